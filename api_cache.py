@@ -0,0 +1,185 @@
+"""
+API Cache Module
+In-memory caches for CapitalX API results served to handlers.
+
+Platform-wide data (investment plans, market data) changes rarely but is read
+on nearly every menu tap. TTLCache keeps each result fresh for a per-endpoint
+TTL; after that it is still served for a stale window while a single
+background task fetches the new value, so a tap never waits on the platform
+unless the data is missing or too old to show. Only successful results are
+cached, and each cache is bounded, evicting the least recently used key.
+
+Per-user data (balance, investments, referrals, withdrawals) is cached keyed by
+user for a few seconds only, long enough that the several lookups one tap makes
+share a single request. Concurrent lookups of the same key are coalesced onto
+one in-flight fetch, and writes invalidate the user's entries.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Fetch = Callable[[], Awaitable[Dict[str, Any]]]
+
+# Per-endpoint (fresh seconds, extra seconds stale data may be served while revalidating)
+SHARED_DATA_TTLS: Dict[str, Tuple[float, float]] = {
+    "investment_plans": (float(os.getenv("CAPITALX_PLANS_TTL", "3600")), 86400.0),
+    "market_data": (float(os.getenv("CAPITALX_MARKET_TTL", "300")), 3600.0),
+}
+# Per-user endpoints, keyed by user id; never served stale since balances must be current
+USER_DATA_TTL_SECONDS = float(os.getenv("CAPITALX_USER_TTL", "15"))
+USER_DATA_ENDPOINTS = ("financial_info", "investments", "balance", "referral_info", "withdrawals")
+DEFAULT_CACHE_SIZE = 256
+USER_CACHE_SIZE = 2048
+
+
+class _CacheEntry(NamedTuple):
+    value: Dict[str, Any]
+    stored_at: float
+
+
+def _is_cacheable(result: Dict[str, Any]) -> bool:
+    return bool(result.get("success"))
+
+
+class TTLCache:
+    """Bounded async cache of API results with stale-while-revalidate and single-flight fetches."""
+
+    def __init__(self, ttl: float, stale_ttl: float = 0.0, max_size: int = DEFAULT_CACHE_SIZE):
+        """
+        Args:
+            ttl: Seconds a result is served without refreshing
+            stale_ttl: Further seconds it is served while a background refresh runs
+            max_size: Keys kept before the least recently used is evicted
+        """
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        # At most one fetch per key at a time; concurrent callers await the same task
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        # Bumped by invalidate() so fetches started before a write are not stored
+        self._generation = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_fetch(self, key: Hashable, fetch: Fetch) -> Dict[str, Any]:
+        """
+        Return the cached result for key, fetching it if missing or expired.
+
+        Callers arriving while a fetch for the same key is in flight share its
+        result instead of starting another. Results are shared between callers
+        and must be treated as read-only.
+
+        Args:
+            key: Cache key
+            fetch: Coroutine function producing the API result
+
+        Returns:
+            API result dictionary
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry.stored_at
+            if age < self.ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                if self._inflight_task(key) is None:
+                    self.refreshes += 1
+                    self._start_fetch(key, fetch, refresh=True).add_done_callback(self._log_refresh_error)
+                return entry.value
+
+        task = self._inflight_task(key)
+        if task is None:
+            self.misses += 1
+            task = self._start_fetch(key, fetch)
+        else:
+            self.coalesced += 1
+        # Shielded so one caller giving up does not cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    def _inflight_task(self, key: Hashable) -> Optional[asyncio.Task]:
+        task = self._inflight.get(key)
+        if task is None or task.done():
+            return None
+        # A KB refresh thread runs its own loop; a task from another loop cannot be awaited here
+        return task if task.get_loop() is asyncio.get_running_loop() else None
+
+    def _start_fetch(self, key: Hashable, fetch: Fetch, refresh: bool = False) -> asyncio.Task:
+        # The generation is taken now: a write between scheduling and running must still win
+        task = asyncio.get_running_loop().create_task(self._fetch_and_store(key, fetch, refresh, self._generation))
+        self._inflight[key] = task
+        return task
+
+    async def _fetch_and_store(self, key: Hashable, fetch: Fetch, refresh: bool, generation: int) -> Dict[str, Any]:
+        try:
+            result = await fetch()
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+        if not _is_cacheable(result):
+            # Errors are retried on the next call; a stale value stays until it ages out
+            if refresh:
+                self.refresh_failures += 1
+        elif generation == self._generation:
+            self._store(key, result)
+        return result
+
+    def _store(self, key: Hashable, result: Dict[str, Any]) -> None:
+        self._entries[key] = _CacheEntry(result, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _log_refresh_error(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Background cache refresh failed: {task.exception()}")
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one key, or everything if key is None, including results of fetches in flight."""
+        self._generation += 1
+        if key is None:
+            self._entries.clear()
+            self._inflight.clear()
+        else:
+            self._entries.pop(key, None)
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss and refresh counters."""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures
+        }
+
+
+def build_shared_caches(max_size: int = DEFAULT_CACHE_SIZE) -> Dict[str, TTLCache]:
+    """One TTLCache per platform-wide endpoint, using SHARED_DATA_TTLS."""
+    return {name: TTLCache(ttl, stale_ttl, max_size) for name, (ttl, stale_ttl) in SHARED_DATA_TTLS.items()}
+
+
+def build_user_caches(ttl: float = USER_DATA_TTL_SECONDS, max_size: int = USER_CACHE_SIZE) -> Dict[str, TTLCache]:
+    """One per-user TTLCache per endpoint in USER_DATA_ENDPOINTS."""
+    return {name: TTLCache(ttl, 0.0, max_size) for name in USER_DATA_ENDPOINTS}
@@ -0,0 +1,417 @@
+"""
+API Resilience Module
+Circuit breakers and retry-with-backoff around CapitalX API requests.
+
+Every request goes through a circuit breaker for its endpoint (user ids are
+folded out, so all users' balance requests share one breaker). After
+CAPITALX_CIRCUIT_FAILURES consecutive failures (timeouts, connection errors,
+5xx/429) the circuit opens: requests to that endpoint fail at once, without
+touching the network, for CAPITALX_CIRCUIT_RESET seconds. Then one trial request
+is let through (half-open); its outcome closes the circuit or opens it again.
+Callers already treat a failed result as "use the fallback", so during an outage
+they fall back immediately instead of each waiting out a timeout.
+
+Idempotent requests (GET/HEAD) that fail fast - refused connections, 5xx, 429 -
+are retried with full-jitter exponential backoff. Timeouts are not retried: the
+attempt already spent the whole timeout and a retry would double the wait.
+
+Reads of endpoints the platform answered 404 for are short-circuited too, by the
+negative cache in endpoint_availability.
+
+Breaker states, missing endpoints, counters and the shared transport's per-host
+request stats are flushed to a JSON snapshot that health_check serves on
+/metrics/api, in the same way as the search metrics.
+"""
+
+import asyncio
+import atexit
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from search_metrics import write_snapshot, read_snapshot
+from http_transport import transport_stats
+from endpoint_availability import (EndpointAvailability, missing_endpoint_result,
+                                   AVAILABLE, MISSING, PROBE)
+
+logger = logging.getLogger(__name__)
+
+API_METRICS_FILE = os.getenv("API_METRICS_FILE", "api_metrics.json")
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CAPITALX_CIRCUIT_FAILURES", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CAPITALX_CIRCUIT_RESET", "30"))
+API_MAX_RETRIES = int(os.getenv("CAPITALX_API_RETRIES", "2"))
+RETRY_BASE_DELAY_SECONDS = 0.2
+RETRY_MAX_DELAY_SECONDS = 2.0
+FLUSH_INTERVAL_SECONDS = 30
+
+# Error strings the API clients put in failed results
+TIMEOUT_ERROR = "Request timeout"
+CONNECTION_ERROR = "Connection error"
+CIRCUIT_OPEN_ERROR = "Service temporarily unavailable (circuit open)"
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD"})
+# /api/users/<id>/balance -> /api/users/{id}/balance
+USER_SEGMENT = re.compile(r"(/users/)[^/]+")
+
+
+def endpoint_key(method: str, endpoint: str) -> str:
+    """Breaker name for a request: method plus path with user ids folded out."""
+    path = USER_SEGMENT.sub(r"\1{id}", endpoint.split("?", 1)[0])
+    return f"{method.upper()} {path}"
+
+
+def resource_key(method: str, endpoint: str) -> str:
+    """Negative-cache name for a request: method plus the exact path, user ids included."""
+    return f"{method.upper()} {endpoint.split('?', 1)[0]}"
+
+
+def is_failure(result: Dict[str, Any]) -> bool:
+    """Whether a result counts against the circuit: no response, a server error or throttling."""
+    if result.get("success"):
+        return False
+    status_code = result.get("status_code")
+    # 404 and other client errors mean the platform answered; they are not outages
+    return status_code is None or status_code >= 500 or status_code == 429
+
+
+def circuit_open_result(key: str) -> Dict[str, Any]:
+    """Result returned without a request while a circuit is open."""
+    return {
+        "success": False,
+        "error": f"{CIRCUIT_OPEN_ERROR}: {key}",
+        "status_code": None
+    }
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one endpoint."""
+
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_SECONDS):
+        """
+        Args:
+            name: Endpoint key
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a trial request
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_started: Optional[float] = None
+        self._lock = threading.Lock()
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        """Whether a request may go out now; False means fail fast."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._trial_started = None
+            if self.state == CLOSED:
+                return True
+            # One trial request probes a recovering endpoint; another is allowed if it never reports back
+            if self.state == HALF_OPEN and (self._trial_started is None
+                                            or now - self._trial_started >= self.reset_timeout):
+                self._trial_started = now
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, result: Dict[str, Any]) -> None:
+        """Update the state with the outcome of an allowed request."""
+        with self._lock:
+            self._trial_started = None
+            if not is_failure(result):
+                self.successes += 1
+                self.consecutive_failures = 0
+                if self.state != CLOSED:
+                    logger.info(f"Circuit for {self.name} closed")
+                self.state = CLOSED
+                return
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                    logger.warning(f"Circuit for {self.name} opened after {self.consecutive_failures} "
+                                   f"failures: {result.get('error')}")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State and counters as a JSON-serialisable dictionary."""
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "open_for_seconds": round(time.monotonic() - self.opened_at, 1) if self.state == OPEN else None,
+                "successes": self.successes,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "times_opened": self.times_opened
+            }
+
+
+class RetryPolicy:
+    """Which failed requests to retry, and how long to wait first."""
+
+    def __init__(self, max_retries: int = API_MAX_RETRIES, base_delay: float = RETRY_BASE_DELAY_SECONDS,
+                 max_delay: float = RETRY_MAX_DELAY_SECONDS):
+        """
+        Args:
+            max_retries: Retries after the first attempt
+            base_delay: Backoff ceiling for the first retry, doubled for each one after
+            max_delay: Largest backoff ceiling
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, method: str, result: Dict[str, Any], retries_done: int) -> bool:
+        """Retry idempotent requests that failed fast, up to max_retries times."""
+        return (retries_done < self.max_retries and method.upper() in IDEMPOTENT_METHODS
+                and is_failure(result) and result.get("error") != TIMEOUT_ERROR)
+
+    def delay(self, retries_done: int) -> float:
+        """Full-jitter backoff: uniform between 0 and the capped exponential ceiling."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retries_done))
+
+
+class APIResilience:
+    """Per-endpoint circuit breakers and a retry policy shared by one API client."""
+
+    def __init__(self, retry_policy: Optional[RetryPolicy] = None,
+                 failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_SECONDS,
+                 metrics_file: Optional[str] = API_METRICS_FILE,
+                 flush_interval: float = FLUSH_INTERVAL_SECONDS,
+                 availability: Optional[EndpointAvailability] = None):
+        """
+        Args:
+            retry_policy: Retry policy; the defaults if omitted
+            failure_threshold: Consecutive failures that open an endpoint's circuit
+            reset_timeout: Seconds a circuit stays open before a trial request
+            metrics_file: Snapshot file for /metrics/api, or None to keep metrics in memory
+            flush_interval: Seconds between snapshot writes
+            availability: Registry of missing endpoints; a new one if omitted
+        """
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.metrics_file = metrics_file
+        self.flush_interval = flush_interval
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.availability = availability or EndpointAvailability()
+        # Background probes of expired missing endpoints, referenced until they finish
+        self._probes: Set[asyncio.Task] = set()
+        self.retries = 0
+        self.short_circuited = 0
+        self.started_at = time.time()
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._persisting = False
+
+    def breaker(self, key: str) -> CircuitBreaker:
+        """The breaker for an endpoint key, created closed on first use."""
+        with self._lock:
+            breaker = self.breakers.get(key)
+            if breaker is None:
+                breaker = self.breakers[key] = CircuitBreaker(key, self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def _before(self, key: str):
+        breaker = self.breaker(key)
+        if breaker.allow():
+            return breaker, None
+        self.short_circuited += 1
+        return breaker, circuit_open_result(key)
+
+    def _retry_delay(self, method: str, breaker: CircuitBreaker, result: Dict[str, Any],
+                     retries_done: int) -> Optional[float]:
+        # A half-open trial gets a single attempt; its failure reopens the circuit
+        if breaker.state != CLOSED or not self.retry_policy.should_retry(method, result, retries_done):
+            return None
+        self.retries += 1
+        delay = self.retry_policy.delay(retries_done)
+        logger.info(f"Retrying {breaker.name} in {delay:.2f}s after: {result.get('error')}")
+        return delay
+
+    def _after(self, breaker: CircuitBreaker, result: Dict[str, Any]) -> Dict[str, Any]:
+        breaker.record(result)
+        self.maybe_flush()
+        return result
+
+    def call(self, method: str, endpoint: str, attempt: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Run a blocking request through the endpoint's breaker and the retry policy.
+
+        Reads of endpoints known to be missing are answered with a cached 404; once
+        that expires, the next read goes out and re-checks the endpoint.
+
+        Args:
+            method: HTTP method
+            endpoint: API endpoint path
+            attempt: Makes one request and returns its result dictionary
+
+        Returns:
+            The last attempt's result, or a cached 404 or circuit-open failure without any request
+        """
+        key = endpoint_key(method, endpoint)
+        resource = resource_key(method, endpoint)
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        if idempotent and self.availability.check(key, resource) == MISSING:
+            return missing_endpoint_result(endpoint)
+        result = self._call(key, method, attempt)
+        if idempotent:
+            self.availability.record(key, result, resource)
+        return result
+
+    def _call(self, key: str, method: str, attempt: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        breaker, rejected = self._before(key)
+        if rejected is not None:
+            return rejected
+        retries_done = 0
+        while True:
+            result = attempt()
+            delay = self._retry_delay(method, breaker, result, retries_done)
+            if delay is None:
+                return self._after(breaker, result)
+            time.sleep(delay)
+            retries_done += 1
+
+    async def call_async(self, method: str, endpoint: str,
+                         attempt: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Async counterpart of call(); backoff waits without blocking the event loop.
+
+        An expired missing endpoint is re-checked by a background request while
+        the caller still gets the cached 404 straight away.
+        """
+        key = endpoint_key(method, endpoint)
+        resource = resource_key(method, endpoint)
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        if idempotent:
+            state = self.availability.check(key, resource)
+            if state == PROBE:
+                probe = asyncio.get_running_loop().create_task(self._probe(key, resource, method, attempt))
+                self._probes.add(probe)
+                probe.add_done_callback(self._probes.discard)
+            if state != AVAILABLE:
+                return missing_endpoint_result(endpoint)
+        result = await self._call_async(key, method, attempt)
+        if idempotent:
+            self.availability.record(key, result, resource)
+        return result
+
+    async def _call_async(self, key: str, method: str,
+                          attempt: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        breaker, rejected = self._before(key)
+        if rejected is not None:
+            return rejected
+        retries_done = 0
+        while True:
+            result = await attempt()
+            delay = self._retry_delay(method, breaker, result, retries_done)
+            if delay is None:
+                return self._after(breaker, result)
+            await asyncio.sleep(delay)
+            retries_done += 1
+
+    async def _probe(self, key: str, resource: str, method: str,
+                     attempt: Callable[[], Awaitable[Dict[str, Any]]]) -> None:
+        try:
+            self.availability.record(key, await self._call_async(key, method, attempt), resource)
+        except Exception as e:
+            # The probe slot expires on its own, so the resource is re-checked later
+            logger.error(f"Probe of {resource} failed: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Breaker states, retry counters and missing endpoints as a JSON-serialisable dictionary."""
+        with self._lock:
+            breakers = dict(self.breakers)
+        return {
+            "generated_at": time.time(),
+            "started_at": self.started_at,
+            "pid": os.getpid(),
+            "retries": self.retries,
+            "short_circuited": self.short_circuited,
+            "open_circuits": sorted(key for key, breaker in breakers.items() if breaker.state != CLOSED),
+            "breakers": {key: breaker.snapshot() for key, breaker in sorted(breakers.items())},
+            "endpoints": self.availability.snapshot(),
+            "http": transport_stats.snapshot()
+        }
+
+    def maybe_flush(self) -> None:
+        """Flush the snapshot to disk if the flush interval has elapsed."""
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> bool:
+        """Write the current snapshot to the metrics file."""
+        self._last_flush = time.monotonic()
+        if not self.metrics_file:
+            return False
+        try:
+            write_snapshot(self.metrics_file, self.snapshot())
+            return True
+        except OSError as e:
+            logger.error(f"Error writing API metrics to {self.metrics_file}: {e}")
+            return False
+
+    def persist(self, path: str = API_METRICS_FILE) -> None:
+        """
+        Start writing snapshots to a file, periodically and at interpreter exit.
+
+        Args:
+            path: Snapshot file read by /metrics/api and the CLI
+        """
+        self.metrics_file = path
+        if not self._persisting:
+            atexit.register(self.flush)
+            self._persisting = True
+
+
+# Shared by the global API clients, so the bot process has one set of breakers to report;
+# the bot enables snapshots with persist()
+api_resilience = APIResilience(metrics_file=None)
+
+
+def load_api_metrics(path: str = API_METRICS_FILE) -> Optional[Dict[str, Any]]:
+    """Load the most recent API metrics snapshot written by the bot process."""
+    return read_snapshot(path)
+
+
+def main():
+    """Dump the latest API breaker snapshot to stdout."""
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Dump CapitalX API circuit breaker metrics")
+    parser.add_argument("--file", default=API_METRICS_FILE, help="Metrics snapshot file")
+    args = parser.parse_args()
+
+    snapshot = load_api_metrics(args.file)
+    if snapshot is None:
+        print(f"No API metrics found at {args.file}. Is the bot running?")
+        sys.exit(1)
+    print(json.dumps(snapshot, indent=2))
+
+
+if __name__ == "__main__":
+    main()
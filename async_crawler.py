@@ -0,0 +1,246 @@
+"""
+Async Crawler Module
+Concurrent breadth-first crawler used by URLExtractor.
+
+Pages are fetched by a pool of asyncio workers sharing one httpx.AsyncClient, so a
+crawl takes roughly as long as its slowest few responses instead of the sum of all
+of them. Politeness is a per-host rate limit (plus a per-host concurrency cap)
+rather than a fixed sleep after every page. With a CrawlStateStore the frontier and
+per-page results are checkpointed to disk, so an interrupted crawl resumes and pages
+fetched recently are not downloaded again.
+
+Each fetched page is SimHash-fingerprinted before its links are parsed. A page whose
+text is a near-duplicate of one already crawled (a URL variant with a trailing slash
+or a query string, say) is not parsed, its links are not followed, and it is left
+out of the crawl result, so nothing downstream ingests the same content twice.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Optional, Set, Tuple, AsyncIterator, NamedTuple
+from urllib.parse import urldefrag, urlparse
+
+import httpx
+
+from html_parsing import extract_links
+from crawl_state import CrawlStateStore
+from page_fingerprint import SimHashIndex, page_fingerprint
+from http_transport import create_async_client, run_async
+
+logger = logging.getLogger(__name__)
+
+# Pages fetched at once across all hosts
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "8"))
+# Requests started per second against any single host
+CRAWL_HOST_RATE = float(os.getenv("CRAWL_HOST_RATE", "5"))
+# Requests in flight against any single host
+CRAWL_HOST_CONCURRENCY = 4
+CRAWL_TIMEOUT_SECONDS = 10.0
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+
+class FetchedPage(NamedTuple):
+    """Links found on a page, with its HTTP status (None if the request failed) and body hash.
+
+    duplicate_of names the already crawled page this one is a near-duplicate of, if any.
+    """
+    links: List[str]
+    http_status: Optional[int] = None
+    body_hash: Optional[str] = None
+    duplicate_of: Optional[str] = None
+
+
+class HostRateLimiter:
+    """Spaces out request starts per host and caps requests in flight per host."""
+
+    def __init__(self, rate: float = CRAWL_HOST_RATE, max_per_host: int = CRAWL_HOST_CONCURRENCY):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.max_per_host = max_per_host
+        self._next_start: Dict[str, float] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    @asynccontextmanager
+    async def acquire(self, host: str) -> AsyncIterator[None]:
+        """Wait for a request slot on a host."""
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.max_per_host))
+        async with semaphore:
+            # Reserve the next start time before sleeping, so concurrent callers queue up behind it
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, 0.0))
+            self._next_start[host] = start + self.interval
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+
+class CrawlFrontier:
+    """Queue of (url, depth) pairs that never hands out the same page twice."""
+
+    def __init__(self):
+        self.queue: "asyncio.Queue[Tuple[str, int]]" = asyncio.Queue()
+        self.seen: Set[str] = set()
+
+    @staticmethod
+    def normalize(url: str) -> str:
+        """Canonical form used for deduplication (fragments never change the page)."""
+        url = urldefrag(url)[0]
+        parsed = urlparse(url)
+        if not parsed.path:
+            url = parsed._replace(path="/").geturl()
+        return url
+
+    def add(self, url: str, depth: int) -> bool:
+        """Queue a page unless it was queued before."""
+        key = self.normalize(url)
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        self.queue.put_nowait((url, depth))
+        return True
+
+
+class AsyncCrawler:
+    """Bounded-concurrency, depth-limited crawler of a single site."""
+
+    def __init__(self, base_url: str, max_depth: int = 2, url_filter: Optional[Callable[[str], bool]] = None,
+                 concurrency: int = CRAWL_CONCURRENCY, rate_limiter: Optional[HostRateLimiter] = None,
+                 headers: Optional[Dict[str, str]] = None, timeout: float = CRAWL_TIMEOUT_SECONDS,
+                 state: Optional[CrawlStateStore] = None, dedupe: bool = True):
+        """
+        Args:
+            base_url: Page the crawl starts from; only links on its host are followed
+            max_depth: Pages more than max_depth - 1 links away from base_url are not fetched
+            url_filter: Links for which this returns False are neither reported nor followed
+            concurrency: Number of pages fetched at once
+            rate_limiter: Per-host politeness limits
+            headers: Request headers
+            timeout: Per-request timeout in seconds
+            state: Optional on-disk checkpoint store to resume from and save to
+            dedupe: Skip pages whose text is a near-duplicate of a page already crawled
+        """
+        self.base_url = base_url
+        self.host = urlparse(base_url).netloc
+        self.max_depth = max_depth
+        self.url_filter = url_filter or (lambda url: True)
+        self.concurrency = max(1, concurrency)
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        self.headers = headers or dict(DEFAULT_HEADERS)
+        self.timeout = timeout
+        self.state = state
+        self.visited_urls: Set[str] = set()
+        self.found_urls: Set[str] = set()
+        # Pages answered from the crawl state instead of the network
+        self.replayed = 0
+        # SimHash of every page fetched in this run; replayed pages have no body to fingerprint
+        self.fingerprints: Optional[SimHashIndex] = SimHashIndex() if dedupe else None
+        # Near-duplicate URL -> the page it duplicates
+        self.duplicates: Dict[str, str] = {}
+
+    async def fetch_page(self, client: httpx.AsyncClient, url: str) -> FetchedPage:
+        """Fetch a page; a failed fetch has no links."""
+        try:
+            async with self.rate_limiter.acquire(urlparse(url).netloc):
+                response = await client.get(url)
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Error fetching {url}: {e}")
+            return FetchedPage([], e.response.status_code)
+        except httpx.HTTPError as e:
+            logger.error(f"Error fetching {url}: {e}")
+            return FetchedPage([])
+        body_hash = hashlib.sha256(response.content).hexdigest()
+        if self.fingerprints is not None:
+            fingerprint = page_fingerprint(response.text)
+            # No await between find and add, so concurrent workers cannot both claim the same content
+            duplicate_of = self.fingerprints.find_or_add(fingerprint, url) if fingerprint is not None else None
+            if duplicate_of is not None:
+                logger.info(f"Skipping {url}: near-duplicate of {duplicate_of}")
+                self.duplicates[url] = duplicate_of
+                return FetchedPage([], response.status_code, body_hash, duplicate_of)
+        return FetchedPage(extract_links(response.text, url), response.status_code, body_hash)
+
+    async def fetch_links(self, client: httpx.AsyncClient, url: str) -> List[str]:
+        """Fetch a page and return its links, or [] if it could not be fetched."""
+        return (await self.fetch_page(client, url)).links
+
+    async def _page_links(self, client: httpx.AsyncClient, url: str, depth: int) -> List[str]:
+        if self.state:
+            stored = self.state.fresh_links(url)
+            if stored is not None:
+                self.replayed += 1
+                return stored
+        page = await self.fetch_page(client, url)
+        if self.state:
+            self.state.record_fetched(url, depth, page.http_status, page.body_hash, page.links)
+        return page.links
+
+    async def _worker(self, client: httpx.AsyncClient, frontier: CrawlFrontier) -> None:
+        while True:
+            url, depth = await frontier.queue.get()
+            try:
+                logger.info(f"Processing URL: {url}")
+                self.visited_urls.add(url)
+                for link in await self._page_links(client, url, depth):
+                    if not self.url_filter(link):
+                        continue
+                    self.found_urls.add(link)
+                    if depth + 1 < self.max_depth and urlparse(link).netloc == self.host:
+                        if frontier.add(link, depth + 1) and self.state:
+                            self.state.record_queued(link, depth + 1)
+            except Exception as e:
+                logger.error(f"Error processing {url}: {e}")
+            finally:
+                frontier.queue.task_done()
+
+    async def crawl(self, client: Optional[httpx.AsyncClient] = None) -> List[str]:
+        """
+        Crawl from base_url and return every accepted link except near-duplicate pages, sorted.
+
+        Args:
+            client: Optional shared client; one is created (and closed) if omitted
+        """
+        if self.max_depth < 1:
+            return []
+        started = time.monotonic()
+        owns_client = client is None
+        if owns_client:
+            client = create_async_client(headers=self.headers, timeout=self.timeout, follow_redirects=True)
+
+        frontier = CrawlFrontier()
+        frontier.add(self.base_url, 0)
+        if self.state:
+            # Resume: URLs still queued when the last run stopped go straight back in
+            for url, depth in self.state.load():
+                if depth < self.max_depth:
+                    frontier.add(url, depth)
+        workers = [asyncio.create_task(self._worker(client, frontier)) for _ in range(self.concurrency)]
+        try:
+            await frontier.queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            if owns_client:
+                await client.aclose()
+            if self.state:
+                # Also runs when the crawl is interrupted, so the next run picks up from here
+                self.state.checkpoint()
+
+        urls = self.found_urls - self.duplicates.keys()
+        logger.info(f"Crawled {len(self.visited_urls)} pages ({self.replayed} from saved state, "
+                    f"{len(self.duplicates)} near-duplicates skipped) in {time.monotonic() - started:.2f}s, "
+                    f"found {len(urls)} URLs")
+        return sorted(urls)
+
+
+def crawl_site(base_url: str, max_depth: int = 2, url_filter: Optional[Callable[[str], bool]] = None,
+               **kwargs) -> List[str]:
+    """Run a crawl to completion from synchronous code."""
+    return run_async(AsyncCrawler(base_url, max_depth, url_filter, **kwargs).crawl())
@@ -9,9 +9,10 @@ from telegram.ext import ContextTypes
 from telegram.constants import ChatType
 from telegram.error import BadRequest, Conflict
 import logging
+from typing import Optional, Tuple
 
 # Import the CapitalX API client
-from capitalx_api import get_investment_plans, initialize_api_client, get_user_balance
+from capitalx_api import get_async_api_client
 from database import add_user, log_command, record_investment, get_user_investments
 from investment_analytics import (
     get_real_time_performance, 
@@ -34,11 +35,47 @@ from withdrawal_system import (
     get_withdrawal_history,
     check_auto_withdrawal_eligibility
 )
+from spell_correction import suggest_correction
 
 logger = logging.getLogger(__name__)
 
-# Initialize the CapitalX API client
-initialize_api_client()
+# Topics handle_message answers, checked in order; each matches when any of its words appears
+MESSAGE_TOPICS = (
+    ("greeting", ("hello", "hi", "hey")),
+    ("investment", ("invest", "investment", "plan")),
+    ("bonus", ("bonus", "free", "r50")),
+    ("performance", ("performance", "profit", "return")),
+    ("withdrawal", ("withdraw", "cash out")),
+    ("help", ("help", "support", "confused")),
+)
+
+
+def message_topic(message_lower: str) -> Optional[str]:
+    """Return the first topic whose words appear in a lowercased message, or None."""
+    for topic, words in MESSAGE_TOPICS:
+        if any(word in message_lower for word in words):
+            return topic
+    return None
+
+
+def classify_message(message_text: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Find the topic of a message, retrying with misspelled words corrected.
+
+    Args:
+        message_text: Text the user sent
+
+    Returns:
+        Tuple of (topic or None, corrected text if the correction was used, otherwise None)
+    """
+    topic = message_topic(message_text.lower())
+    if topic is None:
+        corrected_text = suggest_correction(message_text)
+        if corrected_text:
+            topic = message_topic(corrected_text.lower())
+            if topic is not None:
+                return topic, corrected_text
+    return topic, None
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle the /start command with beginner-friendly welcome message."""
@@ -135,7 +172,7 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         
         if query.data == "investment_options":
             # Get investment plans from the CapitalX API
-            api_response = get_investment_plans()
+            api_response = await get_async_api_client().get_investment_plans()
             
             if api_response["success"]:
                 plans = api_response["data"]["plans"]
@@ -302,7 +339,7 @@ Please send me a direct message to view your referral information."""
             else:
                 # Get referral information
                 if user:
-                    referral_info = get_user_referral_info(user.id)
+                    referral_info = await get_user_referral_info(user.id)
                     if referral_info["status"] == "success":
                         referred_users = get_referred_users(user.id)
                         # Escape any special characters in the referral code
@@ -421,7 +458,7 @@ Please send me a direct message to manage your withdrawals."""
             else:
                 # Check withdrawal eligibility
                 if user:
-                    withdrawal_check = check_auto_withdrawal_eligibility(user.id)
+                    withdrawal_check = await check_auto_withdrawal_eligibility(user.id)
                     if withdrawal_check["status"] == "eligible":
                         response_text = f"""📤 *Withdraw Funds*
 
@@ -462,7 +499,7 @@ Use the buttons below to proceed."""
         
         elif query.data == "withdraw_all":
             if user:
-                withdrawal_result = request_withdrawal(user.id)
+                withdrawal_result = await request_withdrawal(user.id)
                 if withdrawal_result["status"] == "success":
                     response_text = f"""✅ *Withdrawal Request Submitted*
 
@@ -481,7 +518,7 @@ Your withdrawal will be processed within 24-48 hours."""
         
         elif query.data == "withdraw_history":
             if user:
-                history = get_withdrawal_history(user.id, 5)
+                history = await get_withdrawal_history(user.id, 5)
                 if history:
                     response_text = "*📤 Withdrawal History*\n\n"
                     for record in history:
@@ -550,10 +587,11 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         if update.effective_chat:
             is_group = update.effective_chat.type in [ChatType.GROUP, ChatType.SUPERGROUP]
         
-        # Simple response system for common questions
-        message_lower = message_text.lower()
+        # Simple response system for common questions; misspelled topic words are corrected first.
+        # No KB search runs here, so the message is not recorded in query analytics.
+        topic, _ = classify_message(message_text)
         
-        if any(word in message_lower for word in ["hello", "hi", "hey"]):
+        if topic == "greeting":
             greeting = "Hello"
             if user and user.first_name:
                 greeting = f"Hi {user.first_name}"
@@ -563,12 +601,12 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             else:
                 response_text = f"{greeting}! 👋\n\nI'm your CapitalX Beginner Helper. How can I assist you today?"
         
-        elif any(word in message_lower for word in ["invest", "investment", "plan"]):
+        elif topic == "investment":
             if is_group:
                 response_text = "I see you're interested in investments! For detailed information about investment options, please send /start or message me directly."
             else:
                 # Get investment plans from the CapitalX API
-                api_response = get_investment_plans()
+                api_response = await get_async_api_client().get_investment_plans()
                 
                 if api_response["success"]:
                     plans = api_response["data"]["plans"]
@@ -586,19 +624,19 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
                     logger.warning(f"API error getting investment plans: {api_response.get('error')}")
                     response_text = "I'd be happy to help you learn about investing with CapitalX! Our platform offers several investment plans with different risk levels and return potentials:\n\n1. Shoprite Plan (Short-Term): R60 investment, 12 hours, R100 returns\n2. MTN Plan (Mid-Term): R1,000 investment, 7 days, R4,000 returns\n3. Naspers Plan (Long-Term): R10,000 investment, 60 days, R50,000 returns\n\nWould you like to know more about a specific plan?"
         
-        elif any(word in message_lower for word in ["bonus", "free", "r50"]):
+        elif topic == "bonus":
             if is_group:
                 response_text = "You mentioned the bonus! For details about using your R50 free bonus, please send /start or message me directly."
             else:
                 response_text = "Great! Our R50 bonus is a risk-free way to try CapitalX. You can use it to invest in any of our plans, and any profits are yours to keep. The bonus must be used within 7 days.\n\nWould you like to learn how to use your bonus?"
         
-        elif any(word in message_lower for word in ["performance", "profit", "return"]):
+        elif topic == "performance":
             if is_group:
                 response_text = "Interested in investment performance? Please send /start to see the menu, or message me directly for personalized performance data."
             else:
                 # Get real-time performance data
                 if user:
-                    performance_data = get_real_time_performance(user.id)
+                    performance_data = await get_real_time_performance(user.id)
                     if performance_data["status"] == "success":
                         response_text = f"Here's your investment performance:\n\nTotal Invested: R{performance_data['total_invested']}\nCurrent Value: R{performance_data['total_current_value']}\nTotal Return: R{performance_data['total_return']} ({performance_data['performance_percentage']}%)"
                     else:
@@ -606,13 +644,13 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
                 else:
                     response_text = "I'm having trouble retrieving your performance data right now. Please try again later or check through the menu."
         
-        elif any(word in message_lower for word in ["withdraw", "cash out"]):
+        elif topic == "withdrawal":
             if is_group:
                 response_text = "For withdrawal options, please send /start to see the menu, or message me directly for personalized withdrawal options."
             else:
                 response_text = "You can manage withdrawals through the Withdraw menu. Would you like me to take you there? Send /start and select the Withdraw option."
         
-        elif any(word in message_lower for word in ["help", "support", "confused"]):
+        elif topic == "help":
             if is_group:
                 response_text = "Need help? Please send /start to see the main menu, or message me directly for personalized assistance."
             else:
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+HTML Parsing Benchmark
+Compares link extraction and tree building across the installed parser backends.
+
+The baseline is what the extractors used to do: a full BeautifulSoup html.parser
+tree followed by find_all. Pass saved pages to benchmark real content:
+
+    python benchmark_html_parsing.py saved_pages/*.html --repeat 50
+"""
+
+import argparse
+import statistics
+import time
+from typing import Callable, Dict, List
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from html_parsing import available_backends, extract_links, make_soup
+
+DEFAULT_PAGES = ["demo.html"]
+PAGE_URL = "https://capitalx-rtn.onrender.com/"
+
+
+def bs4_baseline(html: str) -> List[str]:
+    """Link extraction the way extract_urls did it before the parser backends existed."""
+    soup = BeautifulSoup(html, "html.parser")
+    links = [urljoin(PAGE_URL, a["href"]) for a in soup.find_all("a", href=True)]
+    links.extend(urljoin(PAGE_URL, form["action"]) for form in soup.find_all("form", action=True))
+    return links
+
+
+def benchmark_functions() -> Dict[str, Callable[[str], object]]:
+    """Every variant worth timing with the backends installed here."""
+    functions: Dict[str, Callable[[str], object]] = {"bs4 html.parser tree (baseline)": bs4_baseline}
+    for backend in available_backends():
+        functions[f"streaming links ({backend})"] = lambda html, backend=backend: extract_links(html, PAGE_URL, backend)
+    functions["make_soup tree"] = make_soup
+    return functions
+
+
+def time_function(func: Callable[[str], object], pages: List[str], repeat: int) -> Dict[str, float]:
+    """Median milliseconds per page."""
+    samples = []
+    for _ in range(repeat):
+        for html in pages:
+            started = time.perf_counter()
+            func(html)
+            samples.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": statistics.median(samples), "mean_ms": statistics.fmean(samples)}
+
+
+def main():
+    """Run the parser benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark HTML parser backends on saved pages")
+    parser.add_argument("pages", nargs="*", default=DEFAULT_PAGES, help="Saved HTML files")
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the pages")
+    args = parser.parse_args()
+
+    pages = []
+    for path in args.pages:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            pages.append(f.read())
+    total_kb = sum(len(page) for page in pages) / 1024
+
+    print(f"📄 {len(pages)} page(s), {total_kb:.1f} KB, backends installed: {', '.join(available_backends())}")
+    baseline = None
+    for name, func in benchmark_functions().items():
+        result = time_function(func, pages, args.repeat)
+        baseline = baseline or result["median_ms"]
+        print(f"  {name:<40} {result['median_ms']:8.3f} ms/page  ({baseline / result['median_ms']:.1f}x baseline)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+HTTP Paths Benchmark
+Times the scraper, the site crawler and the CapitalX API client against a cassette.
+
+Record the live site once, then benchmark offline as often as needed:
+
+    python benchmark_http_paths.py --record
+    python benchmark_http_paths.py --latency 0.05 --jitter 0.02 --error-rate 0.1 --seed 7
+
+Replays are deterministic: the same cassette, fault settings and seed give the same
+responses, delays and failures every run.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Any
+
+import httpx
+
+from async_crawler import AsyncCrawler, HostRateLimiter
+from capitalx_api import CapitalXAPI, BASE_URL
+from extract_urls import URLExtractor
+from http_cassette import (Cassette, FaultProfile, AsyncCassetteTransport, install,
+                           MODE_RECORD, MODE_REPLAY)
+from kb_scraper import KBScraper
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CASSETTE = os.path.join("cassettes", "capitalx.json.gz")
+SITE_URL = BASE_URL + "/"
+BENCHMARK_USER_ID = "benchmark-user"
+CRAWL_DEPTH = 2
+
+# Read-only API calls; nothing is created on the live platform while recording
+API_CALLS: Dict[str, Callable[[CapitalXAPI], Any]] = {
+    "investment_plans": lambda api: api.get_investment_plans(),
+    "market_data": lambda api: api.get_market_data(),
+    "financial_info": lambda api: api.get_financial_info(BENCHMARK_USER_ID),
+    "user_balance": lambda api: api.get_user_balance(BENCHMARK_USER_ID),
+    "user_investments": lambda api: api.get_user_investments(BENCHMARK_USER_ID),
+    "referral_info": lambda api: api.get_user_referral_info(BENCHMARK_USER_ID),
+    "withdrawal_history": lambda api: api.get_withdrawal_history(BENCHMARK_USER_ID),
+}
+
+
+def run_scraper(cassette: Cassette, mode: str, faults: FaultProfile, db_file: str) -> bool:
+    """One full scrape: fetch, parse and sync the KB."""
+    scraper = KBScraper(SITE_URL, db_file)
+    install(scraper.session, cassette, mode, faults)
+    return scraper.scrape_and_populate(force=True)
+
+
+def run_conditional_scrape(cassette: Cassette, mode: str, faults: FaultProfile, db_file: str) -> bool:
+    """A refresh of an already scraped site, answered by 304 Not Modified when possible."""
+    scraper = KBScraper(SITE_URL, db_file)
+    install(scraper.session, cassette, mode, faults)
+    return scraper.scrape_and_populate()
+
+
+def run_crawl(cassette: Cassette, mode: str, faults: FaultProfile) -> List[str]:
+    """Crawl the site through the async crawler."""
+    extractor = URLExtractor(SITE_URL)
+    # Politeness only matters against the live site
+    limiter = HostRateLimiter() if mode == MODE_RECORD else HostRateLimiter(rate=0)
+    crawler = AsyncCrawler(SITE_URL, max_depth=CRAWL_DEPTH, url_filter=extractor.is_valid_url,
+                           rate_limiter=limiter)
+
+    async def crawl():
+        transport = AsyncCassetteTransport(cassette, mode, faults)
+        async with httpx.AsyncClient(transport=transport, headers=crawler.headers, follow_redirects=True) as client:
+            return await crawler.crawl(client)
+
+    return asyncio.run(crawl())
+
+
+def run_api(cassette: Cassette, mode: str, faults: FaultProfile) -> Dict[str, bool]:
+    """Every read-only API call once; returns which succeeded."""
+    api = CapitalXAPI()
+    install(api.session, cassette, mode, faults)
+    return {name: bool(call(api).get("success")) for name, call in API_CALLS.items()}
+
+
+def workloads(cassette: Cassette, mode: str, faults: FaultProfile, db_file: str) -> Dict[str, Callable[[], Any]]:
+    """The HTTP paths worth timing, in the order they are recorded."""
+    return {
+        "scraper (full)": lambda: run_scraper(cassette, mode, faults, db_file),
+        "scraper (conditional)": lambda: run_conditional_scrape(cassette, mode, faults, db_file),
+        "crawler": lambda: run_crawl(cassette, mode, faults),
+        "api client": lambda: run_api(cassette, mode, faults),
+    }
+
+
+def record(path: str = DEFAULT_CASSETTE) -> Dict[str, int]:
+    """Run every workload once against the live site and save what it exchanged."""
+    cassette = Cassette(path)
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, func in workloads(cassette, MODE_RECORD, FaultProfile(), os.path.join(tmp, "kb.db")).items():
+            logger.info(f"Recording {name}")
+            func()
+    cassette.save()
+    return {"interactions": len(cassette.interactions), "bodies": len(cassette.bodies)}
+
+
+def run_benchmark(path: str = DEFAULT_CASSETTE, repeat: int = 5, faults: Optional[FaultProfile] = None) -> Dict[str, Any]:
+    """
+    Replay every workload repeat times.
+
+    Args:
+        path: Cassette written by record()
+        repeat: Timed passes per workload
+        faults: Latency and errors injected into the replay
+
+    Returns:
+        Per-workload timings and cassette counters
+    """
+    cassette = Cassette.load(path)
+    faults = faults or FaultProfile()
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, func in workloads(cassette, MODE_REPLAY, faults, os.path.join(tmp, "kb.db")).items():
+            samples = []
+            for _ in range(repeat):
+                cassette.rewind()
+                started = time.perf_counter()
+                func()
+                samples.append((time.perf_counter() - started) * 1000)
+            results[name] = {"median_ms": statistics.median(samples), "max_ms": max(samples)}
+    return {"workloads": results, "cassette": dict(cassette.stats)}
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Human-readable summary of run_benchmark output."""
+    lines = ["Workload                    median ms      max ms"]
+    for name, result in report["workloads"].items():
+        lines.append(f"{name:<25} {result['median_ms']:10.1f} {result['max_ms']:11.1f}")
+    stats = report["cassette"]
+    lines.append(f"Replayed {stats['replayed']} responses, {stats['injected_errors']} injected errors, "
+                 f"{stats['misses']} misses")
+    return "\n".join(lines)
+
+
+def main():
+    """Run the HTTP paths benchmark from the command line."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the scraper, crawler and API client offline")
+    parser.add_argument("--cassette", default=DEFAULT_CASSETTE, help="Cassette file")
+    parser.add_argument("--record", action="store_true", help="Record the live site into the cassette")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed passes per workload")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every replayed request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many extra seconds per request")
+    parser.add_argument("--recorded-latency", action="store_true", help="Also wait as long as the live request took")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of replayed requests that fail")
+    parser.add_argument("--error-status", type=int, help="HTTP status for failed requests instead of a connection error")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for injected latency and errors")
+    parser.add_argument("--json", help="Write the full results to this JSON file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.record:
+        counts = record(args.cassette)
+        print(f"📼 Recorded {counts['interactions']} interactions ({counts['bodies']} distinct bodies) "
+              f"to {args.cassette}")
+        return
+
+    faults = FaultProfile(args.latency, args.jitter, args.error_rate, args.error_status,
+                          args.recorded_latency, args.seed)
+    report = run_benchmark(args.cassette, args.repeat, faults)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Search Scaling Benchmark
+Times every KB search entry point against synthetic corpora of increasing size.
+
+For each corpus size the benchmark reports median and p95 latency per entry point
+and fits the log-log slope of latency against corpus size: ~0 means constant time,
+~1 linear, and anything clearly above 1 is flagged as superlinear.
+
+Usage:
+    python benchmark_search_scaling.py --sizes 1000 10000 100000 --plot scaling.png
+"""
+
+import json
+import logging
+import math
+import os
+import statistics
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Any, Generator
+
+import kb
+import kb_store
+import kb_versioning
+import keyword_search
+import enhanced_keyword_search
+import spell_correction
+import inline_search
+from kb_corpus_generator import DEFAULT_SEED, DEFAULT_SIZES, build_corpus_db
+
+logger = logging.getLogger(__name__)
+
+# Modules that open the KB through their own DB_FILE global
+DB_MODULES = [kb, kb_store, kb_versioning, keyword_search, enhanced_keyword_search, spell_correction, inline_search]
+
+BENCHMARK_QUERIES = [
+    "how to register",
+    "deposit money",
+    "forgot my password",
+    "what is capitalx",
+    "withdraw funds",
+    "referral bonus",
+    "investment plans",
+    "contact support team",
+    "depost mony",
+    "cash out my earnings",
+]
+INLINE_PREFIXES = ["d", "dep", "with", "ref", "invest", "how to", "sup"]
+
+# A fitted slope above this is reported as superlinear growth
+SUPERLINEAR_SLOPE = 1.2
+
+
+@contextmanager
+def use_database(db_file: str) -> Generator[None, None, None]:
+    """Point every search module at another database for the duration of the block."""
+    previous = {module: module.DB_FILE for module in DB_MODULES}
+    for module in DB_MODULES:
+        module.DB_FILE = db_file
+    kb_versioning.invalidate_kb_version()
+    kb._result_cache.clear()
+    try:
+        yield
+    finally:
+        for module, db in previous.items():
+            module.DB_FILE = db
+        kb_versioning.invalidate_kb_version()
+        kb._result_cache.clear()
+
+
+def corpus_database(size: int, corpus_dir: str, seed: int = DEFAULT_SEED) -> str:
+    """Path to a corpus database of the given size, generating it if needed."""
+    os.makedirs(corpus_dir, exist_ok=True)
+    db_file = os.path.join(corpus_dir, f"kb_{size}.db")
+    if not os.path.exists(db_file) or kb_versioning.get_kb_status(db_file)["entries"] != size:
+        started = time.perf_counter()
+        build_corpus_db(db_file, size, seed)
+        logger.info(f"Generated {size}-entry corpus in {time.perf_counter() - started:.1f}s")
+    return db_file
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(math.ceil(fraction * len(ordered))) - 1)]
+
+
+def time_calls(func: Callable[[str], Any], inputs: List[str], repeat: int) -> Dict[str, float]:
+    """Median and p95 milliseconds per call of func over inputs."""
+    samples = []
+    for _ in range(repeat):
+        for value in inputs:
+            # Measure the search itself, not the per-query result cache in kb.search_kb
+            kb._result_cache.clear()
+            started = time.perf_counter()
+            func(value)
+            samples.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": statistics.median(samples), "p95_ms": percentile(samples, 0.95), "calls": len(samples)}
+
+
+def search_entry_points() -> Dict[str, Callable[[str], Any]]:
+    """Every query-taking KB search function, looked up at call time."""
+    return {
+        "kb.search_kb": lambda q: kb.search_kb(query=q),
+        "kb.search_kb_detailed": kb.search_kb_detailed,
+        "kb.search_kb_detailed_enhanced_v2": kb.search_kb_detailed_enhanced_v2,
+        "keyword_search.search_kb_enhanced": keyword_search.search_kb_enhanced,
+        "keyword_search.search_kb_detailed_enhanced": keyword_search.search_kb_detailed_enhanced,
+        "enhanced.search_kb_enhanced_v2": enhanced_keyword_search.search_kb_enhanced_v2,
+        "enhanced.search_kb_detailed_enhanced_v2": enhanced_keyword_search.search_kb_detailed_enhanced_v2,
+    }
+
+
+def benchmark_size(db_file: str, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Time all entry points and index builds against one corpus database."""
+    results: Dict[str, Dict[str, float]] = {}
+    with use_database(db_file):
+        for name, func in search_entry_points().items():
+            results[name] = time_calls(func, BENCHMARK_QUERIES, repeat)
+
+        # Index builds happen once per KB version, so a couple of runs is enough
+        results["spell_correction.build"] = time_calls(
+            lambda _: spell_correction.build_spelling_index(db_file), ["build"], 2)
+        spelling_index = spell_correction.build_spelling_index(db_file)
+        results["spell_correction.correct_query"] = time_calls(spelling_index.correct_query, BENCHMARK_QUERIES, repeat)
+
+        results["inline_search.build"] = time_calls(lambda _: inline_search.build_inline_index(db_file), ["build"], 2)
+        inline_index = inline_search.build_inline_index(db_file)
+        results["inline_search.complete"] = time_calls(inline_index.complete, INLINE_PREFIXES, repeat)
+    return results
+
+
+def scaling_slope(sizes: List[int], latencies: List[float]) -> Optional[float]:
+    """Least-squares slope of log(latency) against log(size)."""
+    points = [(math.log(size), math.log(latency)) for size, latency in zip(sizes, latencies) if latency > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if spread == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+
+def run_benchmark(sizes: List[int], corpus_dir: str = "kb_corpora", repeat: int = 5,
+                  seed: int = DEFAULT_SEED) -> Dict[str, Any]:
+    """
+    Benchmark all search entry points across corpus sizes.
+
+    Args:
+        sizes: Corpus sizes to test, e.g. [1000, 10000, 100000]
+        corpus_dir: Where generated corpus databases are kept between runs
+        repeat: How many times each query is repeated per entry point
+        seed: Corpus generator seed
+
+    Returns:
+        Dict with the sizes, per-size timings and per-entry-point scaling slopes
+    """
+    sizes = sorted(sizes)
+    by_size = {}
+    for size in sizes:
+        db_file = corpus_database(size, corpus_dir, seed)
+        logger.info(f"Benchmarking {size}-entry corpus")
+        by_size[size] = benchmark_size(db_file, repeat)
+
+    scaling = {}
+    for name in by_size[sizes[0]]:
+        slope = scaling_slope(sizes, [by_size[size][name]["median_ms"] for size in sizes])
+        scaling[name] = {"slope": slope, "superlinear": slope is not None and slope > SUPERLINEAR_SLOPE}
+    return {"sizes": sizes, "results": by_size, "scaling": scaling}
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Plain-text table of median/p95 latency per entry point and size."""
+    sizes = report["sizes"]
+    header = f"{'Entry point':<45}" + "".join(f"{size:>20}" for size in sizes) + f"{'slope':>8}"
+    lines = ["Search latency (median / p95 ms) by corpus size", header, "-" * len(header)]
+    for name, scaling in report["scaling"].items():
+        cells = "".join(
+            f"{report['results'][size][name]['median_ms']:>9.3f} /{report['results'][size][name]['p95_ms']:>9.3f}"
+            for size in sizes)
+        slope = "n/a" if scaling["slope"] is None else f"{scaling['slope']:.2f}"
+        flag = "  ⚠️ superlinear" if scaling["superlinear"] else ""
+        lines.append(f"{name:<45}{cells}{slope:>8}{flag}")
+    return "\n".join(lines)
+
+
+def plot_report(report: Dict[str, Any], path: str) -> bool:
+    """Plot median latency against corpus size on log-log axes (needs matplotlib)."""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        logger.warning("matplotlib is not installed, skipping the plot")
+        return False
+
+    sizes = report["sizes"]
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for name in report["scaling"]:
+        ax.plot(sizes, [report["results"][size][name]["median_ms"] for size in sizes], marker="o", label=name)
+    ax.set_xscale("log")
+    ax.set_yscale("log")
+    ax.set_xlabel("KB entries")
+    ax.set_ylabel("Median latency (ms)")
+    ax.set_title("KB search latency vs corpus size")
+    ax.legend(fontsize="small")
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+    return True
+
+
+def main():
+    """Run the scaling benchmark from the command line."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark KB search latency against corpus size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Corpus sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions of each query")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Corpus generator seed")
+    parser.add_argument("--corpus-dir", default="kb_corpora", help="Directory for generated corpora")
+    parser.add_argument("--json", help="Write the full results to this JSON file")
+    parser.add_argument("--plot", help="Write a latency vs size plot to this image file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    report = run_benchmark(args.sizes, args.corpus_dir, args.repeat, args.seed)
+    print(format_report(report))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.json}")
+    if args.plot and plot_report(report, args.plot):
+        print(f"Plot written to {args.plot}")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,7 @@ class CapitalXBot {
         ];
         
         // Platform URLs
+        // BEGIN GENERATED URL TABLE (url_registry.py) - edit CLIENT_PAGES there and run it instead
         this.urls = {
             home: 'https://capitalx-rtn.onrender.com/',
             register: 'https://capitalx-rtn.onrender.com/register/',
@@ -29,6 +30,7 @@ class CapitalXBot {
             profile: 'https://capitalx-rtn.onrender.com/profile/',
             support: 'https://capitalx-rtn.onrender.com/support/'
         };
+        // END GENERATED URL TABLE
         
         // Quick responses
         this.quickResponses = [
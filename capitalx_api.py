@@ -1,40 +1,146 @@
 """
 CapitalX API Integration Module
 Handles communication with the CapitalX platform API.
+
+CapitalXAPI is the blocking client for scripts and tests; handlers await
+AsyncCapitalXAPI (via get_async_api_client) so a slow API call cannot stall
+the bot's event loop.
 """
 
+import asyncio
 import requests
+import httpx
 import logging
 import json
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any
 from datetime import datetime
 import os
 
+from api_cache import TTLCache, build_shared_caches, build_user_caches
+from api_resilience import APIResilience, api_resilience, TIMEOUT_ERROR, CONNECTION_ERROR
+from http_transport import create_session, create_async_client
+
 # Set up logging
 logger = logging.getLogger(__name__)
 
 # Base URL for the CapitalX API
 BASE_URL = "https://capitalx-rtn.onrender.com"
 
+# Request timeouts for the async client, in seconds; writes get longer since they may not be retried
+API_TIMEOUT_SECONDS = float(os.getenv("CAPITALX_API_TIMEOUT", "10"))
+API_WRITE_TIMEOUT_SECONDS = API_TIMEOUT_SECONDS * 2
+
+DEFAULT_HEADERS = {
+    "User-Agent": "CapitalX-Telegram-Bot/1.0",
+    "Accept": "application/json",
+    "Content-Type": "application/json"
+}
+
+# Static investment plan data from the knowledge base, served while the platform has no plans endpoint
+FALLBACK_INVESTMENT_PLANS = [
+    {"id": "starter", "name": "Starter Plan", "type": "Foundation Tier",
+     "investment": 70, "returns": 140, "duration_hours": 12, "level_requirement": 1},
+    {"id": "bronze", "name": "Bronze Plan", "type": "Foundation Tier",
+     "investment": 140, "returns": 280, "duration_hours": 18, "level_requirement": 1},
+    {"id": "silver", "name": "Silver Plan", "type": "Foundation Tier",
+     "investment": 280, "returns": 560, "duration_hours": 24, "level_requirement": 1},
+    {"id": "gold", "name": "Gold Plan", "type": "Foundation Tier",
+     "investment": 560, "returns": 1120, "duration_hours": 30, "level_requirement": 1},
+    {"id": "platinum", "name": "Platinum Plan", "type": "Foundation Tier",
+     "investment": 1120, "returns": 2240, "duration_hours": 36, "level_requirement": 1},
+    {"id": "diamond", "name": "Diamond Plan", "type": "Growth Tier",
+     "investment": 2240, "returns": 4480, "duration_hours": 48, "level_requirement": 2},
+    {"id": "elite", "name": "Elite Plan", "type": "Growth Tier",
+     "investment": 4480, "returns": 8960, "duration_hours": 72, "level_requirement": 2},
+    {"id": "premium", "name": "Premium Plan", "type": "Growth Tier",
+     "investment": 8960, "returns": 17920, "duration_hours": 96, "level_requirement": 2},
+    {"id": "executive", "name": "Executive Plan", "type": "Premium Tier",
+     "investment": 17920, "returns": 35840, "duration_hours": 120, "level_requirement": 3},
+    {"id": "master", "name": "Master Plan", "type": "Premium Tier",
+     "investment": 35840, "returns": 50000, "duration_hours": 144, "level_requirement": 3}
+]
+
+def _not_found_fallback(result: Dict[str, Any], fallback: Callable[[], Any]) -> Dict[str, Any]:
+    """
+    Replace a 404 result with fallback data for endpoints the platform does not serve yet.
+
+    Args:
+        result: Result of the API request
+        fallback: Builds the data to return instead
+
+    Returns:
+        The fallback as a successful result on 404, otherwise the result unchanged
+    """
+    if not result["success"] and result.get("status_code") == 404:
+        return {
+            "success": True,
+            "data": fallback(),
+            "status_code": 200
+        }
+    return result
+
+def _financial_info_fallback() -> Dict[str, Any]:
+    return {
+        "balance": 0,
+        "bonus_balance": 50,  # Default bonus for new users
+        "total_invested": 0,
+        "total_earnings": 0
+    }
+
+def _investment_plans_fallback() -> Dict[str, Any]:
+    return {"plans": [dict(plan) for plan in FALLBACK_INVESTMENT_PLANS]}
+
+def _investment_fallback(plan_id: str) -> Dict[str, Any]:
+    return {
+        "message": "Investment request submitted successfully",
+        "investment_id": f"sim_{plan_id}_{int(datetime.now().timestamp())}",
+        "status": "pending"
+    }
+
+def _balance_fallback() -> Dict[str, Any]:
+    return {
+        "balance": 0,
+        "bonus_balance": 50,  # Default bonus for new users
+        "currency": "ZAR"
+    }
+
+def _referral_info_fallback(user_id: str) -> Dict[str, Any]:
+    return {
+        "referral_code": f"REF{user_id[:6]}",
+        "bonus_earned": 0,
+        "referred_users": 0
+    }
+
+def _withdrawal_fallback(user_id: str) -> Dict[str, Any]:
+    return {
+        "message": "Withdrawal request submitted successfully",
+        "withdrawal_id": f"wd_{user_id}_{int(datetime.now().timestamp())}",
+        "status": "pending",
+        "processing_time": "1-3 business days"
+    }
+
+def _market_data_fallback() -> Dict[str, Any]:
+    return {
+        "market_status": "open",
+        "trend": "positive",
+        "performance": "strong"
+    }
+
 class CapitalXAPI:
     """API client for interacting with the CapitalX platform."""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, resilience: Optional[APIResilience] = None):
         """
         Initialize the CapitalX API client.
         
         Args:
             api_key: Optional API key for authenticated requests
+            resilience: Circuit breakers and retry policy; a private set if omitted
         """
         self.api_key = api_key or os.getenv('CAPITALX_API_KEY')
-        self.session = requests.Session()
-        
-        # Set default headers
-        self.session.headers.update({
-            "User-Agent": "CapitalX-Telegram-Bot/1.0",
-            "Accept": "application/json",
-            "Content-Type": "application/json"
-        })
+        self.resilience = resilience or APIResilience(metrics_file=None)
+        # Pooled connections shared with the process's other HTTP clients (see http_transport)
+        self.session = create_session(DEFAULT_HEADERS)
         
         # Add API key to headers if provided
         if self.api_key:
@@ -46,22 +152,25 @@ class CapitalXAPI:
         """
         Make an HTTP request to the CapitalX API.
         
+        The request goes through the endpoint's circuit breaker, and idempotent
+        requests that fail fast are retried (see api_resilience).
+        
         Args:
             method: HTTP method (GET, POST, PUT, DELETE)
             endpoint: API endpoint
             **kwargs: Additional arguments to pass to requests
             
         Returns:
-            Dictionary with response data
-            
-        Raises:
-            requests.RequestException: If the request fails
+            Dictionary with response data, or with the error if the request failed
         """
-        url = f"{BASE_URL}{endpoint}"
-        
         # Set timeout for the request
         if 'timeout' not in kwargs:
-            kwargs['timeout'] = 30  # 30 second timeout
+            kwargs['timeout'] = API_TIMEOUT_SECONDS
+        return self.resilience.call(method, endpoint, lambda: self._send(method, endpoint, **kwargs))
+    
+    def _send(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
+        """Make one attempt at a request and turn the outcome into a result dictionary."""
+        url = f"{BASE_URL}{endpoint}"
         
         try:
             logger.info(f"Making {method} request to {url}")
@@ -99,14 +208,14 @@ class CapitalXAPI:
             logger.error(f"API request timeout: {url}")
             return {
                 "success": False,
-                "error": "Request timeout",
+                "error": TIMEOUT_ERROR,
                 "status_code": None
             }
         except requests.exceptions.ConnectionError:
             logger.error(f"API connection error: {url}")
             return {
                 "success": False,
-                "error": "Connection error",
+                "error": CONNECTION_ERROR,
                 "status_code": None
             }
         except requests.exceptions.HTTPError as e:
@@ -181,21 +290,8 @@ class CapitalXAPI:
         Returns:
             Dictionary with financial information
         """
-        # First try the API endpoint
         result = self._make_request("GET", f"/api/users/{user_id}/financial-info")
-        # If API endpoint doesn't exist, return fallback data
-        if not result["success"] and result.get("status_code") == 404:
-            return {
-                "success": True,
-                "data": {
-                    "balance": 0,
-                    "bonus_balance": 50,  # Default bonus for new users
-                    "total_invested": 0,
-                    "total_earnings": 0
-                },
-                "status_code": 200
-            }
-        return result
+        return _not_found_fallback(result, _financial_info_fallback)
     
     def get_investment_plans(self) -> Dict[str, Any]:
         """
@@ -204,110 +300,8 @@ class CapitalXAPI:
         Returns:
             Dictionary with investment plans data
         """
-        # First try the API endpoint
         result = self._make_request("GET", "/api/investment-plans")
-        # If API endpoint doesn't exist, fall back to static data from knowledge base
-        if not result["success"] and result.get("status_code") == 404:
-            # Return static investment plan data from the knowledge base
-            return {
-                "success": True,
-                "data": {
-                    "plans": [
-                        {
-                            "id": "starter",
-                            "name": "Starter Plan",
-                            "type": "Foundation Tier",
-                            "investment": 70,
-                            "returns": 140,
-                            "duration_hours": 12,
-                            "level_requirement": 1
-                        },
-                        {
-                            "id": "bronze",
-                            "name": "Bronze Plan",
-                            "type": "Foundation Tier",
-                            "investment": 140,
-                            "returns": 280,
-                            "duration_hours": 18,
-                            "level_requirement": 1
-                        },
-                        {
-                            "id": "silver",
-                            "name": "Silver Plan",
-                            "type": "Foundation Tier",
-                            "investment": 280,
-                            "returns": 560,
-                            "duration_hours": 24,
-                            "level_requirement": 1
-                        },
-                        {
-                            "id": "gold",
-                            "name": "Gold Plan",
-                            "type": "Foundation Tier",
-                            "investment": 560,
-                            "returns": 1120,
-                            "duration_hours": 30,
-                            "level_requirement": 1
-                        },
-                        {
-                            "id": "platinum",
-                            "name": "Platinum Plan",
-                            "type": "Foundation Tier",
-                            "investment": 1120,
-                            "returns": 2240,
-                            "duration_hours": 36,
-                            "level_requirement": 1
-                        },
-                        {
-                            "id": "diamond",
-                            "name": "Diamond Plan",
-                            "type": "Growth Tier",
-                            "investment": 2240,
-                            "returns": 4480,
-                            "duration_hours": 48,
-                            "level_requirement": 2
-                        },
-                        {
-                            "id": "elite",
-                            "name": "Elite Plan",
-                            "type": "Growth Tier",
-                            "investment": 4480,
-                            "returns": 8960,
-                            "duration_hours": 72,
-                            "level_requirement": 2
-                        },
-                        {
-                            "id": "premium",
-                            "name": "Premium Plan",
-                            "type": "Growth Tier",
-                            "investment": 8960,
-                            "returns": 17920,
-                            "duration_hours": 96,
-                            "level_requirement": 2
-                        },
-                        {
-                            "id": "executive",
-                            "name": "Executive Plan",
-                            "type": "Premium Tier",
-                            "investment": 17920,
-                            "returns": 35840,
-                            "duration_hours": 120,
-                            "level_requirement": 3
-                        },
-                        {
-                            "id": "master",
-                            "name": "Master Plan",
-                            "type": "Premium Tier",
-                            "investment": 35840,
-                            "returns": 50000,
-                            "duration_hours": 144,
-                            "level_requirement": 3
-                        }
-                    ]
-                },
-                "status_code": 200
-            }
-        return result
+        return _not_found_fallback(result, _investment_plans_fallback)
     
     def get_user_investments(self, user_id: str) -> Dict[str, Any]:
         """
@@ -319,18 +313,8 @@ class CapitalXAPI:
         Returns:
             Dictionary with user investments data
         """
-        # First try the API endpoint
         result = self._make_request("GET", f"/api/users/{user_id}/investments")
-        # If API endpoint doesn't exist, return empty data
-        if not result["success"] and result.get("status_code") == 404:
-            return {
-                "success": True,
-                "data": {
-                    "investments": []
-                },
-                "status_code": 200
-            }
-        return result
+        return _not_found_fallback(result, lambda: {"investments": []})
     
     def create_investment(self, user_id: str, plan_id: str, amount: float) -> Dict[str, Any]:
         """
@@ -348,20 +332,8 @@ class CapitalXAPI:
             "plan_id": plan_id,
             "amount": amount
         }
-        # First try the API endpoint
         result = self._make_request("POST", f"/api/users/{user_id}/investments", json=payload)
-        # If API endpoint doesn't exist, return a simulated success
-        if not result["success"] and result.get("status_code") == 404:
-            return {
-                "success": True,
-                "data": {
-                    "message": "Investment request submitted successfully",
-                    "investment_id": f"sim_{plan_id}_{int(datetime.now().timestamp())}",
-                    "status": "pending"
-                },
-                "status_code": 200
-            }
-        return result
+        return _not_found_fallback(result, lambda: _investment_fallback(plan_id))
     
     def get_user_balance(self, user_id: str) -> Dict[str, Any]:
         """
@@ -373,20 +345,8 @@ class CapitalXAPI:
         Returns:
             Dictionary with user balance data
         """
-        # First try the API endpoint
         result = self._make_request("GET", f"/api/users/{user_id}/balance")
-        # If API endpoint doesn't exist, return fallback data
-        if not result["success"] and result.get("status_code") == 404:
-            return {
-                "success": True,
-                "data": {
-                    "balance": 0,
-                    "bonus_balance": 50,  # Default bonus for new users
-                    "currency": "ZAR"
-                },
-                "status_code": 200
-            }
-        return result
+        return _not_found_fallback(result, _balance_fallback)
     
     def get_user_referral_info(self, user_id: str) -> Dict[str, Any]:
         """
@@ -398,20 +358,8 @@ class CapitalXAPI:
         Returns:
             Dictionary with referral information
         """
-        # First try the API endpoint
         result = self._make_request("GET", f"/api/users/{user_id}/referral-info")
-        # If API endpoint doesn't exist, return fallback data
-        if not result["success"] and result.get("status_code") == 404:
-            return {
-                "success": True,
-                "data": {
-                    "referral_code": f"REF{user_id[:6]}",
-                    "bonus_earned": 0,
-                    "referred_users": 0
-                },
-                "status_code": 200
-            }
-        return result
+        return _not_found_fallback(result, lambda: _referral_info_fallback(user_id))
     
     def request_withdrawal(self, user_id: str, amount: float) -> Dict[str, Any]:
         """
@@ -427,21 +375,8 @@ class CapitalXAPI:
         payload = {
             "amount": amount
         }
-        # First try the API endpoint
         result = self._make_request("POST", f"/api/users/{user_id}/withdrawals", json=payload)
-        # If API endpoint doesn't exist, return a simulated success
-        if not result["success"] and result.get("status_code") == 404:
-            return {
-                "success": True,
-                "data": {
-                    "message": "Withdrawal request submitted successfully",
-                    "withdrawal_id": f"wd_{user_id}_{int(datetime.now().timestamp())}",
-                    "status": "pending",
-                    "processing_time": "1-3 business days"
-                },
-                "status_code": 200
-            }
-        return result
+        return _not_found_fallback(result, lambda: _withdrawal_fallback(user_id))
     
     def get_market_data(self) -> Dict[str, Any]:
         """
@@ -450,20 +385,8 @@ class CapitalXAPI:
         Returns:
             Dictionary with market data
         """
-        # First try the API endpoint
         result = self._make_request("GET", "/api/market-data")
-        # If API endpoint doesn't exist, return fallback data
-        if not result["success"] and result.get("status_code") == 404:
-            return {
-                "success": True,
-                "data": {
-                    "market_status": "open",
-                    "trend": "positive",
-                    "performance": "strong"
-                },
-                "status_code": 200
-            }
-        return result
+        return _not_found_fallback(result, _market_data_fallback)
     
     def get_withdrawal_history(self, user_id: str) -> Dict[str, Any]:
         """
@@ -475,18 +398,8 @@ class CapitalXAPI:
         Returns:
             Dictionary with user withdrawal history
         """
-        # First try the API endpoint
         result = self._make_request("GET", f"/api/users/{user_id}/withdrawals")
-        # If API endpoint doesn't exist, return empty data
-        if not result["success"] and result.get("status_code") == 404:
-            return {
-                "success": True,
-                "data": {
-                    "withdrawals": []
-                },
-                "status_code": 200
-            }
-        return result
+        return _not_found_fallback(result, lambda: {"withdrawals": []})
 
 # Global API client instance
 api_client = None
@@ -502,7 +415,7 @@ def initialize_api_client(api_key: Optional[str] = None) -> CapitalXAPI:
         CapitalXAPI instance
     """
     global api_client
-    api_client = CapitalXAPI(api_key)
+    api_client = CapitalXAPI(api_key, resilience=api_resilience)
     logger.info("CapitalX API client initialized")
     return api_client
 
@@ -515,7 +428,7 @@ def get_api_client() -> CapitalXAPI:
     """
     global api_client
     if api_client is None:
-        api_client = CapitalXAPI()
+        api_client = CapitalXAPI(resilience=api_resilience)
     return api_client
 
 # Convenience functions for common operations
@@ -561,4 +474,292 @@ def get_market_data() -> Dict[str, Any]:
 
 def get_withdrawal_history(user_id: str) -> Dict[str, Any]:
     """Get user's withdrawal history."""
-    return get_api_client().get_withdrawal_history(user_id)
\ No newline at end of file
+    return get_api_client().get_withdrawal_history(user_id)
+
+class AsyncCapitalXAPI:
+    """
+    Non-blocking API client for use inside handlers.
+
+    Has the same methods as CapitalXAPI, awaited instead of called, and returns the
+    same result dictionaries. Requests share one pooled httpx.AsyncClient so a slow
+    platform only delays the update waiting on it, never the whole bot. Investment
+    plans and market data are served from TTL caches, and per-user data from
+    short-lived per-user caches that writes invalidate (see api_cache).
+    """
+
+    def __init__(self, api_key: Optional[str] = None, timeout: float = API_TIMEOUT_SECONDS,
+                 write_timeout: float = API_WRITE_TIMEOUT_SECONDS,
+                 transport: Optional[httpx.AsyncBaseTransport] = None,
+                 resilience: Optional[APIResilience] = None):
+        """
+        Initialize the async CapitalX API client.
+
+        Args:
+            api_key: Optional API key for authenticated requests
+            timeout: Timeout in seconds for reads
+            write_timeout: Timeout in seconds for requests that change data
+            transport: Optional httpx transport, e.g. a MockTransport in tests
+            resilience: Circuit breakers and retry policy; a private set if omitted
+        """
+        self.api_key = api_key or os.getenv('CAPITALX_API_KEY')
+        self.resilience = resilience or APIResilience(metrics_file=None)
+        self.timeout = timeout
+        self.write_timeout = write_timeout
+        self.transport = transport
+        self.headers = dict(DEFAULT_HEADERS)
+        if self.api_key:
+            self.headers["Authorization"] = f"Bearer {self.api_key}"
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.caches: Dict[str, TTLCache] = build_shared_caches()
+        self.user_caches: Dict[str, TTLCache] = build_user_caches()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the pooled client, creating it on first use in the running event loop."""
+        loop = asyncio.get_running_loop()
+        # Pooled connections belong to the loop that opened them; a new loop (tests, restarts) needs a new pool
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            self._client = create_async_client(
+                base_url=BASE_URL,
+                headers=self.headers,
+                timeout=self.timeout,
+                transport=self.transport
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        if self._client is not None and not self._client.is_closed:
+            try:
+                await self._client.aclose()
+            except RuntimeError as e:
+                # The loop that owned the pool is already gone
+                logger.warning(f"Could not close CapitalX API client: {e}")
+        self._client = None
+        self._client_loop = None
+
+    async def _make_request(self, method: str, endpoint: str, timeout: Optional[float] = None,
+                            **kwargs) -> Dict[str, Any]:
+        """
+        Make an HTTP request to the CapitalX API.
+
+        The request goes through the endpoint's circuit breaker, and idempotent
+        requests that fail fast are retried (see api_resilience).
+
+        Args:
+            method: HTTP method (GET, POST, PUT, DELETE)
+            endpoint: API endpoint
+            timeout: Timeout in seconds for this call; defaults by method
+            **kwargs: Additional arguments to pass to httpx
+
+        Returns:
+            Dictionary with response data, or with the error if the request failed
+        """
+        if timeout is None:
+            timeout = self.timeout if method in ("GET", "HEAD") else self.write_timeout
+        return await self.resilience.call_async(
+            method, endpoint, lambda: self._send(method, endpoint, timeout, **kwargs))
+
+    async def _send(self, method: str, endpoint: str, timeout: float, **kwargs) -> Dict[str, Any]:
+        """Make one attempt at a request and turn the outcome into a result dictionary."""
+        url = f"{BASE_URL}{endpoint}"
+        try:
+            logger.info(f"Making {method} request to {url}")
+            response = await self._get_client().request(method, endpoint, timeout=timeout, **kwargs)
+
+            # Handle 404 errors specifically
+            if response.status_code == 404:
+                logger.warning(f"API endpoint not found: {url}")
+                return {
+                    "success": False,
+                    "error": f"Endpoint not found: {url}",
+                    "status_code": 404
+                }
+
+            response.raise_for_status()
+
+            # Try to parse JSON response
+            try:
+                data = response.json()
+                logger.info(f"Request successful: {response.status_code}")
+                return {
+                    "success": True,
+                    "data": data,
+                    "status_code": response.status_code
+                }
+            except json.JSONDecodeError:
+                # Return text content if not JSON
+                return {
+                    "success": True,
+                    "data": response.text,
+                    "status_code": response.status_code
+                }
+
+        except httpx.TimeoutException:
+            logger.error(f"API request timeout: {url}")
+            return {
+                "success": False,
+                "error": TIMEOUT_ERROR,
+                "status_code": None
+            }
+        except httpx.NetworkError:
+            logger.error(f"API connection error: {url}")
+            return {
+                "success": False,
+                "error": CONNECTION_ERROR,
+                "status_code": None
+            }
+        except httpx.HTTPStatusError as e:
+            logger.error(f"API HTTP error: {e}")
+            return {
+                "success": False,
+                "error": f"HTTP error: {e}",
+                "status_code": e.response.status_code
+            }
+        except httpx.HTTPError as e:
+            logger.error(f"API request failed: {e}")
+            return {
+                "success": False,
+                "error": str(e),
+                "status_code": None
+            }
+
+    def set_bot_secret(self, secret: str) -> Dict[str, Any]:
+        """
+        Set authentication credentials for the bot.
+
+        Args:
+            secret: Bot secret key
+
+        Returns:
+            Dictionary with result
+        """
+        self.api_key = secret
+        self.headers["Authorization"] = f"Bearer {secret}"
+        if self._client is not None:
+            self._client.headers["Authorization"] = f"Bearer {secret}"
+        return {
+            "success": True,
+            "message": "Bot secret set successfully"
+        }
+
+    async def validate_secret(self) -> Dict[str, Any]:
+        """Validate bot secret with the platform."""
+        result = await self._make_request("GET", "/api/validate")
+        # If API endpoint doesn't exist, fall back to checking the main page
+        if not result["success"] and result.get("status_code") == 404:
+            fallback_result = await self._make_request("GET", "/")
+            if fallback_result["success"]:
+                return {
+                    "success": True,
+                    "data": {"message": "Connected to CapitalX platform"},
+                    "status_code": 200
+                }
+        return result
+
+    async def _get_user_data(self, name: str, user_id: str, endpoint: str,
+                             fallback: Callable[[], Any]) -> Dict[str, Any]:
+        """GET per-user data through its cache, so repeated and concurrent lookups share one request."""
+        async def fetch() -> Dict[str, Any]:
+            result = await self._make_request("GET", endpoint)
+            return _not_found_fallback(result, fallback)
+        return await self.user_caches[name].get_or_fetch(str(user_id), fetch)
+
+    def invalidate_user(self, user_id: str, *names: str) -> None:
+        """
+        Drop a user's cached data after a write.
+
+        Args:
+            user_id: User identifier
+            *names: Endpoints to drop (keys of user_caches); all of them if none given
+        """
+        for name in names or tuple(self.user_caches):
+            self.user_caches[name].invalidate(str(user_id))
+
+    async def get_financial_info(self, user_id: str) -> Dict[str, Any]:
+        """Retrieve user's financial information."""
+        return await self._get_user_data("financial_info", user_id, f"/api/users/{user_id}/financial-info",
+                                         _financial_info_fallback)
+
+    async def get_investment_plans(self) -> Dict[str, Any]:
+        """Get available investment plans, cached for all users."""
+        return await self.caches["investment_plans"].get_or_fetch("plans", self._fetch_investment_plans)
+
+    async def _fetch_investment_plans(self) -> Dict[str, Any]:
+        result = await self._make_request("GET", "/api/investment-plans")
+        return _not_found_fallback(result, _investment_plans_fallback)
+
+    async def get_user_investments(self, user_id: str) -> Dict[str, Any]:
+        """Get user's current investments."""
+        return await self._get_user_data("investments", user_id, f"/api/users/{user_id}/investments",
+                                         lambda: {"investments": []})
+
+    async def create_investment(self, user_id: str, plan_id: str, amount: float) -> Dict[str, Any]:
+        """Create a new investment for a user."""
+        payload = {
+            "plan_id": plan_id,
+            "amount": amount
+        }
+        result = await self._make_request("POST", f"/api/users/{user_id}/investments", json=payload)
+        # Even a failed write may have reached the platform, so drop what it could have changed
+        self.invalidate_user(user_id, "investments", "balance", "financial_info")
+        return _not_found_fallback(result, lambda: _investment_fallback(plan_id))
+
+    async def get_user_balance(self, user_id: str) -> Dict[str, Any]:
+        """Get user's account balance."""
+        return await self._get_user_data("balance", user_id, f"/api/users/{user_id}/balance", _balance_fallback)
+
+    async def get_user_referral_info(self, user_id: str) -> Dict[str, Any]:
+        """Get user's referral information."""
+        return await self._get_user_data("referral_info", user_id, f"/api/users/{user_id}/referral-info",
+                                         lambda: _referral_info_fallback(user_id))
+
+    async def request_withdrawal(self, user_id: str, amount: float) -> Dict[str, Any]:
+        """Request a withdrawal for a user."""
+        payload = {
+            "amount": amount
+        }
+        result = await self._make_request("POST", f"/api/users/{user_id}/withdrawals", json=payload)
+        self.invalidate_user(user_id, "balance", "withdrawals", "financial_info")
+        return _not_found_fallback(result, lambda: _withdrawal_fallback(user_id))
+
+    async def get_market_data(self) -> Dict[str, Any]:
+        """Get current market data and trends, cached for all users."""
+        return await self.caches["market_data"].get_or_fetch("market", self._fetch_market_data)
+
+    async def _fetch_market_data(self) -> Dict[str, Any]:
+        result = await self._make_request("GET", "/api/market-data")
+        return _not_found_fallback(result, _market_data_fallback)
+
+    async def get_withdrawal_history(self, user_id: str) -> Dict[str, Any]:
+        """Get user's withdrawal history."""
+        return await self._get_user_data("withdrawals", user_id, f"/api/users/{user_id}/withdrawals",
+                                         lambda: {"withdrawals": []})
+
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit, miss and refresh counters of each cache."""
+        stats = {name: cache.stats() for name, cache in self.caches.items()}
+        stats.update({f"user_{name}": cache.stats() for name, cache in self.user_caches.items()})
+        return stats
+
+# Global async API client instance, shared by all handlers
+async_api_client = None
+
+def get_async_api_client() -> AsyncCapitalXAPI:
+    """
+    Get the global async API client instance.
+
+    Returns:
+        AsyncCapitalXAPI instance
+    """
+    global async_api_client
+    if async_api_client is None:
+        async_api_client = AsyncCapitalXAPI(resilience=api_resilience)
+    return async_api_client
+
+async def close_async_api_client() -> None:
+    """Close the global async API client's connections, e.g. on shutdown."""
+    global async_api_client
+    if async_api_client is not None:
+        await async_api_client.aclose()
@@ -12,6 +12,7 @@ from typing import List, Dict, Any
 logger = logging.getLogger(__name__)
 
 # CapitalX Platform URLs
+# BEGIN GENERATED URL TABLE (url_registry.py) - edit CLIENT_PAGES there and run it instead
 CAPITALX_URLS = {
     "home": "https://capitalx-rtn.onrender.com/",
     "register": "https://capitalx-rtn.onrender.com/register/",
@@ -26,6 +27,7 @@ CAPITALX_URLS = {
     "profile": "https://capitalx-rtn.onrender.com/profile/",
     "support": "https://capitalx-rtn.onrender.com/support/"
 }
+# END GENERATED URL TABLE
 
 async def client_bot_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle the /clientbot command to launch the enhanced client assistance feature."""
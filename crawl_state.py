@@ -0,0 +1,182 @@
+"""
+Crawl State Module
+On-disk checkpoints of a crawl so an interrupted run resumes instead of starting over.
+
+One row per URL in crawl_pages records its depth, status (queued, fetched or failed),
+HTTP status, body hash and the links found on it. Rows are buffered in memory and
+written in periodic checkpoints. On the next run, queued URLs seed the frontier
+again, and pages fetched within the freshness window are replayed from their stored
+links instead of being downloaded.
+"""
+
+import logging
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional, Any, Tuple
+
+logger = logging.getLogger(__name__)
+DB_FILE = "telegram_bot.db"
+
+# Pages fetched more recently than this are not downloaded again
+CRAWL_FRESHNESS_SECONDS = float(os.getenv("CRAWL_FRESHNESS_SECONDS", str(24 * 3600)))
+# Buffered rows are written at least this often, or when this many are pending
+CHECKPOINT_INTERVAL_SECONDS = 5.0
+CHECKPOINT_BATCH_SIZE = 200
+
+STATUS_QUEUED = "queued"
+STATUS_FETCHED = "fetched"
+STATUS_FAILED = "failed"
+
+
+def ensure_crawl_schema(conn: sqlite3.Connection) -> None:
+    """Create the crawl state table if it doesn't exist."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS crawl_pages (
+            crawl_id TEXT NOT NULL,
+            url TEXT NOT NULL,
+            depth INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            http_status INTEGER,
+            body_hash TEXT,
+            links TEXT,
+            fetched_at REAL,
+            PRIMARY KEY (crawl_id, url)
+        ) WITHOUT ROWID
+    """)
+
+
+class CrawlStateStore:
+    """Checkpointed frontier, visited pages and per-URL status for one crawl."""
+
+    def __init__(self, crawl_id: str, db_file: Optional[str] = None,
+                 freshness_seconds: float = CRAWL_FRESHNESS_SECONDS,
+                 checkpoint_interval: float = CHECKPOINT_INTERVAL_SECONDS):
+        """
+        Args:
+            crawl_id: Identifies the crawl, normally its base URL
+            db_file: Database file; defaults to the bot database
+            freshness_seconds: Pages fetched more recently than this are replayed, not fetched
+            checkpoint_interval: Seconds between checkpoints
+        """
+        self.crawl_id = crawl_id
+        self.db_file = db_file or DB_FILE
+        self.freshness_seconds = freshness_seconds
+        self.checkpoint_interval = checkpoint_interval
+        self._fresh: Dict[str, List[str]] = {}
+        self._pending: Dict[str, Tuple] = {}
+        self._last_checkpoint = time.monotonic()
+        self.checkpoints = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_file)
+        ensure_crawl_schema(conn)
+        return conn
+
+    def load(self) -> List[Tuple[str, int]]:
+        """
+        Read the saved state of this crawl.
+
+        Returns:
+            (url, depth) pairs that were queued but not fetched when the last run stopped
+        """
+        cutoff = time.time() - self.freshness_seconds
+        conn = self._connect()
+        try:
+            rows = conn.execute("""
+                SELECT url, depth, status, links, fetched_at FROM crawl_pages WHERE crawl_id = ?
+            """, (self.crawl_id,)).fetchall()
+        finally:
+            conn.close()
+
+        queued = []
+        self._fresh = {}
+        for url, depth, status, links, fetched_at in rows:
+            if status == STATUS_FETCHED and (fetched_at or 0) >= cutoff:
+                self._fresh[url] = links.split("\n") if links else []
+            elif status == STATUS_QUEUED:
+                queued.append((url, depth))
+        queued.sort(key=lambda item: item[1])
+        logger.info(f"Loaded crawl state for {self.crawl_id}: {len(self._fresh)} fresh pages, {len(queued)} queued")
+        return queued
+
+    def fresh_links(self, url: str) -> Optional[List[str]]:
+        """Links stored for a page fetched within the freshness window, or None if it must be fetched."""
+        return self._fresh.get(url)
+
+    def record_queued(self, url: str, depth: int) -> None:
+        """Note a URL added to the frontier."""
+        if url not in self._pending:
+            self._pending[url] = (depth, STATUS_QUEUED, None, None, None, None)
+        self.maybe_checkpoint()
+
+    def record_fetched(self, url: str, depth: int, http_status: Optional[int], body_hash: Optional[str],
+                       links: List[str]) -> None:
+        """Note a fetched page; network errors and 5xx responses are recorded as failed and retried."""
+        # A 4xx is a definitive answer, so it counts as fetched (with no links) until it goes stale
+        ok = http_status is not None and http_status < 500
+        status = STATUS_FETCHED if ok else STATUS_FAILED
+        self._pending[url] = (depth, status, http_status, body_hash, "\n".join(links), time.time())
+        if ok:
+            self._fresh[url] = list(links)
+        self.maybe_checkpoint()
+
+    def maybe_checkpoint(self) -> None:
+        """Checkpoint if enough time has passed or enough rows are waiting."""
+        if (len(self._pending) >= CHECKPOINT_BATCH_SIZE
+                or time.monotonic() - self._last_checkpoint >= self.checkpoint_interval):
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        """Write all buffered rows in one transaction."""
+        self._last_checkpoint = time.monotonic()
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        queued = [(self.crawl_id, url, row[0]) for url, row in pending.items() if row[1] == STATUS_QUEUED]
+        done = [(self.crawl_id, url) + row for url, row in pending.items() if row[1] != STATUS_QUEUED]
+        try:
+            conn = self._connect()
+            try:
+                # A queued row never overwrites a page that was already fetched
+                conn.executemany("""
+                    INSERT INTO crawl_pages (crawl_id, url, depth, status) VALUES (?, ?, ?, 'queued')
+                    ON CONFLICT (crawl_id, url) DO UPDATE SET depth = excluded.depth, status = 'queued'
+                    WHERE crawl_pages.status != 'fetched'
+                """, queued)
+                conn.executemany("""
+                    INSERT OR REPLACE INTO crawl_pages
+                    (crawl_id, url, depth, status, http_status, body_hash, links, fetched_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, done)
+                conn.commit()
+            finally:
+                conn.close()
+            self.checkpoints += 1
+        except sqlite3.Error as e:
+            logger.error(f"Error checkpointing crawl state: {e}")
+            # Keep the rows for the next checkpoint, without clobbering newer ones
+            for url, row in pending.items():
+                self._pending.setdefault(url, row)
+
+    def reset(self) -> None:
+        """Forget everything about this crawl."""
+        self._pending = {}
+        self._fresh = {}
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM crawl_pages WHERE crawl_id = ?", (self.crawl_id,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Page counts by status for this crawl."""
+        conn = self._connect()
+        try:
+            counts = dict(conn.execute("""
+                SELECT status, COUNT(*) FROM crawl_pages WHERE crawl_id = ? GROUP BY status
+            """, (self.crawl_id,)).fetchall())
+        finally:
+            conn.close()
+        return {status: counts.get(status, 0) for status in (STATUS_QUEUED, STATUS_FETCHED, STATUS_FAILED)}
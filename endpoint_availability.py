@@ -0,0 +1,159 @@
+"""
+Endpoint Availability Module
+Negative cache of CapitalX API endpoints the platform does not serve.
+
+Most CapitalXAPI methods try an /api/... endpoint and fall back to static data
+on 404. The endpoints are missing consistently, so rediscovering that on every
+call is a wasted round trip. The registry remembers a 404 per resource, the
+exact request path, for CAPITALX_MISSING_ENDPOINT_TTL seconds; meanwhile
+requests for it get a synthetic 404 at once and the caller's fallback answers.
+Per-user paths are remembered per user: a 404 for one user (e.g. one the
+platform does not know) must not send every other user to fallback data.
+When the period runs out, one request probes the resource (in the background
+for the async client, so nobody waits on it) and it is either forgotten, if it
+now answers, or marked missing again.
+
+Resources are grouped under their endpoint key (user ids folded out, see
+api_resilience.endpoint_key) for reporting, so snapshots never list user ids.
+
+Only idempotent requests are negative-cached: probing a missing write endpoint
+would replay a real write. Unreachable endpoints are the circuit breakers' job.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MISSING_ENDPOINT_TTL_SECONDS = float(os.getenv("CAPITALX_MISSING_ENDPOINT_TTL", "600"))
+# Per-user entries are bounded; the oldest are dropped first
+MAX_MISSING_RESOURCES = 10000
+
+# check() results
+AVAILABLE = "available"
+MISSING = "missing"
+PROBE = "probe"
+
+
+def missing_endpoint_result(endpoint: str) -> Dict[str, Any]:
+    """The 404 result returned without a request for an endpoint known to be missing."""
+    return {
+        "success": False,
+        "error": f"Endpoint not found: {endpoint} (cached)",
+        "status_code": 404
+    }
+
+
+class EndpointAvailability:
+    """Which resources answered 404, and when to look at them again."""
+
+    def __init__(self, missing_ttl: float = MISSING_ENDPOINT_TTL_SECONDS,
+                 max_resources: int = MAX_MISSING_RESOURCES):
+        """
+        Args:
+            missing_ttl: Seconds a 404 is remembered before the resource is probed again
+            max_resources: Most missing resources remembered at once
+        """
+        self.missing_ttl = missing_ttl
+        self.max_resources = max_resources
+        # (endpoint key, resource) -> when it last answered 404, oldest first
+        self._missing: Dict[Tuple[str, str], float] = {}
+        # endpoint key -> how many of its resources are in _missing, so marking one needs no scan
+        self._missing_counts: Counter = Counter()
+        # (endpoint key, resource) -> when its probe started; cleared when the probe reports back
+        self._probing: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        self.skipped = 0
+        self.probes = 0
+        self.recovered = 0
+
+    def check(self, key: str, resource: Optional[str] = None) -> str:
+        """
+        Decide how to handle a request.
+
+        Args:
+            key: Endpoint key the resource is reported under
+            resource: Exact resource requested; the endpoint key itself if omitted
+
+        Returns:
+            AVAILABLE to send it, MISSING to answer with a cached 404, or PROBE when the
+            404 has expired and this caller should send the one request that re-checks it
+        """
+        entry = (key, resource or key)
+        with self._lock:
+            marked_at = self._missing.get(entry)
+            if marked_at is None:
+                return AVAILABLE
+            now = time.monotonic()
+            if now - marked_at >= self.missing_ttl:
+                probe_started = self._probing.get(entry)
+                # A probe that never reported back does not block the next one forever
+                if probe_started is None or now - probe_started >= self.missing_ttl:
+                    self._probing[entry] = now
+                    self.probes += 1
+                    return PROBE
+            self.skipped += 1
+            return MISSING
+
+    def record(self, key: str, result: Dict[str, Any], resource: Optional[str] = None) -> None:
+        """Update a resource's availability from the result of a real request."""
+        entry = (key, resource or key)
+        with self._lock:
+            self._probing.pop(entry, None)
+            if result.get("status_code") == 404:
+                self._mark_missing(entry)
+            elif result.get("success"):
+                if self._unmark_missing(entry):
+                    self.recovered += 1
+                    logger.info(f"{entry[1]} is available again")
+            elif entry in self._missing:
+                # Probe failed for another reason (outage, open circuit): keep the fallback, retry later
+                self._mark_missing(entry)
+
+    def _mark_missing(self, entry: Tuple[str, str]) -> None:
+        if self._missing.pop(entry, None) is None:
+            while len(self._missing) >= self.max_resources:
+                self._unmark_missing(next(iter(self._missing)))
+            self._missing_counts[entry[0]] += 1
+            if self._missing_counts[entry[0]] == 1:
+                logger.info(f"{entry[0]} answered 404; using fallbacks for {self.missing_ttl:.0f}s")
+        # Re-inserted so the dict stays ordered oldest first
+        self._missing[entry] = time.monotonic()
+
+    def _unmark_missing(self, entry: Tuple[str, str]) -> bool:
+        """Drop a missing resource; returns False if it was not marked."""
+        if self._missing.pop(entry, None) is None:
+            return False
+        self._missing_counts[entry[0]] -= 1
+        if not self._missing_counts[entry[0]]:
+            del self._missing_counts[entry[0]]
+        return True
+
+    def forget(self, key: Optional[str] = None) -> None:
+        """Clear every resource of one endpoint, or all of them."""
+        with self._lock:
+            for entry in [entry for entry in self._missing if key is None or entry[0] == key]:
+                self._unmark_missing(entry)
+            for entry in [entry for entry in self._probing if key is None or entry[0] == key]:
+                del self._probing[entry]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Missing resources per endpoint and counters as a JSON-serialisable dictionary."""
+        with self._lock:
+            now = time.monotonic()
+            missing: Dict[str, Dict[str, Any]] = {}
+            for (key, _), marked_at in self._missing.items():
+                remaining = max(0.0, self.missing_ttl - (now - marked_at))
+                stats = missing.setdefault(key, {"resources": 0, "expires_in": remaining})
+                stats["resources"] += 1
+                stats["expires_in"] = round(min(stats["expires_in"], remaining), 1)
+            return {
+                "missing": dict(sorted(missing.items())),
+                "skipped": self.skipped,
+                "probes": self.probes,
+                "recovered": self.recovered
+            }
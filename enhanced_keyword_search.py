@@ -7,10 +7,16 @@ import difflib
 
 # Import configuration
 from search_config import QUERY_PATTERNS, KEYWORD_MAPPING, SYNONYMS
+from search_metrics import search_metrics
+from kb_store import kb_store, FIELD_KEYWORDS, FIELD_TITLE, FIELD_SUBCATEGORY, FIELD_CONTENT
+from kb_artifact import get_compiled_kb
 
 logger = logging.getLogger(__name__)
 DB_FILE = "telegram_bot.db"
 
+# Same field weights as the LIKE relevance scoring below
+STORE_FIELD_WEIGHTS = {FIELD_KEYWORDS: 3, FIELD_TITLE: 2, FIELD_SUBCATEGORY: 1.5, FIELD_CONTENT: 1}
+
 class EnhancedKeywordSearchEngine:
     """Advanced keyword search engine for the CapitalX Telegram bot with fuzzy matching and improved relevance scoring."""
     
@@ -59,9 +65,10 @@ class EnhancedKeywordSearchEngine:
         matches.sort(key=lambda x: x[1], reverse=True)
         return matches
     
-    def find_best_matches(self, query: str) -> List[Tuple[str, str, float]]:
+    def find_best_matches(self, query: str, meaningful_terms: Optional[List[str]] = None) -> List[Tuple[str, str, float]]:
         """Find the best matching categories/subcategories for a query with enhanced matching."""
-        meaningful_terms = self.preprocess_query(query)
+        if meaningful_terms is None:
+            meaningful_terms = self.preprocess_query(query)
         matches = []
         matched_keywords = set()  # To avoid duplicate matches
         
@@ -120,72 +127,108 @@ class EnhancedKeywordSearchEngine:
         
         return unique_matches
     
+    def _lookup_entry(self, conn: sqlite3.Connection, use_store: bool, category: str,
+                      subcategory: str) -> Optional[Tuple[str, str, str]]:
+        """Return (title, category, content) of the newest entry in a category/subcategory (ties go to the highest id)."""
+        compiled = get_compiled_kb(DB_FILE)
+        if compiled is not None:
+            return compiled.answers.get((category, subcategory))
+        if use_store:
+            entry_id = kb_store.find_entry(conn, category, subcategory)
+            return kb_store.get_entry(conn, entry_id) if entry_id is not None else None
+        
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT title, category, content FROM kb_enhanced 
+            WHERE category = ? AND subcategory = ?
+            ORDER BY updated_at DESC, id DESC
+            LIMIT 1
+        """, (category, subcategory))
+        return cursor.fetchone()
+    
+    def _keyword_fallback(self, conn: sqlite3.Connection, use_store: bool, search_terms: List[str],
+                          limit: int) -> List[Tuple[str, str, str, float]]:
+        """Rank entries by which fields mention the search terms; returns (title, category, content, relevance)."""
+        terms = [term for term in search_terms if len(term) > 1]  # Skip single characters
+        if not terms:
+            return []
+        
+        if use_store:
+            # Term index lookup; only the returned bodies are decompressed
+            results = []
+            for entry_id, relevance in kb_store.search_terms(conn, terms, STORE_FIELD_WEIGHTS, limit):
+                entry = kb_store.get_entry(conn, entry_id)
+                if entry:
+                    results.append(entry + (relevance,))
+            return results
+        
+        like_conditions = []
+        params = []
+        for term in terms:
+            like_conditions.extend([
+                "LOWER(keywords) LIKE ?",
+                "LOWER(title) LIKE ?", 
+                "LOWER(subcategory) LIKE ?",
+                "LOWER(content) LIKE ?"
+            ])
+            params.extend([f"%{term}%"] * 4)
+        
+        # More sophisticated relevance scoring
+        relevance_calc = []
+        for cond in like_conditions:
+            if 'keywords' in cond:
+                relevance_calc.append("3")
+            elif 'title' in cond:
+                relevance_calc.append("2")
+            elif 'subcategory' in cond:
+                relevance_calc.append("1.5")
+            else:
+                relevance_calc.append("1")
+        
+        query_sql = f"""
+            SELECT title, category, content, ({' + '.join(relevance_calc)}) as relevance
+            FROM kb_enhanced 
+            WHERE {' OR '.join(like_conditions)}
+            ORDER BY relevance DESC
+            LIMIT {limit}
+        """
+        cursor = conn.cursor()
+        cursor.execute(query_sql, params)
+        return cursor.fetchall()
+    
     def search_kb_enhanced(self, query: str) -> Optional[str]:
         """Enhanced search function with improved matching and relevance scoring."""
         try:
-            # First try to find best matching category/subcategory
-            matches = self.find_best_matches(query)
-            
-            conn = sqlite3.connect(DB_FILE)
-            cursor = conn.cursor()
-            
-            # Try each match in order of relevance
-            for category, subcategory, weight in matches:
-                cursor.execute("""
-                    SELECT content FROM kb_enhanced 
-                    WHERE category = ? AND subcategory = ?
-                    ORDER BY updated_at DESC
-                    LIMIT 1
-                """, (category, subcategory))
+            with search_metrics.trace("enhanced_v2", query) as trace:
+                with trace.stage("preprocess"):
+                    search_terms = self.preprocess_query(query)
                 
-                result = cursor.fetchone()
-                if result:
-                    conn.close()
-                    return result[0]
-            
-            # If no specific matches, fall back to keyword search with improved scoring
-            search_terms = self.preprocess_query(query)
-            like_conditions = []
-            params = []
-            
-            for term in search_terms:
-                if len(term) > 1:  # Skip single characters
-                    like_conditions.extend([
-                        "LOWER(keywords) LIKE ?",
-                        "LOWER(title) LIKE ?", 
-                        "LOWER(subcategory) LIKE ?",
-                        "LOWER(content) LIKE ?"
-                    ])
-                    params.extend([f"%{term}%"] * 4)
-            
-            if like_conditions:
-                # More sophisticated relevance scoring
-                relevance_calc = []
-                for i, cond in enumerate(like_conditions):
-                    if 'keywords' in cond:
-                        relevance_calc.append("3")
-                    elif 'title' in cond:
-                        relevance_calc.append("2")
-                    elif 'subcategory' in cond:
-                        relevance_calc.append("1.5")
-                    else:
-                        relevance_calc.append("1")
+                # First try to find best matching category/subcategory
+                with trace.stage("find_best_matches"):
+                    matches = self.find_best_matches(query, search_terms)
                 
-                query_sql = f"""
-                    SELECT content, ({' + '.join(relevance_calc)}) as relevance
-                    FROM kb_enhanced 
-                    WHERE {' OR '.join(like_conditions)}
-                    ORDER BY relevance DESC
-                    LIMIT 1
-                """
-                cursor.execute(query_sql, params)
-                result = cursor.fetchone()
-                if result:
-                    conn.close()
-                    return result[0]
-            
-            conn.close()
-            return None
+                conn = sqlite3.connect(DB_FILE)
+                use_store = kb_store.available(conn)
+                
+                # Try each match in order of relevance
+                with trace.stage("match_lookup"):
+                    for category, subcategory, weight in matches:
+                        result = self._lookup_entry(conn, use_store, category, subcategory)
+                        if result:
+                            conn.close()
+                            trace.record_outcome("match_lookup", weight)
+                            return result[2]
+                
+                # If no specific matches, fall back to keyword search with improved scoring
+                with trace.stage("like_fallback"):
+                    keyword_results = self._keyword_fallback(conn, use_store, search_terms, 1)
+                    if keyword_results:
+                        conn.close()
+                        trace.record_outcome("like_fallback", keyword_results[0][3])
+                        return keyword_results[0][2]
+                
+                conn.close()
+                return None
             
         except Exception as e:
             logger.error(f"Error in enhanced search: {e}")
@@ -194,78 +237,47 @@ class EnhancedKeywordSearchEngine:
     def search_kb_detailed_enhanced(self, query: str) -> List[Tuple[str, str, str]]:
         """Enhanced detailed search returning multiple results with improved relevance scoring."""
         try:
-            conn = sqlite3.connect(DB_FILE)
-            cursor = conn.cursor()
-            
-            # First try pattern-based search
-            matches = self.find_best_matches(query)
-            detailed_results = []
-            
-            # Get content for top matches
-            for category, subcategory, weight in matches[:5]:  # Top 5 matches
-                cursor.execute("""
-                    SELECT title, category, content FROM kb_enhanced 
-                    WHERE category = ? AND subcategory = ?
-                    ORDER BY updated_at DESC
-                    LIMIT 1
-                """, (category, subcategory))
+            with search_metrics.trace("enhanced_v2_detailed", query) as trace:
+                conn = sqlite3.connect(DB_FILE)
+                use_store = kb_store.available(conn)
                 
-                result = cursor.fetchone()
-                if result:
-                    detailed_results.append((result[0], result[1], result[2]))
-            
-            # If we don't have enough results, supplement with keyword search
-            if len(detailed_results) < 5:
-                search_terms = self.preprocess_query(query)
-                like_conditions = []
-                params = []
+                with trace.stage("preprocess"):
+                    search_terms = self.preprocess_query(query)
                 
-                for term in search_terms:
-                    if len(term) > 1:  # Skip single characters
-                        like_conditions.extend([
-                            "LOWER(keywords) LIKE ?",
-                            "LOWER(title) LIKE ?", 
-                            "LOWER(subcategory) LIKE ?",
-                            "LOWER(content) LIKE ?"
-                        ])
-                        params.extend([f"%{term}%"] * 4)
+                # First try pattern-based search
+                with trace.stage("find_best_matches"):
+                    matches = self.find_best_matches(query, search_terms)
+                detailed_results = []
                 
-                if like_conditions:
-                    # More sophisticated relevance scoring
-                    relevance_calc = []
-                    for i, cond in enumerate(like_conditions):
-                        if 'keywords' in cond:
-                            relevance_calc.append("3")
-                        elif 'title' in cond:
-                            relevance_calc.append("2")
-                        elif 'subcategory' in cond:
-                            relevance_calc.append("1.5")
-                        else:
-                            relevance_calc.append("1")
-                    
-                    query_sql = f"""
-                        SELECT title, category, content, ({' + '.join(relevance_calc)}) as relevance
-                        FROM kb_enhanced 
-                        WHERE {' OR '.join(like_conditions)}
-                        ORDER BY relevance DESC
-                        LIMIT {7 - len(detailed_results)}
-                    """
-                    cursor.execute(query_sql, params)
-                    keyword_results = cursor.fetchall()
-                    detailed_results.extend([(r[0], r[1], r[2]) for r in keyword_results])
-            
-            conn.close()
-            
-            # Remove duplicates while preserving order
-            seen = set()
-            unique_results = []
-            for result in detailed_results:
-                key = (result[0], result[1])  # title, category
-                if key not in seen:
-                    seen.add(key)
-                    unique_results.append(result)
-            
-            return unique_results[:5]  # Return top 5 unique results
+                # Get content for top matches
+                with trace.stage("match_lookup"):
+                    for category, subcategory, weight in matches[:5]:  # Top 5 matches
+                        result = self._lookup_entry(conn, use_store, category, subcategory)
+                        if result:
+                            if not detailed_results:
+                                trace.record_outcome("match_lookup", weight)
+                            detailed_results.append((result[0], result[1], result[2]))
+                
+                # If we don't have enough results, supplement with keyword search
+                if len(detailed_results) < 5:
+                    with trace.stage("like_fallback"):
+                        keyword_results = self._keyword_fallback(conn, use_store, search_terms, 7 - len(detailed_results))
+                        if keyword_results and not detailed_results:
+                            trace.record_outcome("like_fallback", keyword_results[0][3])
+                        detailed_results.extend([(r[0], r[1], r[2]) for r in keyword_results])
+                
+                conn.close()
+                
+                # Remove duplicates while preserving order
+                seen = set()
+                unique_results = []
+                for result in detailed_results:
+                    key = (result[0], result[1])  # title, category
+                    if key not in seen:
+                        seen.add(key)
+                        unique_results.append(result)
+                
+                return unique_results[:5]  # Return top 5 unique results
             
         except Exception as e:
             logger.error(f"Error in enhanced detailed search: {e}")
@@ -1,34 +1,43 @@
 """
 URL Extractor for CapitalX Website
 Extracts all non-admin page URLs from the CapitalX website for client use.
+
+Pages are discovered from robots.txt and the site's sitemaps first; following links
+page by page is the fallback for sites that publish no sitemap.
 """
 
 import requests
-from bs4 import BeautifulSoup
 import logging
-from urllib.parse import urljoin, urlparse
-import time
+from urllib.parse import urlparse
+from typing import Dict, Optional
+
+from async_crawler import AsyncCrawler, DEFAULT_HEADERS
+from http_transport import create_session, run_async
+from crawl_state import CrawlStateStore
+from html_parsing import extract_links
+from sitemap_discovery import SitemapDiscovery
+from url_registry import (URLRegistry, is_admin_url, update_registry, export_url_lists,
+                          export_url_tables)
 
 logger = logging.getLogger(__name__)
 
 class URLExtractor:
-    def __init__(self, base_url: str = "https://capitalx-rtn.onrender.com/"):
+    def __init__(self, base_url: str = "https://capitalx-rtn.onrender.com/", state: Optional[CrawlStateStore] = None):
         self.base_url = base_url.rstrip('/')
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        # Optional checkpoint store; lets an interrupted crawl resume
+        self.state = state
+        self.session = create_session(DEFAULT_HEADERS)
         self.visited_urls = set()
         self.found_urls = set()
+        # Filled by sitemap discovery: page URL -> lastmod, sitemap URL -> lastmod
+        self.lastmod: Dict[str, Optional[float]] = {}
+        self.sitemap_lastmod: Dict[str, Optional[float]] = {}
+        # "sitemap" or "crawl", whichever produced the URLs of the last extraction
+        self.source = "crawl"
         
     def is_admin_url(self, url: str) -> bool:
         """Check if URL is an admin page."""
-        admin_indicators = [
-            '/admin', '/dashboard/admin', '/control', '/manage',
-            '/backend', '/panel', '/settings'
-        ]
-        url_path = urlparse(url).path.lower()
-        return any(indicator in url_path for indicator in admin_indicators)
+        return is_admin_url(url)
     
     def is_valid_url(self, url: str) -> bool:
         """Check if URL is valid and should be included."""
@@ -53,132 +62,75 @@ class URLExtractor:
         try:
             response = self.session.get(url, timeout=10)
             response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            links = []
-            
-            # Find all anchor tags with href
-            for link in soup.find_all('a', href=True):
-                href = link['href']
-                # Convert relative URLs to absolute
-                absolute_url = urljoin(url, href)
-                links.append(absolute_url)
-                
-            # Find all form actions
-            for form in soup.find_all('form', action=True):
-                action = form['action']
-                absolute_url = urljoin(url, action)
-                links.append(absolute_url)
-                
-            return links
+            return extract_links(response.text, url)
         except requests.RequestException as e:
             logger.error(f"Error fetching {url}: {e}")
             return []
     
-    def extract_all_urls(self, max_depth: int = 2) -> list:
-        """Extract all non-admin URLs from the website."""
+    def extract_all_urls(self, max_depth: int = 2, use_sitemaps: bool = True,
+                         known_sitemaps: Optional[Dict[str, Optional[float]]] = None) -> list:
+        """Extract all non-admin URLs from the website.
+        
+        Args:
+            max_depth: Crawl depth when the site has no sitemap
+            use_sitemaps: Try robots.txt and sitemaps before following links
+            known_sitemaps: Sitemap lastmods from the previous run; unchanged sitemaps are not fetched
+        """
         logger.info(f"Starting URL extraction from {self.base_url}")
         
-        # Start with the base URL
-        urls_to_visit = [self.base_url]
-        current_depth = 0
+        discovery = SitemapDiscovery(self.base_url, url_filter=self.is_valid_url, known_sitemaps=known_sitemaps,
+                                     headers=dict(self.session.headers))
+        if use_sitemaps:
+            entries = run_async(discovery.discover())
+            if discovery.found:
+                self.source = "sitemap"
+                self.lastmod.update(entries)
+                self.sitemap_lastmod = discovery.sitemap_lastmod
+                self.found_urls.update(entry.url for entry in entries)
+                logger.info(f"Found {len(entries)} URLs in sitemaps with {discovery.requests} requests")
+                # Newest lastmod first, so callers that stop early get the fresh pages
+                return [entry.url for entry in entries]
         
-        while urls_to_visit and current_depth < max_depth:
-            next_urls_to_visit = []
-            
-            for url in urls_to_visit:
-                # Skip if already visited
-                if url in self.visited_urls:
-                    continue
-                    
-                logger.info(f"Processing URL: {url}")
-                self.visited_urls.add(url)
-                
-                # Fetch links from this page
-                links = self.fetch_page_links(url)
-                
-                for link in links:
-                    # Check if it's a valid URL to include
-                    if self.is_valid_url(link):
-                        self.found_urls.add(link)
-                        # Add to next level if it's within the same domain
-                        if urlparse(link).netloc == urlparse(self.base_url).netloc:
-                            next_urls_to_visit.append(link)
-                    
-                # Be respectful to the server
-                time.sleep(0.5)
-            
-            urls_to_visit = next_urls_to_visit
-            current_depth += 1
+        # No sitemap: follow links, still honouring robots.txt Disallow rules
+        self.source = "crawl"
+        url_filter = lambda url: self.is_valid_url(url) and discovery.can_fetch(url)
+        # Pages are fetched concurrently, with per-host rate limiting instead of a fixed sleep
+        crawler = AsyncCrawler(self.base_url, max_depth=max_depth, url_filter=url_filter,
+                               headers=dict(self.session.headers), state=self.state)
+        found = run_async(crawler.crawl())
+        self.visited_urls.update(crawler.visited_urls)
+        self.found_urls.update(found)
             
         # Convert to sorted list
         url_list = sorted(list(self.found_urls))
         logger.info(f"Found {len(url_list)} non-admin URLs")
         return url_list
-    
-    def save_urls_to_file(self, urls: list, filename: str = "capitalx_urls.txt"):
-        """Save extracted URLs to a file."""
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(f"# CapitalX Website URLs (Non-Admin Pages)\n")
-            f.write(f"# Extracted on {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"# Total URLs: {len(urls)}\n\n")
-            
-            for url in urls:
-                f.write(f"{url}\n")
-                
-        logger.info(f"Saved {len(urls)} URLs to {filename}")
-    
-    def generate_markdown_report(self, urls: list, filename: str = "CAPITALX_URLS.md"):
-        """Generate a markdown report of the extracted URLs."""
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write("# CapitalX Website URLs\n\n")
-            f.write("This document contains all non-admin page URLs from the CapitalX website.\n\n")
-            f.write(f"**Extraction Date:** {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"**Total URLs Found:** {len(urls)}\n\n")
-            f.write("## URL List\n\n")
-            
-            # Group URLs by path depth
-            grouped_urls = {}
-            for url in urls:
-                path_parts = urlparse(url).path.strip('/').split('/')
-                depth = len(path_parts) if path_parts != [''] else 0
-                if depth not in grouped_urls:
-                    grouped_urls[depth] = []
-                grouped_urls[depth].append(url)
-            
-            # Write URLs grouped by depth
-            for depth in sorted(grouped_urls.keys()):
-                f.write(f"### Level {depth} Pages\n\n")
-                for url in sorted(grouped_urls[depth]):
-                    f.write(f"- [{url}]({url})\n")
-                f.write("\n")
-                
-        logger.info(f"Generated markdown report with {len(urls)} URLs to {filename}")
 
 def main():
-    """Main function to extract and save URLs."""
+    """Crawl the website into the URL registry and export the URL lists and tables."""
     # Configure logging
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s - %(levelname)s - %(message)s'
     )
     
-    # Create extractor
-    extractor = URLExtractor()
-    
-    # Extract URLs
-    urls = extractor.extract_all_urls(max_depth=3)
+    # Crawl state is checkpointed so an interrupted run resumes
+    registry = URLRegistry()
+    added = update_registry(registry, crawl=True, max_depth=3, state=CrawlStateStore(registry.base_url))
+    urls = registry.urls()
     
     # Save to files
-    extractor.save_urls_to_file(urls, "capitalx_urls.txt")
-    extractor.generate_markdown_report(urls, "CAPITALX_URLS.md")
+    export_url_lists(urls)
+    changed = export_url_tables(registry.named_urls())
     
     # Print summary
     print(f"\n✅ URL Extraction Complete!")
-    print(f"📊 Total URLs Found: {len(urls)}")
+    print(f"📊 Total URLs Found: {len(urls)} ({added.get('crawl', 0)} new from the crawl)")
     print(f"📁 Files Generated:")
     print(f"   - capitalx_urls.txt (Plain text list)")
     print(f"   - CAPITALX_URLS.md (Formatted markdown report)")
+    for path in changed:
+        print(f"   - {path} (URL table regenerated)")
     print(f"\n📋 Sample URLs:")
     for url in urls[:10]:
         print(f"   - {url}")
@@ -186,4 +138,4 @@ def main():
         print(f"   ... and {len(urls) - 10} more")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -3,9 +3,13 @@ Handlers module for CapitalX Support Telegram Bot
 Contains all command and button handlers for the bot.
 """
 
+import asyncio
 import logging
 from typing import Optional, Dict, Callable
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, User
+from telegram import (
+    Update, InlineKeyboardButton, InlineKeyboardMarkup, User,
+    InlineQueryResultArticle, InputTextMessageContent
+)
 from telegram.ext import ContextTypes
 from database import add_user, log_command
 from kb import search_kb, search_kb_detailed
@@ -13,6 +17,10 @@ from enhanced_keyword_search import (
     search_kb_detailed_enhanced_v2,
     search_kb_enhanced_v2
 )
+from spell_correction import suggest_correction
+from query_analytics import search_session
+from inline_search import complete_query, INLINE_CACHE_TIME
+from kb_versioning import VersionedCache
 from utils import (
     get_main_menu_markup,
     get_back_to_menu_markup,
@@ -22,6 +30,18 @@ from utils import (
 
 logger = logging.getLogger(__name__)
 
+# /search replies keyed by query text; emptied automatically when the KB version changes
+search_answer_cache = VersionedCache()
+
+# The /refresh_kb progress task polls the background refresh this often, for at most this long (seconds)
+REFRESH_PROGRESS_INTERVAL = 0.5
+REFRESH_PROGRESS_TIMEOUT = 60.0
+REFRESH_STAGE_MESSAGES = {
+    "fetching": "🌐 Checking the CapitalX website for updates...",
+    "parsing": "📄 New content found, reading it...",
+    "saving": "💾 Saving the updated knowledge base...",
+}
+
 # ------------------------------
 # Command Handlers
 # ------------------------------
@@ -124,26 +144,51 @@ async def refresh_kb_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         log_command(chat_id, "/refresh_kb")
         
         # Import here to avoid circular imports
-        from kb import refresh_knowledge_base
+        from kb_refresh import kb_refresher
         
         # Send "working" message
         working_msg = await update.message.reply_text("🔄 Updating CapitalX knowledge base...")
         
-        # Refresh the knowledge base
-        success = refresh_knowledge_base()
+        # Refresh runs in the background; the bot keeps answering from the current KB meanwhile
+        if not kb_refresher.start("command"):
+            await working_msg.edit_text("🔄 A knowledge base update is already in progress. Searches use the current data meanwhile.")
+            return
+        
+        # Progress is reported from its own task so this handler returns and other chats are served
+        context.application.create_task(report_refresh_progress(working_msg, kb_refresher), update=update)
+        logger.info(f"Refresh KB command handled for user {chat_id}")
         
-        if success:
+    except Exception as e:
+        log_error(logger, "refresh_kb_command", e)
+        if update.message:
+            await update.message.reply_text("Sorry, something went wrong while updating the knowledge base.")
+
+async def report_refresh_progress(working_msg, kb_refresher) -> None:
+    """Edit the /refresh_kb reply as the background refresh moves through its stages."""
+    try:
+        stage = None
+        waited = 0.0
+        while kb_refresher.is_running() and waited < REFRESH_PROGRESS_TIMEOUT:
+            await asyncio.sleep(REFRESH_PROGRESS_INTERVAL)
+            waited += REFRESH_PROGRESS_INTERVAL
+            current = kb_refresher.get_status()["stage"]
+            if current != stage and current in REFRESH_STAGE_MESSAGES:
+                stage = current
+                await working_msg.edit_text(REFRESH_STAGE_MESSAGES[stage])
+        
+        success = kb_refresher.get_status()["success"]
+        if kb_refresher.is_running():
+            await working_msg.edit_text("⏳ The knowledge base update is still running in the background. Latest information will be available shortly.")
+        elif success:
             await working_msg.edit_text("✅ CapitalX knowledge base updated successfully! Latest information is now available.")
         else:
             # If web update fails, we still have our CapitalX data
             await working_msg.edit_text("ℹ️ CapitalX knowledge base is using the latest available data. Web update not required.")
         
-        logger.info(f"Refresh KB command handled for user {chat_id}, success: {success}")
+        logger.info(f"Knowledge base refresh requested by /refresh_kb finished, success: {success}")
         
     except Exception as e:
-        log_error(logger, "refresh_kb_command", e)
-        if update.message:
-            await update.message.reply_text("Sorry, something went wrong while updating the knowledge base.")
+        log_error(logger, "report_refresh_progress", e)
 
 async def search_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle the /search command with enhanced search capabilities."""
@@ -160,14 +205,32 @@ async def search_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             
         log_command(chat_id, f"/search {query}")
         
-        # Try enhanced detailed search first (V2)
-        results = search_kb_detailed_enhanced_v2(query)
-        
-        # If still no results, fall back to original search
-        if not results:
-            results = search_kb_detailed(query)
-        
-        response = format_search_results(results, query)
+        with search_session(query, "search_command") as session:
+            # Rendered answers are reused until the KB version changes
+            cached = search_answer_cache.get(query)
+            if cached is not None:
+                response, corrected_query, outcome = cached
+                if corrected_query:
+                    session.mark_corrected(corrected_query)
+                session.mark_cached(outcome)
+            else:
+                # Try enhanced detailed search first (V2)
+                results = search_kb_detailed_enhanced_v2(query)
+                
+                # If still no results, fall back to original search
+                if not results:
+                    results = search_kb_detailed(query)
+                
+                # If nothing matched, re-run the search with misspelled words corrected
+                corrected_query = None
+                if not results:
+                    corrected_query = suggest_correction(query)
+                    if corrected_query:
+                        session.mark_corrected(corrected_query)
+                        results = search_kb_detailed_enhanced_v2(corrected_query) or search_kb_detailed(corrected_query)
+                
+                response = format_search_results(results, query, corrected_query if results else None)
+                search_answer_cache.set(query, (response, corrected_query, session.outcome()))
         
         reply_markup = get_main_menu_markup()
         await update.message.reply_text(response, reply_markup=reply_markup)
@@ -394,113 +457,128 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         message_text = update.message.text.strip()
         log_command(chat_id, f"message: {message_text[:50]}...")
 
-        # First try the new enhanced keyword search (V2)
-        response = search_kb_enhanced_v2(message_text)
-        
-        # If no result from enhanced search, fall back to original search
-        if not response:
-            response = search_kb(None, message_text)
-        
-        # Handle specific common issues with targeted responses
-        message_lower = message_text.lower()
-        
-        # Deposit issues
-        if any(keyword in message_lower for keyword in ["deposit", "cant deposit", "cannot deposit", "deposit problem"]):
-            response = (
-                "📥 **Deposit Options Help:**\n\n"
-                "**For Bonus Path Investors**:\n"
-                "• Use your R50 registration bonus to start immediately\n"
-                "• No additional deposit needed for first investment\n\n"
-                "**For Direct Path Investors**:\n"
-                "• Minimum deposit: R50\n"
-                "• Supported methods: Card, EFT, Bitcoin, Vouchers\n"
-                "• Processing time: 24-48 hours\n"
-                "• Ensure payment details are correct\n\n"
-                "Still having issues? Click 'Contact Support' below."
-            )
-        
-        # Withdrawal issues
-        elif any(keyword in message_lower for keyword in ["withdraw", "cant withdraw", "cannot withdraw", "withdrawal problem"]):
-            response = (
-                "📤 **Withdrawal Issues Help:**\n\n"
-                "**For All Investors** (Bonus Path & Direct Path):\n"
-                "• Minimum withdrawal: R50\n"
-                "• Processing time: 24-48 hours\n"
-                "• Must deposit 50% of earnings first\n"
-                "• Verify banking details are correct\n\n"
-                "Note: This requirement applies to all earnings, whether from bonuses or direct deposits.\n\n"
-                "Still having issues? Click 'Contact Support' below."
-            )
-        
-        # Payment method questions
-        elif any(keyword in message_lower for keyword in ["payment", "methods", "pay", "bitcoin", "card", "eft"]):
-            response = (
-                "💰 **Payment Methods:**\n\n"
-                "**Available for Direct Path Investors**:\n"
-                "• Card Payments (Credit/Debit)\n"
-                "• EFT (Bank Transfer)\n"
-                "• Bitcoin (Cryptocurrency)\n"
-                "• Voucher Codes\n\n"
-                "**Bonus Path Investors**:\n"
-                "• Start with R50 registration bonus\n"
-                "• Can upgrade to direct methods anytime\n\n"
-                "Minimum deposit for all direct methods: R50"
-            )
-        
-        # Tier/Investment questions with bonus vs direct differentiation
-        elif any(keyword in message_lower for keyword in ["tier", "investment", "plan", "r70", "return", "profit"]):
-            response = (
-                "📊 **Investment Tiers Overview:**\n\n"
-                "CapitalX offers a 3-stage tier system (R70 to R50,000) for both Bonus Path and Direct Path investors:\n\n"
-                "**For Bonus Path Investors**:\n"
-                "• Start with R50 bonus to access Tier 1 (R70 investment)\n"
-                "• Can reinvest bonus returns for compound growth\n\n"
-                "**For Direct Path Investors**:\n"
-                "• Directly invest your own funds in any tier\n"
-                "• Full control over investment amounts\n\n"
-                "All tiers offer 100% guaranteed returns over 7 days.\n"
-                "Click 'Investment Tiers' below for detailed information."
-            )
-        
-        # Bonus-specific questions
-        elif any(keyword in message_lower for keyword in ["bonus", "free", "r50", "registration bonus"]):
-            response = (
-                "🎁 **Bonus Information - Two Investment Paths**:\n\n"
-                "**Bonus Path Investors**:\n"
-                "• Get R50 free registration bonus upon sign up\n"
-                "• Use bonus to start investing immediately\n"
-                "• Bonus tracked separately in your wallet\n"
-                "• Perfect for testing with no risk\n\n"
-                "**Direct Path Investors**:\n"
-                "• Skip bonus and deposit your own funds\n"
-                "• Full control over investment strategy\n"
-                "• Can still earn referral bonuses\n\n"
-                "Both paths lead to the same investment opportunities!"
-            )
-        
-        # Website/URL questions
-        elif any(keyword in message_lower for keyword in ["website", "link", "url", "site", "capitalx", "register", "registration"]):
-            response = (
-                "🌐 **CapitalX Website Links:**\n\n"
-                "• Main Website: https://capitalx-rtn.onrender.com/\n"
-                "• Registration Page: https://capitalx-rtn.onrender.com/register/\n\n"
-                "💡 **Quick Access Tips:**\n"
-                "• Bookmark the main website for easy access\n"
-                "• Registration page is where you create your account\n"
-                "• All investment activities happen on the main site\n\n"
-                "Need help with registration or accessing the site? Click 'Contact Support' below."
-            )
-        
-        elif not response:
-            response = (
-                "Sorry, I couldn't find specific information about that. Try the menu below or ask about:\n"
-                "• Registration & Account Setup\n"
-                "• Deposits & Withdrawals\n"
-                "• Bonuses & Referrals\n"
-                "• Investment Tiers\n"
-                "• Contact & Support\n\n"
-                "You can also use `/search [your question]` for detailed search."
-            )
+        with search_session(message_text, "message") as session:
+            # First try the new enhanced keyword search (V2)
+            response = search_kb_enhanced_v2(message_text)
+        
+            # If no result from enhanced search, fall back to original search
+            if not response:
+                response = search_kb(None, message_text)
+        
+            # If nothing matched, retry with misspelled words corrected
+            message_lower = message_text.lower()
+            if not response:
+                corrected_text = suggest_correction(message_text)
+                if corrected_text:
+                    session.mark_corrected(corrected_text)
+                    response = search_kb_enhanced_v2(corrected_text) or search_kb(None, corrected_text)
+                    message_lower = corrected_text
+        
+            # Handle specific common issues with targeted responses
+        
+            # Deposit issues
+            if any(keyword in message_lower for keyword in ["deposit", "cant deposit", "cannot deposit", "deposit problem"]):
+                session.mark_handled("deposit_rule")
+                response = (
+                    "📥 **Deposit Options Help:**\n\n"
+                    "**For Bonus Path Investors**:\n"
+                    "• Use your R50 registration bonus to start immediately\n"
+                    "• No additional deposit needed for first investment\n\n"
+                    "**For Direct Path Investors**:\n"
+                    "• Minimum deposit: R50\n"
+                    "• Supported methods: Card, EFT, Bitcoin, Vouchers\n"
+                    "• Processing time: 24-48 hours\n"
+                    "• Ensure payment details are correct\n\n"
+                    "Still having issues? Click 'Contact Support' below."
+                )
+        
+            # Withdrawal issues
+            elif any(keyword in message_lower for keyword in ["withdraw", "cant withdraw", "cannot withdraw", "withdrawal problem"]):
+                session.mark_handled("withdrawal_rule")
+                response = (
+                    "📤 **Withdrawal Issues Help:**\n\n"
+                    "**For All Investors** (Bonus Path & Direct Path):\n"
+                    "• Minimum withdrawal: R50\n"
+                    "• Processing time: 24-48 hours\n"
+                    "• Must deposit 50% of earnings first\n"
+                    "• Verify banking details are correct\n\n"
+                    "Note: This requirement applies to all earnings, whether from bonuses or direct deposits.\n\n"
+                    "Still having issues? Click 'Contact Support' below."
+                )
+        
+            # Payment method questions
+            elif any(keyword in message_lower for keyword in ["payment", "methods", "pay", "bitcoin", "card", "eft"]):
+                session.mark_handled("payment_rule")
+                response = (
+                    "💰 **Payment Methods:**\n\n"
+                    "**Available for Direct Path Investors**:\n"
+                    "• Card Payments (Credit/Debit)\n"
+                    "• EFT (Bank Transfer)\n"
+                    "• Bitcoin (Cryptocurrency)\n"
+                    "• Voucher Codes\n\n"
+                    "**Bonus Path Investors**:\n"
+                    "• Start with R50 registration bonus\n"
+                    "• Can upgrade to direct methods anytime\n\n"
+                    "Minimum deposit for all direct methods: R50"
+                )
+        
+            # Tier/Investment questions with bonus vs direct differentiation
+            elif any(keyword in message_lower for keyword in ["tier", "investment", "plan", "r70", "return", "profit"]):
+                session.mark_handled("tier_rule")
+                response = (
+                    "📊 **Investment Tiers Overview:**\n\n"
+                    "CapitalX offers a 3-stage tier system (R70 to R50,000) for both Bonus Path and Direct Path investors:\n\n"
+                    "**For Bonus Path Investors**:\n"
+                    "• Start with R50 bonus to access Tier 1 (R70 investment)\n"
+                    "• Can reinvest bonus returns for compound growth\n\n"
+                    "**For Direct Path Investors**:\n"
+                    "• Directly invest your own funds in any tier\n"
+                    "• Full control over investment amounts\n\n"
+                    "All tiers offer 100% guaranteed returns over 7 days.\n"
+                    "Click 'Investment Tiers' below for detailed information."
+                )
+        
+            # Bonus-specific questions
+            elif any(keyword in message_lower for keyword in ["bonus", "free", "r50", "registration bonus"]):
+                session.mark_handled("bonus_rule")
+                response = (
+                    "🎁 **Bonus Information - Two Investment Paths**:\n\n"
+                    "**Bonus Path Investors**:\n"
+                    "• Get R50 free registration bonus upon sign up\n"
+                    "• Use bonus to start investing immediately\n"
+                    "• Bonus tracked separately in your wallet\n"
+                    "• Perfect for testing with no risk\n\n"
+                    "**Direct Path Investors**:\n"
+                    "• Skip bonus and deposit your own funds\n"
+                    "• Full control over investment strategy\n"
+                    "• Can still earn referral bonuses\n\n"
+                    "Both paths lead to the same investment opportunities!"
+                )
+        
+            # Website/URL questions
+            elif any(keyword in message_lower for keyword in ["website", "link", "url", "site", "capitalx", "register", "registration"]):
+                session.mark_handled("website_rule")
+                response = (
+                    "🌐 **CapitalX Website Links:**\n\n"
+                    "• Main Website: https://capitalx-rtn.onrender.com/\n"
+                    "• Registration Page: https://capitalx-rtn.onrender.com/register/\n\n"
+                    "💡 **Quick Access Tips:**\n"
+                    "• Bookmark the main website for easy access\n"
+                    "• Registration page is where you create your account\n"
+                    "• All investment activities happen on the main site\n\n"
+                    "Need help with registration or accessing the site? Click 'Contact Support' below."
+                )
+        
+            elif not response:
+                response = (
+                    "Sorry, I couldn't find specific information about that. Try the menu below or ask about:\n"
+                    "• Registration & Account Setup\n"
+                    "• Deposits & Withdrawals\n"
+                    "• Bonuses & Referrals\n"
+                    "• Investment Tiers\n"
+                    "• Contact & Support\n\n"
+                    "You can also use `/search [your question]` for detailed search."
+                )
 
         reply_markup = get_main_menu_markup()
         await update.message.reply_text(response, reply_markup=reply_markup)
@@ -510,6 +588,33 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         if update.message:
             await update.message.reply_text("Sorry, I couldn't process your message. Please try again.")
 
+# ------------------------------
+# Inline Query Handler (@bot autocomplete)
+# ------------------------------
+
+async def inline_query_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Answer inline queries with knowledge base entries matching the typed prefix."""
+    try:
+        inline_query = update.inline_query
+        if not inline_query:
+            return
+        
+        results = [
+            InlineQueryResultArticle(
+                id=str(entry.entry_id),
+                title=entry.title,
+                description=entry.content[:100],
+                input_message_content=InputTextMessageContent(entry.content[:4096])
+            )
+            for entry in complete_query(inline_query.query)
+        ]
+        
+        # Answers depend only on the prefix, so let Telegram share its cache across users
+        await inline_query.answer(results, cache_time=INLINE_CACHE_TIME, is_personal=False)
+        
+    except Exception as e:
+        log_error(logger, "inline_query_handler", e)
+
 # ------------------------------
 # Helper: Edit message with back button
 # ------------------------------
@@ -5,8 +5,9 @@ This provides a web interface for Render to bind to a port while running the bot
 """
 
 import os
+import hmac
 import time
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 from dotenv import load_dotenv
 import logging
 import sys
@@ -14,6 +15,11 @@ import subprocess
 import threading
 import signal
 
+from search_metrics import load_search_metrics
+from query_analytics import load_query_analytics
+from kb_refresh import load_refresh_status
+from api_resilience import load_api_metrics
+
 # Load environment variables
 load_dotenv()
 
@@ -23,6 +29,10 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+# Query lists on /metrics/queries hold raw user messages; only requests with this token see them
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+QUERY_TEXT_FIELDS = ("top_queries", "top_missed", "top_low_confidence")
+
 # Global variable to track bot status
 bot_status = {
     "running": False,
@@ -84,7 +94,70 @@ def status_check():
         "status": "running" if bot_status["running"] else "stopped",
         "service": "CapitalX-Telegram-Bot",
         "environment": os.getenv("ENVIRONMENT", "production"),
-        "bot_status": bot_status
+        "bot_status": bot_status,
+        "kb_refresh": load_refresh_status()
+    })
+
+@app.route('/metrics/search')
+def search_metrics_check():
+    """Search pipeline stage histograms and slow-query log from the bot process."""
+    snapshot = load_search_metrics()
+    if snapshot is None:
+        return jsonify({
+            "status": "no_data",
+            "message": "The bot process has not written search metrics yet"
+        })
+    
+    return jsonify({
+        "status": "ok",
+        "age_seconds": round(time.time() - snapshot.get("generated_at", time.time()), 1),
+        "search_metrics": snapshot
+    })
+
+def metrics_token_valid():
+    """Whether the request carries METRICS_TOKEN as a bearer token."""
+    if not METRICS_TOKEN:
+        return False
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), METRICS_TOKEN.encode())
+
+@app.route('/metrics/queries')
+def query_analytics_check():
+    """Top missed and low-confidence queries aggregated by the bot process.
+    
+    Without a valid METRICS_TOKEN only the counts are shown, never the query text.
+    """
+    snapshot = load_query_analytics()
+    if snapshot is None:
+        return jsonify({
+            "status": "no_data",
+            "message": "The bot process has not written query analytics yet"
+        })
+    
+    if not metrics_token_valid():
+        for field in QUERY_TEXT_FIELDS:
+            snapshot.pop(field, None)
+    
+    return jsonify({
+        "status": "ok",
+        "age_seconds": round(time.time() - snapshot.get("generated_at", time.time()), 1),
+        "query_analytics": snapshot
+    })
+
+@app.route('/metrics/api')
+def api_metrics_check():
+    """CapitalX API circuit breaker states and retry counters from the bot process."""
+    snapshot = load_api_metrics()
+    if snapshot is None:
+        return jsonify({
+            "status": "no_data",
+            "message": "The bot process has not written API metrics yet"
+        })
+    
+    return jsonify({
+        "status": "degraded" if snapshot.get("open_circuits") else "ok",
+        "age_seconds": round(time.time() - snapshot.get("generated_at", time.time()), 1),
+        "api_metrics": snapshot
     })
 
 @app.route('/restart')
@@ -128,6 +201,9 @@ def home():
         "endpoints": {
             "health": "/health",
             "status": "/status",
+            "search_metrics": "/metrics/search",
+            "query_analytics": "/metrics/queries",
+            "api_metrics": "/metrics/api",
             "restart": "/restart",
             "info": "/"
         },
@@ -0,0 +1,141 @@
+"""
+HTML Parsing Module
+Pluggable HTML parsing backends for the KB scraper and the URL extractors.
+
+Link extraction never builds a document tree: the stdlib and lxml backends stream
+start tags through a callback, and selectolax parses in C far faster than any
+Python tree builder. Code that does need a tree (kb_scraper) gets a BeautifulSoup
+built with lxml when it's installed instead of the slow pure-Python html.parser.
+
+The fastest installed backend is used unless HTML_PARSER_BACKEND names another.
+"""
+
+import importlib.util
+import logging
+import os
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+# Fastest first; html.parser (stdlib) is always available
+BACKENDS = ("selectolax", "lxml", "html.parser")
+HTML_PARSER_BACKEND = os.getenv("HTML_PARSER_BACKEND", "")
+
+# Tag -> attribute holding a URL that the crawlers follow
+LINK_ATTRIBUTES = {"a": "href", "form": "action"}
+
+
+def available_backends() -> List[str]:
+    """Installed backends, fastest first."""
+    return [name for name in BACKENDS if name == "html.parser" or importlib.util.find_spec(name) is not None]
+
+
+def get_backend(name: Optional[str] = None) -> str:
+    """Resolve a backend name, falling back to the fastest installed one."""
+    name = name or HTML_PARSER_BACKEND
+    installed = available_backends()
+    if name and name not in installed:
+        logger.warning(f"HTML parser backend '{name}' is not installed, using {installed[0]}")
+        name = None
+    return name or installed[0]
+
+
+def make_soup(html: str) -> BeautifulSoup:
+    """BeautifulSoup tree built with lxml when installed, html.parser otherwise."""
+    return BeautifulSoup(html, "lxml" if "lxml" in available_backends() else "html.parser")
+
+
+class _LinkCollector(HTMLParser):
+    """Streams start tags and keeps only link attributes; no tree is built."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        attribute = LINK_ATTRIBUTES.get(tag)
+        if attribute:
+            for name, value in attrs:
+                if name == attribute and value is not None:
+                    self.links.append(value)
+                    break
+
+
+class _LxmlLinkTarget:
+    """lxml parser target: receives start tags as events instead of building elements."""
+
+    def __init__(self):
+        self.links: List[str] = []
+
+    def start(self, tag, attrib):
+        attribute = LINK_ATTRIBUTES.get(tag)
+        if attribute:
+            value = attrib.get(attribute)
+            if value is not None:
+                self.links.append(value)
+
+    def end(self, tag):
+        pass
+
+    def data(self, data):
+        pass
+
+    def close(self):
+        return self.links
+
+
+def _raw_links_stdlib(html: str) -> List[str]:
+    collector = _LinkCollector()
+    collector.feed(html)
+    collector.close()
+    return collector.links
+
+
+def _raw_links_lxml(html: str) -> List[str]:
+    from lxml import etree
+    parser = etree.HTMLParser(target=_LxmlLinkTarget())
+    parser.feed(html)
+    return parser.close()
+
+
+def _raw_links_selectolax(html: str) -> List[str]:
+    from selectolax.parser import HTMLParser as SelectolaxParser
+    links = []
+    for node in SelectolaxParser(html).css("a[href], form[action]"):
+        value = node.attributes.get(LINK_ATTRIBUTES[node.tag])
+        if value is not None:
+            links.append(value)
+    return links
+
+
+_LINK_EXTRACTORS = {
+    "selectolax": _raw_links_selectolax,
+    "lxml": _raw_links_lxml,
+    "html.parser": _raw_links_stdlib,
+}
+
+
+def extract_links(html: str, page_url: str, backend: Optional[str] = None) -> List[str]:
+    """
+    Absolute URLs of every link and form action in a page, in document order.
+
+    Args:
+        html: Page source
+        page_url: URL the page was fetched from, for resolving relative links
+        backend: Backend name; defaults to HTML_PARSER_BACKEND or the fastest installed
+
+    Returns:
+        List of absolute URLs (duplicates kept, as in the page)
+    """
+    if not html:
+        return []
+    try:
+        raw_links = _LINK_EXTRACTORS[get_backend(backend)](html)
+    except Exception as e:
+        logger.warning(f"Link extraction failed for {page_url}, retrying with html.parser: {e}")
+        raw_links = _raw_links_stdlib(html)
+    return [urljoin(page_url, link) for link in raw_links]
@@ -0,0 +1,350 @@
+"""
+HTTP Cassette Module
+Records real HTTP exchanges once and replays them offline, deterministically.
+
+A cassette is a gzipped JSON file of interactions (method, URL, request body hash,
+status, a few response headers) with response bodies stored once per distinct
+content. It plugs in underneath the existing clients, so the code under test keeps
+its own session:
+
+    cassette = Cassette.load("cassettes/capitalx.json.gz")
+    install(scraper.session, cassette)                       # requests.Session
+    client = httpx.AsyncClient(transport=AsyncCassetteTransport(cassette))
+
+Replays can inject latency and failures from a seeded FaultProfile, so a slow or
+flaky site can be reproduced run after run.
+"""
+
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from datetime import timedelta
+from typing import Dict, List, Optional, Any, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import httpx
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+
+# Only these response headers are kept; the rest is noise that bloats the cassette
+RECORDED_HEADERS = ("content-type", "etag", "last-modified", "location", "cache-control", "expires", "retry-after")
+
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """A replayed request has no recorded interaction."""
+
+
+def normalize_url(url: str) -> str:
+    """URL with its fragment dropped and query parameters sorted, used as the match key."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path or "/", query, ""))
+
+
+def _body_digest(body: Any) -> Optional[str]:
+    if not body:
+        return None
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return hashlib.sha256(body).hexdigest()[:16]
+
+
+def _kept_headers(headers: Any) -> Dict[str, str]:
+    return {name: headers[name] for name in RECORDED_HEADERS if name in headers}
+
+
+class FaultProfile:
+    """Latency and failures injected into replayed requests, drawn from a seeded RNG."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 error_status: Optional[int] = None, recorded_latency: bool = False, seed: int = 0):
+        """
+        Args:
+            latency: Seconds added to every request
+            jitter: Up to this many extra seconds, uniformly distributed
+            error_rate: Fraction of requests that fail
+            error_status: Failed requests get this HTTP status; None raises a connection error
+            recorded_latency: Also wait as long as the live request took when it was recorded
+            seed: RNG seed, so the same run injects the same faults
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.recorded_latency = recorded_latency
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self, interaction: Optional[Dict[str, Any]] = None) -> Tuple[float, bool]:
+        """
+        Decide the fate of one request.
+
+        Returns:
+            (seconds to wait, whether the request fails)
+        """
+        with self._lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            failed = bool(self.error_rate) and self._random.random() < self.error_rate
+        if self.recorded_latency and interaction:
+            delay += interaction.get("elapsed", 0.0)
+        return delay, failed
+
+
+class Cassette:
+    """Recorded interactions, matched on method, normalized URL and request body."""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: File the cassette is loaded from and saved to
+        """
+        self.path = path
+        self.interactions: List[Dict[str, Any]] = []
+        self.bodies: Dict[str, str] = {}
+        self._index: Dict[Tuple, List[Dict[str, Any]]] = {}
+        self._cursor: Dict[Tuple, int] = {}
+        self._lock = threading.Lock()
+        self.stats = {"recorded": 0, "replayed": 0, "misses": 0, "injected_errors": 0}
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        """Read a cassette file written by save()."""
+        cassette = cls(path)
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version {data.get('version')} in {path}")
+        cassette.bodies = data["bodies"]
+        for interaction in data["interactions"]:
+            cassette._add(interaction)
+        logger.info(f"Loaded {len(cassette.interactions)} interactions from {path}")
+        return cassette
+
+    def save(self, path: Optional[str] = None) -> str:
+        """Write the cassette; returns the path written."""
+        path = path or self.path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            data = {"version": CASSETTE_VERSION, "interactions": self.interactions, "bodies": self.bodies}
+        # No name or mtime in the header keeps identical recordings byte-identical
+        with open(path, "wb") as raw, gzip.GzipFile(filename="", fileobj=raw, mode="wb", mtime=0) as f:
+            f.write(json.dumps(data, separators=(",", ":"), sort_keys=True).encode("utf-8"))
+        logger.info(f"Saved {len(self.interactions)} interactions to {path}")
+        return path
+
+    @staticmethod
+    def _key(method: str, url: str, body_hash: Optional[str]) -> Tuple:
+        return (method.upper(), normalize_url(url), body_hash)
+
+    def _add(self, interaction: Dict[str, Any]) -> None:
+        self.interactions.append(interaction)
+        key = self._key(interaction["method"], interaction["url"], interaction.get("request_hash"))
+        self._index.setdefault(key, []).append(interaction)
+
+    def record(self, method: str, url: str, request_body: Any, status: int, headers: Any,
+               content: bytes, elapsed: float) -> None:
+        """Add a live exchange; identical bodies are stored once."""
+        body_id = hashlib.sha256(content).hexdigest()[:16]
+        interaction = {
+            "method": method.upper(),
+            "url": url,
+            "request_hash": _body_digest(request_body),
+            "status": status,
+            "headers": _kept_headers(headers),
+            "body": body_id,
+            "elapsed": round(elapsed, 4)
+        }
+        with self._lock:
+            self.bodies.setdefault(body_id, base64.b64encode(content).decode("ascii"))
+            self._add(interaction)
+            self.stats["recorded"] += 1
+
+    def match(self, method: str, url: str, request_body: Any = None) -> Optional[Dict[str, Any]]:
+        """
+        Find the recorded interaction for a request.
+
+        Repeated requests get the recorded responses in order, then the last one again.
+
+        Returns:
+            The interaction, or None if nothing was recorded for this request
+        """
+        key = self._key(method, url, _body_digest(request_body))
+        with self._lock:
+            candidates = self._index.get(key)
+            if not candidates:
+                self.stats["misses"] += 1
+                return None
+            position = self._cursor.get(key, 0)
+            self._cursor[key] = position + 1
+            self.stats["replayed"] += 1
+            return candidates[min(position, len(candidates) - 1)]
+
+    def body_of(self, interaction: Dict[str, Any]) -> bytes:
+        return base64.b64decode(self.bodies[interaction["body"]])
+
+    def rewind(self) -> None:
+        """Start replaying every URL from its first recorded response again."""
+        with self._lock:
+            self._cursor = {}
+
+    def note_injected_error(self) -> None:
+        with self._lock:
+            self.stats["injected_errors"] += 1
+
+
+def _replay_status(interaction: Dict[str, Any], request_headers: Any) -> int:
+    """304 when the request's validators match the recording, like the live server would."""
+    headers = interaction["headers"]
+    if interaction["status"] == 200:
+        if headers.get("etag") and request_headers.get("If-None-Match") == headers["etag"]:
+            return 304
+        if headers.get("last-modified") and request_headers.get("If-Modified-Since") == headers["last-modified"]:
+            return 304
+    return interaction["status"]
+
+
+class CassetteAdapter(BaseAdapter):
+    """requests transport adapter that records to, or replays from, a cassette."""
+
+    def __init__(self, cassette: Cassette, mode: str = MODE_REPLAY, faults: Optional[FaultProfile] = None):
+        """
+        Args:
+            cassette: Where interactions are stored
+            mode: MODE_RECORD to hit the network and save, MODE_REPLAY to stay offline
+            faults: Latency and errors injected into replays
+        """
+        super().__init__()
+        self.cassette = cassette
+        self.mode = mode
+        self.faults = faults or FaultProfile()
+        self._live = HTTPAdapter() if mode == MODE_RECORD else None
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if self._live:
+            started = time.perf_counter()
+            response = self._live.send(request, stream=False, timeout=timeout, verify=verify,
+                                       cert=cert, proxies=proxies)
+            self.cassette.record(request.method, request.url, request.body, response.status_code,
+                                 response.headers, response.content, time.perf_counter() - started)
+            return response
+
+        interaction = self.cassette.match(request.method, request.url, request.body)
+        if interaction is None:
+            logger.warning(f"No recorded response for {request.method} {request.url}")
+            raise CassetteMiss(f"No recorded response for {request.method} {request.url}", request=request)
+        delay, failed = self.faults.draw(interaction)
+        if delay:
+            time.sleep(delay)
+        status = _replay_status(interaction, request.headers)
+        content = b"" if status == 304 else self.cassette.body_of(interaction)
+        if failed:
+            self.cassette.note_injected_error()
+            if self.faults.error_status is None:
+                raise requests.exceptions.ConnectionError(f"Injected failure for {request.url}", request=request)
+            status, content = self.faults.error_status, b""
+        return self._build_response(request, status, interaction["headers"], content, delay)
+
+    @staticmethod
+    def _build_response(request, status: int, headers: Dict[str, str], content: bytes, elapsed: float):
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = content
+        response.url = request.url
+        response.request = request
+        response.reason = "Replayed"
+        response.elapsed = timedelta(seconds=elapsed)
+        return response
+
+    def close(self):
+        if self._live:
+            self._live.close()
+
+
+class AsyncCassetteTransport(httpx.AsyncBaseTransport):
+    """httpx transport that records to, or replays from, a cassette."""
+
+    def __init__(self, cassette: Cassette, mode: str = MODE_REPLAY, faults: Optional[FaultProfile] = None):
+        """
+        Args:
+            cassette: Where interactions are stored
+            mode: MODE_RECORD to hit the network and save, MODE_REPLAY to stay offline
+            faults: Latency and errors injected into replays
+        """
+        self.cassette = cassette
+        self.mode = mode
+        self.faults = faults or FaultProfile()
+        self._live = httpx.AsyncHTTPTransport() if mode == MODE_RECORD else None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        body = await request.aread()
+        if self._live:
+            started = time.perf_counter()
+            live = await self._live.handle_async_request(request)
+            # Read through a Response so the content is decoded like the client would see it
+            response = httpx.Response(live.status_code, headers=live.headers, stream=live.stream, request=request)
+            content = await response.aread()
+            await response.aclose()
+            self.cassette.record(request.method, url, body, response.status_code, response.headers,
+                                 content, time.perf_counter() - started)
+            return httpx.Response(response.status_code, headers=_kept_headers(response.headers),
+                                  content=content, request=request)
+
+        interaction = self.cassette.match(request.method, url, body)
+        if interaction is None:
+            logger.warning(f"No recorded response for {request.method} {url}")
+            raise httpx.ConnectError(f"No recorded response for {request.method} {url}", request=request)
+        delay, failed = self.faults.draw(interaction)
+        if delay:
+            await asyncio.sleep(delay)
+        status = _replay_status(interaction, request.headers)
+        content = b"" if status == 304 else self.cassette.body_of(interaction)
+        if failed:
+            self.cassette.note_injected_error()
+            if self.faults.error_status is None:
+                raise httpx.ConnectError(f"Injected failure for {url}", request=request)
+            status, content = self.faults.error_status, b""
+        return httpx.Response(status, headers=interaction["headers"], content=content, request=request)
+
+    async def aclose(self) -> None:
+        if self._live:
+            await self._live.aclose()
+
+
+def install(session: requests.Session, cassette: Cassette, mode: str = MODE_REPLAY,
+            faults: Optional[FaultProfile] = None) -> CassetteAdapter:
+    """
+    Route every request made through an existing requests.Session via a cassette.
+
+    Args:
+        session: Session of the client under test, e.g. KBScraper().session
+        cassette: Cassette to record to or replay from
+        mode: MODE_RECORD or MODE_REPLAY
+        faults: Latency and errors injected into replays
+
+    Returns:
+        The mounted adapter
+    """
+    adapter = CassetteAdapter(cassette, mode, faults)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return adapter
@@ -0,0 +1,257 @@
+"""
+HTTP Transport Module
+One set of pooled, instrumented HTTP connections for the whole process.
+
+Blocking callers (the CapitalX API client, kb_scraper, extract_urls, the bot
+start/stop scripts) get requests.Session objects from create_session(); each
+keeps its own headers, but all of them send through the same HTTPAdapter, so
+keep-alive connections to a host are reused across callers instead of every
+object (or every call) paying for a new TCP and TLS handshake. The adapter also
+applies a default timeout to requests made without one.
+
+Async callers (the async API client, the crawler, sitemap discovery, KB ingestion)
+get httpx.AsyncClient objects from create_async_client(), which share one
+connection pool per event loop. HTTP/2 is used for them when HTTP2_ENABLED is set
+and the optional h2 package is installed.
+
+Both paths record per-host request counts, errors and latency in transport_stats,
+which is reported on /metrics/api.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import os
+import threading
+import time
+import weakref
+from typing import Any, Awaitable, Dict, Optional, TypeVar
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_CONNECT_TIMEOUT_SECONDS = 5.0
+# Connections kept per host, and hosts kept, by the shared pools
+HTTP_MAX_CONNECTIONS = 20
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 10
+HTTP_POOL_HOSTS = 10
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "").lower() in ("1", "true", "yes")
+
+
+def default_timeout() -> httpx.Timeout:
+    """Timeout applied when a caller does not give one."""
+    return httpx.Timeout(HTTP_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT_SECONDS)
+
+
+def http2_available() -> bool:
+    """Whether HTTP/2 was asked for and the h2 package needed for it is installed."""
+    return HTTP2_ENABLED and importlib.util.find_spec("h2") is not None
+
+
+class TransportStats:
+    """Per-host request counters and latency shared by every pooled client."""
+
+    def __init__(self):
+        self._hosts: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, url: str, status_code: Optional[int], elapsed_ms: float) -> None:
+        """Count one request; status_code is None when no response arrived."""
+        host = urlsplit(str(url)).netloc or "unknown"
+        with self._lock:
+            stats = self._hosts.get(host)
+            if stats is None:
+                stats = self._hosts[host] = {"requests": 0, "errors": 0, "status": {}, "total_ms": 0.0, "max_ms": 0.0}
+            stats["requests"] += 1
+            key = f"{status_code // 100}xx" if status_code else "error"
+            stats["status"][key] = stats["status"].get(key, 0) + 1
+            if status_code is None or status_code >= 500:
+                stats["errors"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters per host, with mean and max time to response headers in milliseconds."""
+        with self._lock:
+            return {
+                host: {
+                    "requests": stats["requests"],
+                    "errors": stats["errors"],
+                    "status": dict(stats["status"]),
+                    "mean_ms": round(stats["total_ms"] / stats["requests"], 1),
+                    "max_ms": round(stats["max_ms"], 1)
+                }
+                for host, stats in sorted(self._hosts.items())
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hosts.clear()
+
+
+# Global stats shared by all pooled clients
+transport_stats = TransportStats()
+
+
+class SharedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter mounted into every session: pooled, instrumented and with a default timeout."""
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = (HTTP_CONNECT_TIMEOUT_SECONDS, HTTP_TIMEOUT_SECONDS)
+        started = time.perf_counter()
+        status_code = None
+        try:
+            response = super().send(request, timeout=timeout, **kwargs)
+            status_code = response.status_code
+            return response
+        finally:
+            transport_stats.record(request.url, status_code, (time.perf_counter() - started) * 1000)
+
+    def close(self):
+        # Sessions close their adapters; the shared pool outlives any one session
+        pass
+
+    def close_pool(self) -> None:
+        """Really close the pooled connections."""
+        super().close()
+
+
+_adapter: Optional[SharedHTTPAdapter] = None
+_adapter_lock = threading.Lock()
+_default_session: Optional[requests.Session] = None
+
+
+def get_shared_adapter() -> SharedHTTPAdapter:
+    """The process-wide adapter holding the blocking connection pools."""
+    global _adapter
+    with _adapter_lock:
+        if _adapter is None:
+            _adapter = SharedHTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_MAX_CONNECTIONS)
+        return _adapter
+
+
+def create_session(headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """
+    Create a requests.Session that sends through the shared connection pool.
+
+    Args:
+        headers: Headers for every request of this session (User-Agent, Authorization, ...)
+
+    Returns:
+        Session with its own headers and cookies but pooled connections
+    """
+    session = requests.Session()
+    adapter = get_shared_adapter()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Process-wide session with default headers, for one-off requests from scripts."""
+    global _default_session
+    if _default_session is None:
+        _default_session = create_session()
+    return _default_session
+
+
+class _SharedAsyncTransport(httpx.AsyncBaseTransport):
+    """Times every request; leaves the wrapped pool open when a client closes, unless it owns it."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, owned: bool):
+        self._transport = transport
+        self._owned = owned
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        status_code = None
+        try:
+            response = await self._transport.handle_async_request(request)
+            status_code = response.status_code
+            return response
+        finally:
+            transport_stats.record(request.url, status_code, (time.perf_counter() - started) * 1000)
+
+    async def aclose(self) -> None:
+        if self._owned:
+            await self._transport.aclose()
+
+
+# One pool per event loop: pooled connections belong to the loop that opened them, and the bot's
+# loop runs alongside short-lived asyncio.run() loops in KB refresh threads
+_async_transports: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport]" = \
+    weakref.WeakKeyDictionary()
+_async_transport_lock = threading.Lock()
+
+
+def get_async_transport() -> httpx.AsyncHTTPTransport:
+    """The connection pool shared by async clients created in the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _async_transport_lock:
+        transport = _async_transports.get(loop)
+        if transport is None:
+            http2 = http2_available()
+            if HTTP2_ENABLED and not http2:
+                logger.warning("HTTP2_ENABLED is set but the h2 package is not installed; using HTTP/1.1")
+            transport = _async_transports[loop] = httpx.AsyncHTTPTransport(
+                http2=http2,
+                limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS,
+                                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS)
+            )
+    return transport
+
+
+def create_async_client(transport: Optional[httpx.AsyncBaseTransport] = None, **kwargs) -> httpx.AsyncClient:
+    """
+    Create an httpx.AsyncClient on the shared, instrumented connection pool.
+
+    Closing the client leaves the shared pool open for the others.
+
+    Args:
+        transport: Transport to use instead of the shared pool, e.g. a MockTransport in tests;
+            it is closed with the client
+        **kwargs: Other httpx.AsyncClient arguments (base_url, headers, timeout, follow_redirects, ...)
+
+    Returns:
+        AsyncClient
+    """
+    kwargs.setdefault("timeout", default_timeout())
+    if transport is None:
+        wrapped = _SharedAsyncTransport(get_async_transport(), owned=False)
+    else:
+        wrapped = _SharedAsyncTransport(transport, owned=True)
+    return httpx.AsyncClient(transport=wrapped, **kwargs)
+
+
+async def close_async_transport() -> None:
+    """Close the running loop's shared async pool, e.g. on shutdown or before asyncio.run() returns."""
+    with _async_transport_lock:
+        transport = _async_transports.pop(asyncio.get_running_loop(), None)
+    if transport is not None:
+        await transport.aclose()
+
+
+def run_async(coro: Awaitable[T]) -> T:
+    """
+    asyncio.run() for blocking callers (KB refresh threads, CLI tools).
+
+    The loop's shared pool is closed before the loop is, so short-lived loops
+    never leave open connections behind.
+    """
+    async def run_and_close() -> T:
+        try:
+            return await coro
+        finally:
+            await close_async_transport()
+
+    return asyncio.run(run_and_close())
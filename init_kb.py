@@ -1,6 +1,8 @@
 import sqlite3
 import logging
 
+from kb_versioning import ensure_kb_schema, sync_kb_entries
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -11,28 +13,9 @@ def init_sample_kb():
     """Initialize the knowledge base with sample data."""
     try:
         conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
-        # Create enhanced KB table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS kb_enhanced (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                category TEXT NOT NULL,
-                subcategory TEXT,
-                keywords TEXT,
-                title TEXT NOT NULL,
-                content TEXT NOT NULL,
-                url TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
         
-        # Create index for faster searching
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_kb_search 
-            ON kb_enhanced(category, subcategory, keywords, title)
-        """)
+        # Create KB tables (or add versioning columns) if needed
+        ensure_kb_schema(conn)
         
         # Sample knowledge base entries
         kb_entries = [
@@ -46,15 +29,13 @@ def init_sample_kb():
             ("Account Management", "registration", "registration,signup,register,account", "How to Register", "📝 **How to Register:**\n\n1. Visit https://example.com/register/\n2. Fill in your details\n3. Get instant R50 bonus upon registration\n4. Start investing immediately!"),
         ]
         
-        # Clear existing entries and insert sample data
-        cursor.execute("DELETE FROM kb_enhanced")
-        
-        for category, subcategory, keywords, title, content in kb_entries:
-            if content.strip():  # Only insert if content exists
-                cursor.execute("""
-                    INSERT INTO kb_enhanced (category, subcategory, keywords, title, content, url)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (category, subcategory, keywords, title, content, "https://example.com/"))
+        # Sync entries; rows whose content hash is unchanged are not touched
+        rows = [
+            (category, subcategory, keywords, title, content, "https://example.com/")
+            for category, subcategory, keywords, title, content in kb_entries
+            if content.strip()  # Only keep entries with content
+        ]
+        sync_kb_entries(conn, rows)
         
         conn.commit()
         conn.close()
@@ -0,0 +1,284 @@
+"""
+Inline Search Module
+Prefix-trie autocomplete over the knowledge base for Telegram inline mode (@bot <prefix>).
+
+Every trie node stores the ids of the best-ranked entries in its subtree, computed
+once at build time. Answering a prefix is then a walk of len(prefix) dict lookups
+with no scoring or database access.
+"""
+
+import heapq
+import logging
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Iterable, NamedTuple, Tuple
+
+from kb_versioning import get_kb_version
+from search_config import KEYWORD_MAPPING
+from search_metrics import search_metrics
+
+logger = logging.getLogger(__name__)
+DB_FILE = "telegram_bot.db"
+
+# How many suggestions each node keeps, and how many Telegram is sent
+TOP_K = 10
+# Prefixes longer than this add nothing to ranking, only memory
+MAX_KEY_LENGTH = 40
+# Seconds Telegram may cache an answer; results are the same for every user
+INLINE_CACHE_TIME = int(os.getenv("INLINE_CACHE_TIME", "300"))
+
+TITLE_WEIGHT = 3.0
+KEYWORD_WEIGHT = 2.0
+TITLE_WORD_WEIGHT = 1.0
+# Phrases from KEYWORD_MAPPING are the queries users already type most often
+MAPPED_QUERY_WEIGHT = 2.5
+# Each recorded query of a phrase (from query analytics) adds this much
+POPULARITY_WEIGHT = 0.1
+
+KEY_PATTERN = re.compile(r"[^a-z0-9\s]")
+
+
+class InlineEntry(NamedTuple):
+    """A knowledge base entry that can be offered as an inline result."""
+    entry_id: int
+    category: str
+    subcategory: str
+    title: str
+    content: str
+    keywords: Tuple[str, ...] = ()
+
+
+def normalize_key(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return " ".join(KEY_PATTERN.sub(" ", text.lower()).split())[:MAX_KEY_LENGTH]
+
+
+class TrieNode:
+    """Trie node holding its children and the best entries beneath it."""
+    __slots__ = ("children", "scores", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "TrieNode"] = {}
+        # entry id -> best score for keys that end exactly at this node
+        self.scores: Dict[int, float] = {}
+        # (score, entry id) of the TOP_K best entries in this subtree
+        self.top: List[tuple] = []
+
+
+class PrefixTrie:
+    """Prefix trie with precomputed per-node top-k completions."""
+
+    def __init__(self, top_k: int = TOP_K):
+        self.top_k = top_k
+        self.root = TrieNode()
+        self.node_count = 1
+
+    def insert(self, key: str, entry_id: int, score: float) -> None:
+        """Index a key for an entry, keeping the highest score if the key repeats."""
+        key = normalize_key(key)
+        if not key:
+            return
+        node = self.root
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = TrieNode()
+                self.node_count += 1
+            node = child
+        if score > node.scores.get(entry_id, 0):
+            node.scores[entry_id] = score
+
+    def finalize(self) -> "PrefixTrie":
+        """Compute every node's top-k from its own keys and its children's top-k."""
+        # Iterative post-order so deep keys cannot hit the recursion limit
+        stack = [(self.root, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if not children_done:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children.values())
+                continue
+            best = dict(node.scores)
+            for child in node.children.values():
+                for score, entry_id in child.top:
+                    if score > best.get(entry_id, 0):
+                        best[entry_id] = score
+            node.top = heapq.nlargest(self.top_k, ((score, entry_id) for entry_id, score in best.items()))
+        return self
+
+    def to_data(self) -> Dict[str, Any]:
+        """
+        The finalized trie as plain containers, for the compiled KB artifact.
+
+        Nodes are listed breadth-first from the root; each is (children as char -> node
+        position, top). Per-key scores only matter while building, so they are left out.
+        """
+        order = [self.root]
+        nodes = []
+        for node in order:
+            children = {}
+            for char, child in node.children.items():
+                children[char] = len(order)
+                order.append(child)
+            nodes.append((children, node.top))
+        return {"top_k": self.top_k, "nodes": nodes}
+
+    @classmethod
+    def from_data(cls, data: Dict[str, Any]) -> "PrefixTrie":
+        """Restore a trie saved with to_data."""
+        trie = cls(data["top_k"])
+        nodes = [TrieNode() for _ in data["nodes"]]
+        for node, (children, top) in zip(nodes, data["nodes"]):
+            node.children = {char: nodes[position] for char, position in children.items()}
+            node.top = top
+        trie.root = nodes[0]
+        trie.node_count = len(nodes)
+        return trie
+
+    def complete(self, prefix: str, limit: Optional[int] = None) -> List[int]:
+        """Return entry ids for a prefix, best first."""
+        node = self.root
+        for char in normalize_key(prefix):
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [entry_id for _, entry_id in node.top[:limit or self.top_k]]
+
+
+class InlineSearchIndex:
+    """Knowledge base entries plus the trie used to autocomplete them."""
+
+    def __init__(self, entries: Iterable[InlineEntry], popularity: Optional[Dict[str, int]] = None,
+                 top_k: int = TOP_K):
+        self.entries: Dict[int, InlineEntry] = {entry.entry_id: entry for entry in entries}
+        self.trie = PrefixTrie(top_k)
+        self._build(popularity or {})
+
+    def _build(self, popularity: Dict[str, int]) -> None:
+        by_subcategory: Dict[tuple, List[int]] = {}
+        for entry in self.entries.values():
+            boost = POPULARITY_WEIGHT * popularity.get(normalize_key(entry.title), 0)
+            self.trie.insert(entry.title, entry.entry_id, TITLE_WEIGHT + boost)
+            # Also match from the start of every later title word ("info" -> "Deposit Information")
+            title_words = normalize_key(entry.title).split()
+            for i in range(1, len(title_words)):
+                self.trie.insert(" ".join(title_words[i:]), entry.entry_id, TITLE_WORD_WEIGHT + boost)
+            for keyword in entry.keywords:
+                self.trie.insert(keyword, entry.entry_id, KEYWORD_WEIGHT)
+            by_subcategory.setdefault((entry.category, entry.subcategory), []).append(entry.entry_id)
+
+        for phrase, (category, subcategory) in KEYWORD_MAPPING.items():
+            boost = POPULARITY_WEIGHT * popularity.get(normalize_key(phrase), 0)
+            for entry_id in by_subcategory.get((category, subcategory), []):
+                self.trie.insert(phrase, entry_id, MAPPED_QUERY_WEIGHT + boost)
+
+        self.trie.finalize()
+
+    def to_data(self) -> Dict[str, Any]:
+        """The entries and trie as plain containers, for the compiled KB artifact."""
+        return {"entries": [tuple(entry) for entry in self.entries.values()], "trie": self.trie.to_data()}
+
+    @classmethod
+    def from_data(cls, data: Dict[str, Any]) -> "InlineSearchIndex":
+        """Restore an index saved with to_data without rebuilding its trie."""
+        index = cls.__new__(cls)
+        index.entries = {row[0]: InlineEntry(*row) for row in data["entries"]}
+        index.trie = PrefixTrie.from_data(data["trie"])
+        return index
+
+    def complete(self, prefix: str, limit: int = TOP_K) -> List[InlineEntry]:
+        """Return the best knowledge base entries for a prefix."""
+        return [self.entries[entry_id] for entry_id in self.trie.complete(prefix, limit)]
+
+
+def load_kb_entries(db_file: Optional[str] = None) -> List[InlineEntry]:
+    """Read every knowledge base entry."""
+    entries = []
+    try:
+        conn = sqlite3.connect(db_file or DB_FILE)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, category, subcategory, title, content, keywords FROM kb_enhanced")
+            for entry_id, category, subcategory, title, content, keywords in cursor.fetchall():
+                keyword_list = tuple(k.strip() for k in (keywords or "").split(",") if k.strip())
+                entries.append(InlineEntry(entry_id, category or "", subcategory or "", title or "",
+                                           content or "", keyword_list))
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning(f"Could not load knowledge base for inline search: {e}")
+    return entries
+
+
+def load_query_popularity() -> Dict[str, int]:
+    """Counts of the most common user queries recorded by query analytics, if any."""
+    try:
+        from query_analytics import load_query_analytics
+        snapshot = load_query_analytics()
+    except Exception as e:
+        logger.debug(f"No query analytics available for inline ranking: {e}")
+        return {}
+    if not snapshot:
+        return {}
+    return {normalize_key(item["query"]): item["count"] for item in snapshot.get("top_queries", [])}
+
+
+def build_inline_index(db_file: Optional[str] = None) -> InlineSearchIndex:
+    """Build the inline autocomplete index from the knowledge base.
+
+    For the live KB the trie compiled into the KB artifact is used when it matches
+    and there is no query popularity to rank by.
+    """
+    popularity = load_query_popularity()
+    if db_file is None and not popularity:
+        from kb_artifact import get_compiled_kb
+        compiled = get_compiled_kb()
+        if compiled is not None:
+            return compiled.inline_index
+    index = InlineSearchIndex(load_kb_entries(db_file), popularity)
+    logger.info(f"Built inline search trie with {len(index.entries)} entries and {index.trie.node_count} nodes")
+    return index
+
+
+# Lazily built global index, tagged with the KB version it was built from
+_inline_index: Optional[InlineSearchIndex] = None
+_inline_index_version: Optional[int] = None
+_index_lock = threading.Lock()
+
+
+def get_inline_index() -> InlineSearchIndex:
+    """Get the global inline index, rebuilding it only when the KB version changes."""
+    global _inline_index, _inline_index_version
+    version = get_kb_version()
+    if _inline_index is None or _inline_index_version != version:
+        with _index_lock:
+            if _inline_index is None or _inline_index_version != version:
+                _inline_index = build_inline_index()
+                _inline_index_version = version
+    return _inline_index
+
+
+def reset_inline_index() -> None:
+    """Drop the global inline index so it is rebuilt from fresh data on next use."""
+    global _inline_index
+    with _index_lock:
+        _inline_index = None
+
+
+def complete_query(prefix: str, limit: int = TOP_K) -> List[InlineEntry]:
+    """Autocomplete a prefix against the knowledge base."""
+    try:
+        with search_metrics.trace("inline", prefix) as trace:
+            # Index time covers the rebuild after a KB version bump
+            with trace.stage("index"):
+                index = get_inline_index()
+            with trace.stage("prefix_walk"):
+                entries = index.complete(prefix, limit)
+            if entries:
+                trace.record_outcome("prefix_walk")
+            return entries
+    except Exception as e:
+        logger.error(f"Error completing inline query '{prefix}': {e}")
+        return []
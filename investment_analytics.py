@@ -11,7 +11,7 @@ import csv
 import io
 
 # Import the CapitalX API client
-from capitalx_api import get_user_investments, get_market_data
+from capitalx_api import get_async_api_client
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +24,7 @@ RISK_WEIGHTS = {
     "diversification": 0.1
 }
 
-def get_real_time_performance(chat_id: int) -> Dict[str, Any]:
+async def get_real_time_performance(chat_id: int) -> Dict[str, Any]:
     """
     Get real-time investment performance data for a user.
     
@@ -36,7 +36,7 @@ def get_real_time_performance(chat_id: int) -> Dict[str, Any]:
     """
     try:
         # Get user's investments from the CapitalX API
-        api_response = get_user_investments(str(chat_id))
+        api_response = await get_async_api_client().get_user_investments(str(chat_id))
         
         # If API call fails, fall back to database
         if not api_response["success"]:
@@ -131,7 +131,7 @@ def get_real_time_performance(chat_id: int) -> Dict[str, Any]:
             "message": "Failed to retrieve performance data"
         }
 
-def get_market_trends() -> Dict[str, Any]:
+async def get_market_trends() -> Dict[str, Any]:
     """
     Get current market trend analysis.
     
@@ -140,7 +140,7 @@ def get_market_trends() -> Dict[str, Any]:
     """
     try:
         # Get market data from the CapitalX API
-        api_response = get_market_data()
+        api_response = await get_async_api_client().get_market_data()
         
         # If API call fails, return default data
         if not api_response["success"]:
@@ -180,7 +180,7 @@ def get_market_trends() -> Dict[str, Any]:
             }
         }
 
-def calculate_risk_score(chat_id: int) -> Dict[str, Any]:
+async def calculate_risk_score(chat_id: int) -> Dict[str, Any]:
     """
     Calculate risk assessment score for current investments.
     
@@ -192,7 +192,7 @@ def calculate_risk_score(chat_id: int) -> Dict[str, Any]:
     """
     try:
         # Get user's investments
-        performance_data = get_real_time_performance(chat_id)
+        performance_data = await get_real_time_performance(chat_id)
         
         if performance_data["status"] != "success":
             return {
@@ -211,7 +211,7 @@ def calculate_risk_score(chat_id: int) -> Dict[str, Any]:
             }
         
         # Get market data for volatility factor
-        market_data = get_market_trends()
+        market_data = await get_market_trends()
         market_volatility = market_data.get("market_data", {}).get("volatility", 0.15)
         
         total_risk_score = 0
@@ -287,7 +287,7 @@ def calculate_risk_score(chat_id: int) -> Dict[str, Any]:
             "message": "Failed to calculate risk assessment"
         }
 
-def get_portfolio_rebalancing_recommendations(chat_id: int) -> Dict[str, Any]:
+async def get_portfolio_rebalancing_recommendations(chat_id: int) -> Dict[str, Any]:
     """
     Get portfolio rebalancing recommendations based on current investments.
     
@@ -299,7 +299,7 @@ def get_portfolio_rebalancing_recommendations(chat_id: int) -> Dict[str, Any]:
     """
     try:
         # Get user's investments
-        performance_data = get_real_time_performance(chat_id)
+        performance_data = await get_real_time_performance(chat_id)
         
         if performance_data["status"] != "success":
             return {
@@ -362,7 +362,7 @@ def get_portfolio_rebalancing_recommendations(chat_id: int) -> Dict[str, Any]:
             "message": "Failed to generate rebalancing recommendations"
         }
 
-def export_investment_data(chat_id: int, format_type: str = "json") -> Dict[str, Any]:
+async def export_investment_data(chat_id: int, format_type: str = "json") -> Dict[str, Any]:
     """
     Export investment data in specified format (JSON/CSV).
     
@@ -375,7 +375,7 @@ def export_investment_data(chat_id: int, format_type: str = "json") -> Dict[str,
     """
     try:
         # Get user's investments
-        performance_data = get_real_time_performance(chat_id)
+        performance_data = await get_real_time_performance(chat_id)
         
         if performance_data["status"] != "success":
             return {
@@ -1,21 +1,31 @@
 import sqlite3
 import logging
-from typing import Optional, List, Tuple, Generator
+from typing import Optional, List, Tuple, Generator, Callable
 from contextlib import contextmanager
 
+from search_metrics import search_metrics
+from kb_versioning import VersionedCache, read_kb_version
+from kb_store import kb_store, FIELD_KEYWORDS, FIELD_TITLE, FIELD_SUBCATEGORY, FIELD_CONTENT
+
 # Import search functions to avoid circular imports
 try:
     from keyword_search import search_kb_enhanced, search_kb_detailed_enhanced
-    from kb_scraper import update_knowledge_base
 except ImportError:
     # Fallback if modules are not available
     search_kb_enhanced = None
     search_kb_detailed_enhanced = None
-    update_knowledge_base = None
 
 logger = logging.getLogger(__name__)
 DB_FILE = "telegram_bot.db"
 
+# Same field weights as the LIKE relevance scoring in search_kb
+SEARCH_FIELD_WEIGHTS = {FIELD_KEYWORDS: 1, FIELD_TITLE: 0.5, FIELD_SUBCATEGORY: 0.3, FIELD_CONTENT: 0.1}
+# search_kb_detailed ranks by keywords/title/subcategory and only includes content matches
+DETAILED_FIELD_WEIGHTS = {FIELD_KEYWORDS: 3, FIELD_TITLE: 2, FIELD_SUBCATEGORY: 1, FIELD_CONTENT: 0.01}
+
+# (content, hit_stage) per lookup; emptied automatically when the KB version changes
+_result_cache = VersionedCache()
+
 @contextmanager
 def get_db_connection() -> Generator[sqlite3.Connection, None, None]:
     """Context manager for database connections.
@@ -51,11 +61,23 @@ def add_kb_entry(category, key, content):
             (category, key, content)
         )
         conn.commit()
+    # The legacy table is not versioned, so drop cached lookups explicitly
+    _result_cache.clear()
 
 def search_kb(category=None, query=None) -> Optional[str]:
     """Enhanced search function for the knowledge base."""
     try:
-        with get_db_connection() as conn:
+        cache_key = (DB_FILE, category, query)
+        cached = _result_cache.get(cache_key)
+        if cached is not None:
+            with search_metrics.trace("kb_fallback", query or category or "") as trace:
+                with trace.stage("result_cache"):
+                    content, hit_stage = cached
+                if hit_stage:
+                    trace.record_outcome(hit_stage)
+                return content
+        
+        with search_metrics.trace("kb_fallback", query or category or "") as trace, get_db_connection() as conn:
             cursor = conn.cursor()
             
             # Ensure enhanced KB table exists
@@ -74,86 +96,120 @@ def search_kb(category=None, query=None) -> Optional[str]:
             """)
             
             # Try enhanced search first
-            if category and query:
-                # Search by category and query terms
-                cursor.execute("""
-                    SELECT content FROM kb_enhanced 
-                    WHERE category = ? AND (
-                        keywords LIKE ? OR 
-                        title LIKE ? OR 
-                        subcategory LIKE ? OR
-                        content LIKE ?
-                    )
-                    ORDER BY 
-                        CASE WHEN subcategory LIKE ? THEN 1 ELSE 2 END,
-                        CASE WHEN keywords LIKE ? THEN 1 ELSE 2 END
-                    LIMIT 1
-                """, (category, f"%{query}%", f"%{query}%", f"%{query}%", f"%{query}%", f"%{query}%", f"%{query}%"))
-            elif category:
-                # Search by category only
-                cursor.execute("""
-                    SELECT content FROM kb_enhanced 
-                    WHERE category = ?
-                    ORDER BY id
-                    LIMIT 1
-                """, (category,))
-            elif query:
-                # Search by query terms across all fields
-                search_terms = query.lower().split()
-                like_conditions = []
-                params = []
+            with trace.stage("like_query"):
+                if category and query:
+                    # Search by category and query terms
+                    cursor.execute("""
+                        SELECT content FROM kb_enhanced 
+                        WHERE category = ? AND (
+                            keywords LIKE ? OR 
+                            title LIKE ? OR 
+                            subcategory LIKE ? OR
+                            content LIKE ?
+                        )
+                        ORDER BY 
+                            CASE WHEN subcategory LIKE ? THEN 1 ELSE 2 END,
+                            CASE WHEN keywords LIKE ? THEN 1 ELSE 2 END
+                        LIMIT 1
+                    """, (category, f"%{query}%", f"%{query}%", f"%{query}%", f"%{query}%", f"%{query}%", f"%{query}%"))
+                    result = cursor.fetchone()
+                elif category:
+                    # Search by category only
+                    cursor.execute("""
+                        SELECT content FROM kb_enhanced 
+                        WHERE category = ?
+                        ORDER BY id
+                        LIMIT 1
+                    """, (category,))
+                    result = cursor.fetchone()
+                elif query:
+                    # Search by query terms across all fields
+                    search_terms = query.lower().split()
+                    if kb_store.available(conn):
+                        # Term index lookup; only the best body is decompressed
+                        ranked = kb_store.search_terms(conn, search_terms, SEARCH_FIELD_WEIGHTS, 1)
+                        entry = kb_store.get_entry(conn, ranked[0][0]) if ranked else None
+                        result = (entry[2],) if entry else None
+                    else:
+                        like_conditions = []
+                        params = []
                 
-                for term in search_terms:
-                    like_conditions.extend([
-                        "LOWER(keywords) LIKE ?",
-                        "LOWER(title) LIKE ?", 
-                        "LOWER(subcategory) LIKE ?",
-                        "LOWER(content) LIKE ?"
-                    ])
-                    params.extend([f"%{term}%"] * 4)
+                        for term in search_terms:
+                            like_conditions.extend([
+                                "LOWER(keywords) LIKE ?",
+                                "LOWER(title) LIKE ?", 
+                                "LOWER(subcategory) LIKE ?",
+                                "LOWER(content) LIKE ?"
+                            ])
+                            params.extend([f"%{term}%"] * 4)
                 
-                query_sql = f"""
-                    SELECT content, 
-                        ({' + '.join(['1' if 'keywords' in cond else '0.5' if 'title' in cond else '0.3' if 'subcategory' in cond else '0.1' for cond in like_conditions])}) as relevance
-                    FROM kb_enhanced 
-                    WHERE {' OR '.join(like_conditions)}
-                    ORDER BY relevance DESC
-                    LIMIT 1
-                """
-                cursor.execute(query_sql, params)
-            else:
-                return None
+                        query_sql = f"""
+                            SELECT content, 
+                                ({' + '.join(['1' if 'keywords' in cond else '0.5' if 'title' in cond else '0.3' if 'subcategory' in cond else '0.1' for cond in like_conditions])}) as relevance
+                            FROM kb_enhanced 
+                            WHERE {' OR '.join(like_conditions)}
+                            ORDER BY relevance DESC
+                            LIMIT 1
+                        """
+                        cursor.execute(query_sql, params)
+                        result = cursor.fetchone()
+                else:
+                    return None
             
-            result = cursor.fetchone()
+            hit_stage = "like_query"
             
             # If no result from enhanced KB, try legacy KB
             if not result:
-                cursor.execute(
-                    "CREATE TABLE IF NOT EXISTS kb (id INTEGER PRIMARY KEY AUTOINCREMENT, category TEXT, key TEXT, content TEXT)"
-                )
-                if category and query:
-                    cursor.execute("SELECT content FROM kb WHERE category=? AND key=?", (category, query))
-                elif category:
-                    cursor.execute("SELECT content FROM kb WHERE category=?", (category,))
-                elif query:
-                    cursor.execute("SELECT content FROM kb WHERE key LIKE ?", (f"%{query}%",))
-                
-                result = cursor.fetchone()
+                hit_stage = "legacy_kb"
+                with trace.stage("legacy_kb"):
+                    cursor.execute(
+                        "CREATE TABLE IF NOT EXISTS kb (id INTEGER PRIMARY KEY AUTOINCREMENT, category TEXT, key TEXT, content TEXT)"
+                    )
+                    if category and query:
+                        cursor.execute("SELECT content FROM kb WHERE category=? AND key=?", (category, query))
+                    elif category:
+                        cursor.execute("SELECT content FROM kb WHERE category=?", (category,))
+                    elif query:
+                        cursor.execute("SELECT content FROM kb WHERE key LIKE ?", (f"%{query}%",))
+                    
+                    result = cursor.fetchone()
             
-            return result[0] if result else None
+            if result:
+                trace.record_outcome(hit_stage)
+            content = result[0] if result else None
+            _result_cache.set(cache_key, (content, hit_stage if result else None))
+            return content
             
     except Exception as e:
         logger.error(f"Error searching knowledge base: {e}")
         return None
 
-def refresh_knowledge_base() -> bool:
-    """Refresh the knowledge base by scraping latest content."""
+def refresh_knowledge_base(progress: Optional[Callable[[str], None]] = None) -> bool:
+    """Refresh the knowledge base by scraping latest content.
+    
+    Args:
+        progress: Optional callback receiving each scraper stage name
+    """
     try:
-        if update_knowledge_base is not None:
-            return update_knowledge_base()
-        else:
+        # Imported on demand: the scraper pulls in requests, bs4 and httpx, which searches never need
+        try:
+            from kb_scraper import update_knowledge_base
+        except ImportError:
             logger.warning("kb_scraper.update_knowledge_base not available")
             return False
+        version = read_kb_version(DB_FILE)
+        if not update_knowledge_base(progress=progress):
+            return False
+        # Keep the startup artifact in step with the refreshed KB; the version only moves when content changed
+        if read_kb_version(DB_FILE) != version:
+            from kb_artifact import compile_from_db
+            from spell_correction import rebuild_spelling_index
+            # Rebuilt on this thread first; handlers keep using the old index until it is ready
+            rebuild_spelling_index()
+            compile_from_db()
+        else:
+            logger.info("Knowledge base unchanged, keeping the compiled KB artifact")
+        return True
     except Exception as e:
         logger.error(f"Error refreshing knowledge base: {e}")
         return False
@@ -173,7 +229,7 @@ def get_all_categories() -> List[str]:
 def search_kb_detailed(query: str) -> List[Tuple[str, str, str]]:
     """Detailed search returning multiple results with titles and categories."""
     try:
-        with get_db_connection() as conn:
+        with search_metrics.trace("kb_fallback_detailed", query) as trace, get_db_connection() as conn:
             cursor = conn.cursor()
             
             search_terms = query.lower().split()
@@ -205,9 +261,17 @@ def search_kb_detailed(query: str) -> List[Tuple[str, str, str]]:
             main_term = search_terms[0] if search_terms else query.lower()
             order_params = params + [f"%{main_term}%"] * 3
             
-            cursor.execute(query_sql, order_params)
-            results = cursor.fetchall()
+            with trace.stage("like_query"):
+                if kb_store.available(conn):
+                    # Term index lookup; only the returned bodies are decompressed
+                    ranked = kb_store.search_terms(conn, search_terms, DETAILED_FIELD_WEIGHTS, 5)
+                    results = [entry for entry in (kb_store.get_entry(conn, entry_id) for entry_id, _ in ranked) if entry]
+                else:
+                    cursor.execute(query_sql, order_params)
+                    results = cursor.fetchall()
             
+            if results:
+                trace.record_outcome("like_query")
             return results
             
     except Exception as e:
@@ -0,0 +1,398 @@
+"""
+KB Artifact Module
+Compiles the knowledge base and the search structures built from it into one file.
+
+populate_capitalx_kb.py, capitalx_knowledge_base.md and search_config are turned
+into KB rows, the spelling index, the inline autocomplete trie and the answer
+table ahead of time. At startup the bot reads the artifact and restores those
+structures from plain data instead of rebuilding them. The artifact records the digest of
+the KB and of the search configuration it was compiled from, and is only used
+while both still match, so a scraper refresh or a config edit falls back to
+building from the database as before.
+
+File layout: 4-byte magic, 2-byte format version, then the CompiledKB fields
+marshalled with every index reduced to dicts, lists and strings. Nothing in the
+file can name a class or function, so loading one never runs code.
+"""
+
+import hashlib
+import json
+import logging
+import marshal
+import os
+import re
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from kb_versioning import KBEntry, ensure_kb_schema, sync_kb_entries, read_kb_entries, get_kb_version
+from search_config import QUERY_PATTERNS, KEYWORD_MAPPING, SYNONYMS
+
+logger = logging.getLogger(__name__)
+
+DB_FILE = "telegram_bot.db"
+
+KB_ARTIFACT_FILE = os.getenv("KB_ARTIFACT_FILE", "kb_artifact.bin")
+KNOWLEDGE_BASE_DOC = "capitalx_knowledge_base.md"
+
+MAGIC = b"CXKB"
+FORMAT_VERSION = 2
+HEADER = struct.Struct(">4sH")
+# Fixed so an artifact built by one interpreter loads in any other
+MARSHAL_VERSION = 4
+
+# Sections of capitalx_knowledge_base.md; kb_scraper and kb_ingest keep these rows when they sync theirs
+DOC_SUBCATEGORY_PREFIX = "doc:"
+DOC_URL = "https://capitalx-rtn.onrender.com/"
+
+MARKDOWN_HEADING = re.compile(r"^(#{1,4})\s+(.*)$")
+MARKDOWN_ITEM = re.compile(r"^(?:[-*+]|\d+\.)\s+")
+MARKDOWN_EMPHASIS = re.compile(r"\*\*|__|`")
+
+
+class CompiledKB(NamedTuple):
+    format_version: int
+    built_at: float
+    kb_digest: str
+    config_digest: str
+    entries: List[KBEntry]
+    spelling_index: Any
+    inline_index: Any
+    # (category, subcategory) -> (title, category, content), as returned by search lookups
+    answers: Dict[Tuple[str, str], Tuple[str, str, str]]
+
+
+def compute_config_digest() -> str:
+    """Digest of the search configuration the spelling and inline indexes are built from."""
+    config = {"patterns": QUERY_PATTERNS, "mapping": KEYWORD_MAPPING, "synonyms": SYNONYMS}
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=list).encode("utf-8")).hexdigest()
+
+
+def parse_markdown_sections(text: str) -> Tuple[str, List[Tuple[str, List[str]]]]:
+    """
+    Split a markdown document into (heading, paragraphs) sections.
+
+    Level 3+ headings are prefixed with their level 2 parent so "Key Features"
+    under "Platform Overview" stays distinguishable from other "Key Features".
+
+    Returns:
+        (document title, sections) in document order
+    """
+    title = ""
+    parent = ""
+    sections: List[Tuple[str, List[str]]] = []
+    paragraphs: List[str] = []
+    current = ""
+
+    def flush():
+        if current and paragraphs:
+            sections.append((current, list(paragraphs)))
+        paragraphs.clear()
+
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        heading = MARKDOWN_HEADING.match(line)
+        if heading:
+            flush()
+            level, name = len(heading.group(1)), MARKDOWN_EMPHASIS.sub("", heading.group(2)).strip()
+            if level == 1:
+                title = name
+                current = ""
+            elif level == 2:
+                parent = current = name
+            else:
+                current = f"{parent} - {name}" if parent else name
+            continue
+        line = MARKDOWN_EMPHASIS.sub("", MARKDOWN_ITEM.sub("", line)).strip()
+        if line:
+            paragraphs.append(line)
+    flush()
+    return title, sections
+
+
+def load_document_rows(path: str = KNOWLEDGE_BASE_DOC) -> List[KBEntry]:
+    """KB rows for each section of the markdown knowledge base document."""
+    # kb_ingest pulls in httpx; only compiling needs it, not loading
+    from kb_ingest import section_entries
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            title, sections = parse_markdown_sections(f.read())
+    except OSError as e:
+        logger.warning(f"Could not read {path}: {e}")
+        return []
+    slug = os.path.splitext(os.path.basename(path))[0]
+    return section_entries(DOC_URL, title, sections, f"{DOC_SUBCATEGORY_PREFIX}{slug}")
+
+
+def collect_source_rows(doc_path: Optional[str] = KNOWLEDGE_BASE_DOC) -> List[KBEntry]:
+    """The curated populate_capitalx_kb entries followed by the markdown document sections."""
+    from populate_capitalx_kb import build_kb_rows
+
+    rows = build_kb_rows()
+    if doc_path:
+        rows.extend(load_document_rows(doc_path))
+    return rows
+
+
+def compile_artifact(rows: List[KBEntry]) -> CompiledKB:
+    """
+    Build every search structure for the given rows.
+
+    The rows are synced into a scratch database, so ids, digest and index contents
+    come out exactly as they would for a live KB holding the same rows.
+
+    Args:
+        rows: (category, subcategory, keywords, title, content, url) tuples, oldest first
+
+    Returns:
+        CompiledKB ready to be written with save_artifact
+    """
+    from spell_correction import build_spelling_index
+    from inline_search import InlineSearchIndex, load_kb_entries
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scratch_db = os.path.join(tmp, "kb_artifact.db")
+        conn = sqlite3.connect(scratch_db)
+        try:
+            sync_kb_entries(conn, rows)
+            kb_digest = conn.execute("SELECT value FROM kb_meta WHERE key = 'digest'").fetchone()[0]
+            entries = read_kb_entries(conn)
+            # Later rows overwrite earlier ones, leaving the row the database lookups pick:
+            # newest updated_at, ties to the highest id
+            answers = {}
+            for category, subcategory, title, content in conn.execute("""
+                    SELECT category, subcategory, title, content FROM kb_enhanced ORDER BY updated_at, id"""):
+                answers[(category, subcategory)] = (title, category, content)
+        finally:
+            conn.close()
+
+        spelling_index = build_spelling_index(scratch_db)
+        # Popularity comes from live query analytics, so the compiled trie ranks by content only
+        inline_index = InlineSearchIndex(load_kb_entries(scratch_db), {})
+
+    return CompiledKB(FORMAT_VERSION, time.time(), kb_digest, compute_config_digest(), entries,
+                      spelling_index, inline_index, answers)
+
+
+def save_artifact(artifact: CompiledKB, path: Optional[str] = None) -> int:
+    """Write the artifact atomically; returns its size in bytes."""
+    path = path or KB_ARTIFACT_FILE
+    fields = artifact._replace(spelling_index=artifact.spelling_index.to_data(),
+                               inline_index=artifact.inline_index.to_data())
+    data = HEADER.pack(MAGIC, FORMAT_VERSION) + marshal.dumps(tuple(fields), MARSHAL_VERSION)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+def load_artifact(path: Optional[str] = None) -> Optional[CompiledKB]:
+    """Read an artifact and restore its indexes, or None if it is missing, foreign or from another format."""
+    from spell_correction import SymSpellIndex
+    from inline_search import InlineSearchIndex
+
+    path = path or KB_ARTIFACT_FILE
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        logger.warning(f"Could not read KB artifact {path}: {e}")
+        return None
+    if len(data) < HEADER.size:
+        logger.warning(f"KB artifact {path} is truncated")
+        return None
+    magic, format_version = HEADER.unpack_from(data)
+    if magic != MAGIC or format_version != FORMAT_VERSION:
+        logger.warning(f"KB artifact {path} has format {magic!r}/{format_version}, "
+                       f"expected {MAGIC!r}/{FORMAT_VERSION}; rebuild it")
+        return None
+    try:
+        artifact = CompiledKB(*marshal.loads(memoryview(data)[HEADER.size:]))
+        return artifact._replace(spelling_index=SymSpellIndex.from_data(artifact.spelling_index),
+                                 inline_index=InlineSearchIndex.from_data(artifact.inline_index))
+    except (ValueError, EOFError, TypeError, KeyError, IndexError) as e:
+        logger.warning(f"Could not load KB artifact {path}: {e}")
+        return None
+
+
+def read_entries_by_recency(conn: sqlite3.Connection) -> List[KBEntry]:
+    """
+    Live KB rows, least recently updated first.
+
+    The scratch KB stamps every row at once, so this order is what lets its ids stand
+    in for the live timestamps when the answers are compiled.
+    """
+    ensure_kb_schema(conn)
+    return conn.execute("""
+        SELECT category, subcategory, keywords, title, content, url FROM kb_enhanced ORDER BY updated_at, id
+    """).fetchall()
+
+
+def compile_from_db(db_file: Optional[str] = None, path: Optional[str] = None) -> bool:
+    """
+    Recompile the artifact from the live KB, e.g. after a scraper refresh, so the next start is warm.
+
+    Returns:
+        True if the artifact was written
+    """
+    try:
+        conn = sqlite3.connect(db_file or DB_FILE)
+        try:
+            rows = read_entries_by_recency(conn)
+        finally:
+            conn.close()
+        artifact = compile_artifact(rows)
+        size = save_artifact(artifact, path)
+        reset_compiled_kb()
+        logger.info(f"Recompiled KB artifact with {len(artifact.entries)} entries ({size} bytes)")
+        return True
+    except Exception as e:
+        logger.error(f"Error compiling KB artifact: {e}")
+        return False
+
+
+def read_kb_digest(db_file: Optional[str] = None) -> Optional[str]:
+    """Digest of the live KB as recorded by sync_kb_entries, or None if it was never synced."""
+    try:
+        conn = sqlite3.connect(db_file or DB_FILE)
+        try:
+            row = conn.execute("SELECT value FROM kb_meta WHERE key = 'digest'").fetchone()
+            return row[0] if row else None
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+
+
+# Loaded once per process; validity is re-checked whenever the KB version changes
+_artifact: Optional[CompiledKB] = None
+_artifact_loaded = False
+_config_digest: Optional[str] = None
+_validity: Dict[Tuple[str, int], bool] = {}
+_artifact_lock = threading.Lock()
+
+
+def get_compiled_kb(db_file: Optional[str] = None) -> Optional[CompiledKB]:
+    """
+    The compiled artifact, if it was built from exactly the KB and config in use.
+
+    Args:
+        db_file: Database the caller reads from
+
+    Returns:
+        CompiledKB, or None if there is no artifact or it is stale
+    """
+    global _artifact, _artifact_loaded, _config_digest
+    if not _artifact_loaded:
+        with _artifact_lock:
+            if not _artifact_loaded:
+                started = time.perf_counter()
+                _artifact = load_artifact()
+                _config_digest = compute_config_digest()
+                _artifact_loaded = True
+                if _artifact is not None:
+                    logger.info(f"Loaded KB artifact with {len(_artifact.entries)} entries "
+                                f"in {(time.perf_counter() - started) * 1000:.1f}ms")
+    artifact = _artifact
+    if artifact is None:
+        return None
+
+    key = (db_file or DB_FILE, get_kb_version())
+    valid = _validity.get(key)
+    if valid is None:
+        valid = artifact.config_digest == _config_digest and artifact.kb_digest == read_kb_digest(db_file)
+        with _artifact_lock:
+            if len(_validity) > 64:
+                _validity.clear()
+            _validity[key] = valid
+        if not valid:
+            logger.info("KB artifact does not match the current knowledge base; building indexes from the database")
+    return artifact if valid else None
+
+
+def reset_compiled_kb() -> None:
+    """Forget the loaded artifact so the next lookup reads it from disk again."""
+    global _artifact, _artifact_loaded
+    with _artifact_lock:
+        _artifact = None
+        _artifact_loaded = False
+        _validity.clear()
+
+
+def seed_from_artifact(db_file: Optional[str] = None) -> bool:
+    """
+    Fill an empty knowledge base from the artifact, so a fresh deployment answers at once.
+
+    Returns:
+        True if the KB was seeded, False if it already had entries or there is no artifact
+    """
+    try:
+        conn = sqlite3.connect(db_file or DB_FILE)
+        try:
+            ensure_kb_schema(conn)
+            if conn.execute("SELECT COUNT(*) FROM kb_enhanced").fetchone()[0]:
+                return False
+            artifact = load_artifact()
+            if artifact is None:
+                return False
+            sync_kb_entries(conn, artifact.entries)
+        finally:
+            conn.close()
+        logger.info(f"Seeded empty knowledge base with {len(artifact.entries)} entries from KB artifact")
+        return True
+    except Exception as e:
+        logger.error(f"Error seeding knowledge base from artifact: {e}")
+        return False
+
+
+def warm_start(db_file: Optional[str] = None) -> bool:
+    """Seed an empty KB, load the artifact and build the spelling index; returns True if searches will use it."""
+    seed_from_artifact(db_file)
+    warm = get_compiled_kb(db_file) is not None
+    if db_file is None:
+        # Built here so the first message needing a correction does not pay for it on the event loop
+        from spell_correction import rebuild_spelling_index
+        rebuild_spelling_index()
+    return warm
+
+
+def main():
+    """Compile the knowledge base artifact."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compile the CapitalX knowledge base into a startup artifact")
+    parser.add_argument("--output", default=KB_ARTIFACT_FILE, help="Artifact path")
+    parser.add_argument("--doc", default=KNOWLEDGE_BASE_DOC, help="Markdown knowledge base to include")
+    parser.add_argument("--from-db", nargs="?", const=DB_FILE, metavar="DB",
+                        help="Compile the rows of an existing database instead of the source files")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    started = time.perf_counter()
+    if args.from_db:
+        conn = sqlite3.connect(args.from_db)
+        try:
+            rows = read_entries_by_recency(conn)
+        finally:
+            conn.close()
+    else:
+        rows = collect_source_rows(args.doc)
+    artifact = compile_artifact(rows)
+    size = save_artifact(artifact, args.output)
+    print(f"✅ Compiled {len(artifact.entries)} entries into {args.output} ({size / 1024:.1f} KB) "
+          f"in {time.perf_counter() - started:.2f}s")
+
+    started = time.perf_counter()
+    load_artifact(args.output)
+    print(f"⚡ Loads in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
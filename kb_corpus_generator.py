@@ -0,0 +1,160 @@
+"""
+Knowledge Base Corpus Generator
+Builds large synthetic KB databases with realistic category, keyword and content distributions.
+
+Categories and keywords come from search_config, so the keyword-mapping paths still
+hit. Subcategories follow a Zipf-like popularity curve. Bodies are assembled from
+sentences of capitalx_knowledge_base.md in the same emoji/markdown style as the real
+answers, with a long-tailed length distribution.
+"""
+
+import logging
+import math
+import os
+import random
+import re
+import sqlite3
+from typing import Dict, List, Optional, Tuple, Iterator
+
+from search_config import KEYWORD_MAPPING, QUERY_PATTERNS
+from kb_versioning import KBEntry, sync_kb_entries
+
+logger = logging.getLogger(__name__)
+
+SOURCE_DOCUMENT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "capitalx_knowledge_base.md")
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_SEED = 42
+
+# Popularity of the n-th most common subcategory is proportional to 1 / n ** ZIPF_EXPONENT
+ZIPF_EXPONENT = 1.1
+# Bullet count per body is log-normal around the real KB (median ~8 bullets, ~600 bytes)
+BULLETS_MEDIAN = 8
+BULLETS_SIGMA = 0.6
+MAX_BULLETS = 60
+KEYWORDS_PER_ENTRY = (3, 7)
+
+TITLE_VARIANTS = ["Guide", "FAQ", "Overview", "Details", "Tips", "Update", "Rules", "Help", "Explained", "Checklist"]
+SECTION_EMOJIS = ["📥", "📤", "💰", "📊", "🎁", "🌐", "💡", "🔒", "📞", "🏆", "📝", "💸"]
+
+FALLBACK_SENTENCES = [
+    "Minimum deposit is R50 for all direct payment methods",
+    "Withdrawals are processed within 24-48 hours",
+    "Deposit 50% of your total earnings before you can withdraw",
+    "Get a R50 registration bonus when you sign up",
+    "Earn R10 for every referred user who deposits",
+    "Investment tiers range from R70 to R50,000",
+    "Contact support through the in-platform messaging system",
+]
+
+
+def load_source_sentences(path: str = SOURCE_DOCUMENT) -> List[str]:
+    """Sentences and bullet points from the hand-written knowledge base document."""
+    sentences = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                text = re.sub(r"^[\s\-\*\d\.#]+", "", line).strip()
+                text = text.replace("**", "")
+                if len(text) >= 20 and not line.lstrip().startswith("#"):
+                    sentences.append(text)
+    except OSError as e:
+        logger.warning(f"Could not read {path}, using built-in sentences: {e}")
+    return sentences or list(FALLBACK_SENTENCES)
+
+
+def _subcategory_keywords() -> Dict[Tuple[str, str], List[str]]:
+    """Keyword phrases per (category, subcategory), from KEYWORD_MAPPING and QUERY_PATTERNS."""
+    keywords: Dict[Tuple[str, str], List[str]] = {}
+    for phrase, target in KEYWORD_MAPPING.items():
+        keywords.setdefault(target, []).append(phrase)
+    for target, phrases in keywords.items():
+        for pattern_phrase in QUERY_PATTERNS.get(target[1], []):
+            if pattern_phrase not in phrases:
+                phrases.append(pattern_phrase)
+    return keywords
+
+
+class CorpusGenerator:
+    """Deterministic generator of synthetic KB entries."""
+
+    def __init__(self, seed: int = DEFAULT_SEED, sentences: Optional[List[str]] = None):
+        self.random = random.Random(seed)
+        self.sentences = sentences or load_source_sentences()
+        self.keywords = _subcategory_keywords()
+        self.targets = sorted(self.keywords)
+        # Shuffle before assigning Zipf ranks so popularity isn't alphabetical
+        self.random.shuffle(self.targets)
+        self.weights = [1 / (rank + 1) ** ZIPF_EXPONENT for rank in range(len(self.targets))]
+
+    def _body(self, title: str, keywords: List[str]) -> str:
+        bullets = int(self.random.lognormvariate(math.log(BULLETS_MEDIAN), BULLETS_SIGMA))
+        bullets = max(2, min(MAX_BULLETS, bullets))
+        lines = [f"{self.random.choice(SECTION_EMOJIS)} **{title}:**", ""]
+        for _ in range(bullets):
+            sentence = self.random.choice(self.sentences)
+            # Mention the entry's own keywords now and then, like real answers do
+            if self.random.random() < 0.3:
+                sentence = f"{sentence} ({self.random.choice(keywords)})"
+            lines.append(f"• {sentence}")
+        lines.append("")
+        lines.append("Still having issues? Click 'Contact Support' below.")
+        return "\n".join(lines)
+
+    def entries(self, size: int) -> Iterator[KBEntry]:
+        """Yield size unique (category, subcategory, keywords, title, content, url) entries."""
+        for i in range(size):
+            category, subcategory = self.random.choices(self.targets, weights=self.weights)[0]
+            phrases = self.keywords[(category, subcategory)]
+            keyword_count = min(len(phrases), self.random.randint(*KEYWORDS_PER_ENTRY))
+            keywords = self.random.sample(phrases, keyword_count)
+            title = f"{subcategory.replace('_', ' ').title()} {self.random.choice(TITLE_VARIANTS)} {i + 1}"
+            url = f"https://capitalx-rtn.onrender.com/kb/{subcategory}/{i + 1}/"
+            yield (category, subcategory, ",".join(keywords), title, self._body(title, keywords), url)
+
+
+def generate_corpus(size: int, seed: int = DEFAULT_SEED) -> List[KBEntry]:
+    """Generate a list of synthetic KB entries."""
+    return list(CorpusGenerator(seed).entries(size))
+
+
+def build_corpus_db(db_file: str, size: int, seed: int = DEFAULT_SEED) -> Dict[str, int]:
+    """
+    Write a synthetic corpus into a database through the normal KB sync path.
+
+    Args:
+        db_file: Database file to create or update
+        size: Number of entries
+        seed: Random seed, so the same size always produces the same corpus
+
+    Returns:
+        Sync statistics from sync_kb_entries
+    """
+    conn = sqlite3.connect(db_file)
+    try:
+        result = sync_kb_entries(conn, generate_corpus(size, seed))
+    finally:
+        conn.close()
+    logger.info(f"Built {size}-entry corpus in {db_file}")
+    return result
+
+
+def main():
+    """Generate synthetic KB databases of the requested sizes."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate synthetic CapitalX KB corpora")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Corpus sizes")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Random seed")
+    parser.add_argument("--out-dir", default="kb_corpora", help="Directory for the generated databases")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    os.makedirs(args.out_dir, exist_ok=True)
+    for size in args.sizes:
+        db_file = os.path.join(args.out_dir, f"kb_{size}.db")
+        result = build_corpus_db(db_file, size, args.seed)
+        print(f"{db_file}: {result['inserted']} inserted, {result['updated']} updated, version {result['version']}")
+
+
+if __name__ == "__main__":
+    main()
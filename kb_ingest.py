@@ -0,0 +1,392 @@
+"""
+KB Ingestion Module
+Turns every page the URL extractor knows about into knowledge base entries.
+
+Pages are downloaded concurrently and each one is handed to a process pool as soon
+as it arrives, so parsing (the CPU-bound part) runs on every core while the network
+is still busy. Workers split a page into heading sections, chunk long sections on
+paragraph and sentence boundaries and infer a category for each chunk. All entries
+are then written with one sync_kb_entries call, i.e. a single atomic swap.
+
+Pages are SimHash-fingerprinted as they arrive, before parsing. Of a group of
+near-duplicate pages only the one listed first is parsed and ingested, so URL
+variants serving the same content don't add the same entries twice.
+
+Ingested rows are marked by a "page:" subcategory. They replace each other on every
+run and live alongside the hand-written main page entries kept by kb_scraper.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import sqlite3
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Any, Tuple, Iterable
+from urllib.parse import urlsplit
+
+import httpx
+
+from async_crawler import HostRateLimiter, DEFAULT_HEADERS, CRAWL_CONCURRENCY, CRAWL_TIMEOUT_SECONDS
+from html_parsing import make_soup
+from page_fingerprint import SimHashIndex, page_fingerprint
+from http_transport import create_async_client, run_async
+from kb_versioning import KBEntry, read_kb_entries, sync_kb_entries
+from spell_correction import STOP_WORDS, MIN_WORD_LENGTH
+
+logger = logging.getLogger(__name__)
+DB_FILE = "telegram_bot.db"
+
+# Parser processes; defaults to one per core
+KB_INGEST_WORKERS = int(os.getenv("KB_INGEST_WORKERS", "0")) or os.cpu_count() or 1
+
+PAGE_SUBCATEGORY_PREFIX = "page:"
+MAX_CHUNK_CHARS = 800
+MIN_CHUNK_CHARS = 40
+DEFAULT_CATEGORY = "Platform Overview"
+
+# Category -> terms that suggest it; matches in headings and URLs count extra
+CATEGORY_TERMS = {
+    "Financial Operations": ["deposit", "deposits", "withdraw", "withdrawal", "withdrawals", "payment", "wallet",
+                             "payout", "balance", "fund", "funds"],
+    "Bonuses": ["bonus", "bonuses", "reward", "rewards", "free", "gift"],
+    "Referral Program": ["referral", "referrals", "refer", "invite", "friends"],
+    "Account Management": ["register", "registration", "signup", "login", "password", "profile", "account",
+                           "verify", "verification", "otp"],
+    "Investment": ["invest", "investment", "investments", "plan", "plans", "tier", "tiers", "shares", "stock",
+                   "company", "companies", "returns"],
+    "Trading": ["trading", "trade", "trades", "ai", "strategy", "strategies"],
+    "Contact & Support": ["support", "contact", "help", "faq", "email"],
+    "User Reviews": ["testimonial", "testimonials", "review", "reviews", "rating"],
+}
+HEADING_WEIGHT = 3
+
+HEADING_TAGS = ["h1", "h2", "h3", "h4"]
+TEXT_TAGS = ["p", "li", "td", "blockquote", "dd"]
+SKIPPED_TAGS = ["script", "style", "noscript", "nav", "footer", "header", "form", "svg", "template"]
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+WORD = re.compile(r"[a-z]+")
+
+
+def is_page_entry(entry: KBEntry) -> bool:
+    """Whether a KB entry was produced by this module."""
+    return bool(entry[1]) and entry[1].startswith(PAGE_SUBCATEGORY_PREFIX)
+
+
+def extract_sections(html: str) -> Tuple[str, List[Tuple[str, List[str]]]]:
+    """
+    Split a page into heading sections.
+
+    Returns:
+        (page title, [(heading, paragraphs)]) with navigation, scripts and forms removed
+    """
+    soup = make_soup(html)
+    for tag in soup(SKIPPED_TAGS):
+        tag.decompose()
+    title = soup.title.get_text(" ", strip=True) if soup.title else ""
+    body = soup.body or soup
+
+    sections: List[Tuple[str, List[str]]] = []
+    heading, paragraphs = title or "Overview", []
+    for element in body.find_all(HEADING_TAGS + TEXT_TAGS):
+        if element.name in HEADING_TAGS:
+            if paragraphs:
+                sections.append((heading, paragraphs))
+            heading, paragraphs = element.get_text(" ", strip=True) or heading, []
+        elif not element.find(TEXT_TAGS):
+            # Only the innermost text blocks, so nested lists aren't counted twice
+            text = " ".join(element.get_text(" ", strip=True).split())
+            if text:
+                paragraphs.append(text)
+    if paragraphs:
+        sections.append((heading, paragraphs))
+    return title, sections
+
+
+def chunk_paragraphs(paragraphs: List[str], max_chars: int = MAX_CHUNK_CHARS) -> List[str]:
+    """Group paragraphs into chunks of at most max_chars, splitting long ones on sentences."""
+    pieces: List[str] = []
+    for paragraph in paragraphs:
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        sentence_run = ""
+        for sentence in SENTENCE_END.split(paragraph):
+            if sentence_run and len(sentence_run) + len(sentence) + 1 > max_chars:
+                pieces.append(sentence_run)
+                sentence_run = ""
+            sentence_run = f"{sentence_run} {sentence}".strip()
+        if sentence_run:
+            pieces.append(sentence_run)
+
+    chunks, current = [], ""
+    for piece in pieces:
+        if current and len(current) + len(piece) + 2 > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return [chunk for chunk in chunks if len(chunk) >= MIN_CHUNK_CHARS]
+
+
+def infer_category(url: str, heading: str, text: str) -> Tuple[str, List[str]]:
+    """
+    Pick the KB category a chunk belongs to from its URL, heading and text.
+
+    Returns:
+        (category, the matched terms, most frequent first)
+    """
+    counts = Counter(WORD.findall(text.lower()))
+    for word in WORD.findall(f"{heading} {urlsplit(url).path}".lower()):
+        counts[word] += HEADING_WEIGHT
+    best, best_score, best_terms = DEFAULT_CATEGORY, 0, []
+    for category, terms in CATEGORY_TERMS.items():
+        matched = [(counts[term], term) for term in terms if counts[term]]
+        score = sum(count for count, _ in matched)
+        if score > best_score:
+            best, best_score = category, score
+            best_terms = [term for _, term in sorted(matched, reverse=True)]
+    return best, best_terms
+
+
+def _page_slug(url: str) -> str:
+    parts = urlsplit(url)
+    slug = parts.path.strip("/").replace("/", "-") or "home"
+    return f"{slug}?{parts.query}" if parts.query else slug
+
+
+def section_entries(url: str, title: str, sections: List[Tuple[str, List[str]]],
+                    subcategory_base: str) -> List[KBEntry]:
+    """
+    Chunk (heading, paragraphs) sections into KB entries.
+
+    Args:
+        url: Source URL, stored on every entry
+        title: Document title, appended to entry titles that differ from it
+        sections: (heading, paragraphs) pairs in document order
+        subcategory_base: Prefix of the numbered subcategories, e.g. "page:faq"
+
+    Returns:
+        (category, subcategory, keywords, title, content, url) tuples
+    """
+    entries = []
+    for heading, paragraphs in sections:
+        chunks = chunk_paragraphs(paragraphs)
+        for part, chunk in enumerate(chunks, 1):
+            category, terms = infer_category(url, heading, chunk)
+            heading_words = [word for word in WORD.findall(heading.lower())
+                             if len(word) >= MIN_WORD_LENGTH and word not in STOP_WORDS]
+            keywords = ",".join(dict.fromkeys(terms[:5] + heading_words[:5]))
+            entry_title = heading if len(chunks) == 1 else f"{heading} ({part}/{len(chunks)})"
+            if title and title != heading:
+                entry_title = f"{entry_title} - {title}"
+            subcategory = f"{subcategory_base}:{len(entries) + 1}"
+            entries.append((category, subcategory, keywords, entry_title, f"📄 **{heading}**\n\n{chunk}", url))
+    return entries
+
+
+def parse_page(url: str, html: str) -> List[KBEntry]:
+    """
+    Turn one page into KB entries; runs in a worker process.
+
+    Args:
+        url: Page URL, stored on every entry
+        html: Page body
+
+    Returns:
+        (category, subcategory, keywords, title, content, url) tuples
+    """
+    title, sections = extract_sections(html)
+    return section_entries(url, title, sections, f"{PAGE_SUBCATEGORY_PREFIX}{_page_slug(url)}")
+
+
+async def _fetch(client: httpx.AsyncClient, limiter: HostRateLimiter, url: str) -> Optional[str]:
+    try:
+        async with limiter.acquire(urlsplit(url).netloc):
+            response = await client.get(url)
+        response.raise_for_status()
+        return response.text
+    except httpx.HTTPError as e:
+        logger.error(f"Error fetching {url}: {e}")
+        return None
+
+
+async def ingest_pages(urls: Iterable[str], workers: int = KB_INGEST_WORKERS,
+                       client: Optional[httpx.AsyncClient] = None,
+                       rate_limiter: Optional[HostRateLimiter] = None, dedupe: bool = True) -> Dict[str, Any]:
+    """
+    Fetch pages and parse them in a process pool as they arrive.
+
+    Args:
+        urls: Pages to ingest
+        workers: Parser processes
+        client: Optional shared client; one is created (and closed) if omitted
+        rate_limiter: Per-host politeness limits
+        dedupe: Skip pages that are near-duplicates of another page in urls
+
+    Returns:
+        Dict with the "entries", "pages"/"failed" counts and "duplicates" (URL -> page kept instead)
+    """
+    urls = list(dict.fromkeys(urls))
+    limiter = rate_limiter or HostRateLimiter()
+    owns_client = client is None
+    if owns_client:
+        client = create_async_client(headers=DEFAULT_HEADERS, timeout=CRAWL_TIMEOUT_SECONDS, follow_redirects=True)
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(CRAWL_CONCURRENCY)
+    fingerprints = SimHashIndex() if dedupe else None
+    # Position of the first page of each near-duplicate group -> position of the page being kept
+    kept: Dict[int, int] = {}
+    duplicates: Dict[str, str] = {}
+
+    def is_duplicate(position: int, html: str) -> bool:
+        fingerprint = page_fingerprint(html)
+        if fingerprint is None:
+            return False
+        group = fingerprints.find_or_add(fingerprint, position)
+        if group is None:
+            kept[position] = position
+            return False
+        # Pages arrive in any order; keep the one listed first so reruns ingest the same URL
+        if kept[group] < position:
+            duplicates[urls[position]] = urls[kept[group]]
+            return True
+        duplicates[urls[kept[group]]] = urls[position]
+        kept[group] = position
+        return False
+
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        async def fetch_and_parse(position: int, url: str) -> Optional[List[KBEntry]]:
+            async with semaphore:
+                html = await _fetch(client, limiter, url)
+            if html is None:
+                return None
+            if fingerprints is not None and is_duplicate(position, html):
+                return []
+            return await loop.run_in_executor(pool, parse_page, url, html)
+
+        try:
+            results = await asyncio.gather(*(fetch_and_parse(position, url) for position, url in enumerate(urls)))
+        finally:
+            if owns_client:
+                await client.aclose()
+
+    entries = [entry for url, page in zip(urls, results) if page and url not in duplicates for entry in page]
+    failed = sum(1 for page in results if page is None)
+    if duplicates:
+        logger.info(f"Skipped {len(duplicates)} near-duplicate pages")
+    return {"entries": entries, "pages": len(urls) - failed - len(duplicates), "failed": failed,
+            "duplicates": duplicates}
+
+
+def save_page_entries(entries: List[KBEntry], db_file: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Replace every ingested page entry in one transaction, keeping all other KB rows.
+
+    Returns:
+        sync_kb_entries statistics
+    """
+    conn = sqlite3.connect(db_file or DB_FILE)
+    try:
+        kept = [entry for entry in read_kb_entries(conn) if not is_page_entry(entry)]
+        return sync_kb_entries(conn, kept + list(entries))
+    finally:
+        conn.close()
+
+
+def ingest_site(urls: Optional[Iterable[str]] = None, workers: int = KB_INGEST_WORKERS,
+                db_file: Optional[str] = None, client: Optional[httpx.AsyncClient] = None,
+                rate_limiter: Optional[HostRateLimiter] = None, dedupe: bool = True) -> Dict[str, Any]:
+    """
+    Ingest every known site page into the knowledge base.
+
+    Args:
+        urls: Pages to ingest; defaults to every URL in the URL registry
+        workers: Parser processes
+        db_file: Database file; defaults to the bot database
+        client: Optional httpx client, e.g. one replaying a cassette
+        rate_limiter: Per-host politeness limits
+        dedupe: Skip near-duplicate pages
+
+    Returns:
+        Report with page, entry, failure and near-duplicate counts, seconds taken and pages/entries per second
+    """
+    if urls is None:
+        from url_registry import get_client_urls
+        urls = get_client_urls()
+    started = time.perf_counter()
+    result = run_async(ingest_pages(urls, workers, client, rate_limiter, dedupe))
+    sync = save_page_entries(result["entries"], db_file)
+    seconds = time.perf_counter() - started
+    report = {
+        "pages": result["pages"],
+        "failed": result["failed"],
+        "duplicates": len(result["duplicates"]),
+        "entries": len(result["entries"]),
+        "workers": workers,
+        "seconds": round(seconds, 3),
+        "pages_per_second": round(result["pages"] / seconds, 2) if seconds else 0.0,
+        "entries_per_second": round(len(result["entries"]) / seconds, 2) if seconds else 0.0,
+        "sync": {key: sync[key] for key in ("inserted", "updated", "deleted", "unchanged", "version")}
+    }
+    logger.info(f"Ingested {report['pages']} pages into {report['entries']} entries in {report['seconds']}s "
+                f"({report['pages_per_second']} pages/s, {report['entries_per_second']} entries/s, "
+                f"{workers} workers)")
+    return report
+
+
+def measure_parse_throughput(pages: List[Tuple[str, str]], workers: int) -> Dict[str, float]:
+    """
+    Parse already downloaded pages in a pool, to see how parsing scales with cores.
+
+    Args:
+        pages: (url, html) pairs
+        workers: Parser processes
+
+    Returns:
+        Dict with seconds, pages_per_second and entries_per_second
+    """
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        entries = sum(len(page) for page in pool.map(parse_page, *zip(*pages), chunksize=4))
+    seconds = time.perf_counter() - started
+    return {"workers": workers, "seconds": round(seconds, 3),
+            "pages_per_second": round(len(pages) / seconds, 2),
+            "entries_per_second": round(entries / seconds, 2)}
+
+
+def main():
+    """Ingest the site, or benchmark parser scaling on saved pages."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingest every known CapitalX page into the knowledge base")
+    parser.add_argument("--workers", type=int, nargs="+", default=[KB_INGEST_WORKERS], help="Parser processes")
+    parser.add_argument("--benchmark", nargs="*", metavar="HTML", help="Time parsing of saved pages instead")
+    parser.add_argument("--copies", type=int, default=200, help="Times each saved page is parsed when benchmarking")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.benchmark is not None:
+        pages = []
+        for path in args.benchmark or ["demo.html"]:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                pages.append((f"https://capitalx-rtn.onrender.com/{_page_slug(path)}/", f.read()))
+        pages = pages * args.copies
+        for workers in args.workers:
+            result = measure_parse_throughput(pages, workers)
+            print(f"{workers:3d} workers: {result['pages_per_second']:8.1f} pages/s "
+                  f"{result['entries_per_second']:9.1f} entries/s")
+        return
+
+    report = ingest_site(workers=args.workers[0])
+    print(f"✅ Ingested {report['pages']} pages ({report['failed']} failed, {report['duplicates']} near-duplicates "
+          f"skipped) into {report['entries']} entries")
+    print(f"⚡ {report['pages_per_second']} pages/s, {report['entries_per_second']} entries/s "
+          f"with {report['workers']} workers")
+
+
+if __name__ == "__main__":
+    main()
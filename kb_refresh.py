@@ -0,0 +1,166 @@
+"""
+Knowledge Base Refresh Module
+Runs the website scrape in a background thread so the bot never waits for it.
+
+The bot starts serving from the KB already on disk; the refresh swaps new content in
+when (and if) it arrives. Progress is kept in memory for /refresh_kb and written to
+a JSON snapshot so the health_check web process can show it on /status.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Any
+
+from search_metrics import write_snapshot, read_snapshot
+
+logger = logging.getLogger(__name__)
+
+KB_REFRESH_STATUS_FILE = os.getenv("KB_REFRESH_STATUS_FILE", "kb_refresh_status.json")
+
+
+class KBRefresher:
+    """Runs at most one knowledge base refresh at a time in a daemon thread."""
+
+    def __init__(self, refresh_func: Optional[Callable[..., bool]] = None,
+                 status_file: Optional[str] = KB_REFRESH_STATUS_FILE):
+        """
+        Args:
+            refresh_func: Callable taking a progress callback and returning success;
+                defaults to kb.refresh_knowledge_base
+            status_file: Where to write the status snapshot, or None to keep it in memory only
+        """
+        self.refresh_func = refresh_func
+        self.status_file = status_file
+        self.status: Dict[str, Any] = {
+            "state": "idle",
+            "stage": None,
+            "reason": None,
+            "started_at": None,
+            "finished_at": None,
+            "duration_seconds": None,
+            "success": None,
+            "error": None,
+            "runs": 0
+        }
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._done.set()
+
+    def start(self, reason: str = "manual") -> bool:
+        """
+        Start a refresh in the background.
+
+        Args:
+            reason: Recorded in the status, e.g. "startup" or "command"
+
+        Returns:
+            False if a refresh is already running
+        """
+        with self._lock:
+            if not self._done.is_set():
+                return False
+            self._done.clear()
+            self.status.update({
+                "state": "running",
+                "stage": "starting",
+                "reason": reason,
+                "started_at": time.time(),
+                "finished_at": None,
+                "duration_seconds": None,
+                "success": None,
+                "error": None,
+                "runs": self.status["runs"] + 1
+            })
+        self._write_status()
+        threading.Thread(target=self._run, name="kb-refresh", daemon=True).start()
+        logger.info(f"Knowledge base refresh started in background ({reason})")
+        return True
+
+    def is_running(self) -> bool:
+        return not self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[bool]:
+        """Block until the current refresh finishes; returns its success, or None on timeout."""
+        if not self._done.wait(timeout):
+            return None
+        return self.status["success"]
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.status)
+
+    def _report(self, stage: str) -> None:
+        with self._lock:
+            self.status["stage"] = stage
+        logger.info(f"Knowledge base refresh: {stage}")
+        self._write_status()
+
+    def _run(self) -> None:
+        success = False
+        error = None
+        try:
+            refresh = self.refresh_func
+            if refresh is None:
+                # Imported lazily: kb pulls in the scraper and search modules
+                from kb import refresh_knowledge_base
+                refresh = refresh_knowledge_base
+            success = bool(refresh(progress=self._report))
+        except Exception as e:
+            error = str(e)
+            logger.error(f"Background knowledge base refresh failed: {e}")
+        finally:
+            with self._lock:
+                finished_at = time.time()
+                self.status.update({
+                    "state": "succeeded" if success else "failed",
+                    "finished_at": finished_at,
+                    "duration_seconds": round(finished_at - self.status["started_at"], 3),
+                    "success": success,
+                    "error": error
+                })
+            # Written before waiters are released, so they never read a stale "running" snapshot
+            self._write_status()
+            self._done.set()
+            if success:
+                logger.info(f"Knowledge base refresh finished in {self.status['duration_seconds']}s")
+            else:
+                logger.warning("Knowledge base refresh failed, still serving the existing knowledge base")
+
+    def persist(self, path: str = KB_REFRESH_STATUS_FILE) -> None:
+        """
+        Start writing the status snapshot to a file; only the bot process does this.
+
+        Args:
+            path: Snapshot file read by the health_check /status page
+        """
+        self.status_file = path
+        self._write_status()
+
+    def _write_status(self) -> None:
+        if not self.status_file:
+            return
+        try:
+            write_snapshot(self.status_file, self.get_status())
+        except OSError as e:
+            logger.error(f"Error writing knowledge base refresh status: {e}")
+
+
+# Global refresher shared by startup and /refresh_kb; the bot enables the status file with persist()
+kb_refresher = KBRefresher(status_file=None)
+
+
+def start_background_refresh(reason: str = "manual") -> bool:
+    """Start a background knowledge base refresh unless one is already running."""
+    return kb_refresher.start(reason)
+
+
+def get_refresh_status() -> Dict[str, Any]:
+    """Status of the current or last refresh in this process."""
+    return kb_refresher.get_status()
+
+
+def load_refresh_status(path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Read the status snapshot written by the bot process."""
+    return read_snapshot(path or KB_REFRESH_STATUS_FILE)
@@ -5,21 +5,35 @@ Fetches and processes content from the CapitalX website to populate the bot's kn
 
 import requests
 from bs4 import BeautifulSoup
+import hashlib
 import logging
 import sqlite3
 import re
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Any, NamedTuple, Callable
+
+from kb_versioning import ensure_kb_schema, sync_kb_entries, read_kb_entries
+from html_parsing import make_soup
+from async_crawler import DEFAULT_HEADERS
+from http_transport import create_session
 
 logger = logging.getLogger(__name__)
 
+# Bump when parse_main_page/save_to_kb change, so unchanged pages are re-parsed once
+PARSER_VERSION = 2
+
+class FetchResult(NamedTuple):
+    """Outcome of a conditional fetch: "changed", "not_modified", "unchanged" or "error"."""
+    status: str
+    content: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    body_hash: Optional[str] = None
+
 class KBScraper:
     def __init__(self, base_url: str = "https://capitalx-rtn.onrender.com/", db_file: str = "telegram_bot.db"):
         self.base_url = base_url.rstrip('/')
         self.db_file = db_file
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self.session = create_session(DEFAULT_HEADERS)
         
     def fetch_page_content(self, url: str) -> Optional[str]:
         """Fetch content from a URL."""
@@ -31,9 +45,74 @@ class KBScraper:
             logger.error(f"Error fetching {url}: {e}")
             return None
     
+    def load_fetch_state(self, url: str) -> Optional[Dict[str, Any]]:
+        """Validators and body hash from the last successful refresh of a URL."""
+        conn = sqlite3.connect(self.db_file)
+        try:
+            # State is only trusted while the entries it produced are still in the KB
+            if not conn.execute("SELECT 1 FROM kb_enhanced WHERE url = ? LIMIT 1", (url,)).fetchone():
+                return None
+            row = conn.execute("""
+                SELECT etag, last_modified, body_hash, parser_version FROM kb_fetch_state WHERE url = ?
+            """, (url,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read fetch state for {url}: {e}")
+            return None
+        finally:
+            conn.close()
+        if not row or row[3] != PARSER_VERSION:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "body_hash": row[2]}
+    
+    def save_fetch_state(self, url: str, result: FetchResult):
+        """Remember a URL's validators and body hash for the next conditional request."""
+        conn = sqlite3.connect(self.db_file)
+        try:
+            conn.execute("""
+                INSERT OR REPLACE INTO kb_fetch_state (url, etag, last_modified, body_hash, parser_version, fetched_at)
+                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """, (url, result.etag, result.last_modified, result.body_hash, PARSER_VERSION))
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def fetch_page_if_changed(self, url: str, state: Optional[Dict[str, Any]] = None) -> FetchResult:
+        """
+        Fetch a URL with If-None-Match / If-Modified-Since from the stored state.
+        
+        Args:
+            url: Page to fetch
+            state: Result of load_fetch_state, or None to fetch unconditionally
+            
+        Returns:
+            FetchResult; content is only set when the body changed
+        """
+        headers = {}
+        if state:
+            if state.get("etag"):
+                headers["If-None-Match"] = state["etag"]
+            if state.get("last_modified"):
+                headers["If-Modified-Since"] = state["last_modified"]
+        try:
+            response = self.session.get(url, headers=headers, timeout=10)
+            if response.status_code == 304:
+                return FetchResult("not_modified")
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.error(f"Error fetching {url}: {e}")
+            return FetchResult("error")
+        
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        body_hash = hashlib.sha256(response.content).hexdigest()
+        if state and state.get("body_hash") == body_hash:
+            # Server ignores validators (or they rotated) but the page is identical
+            return FetchResult("unchanged", None, etag, last_modified, body_hash)
+        return FetchResult("changed", response.text, etag, last_modified, body_hash)
+    
     def parse_main_page(self, html_content: str) -> Dict[str, str]:
         """Parse the main page content and extract key information."""
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = make_soup(html_content)
         
         knowledge_data = {}
         
@@ -162,45 +241,32 @@ class KBScraper:
     def setup_kb_tables(self):
         """Setup the knowledge base tables in the database."""
         conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        
-        # Create enhanced KB table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS kb_enhanced (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                category TEXT NOT NULL,
-                subcategory TEXT,
-                keywords TEXT,
-                title TEXT NOT NULL,
-                content TEXT NOT NULL,
-                url TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ensure_kb_schema(conn)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS kb_fetch_state (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body_hash TEXT,
+                parser_version INTEGER,
+                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
-        
-        # Create index for faster searching
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_kb_search 
-            ON kb_enhanced(category, subcategory, keywords, title)
-        """)
-        
         conn.commit()
         conn.close()
         
     def clear_existing_kb(self):
         """Clear existing knowledge base entries."""
         conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM kb_enhanced")
-        conn.commit()
-        conn.close()
+        try:
+            # Syncing to nothing removes every row and bumps the KB version
+            sync_kb_entries(conn, [])
+        finally:
+            conn.close()
         logger.info("Cleared existing knowledge base entries")
     
-    def save_to_kb(self, knowledge_data: Dict[str, str]):
-        """Save extracted knowledge to the database."""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
+    def save_to_kb(self, knowledge_data: Dict[str, str]) -> Dict[str, Any]:
+        """Sync extracted knowledge into the database, only touching entries that changed."""
         
         # Define categories and keywords for better organization
         kb_entries = [
@@ -219,44 +285,76 @@ class KBScraper:
             ("Trading", "trading", "trading,trade,ai,strategies,invest", "Trading Information", knowledge_data.get("trading", ""))
         ]
         
-        for category, subcategory, keywords, title, content in kb_entries:
-            if content.strip():  # Only insert if content exists
-                cursor.execute("""
-                    INSERT INTO kb_enhanced (category, subcategory, keywords, title, content, url)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (category, subcategory, keywords, title, content, self.base_url))
+        rows = [
+            (category, subcategory, keywords, title, content, self.base_url)
+            for category, subcategory, keywords, title, content in kb_entries
+            if content.strip()  # Only keep entries with content
+        ]
         
-        conn.commit()
-        conn.close()
-        logger.info(f"Saved {len([e for e in kb_entries if e[4].strip()])} knowledge base entries")
+        conn = sqlite3.connect(self.db_file)
+        try:
+            # Only rows this scrape rewrites are replaced; curated, doc: and page: rows (and
+            # sections the page no longer has) are kept, since their writers refresh them
+            scraped = {(category, subcategory, title) for category, subcategory, _, title, _, _ in rows}
+            kept = [entry for entry in read_kb_entries(conn) if (entry[0], entry[1], entry[3]) not in scraped]
+            result = sync_kb_entries(conn, kept + rows)
+        finally:
+            conn.close()
+        logger.info(f"Saved {len(rows)} knowledge base entries")
+        return result
     
-    def scrape_and_populate(self):
-        """Main method to scrape content and populate the knowledge base."""
+    def scrape_and_populate(self, force: bool = False, progress: Optional[Callable[[str], None]] = None):
+        """
+        Main method to scrape content and populate the knowledge base.
+        
+        Unchanged pages (304 Not Modified, or an identical body) cost one request:
+        nothing is parsed and nothing is written.
+        
+        Args:
+            force: Ignore stored validators and re-parse the page
+            progress: Called with the name of each stage as it starts
+        """
+        report = progress or (lambda stage: None)
         logger.info("Starting knowledge base scraping and population...")
         
         # Setup database tables
         self.setup_kb_tables()
         
-        # Fetch main page content
-        html_content = self.fetch_page_content(self.base_url)
-        if not html_content:
+        # Fetch main page content, conditionally if we have seen it before
+        report("fetching")
+        state = None if force else self.load_fetch_state(self.base_url)
+        result = self.fetch_page_if_changed(self.base_url, state)
+        if result.status == "error":
             logger.error("Failed to fetch main page content")
             return False
+        if result.status == "not_modified":
+            report("not_modified")
+            logger.info("Main page not modified since last refresh, knowledge base left as is")
+            return True
+        if result.status == "unchanged":
+            report("unchanged")
+            if (result.etag, result.last_modified) != (state.get("etag"), state.get("last_modified")):
+                self.save_fetch_state(self.base_url, result)
+            logger.info("Main page content unchanged since last refresh, knowledge base left as is")
+            return True
         
         # Parse content
-        knowledge_data = self.parse_main_page(html_content)
+        report("parsing")
+        knowledge_data = self.parse_main_page(result.content)
         
-        # Clear existing KB and save new data
-        self.clear_existing_kb()
+        # Sync new data; unchanged entries (and the KB version) are left alone
+        report("saving")
         self.save_to_kb(knowledge_data)
+        # Only remember the page once its entries are safely written
+        self.save_fetch_state(self.base_url, result)
         
         logger.info("Knowledge base scraping and population completed successfully!")
         return True
 
-def update_knowledge_base():
+def update_knowledge_base(progress: Optional[Callable[[str], None]] = None):
     """Utility function to update the knowledge base."""
     scraper = KBScraper()
-    return scraper.scrape_and_populate()
+    return scraper.scrape_and_populate(progress=progress)
 
 if __name__ == "__main__":
     # Configure logging
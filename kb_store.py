@@ -0,0 +1,381 @@
+"""
+Knowledge Base Store Module
+Compressed KB bodies, a compact metadata table and a term index for the search read path.
+
+kb_enhanced stays the table that writers edit. sync_kb_store derives three tables from it:
+kb_docs (small per-entry metadata), kb_terms (a token -> entry index searched with prefix
+ranges instead of LOWER(content) LIKE) and kb_bodies (zlib-compressed answers using a
+preset dictionary trained on the KB itself). Searches only touch the small tables. A
+body is decompressed only for results that are actually sent, and the hottest
+decompressed bodies stay in an LRU keyed by content hash.
+"""
+
+import logging
+import re
+import sqlite3
+import sys
+import threading
+import zlib
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Any, Tuple, Iterable
+
+from kb_versioning import ensure_kb_schema
+
+logger = logging.getLogger(__name__)
+DB_FILE = "telegram_bot.db"
+
+# zlib only looks back 32KB, so a larger preset dictionary is wasted
+DICTIONARY_SIZE = 16 * 1024
+COMPRESSION_LEVEL = 9
+BODY_CACHE_SIZE = 64
+MIN_TERM_LENGTH = 2
+
+# Field codes stored in kb_terms
+FIELD_KEYWORDS = 0
+FIELD_TITLE = 1
+FIELD_SUBCATEGORY = 2
+FIELD_CONTENT = 3
+
+TERM_PATTERN = re.compile(r"[a-z0-9]+")
+SEGMENT_PATTERN = re.compile(r"[^\n]+\n?|\S+\s*")
+
+
+def tokenize_terms(text: Optional[str]) -> List[str]:
+    """Lowercase alphanumeric tokens worth indexing."""
+    if not text:
+        return []
+    return [t for t in TERM_PATTERN.findall(text.lower()) if len(t) >= MIN_TERM_LENGTH]
+
+
+def ensure_store_schema(conn: sqlite3.Connection) -> None:
+    """Create the derived store tables if they don't exist."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS kb_docs (
+            entry_id INTEGER PRIMARY KEY,
+            category TEXT NOT NULL,
+            subcategory TEXT,
+            title TEXT NOT NULL,
+            keywords TEXT,
+            url TEXT,
+            content_hash TEXT,
+            body_length INTEGER,
+            updated_at TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_kb_docs_category
+        ON kb_docs(category, subcategory)
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS kb_bodies (
+            entry_id INTEGER PRIMARY KEY,
+            dict_id INTEGER NOT NULL,
+            body BLOB NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS kb_terms (
+            term TEXT NOT NULL,
+            field INTEGER NOT NULL,
+            entry_id INTEGER NOT NULL,
+            PRIMARY KEY (term, field, entry_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS kb_dictionaries (
+            dict_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data BLOB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def train_dictionary(bodies: Iterable[str], size: int = DICTIONARY_SIZE) -> bytes:
+    """
+    Build a zlib preset dictionary from text segments shared between bodies.
+
+    Lines and words that appear in several bodies (headings, bullets, emoji labels)
+    are ranked by the bytes they would save. zlib finds matches near the end of the
+    dictionary more cheaply, so the most valuable segments go last.
+    """
+    document_counts: Counter = Counter()
+    for body in bodies:
+        document_counts.update(set(SEGMENT_PATTERN.findall(body)))
+
+    scored = []
+    for segment, documents in document_counts.items():
+        encoded = segment.encode("utf-8")
+        if documents > 1 and len(encoded) > 3:
+            scored.append(((documents - 1) * len(encoded), encoded))
+    scored.sort(reverse=True)
+
+    chosen = []
+    total = 0
+    for _, encoded in scored:
+        if total + len(encoded) > size:
+            continue
+        chosen.append(encoded)
+        total += len(encoded)
+    return b"".join(reversed(chosen))
+
+
+def compress_body(body: str, dictionary: bytes) -> bytes:
+    """Compress a body with an optional preset dictionary."""
+    if dictionary:
+        compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, 15, 9, zlib.Z_DEFAULT_STRATEGY, dictionary)
+    else:
+        compressor = zlib.compressobj(COMPRESSION_LEVEL)
+    return compressor.compress(body.encode("utf-8")) + compressor.flush()
+
+
+def decompress_body(blob: bytes, dictionary: bytes) -> str:
+    """Inverse of compress_body."""
+    decompressor = zlib.decompressobj(zdict=dictionary) if dictionary else zlib.decompressobj()
+    return (decompressor.decompress(blob) + decompressor.flush()).decode("utf-8")
+
+
+def _entry_terms(keywords: Optional[str], title: str, subcategory: Optional[str],
+                 content: str) -> List[Tuple[str, int]]:
+    terms = set()
+    for field, text in ((FIELD_KEYWORDS, (keywords or "").replace(",", " ")), (FIELD_TITLE, title),
+                        (FIELD_SUBCATEGORY, (subcategory or "").replace("_", " ")), (FIELD_CONTENT, content)):
+        terms.update((term, field) for term in tokenize_terms(text))
+    return sorted(terms)
+
+
+def _latest_dictionary(cursor: sqlite3.Cursor) -> Tuple[int, bytes]:
+    row = cursor.execute("SELECT dict_id, data FROM kb_dictionaries ORDER BY dict_id DESC LIMIT 1").fetchone()
+    return (row[0], row[1]) if row else (0, b"")
+
+
+def sync_kb_store(conn: sqlite3.Connection, retrain: bool = False) -> Dict[str, int]:
+    """
+    Bring the derived store in line with kb_enhanced, only re-encoding rows whose hash changed.
+
+    Args:
+        conn: Open database connection (the caller commits)
+        retrain: Train a new dictionary and recompress every body with it
+
+    Returns:
+        Dict with written/deleted/unchanged counts and the dictionary id in use
+    """
+    ensure_kb_schema(conn)
+    ensure_store_schema(conn)
+    cursor = conn.cursor()
+
+    rows = cursor.execute("""
+        SELECT id, category, subcategory, keywords, title, content, url, content_hash, updated_at
+        FROM kb_enhanced
+    """).fetchall()
+    existing = dict(cursor.execute("SELECT entry_id, content_hash FROM kb_docs").fetchall())
+
+    dict_id, dictionary = _latest_dictionary(cursor)
+    if rows and (retrain or dict_id == 0):
+        dictionary = train_dictionary(row[5] for row in rows)
+        if dictionary:
+            cursor.execute("INSERT INTO kb_dictionaries (data) VALUES (?)", (dictionary,))
+            dict_id = cursor.lastrowid
+            logger.info(f"Trained {len(dictionary)}-byte KB compression dictionary {dict_id}")
+
+    stats = {"written": 0, "deleted": 0, "unchanged": 0, "dict_id": dict_id}
+    for entry_id, category, subcategory, keywords, title, content, url, content_hash, updated_at in rows:
+        if not retrain and content_hash is not None and existing.get(entry_id) == content_hash:
+            stats["unchanged"] += 1
+            continue
+        cursor.execute("""
+            INSERT OR REPLACE INTO kb_docs
+            (entry_id, category, subcategory, title, keywords, url, content_hash, body_length, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (entry_id, category, subcategory, title, keywords, url, content_hash, len(content), updated_at))
+        cursor.execute("INSERT OR REPLACE INTO kb_bodies (entry_id, dict_id, body) VALUES (?, ?, ?)",
+                       (entry_id, dict_id, compress_body(content, dictionary)))
+        cursor.execute("DELETE FROM kb_terms WHERE entry_id = ?", (entry_id,))
+        cursor.executemany("INSERT INTO kb_terms (term, field, entry_id) VALUES (?, ?, ?)",
+                           [(term, field, entry_id) for term, field in _entry_terms(keywords, title, subcategory, content)])
+        stats["written"] += 1
+
+    live_ids = {row[0] for row in rows}
+    for entry_id in set(existing) - live_ids:
+        cursor.execute("DELETE FROM kb_docs WHERE entry_id = ?", (entry_id,))
+        cursor.execute("DELETE FROM kb_bodies WHERE entry_id = ?", (entry_id,))
+        cursor.execute("DELETE FROM kb_terms WHERE entry_id = ?", (entry_id,))
+        stats["deleted"] += 1
+
+    if stats["written"] or stats["deleted"]:
+        logger.info(f"KB store synced: {stats}")
+    return stats
+
+
+def _prefix_upper_bound(prefix: str) -> str:
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class KBStore:
+    """Read path over the derived store with an LRU of decompressed bodies."""
+
+    def __init__(self, cache_size: int = BODY_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._bodies: "OrderedDict[str, str]" = OrderedDict()
+        self._dictionaries: Dict[Tuple[str, int], bytes] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def available(self, conn: sqlite3.Connection) -> bool:
+        """Whether the store has been built for this database."""
+        try:
+            return conn.execute("SELECT 1 FROM kb_docs LIMIT 1").fetchone() is not None
+        except sqlite3.Error:
+            return False
+
+    def search_terms(self, conn: sqlite3.Connection, terms: Iterable[str],
+                     weights: Dict[int, float], limit: int = 5) -> List[Tuple[int, float]]:
+        """
+        Rank entries by the fields their indexed terms match, using prefix ranges.
+
+        Query terms go through tokenize_terms like indexed text does, so "what's"
+        looks up "what" and "e-wallet" looks up "wallet". A term that splits into
+        several tokens matches a field only when all of them do, the nearest
+        equivalent of the old "field LIKE %term%" phrase match. Each token is
+        matched as a prefix of indexed words, not as an arbitrary substring.
+        Each (query term, field) pair counts once per entry, mirroring the old
+        LIKE relevance sums.
+
+        Returns:
+            (entry_id, score) pairs, best first
+        """
+        scores: Dict[int, float] = {}
+        for tokens in dict.fromkeys(tuple(dict.fromkeys(tokenize_terms(t))) for t in terms):
+            if not tokens:
+                continue
+            matched = None
+            for token in tokens:
+                pairs = set(conn.execute("""
+                    SELECT DISTINCT entry_id, field FROM kb_terms
+                    WHERE term >= ? AND term < ?
+                """, (token, _prefix_upper_bound(token))).fetchall())
+                matched = pairs if matched is None else matched & pairs
+            for entry_id, field in matched:
+                scores[entry_id] = scores.get(entry_id, 0) + weights.get(field, 0)
+        ranked = sorted(((entry_id, score) for entry_id, score in scores.items() if score > 0),
+                        key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+    def find_entry(self, conn: sqlite3.Connection, category: str, subcategory: Optional[str]) -> Optional[int]:
+        """Most recently updated entry in a category/subcategory; ties go to the highest id."""
+        row = conn.execute("""
+            SELECT entry_id FROM kb_docs
+            WHERE category = ? AND subcategory = ?
+            ORDER BY updated_at DESC, entry_id DESC
+            LIMIT 1
+        """, (category, subcategory)).fetchone()
+        return row[0] if row else None
+
+    def get_entry(self, conn: sqlite3.Connection, entry_id: int) -> Optional[Tuple[str, str, str]]:
+        """Return (title, category, content) for an entry, decompressing only on an LRU miss."""
+        row = conn.execute("SELECT title, category, content_hash FROM kb_docs WHERE entry_id = ?",
+                           (entry_id,)).fetchone()
+        if not row:
+            return None
+        content = self.get_body(conn, entry_id, row[2])
+        return (row[0], row[1], content) if content is not None else None
+
+    def get_body(self, conn: sqlite3.Connection, entry_id: int, content_hash: Optional[str]) -> Optional[str]:
+        """Decompressed body of an entry; cached by content hash so it can never be stale."""
+        if content_hash:
+            with self._lock:
+                body = self._bodies.get(content_hash)
+                if body is not None:
+                    self._bodies.move_to_end(content_hash)
+                    self.hits += 1
+                    return body
+
+        row = conn.execute("SELECT dict_id, body FROM kb_bodies WHERE entry_id = ?", (entry_id,)).fetchone()
+        if not row:
+            return None
+        body = decompress_body(row[1], self._dictionary(conn, row[0]))
+
+        with self._lock:
+            self.misses += 1
+            if content_hash:
+                self._bodies[content_hash] = body
+                if len(self._bodies) > self.cache_size:
+                    self._bodies.popitem(last=False)
+        return body
+
+    def _dictionary(self, conn: sqlite3.Connection, dict_id: int) -> bytes:
+        if dict_id == 0:
+            return b""
+        database = conn.execute("PRAGMA database_list").fetchone()[2]
+        key = (database, dict_id)
+        dictionary = self._dictionaries.get(key)
+        if dictionary is None:
+            row = conn.execute("SELECT data FROM kb_dictionaries WHERE dict_id = ?", (dict_id,)).fetchone()
+            dictionary = row[0] if row else b""
+            self._dictionaries[key] = dictionary
+        return dictionary
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._bodies.clear()
+            self._dictionaries.clear()
+
+
+# Global store shared by the search engines
+kb_store = KBStore()
+
+
+def get_store_stats(db_file: Optional[str] = None) -> Dict[str, Any]:
+    """Raw vs stored sizes of the KB bodies."""
+    try:
+        conn = sqlite3.connect(db_file or DB_FILE)
+        try:
+            raw = conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(content AS BLOB))), 0) FROM kb_enhanced").fetchone()
+            stored = conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM kb_bodies").fetchone()
+            dictionary = conn.execute("SELECT COALESCE(LENGTH(data), 0) FROM kb_dictionaries ORDER BY dict_id DESC LIMIT 1").fetchone()
+            terms = conn.execute("SELECT COUNT(*) FROM kb_terms").fetchone()[0]
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.error(f"Error reading KB store stats: {e}")
+        return {}
+    return {
+        "entries": raw[0],
+        "raw_bytes": raw[1],
+        "stored_entries": stored[0],
+        "compressed_bytes": stored[1],
+        "dictionary_bytes": dictionary[0] if dictionary else 0,
+        "ratio": round(stored[1] / raw[1], 3) if raw[1] else None,
+        "terms": terms
+    }
+
+
+def main():
+    """Build the compressed KB store and report its size."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the compressed CapitalX KB store")
+    parser.add_argument("--db", default=DB_FILE, help="Database file")
+    parser.add_argument("--retrain", action="store_true", help="Train a new dictionary and recompress all bodies")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        conn = sqlite3.connect(args.db)
+        try:
+            sync_kb_store(conn, retrain=args.retrain)
+            conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"Error building KB store: {e}")
+        sys.exit(1)
+
+    stats = get_store_stats(args.db)
+    print(f"{stats['stored_entries']} bodies: {stats['raw_bytes']} bytes raw -> {stats['compressed_bytes']} bytes "
+          f"compressed (ratio {stats['ratio']}, {stats['dictionary_bytes']}-byte dictionary, {stats['terms']} terms)")
+
+
+if __name__ == "__main__":
+    main()
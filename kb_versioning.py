@@ -0,0 +1,388 @@
+"""
+Knowledge Base Versioning Module
+Content hashes for KB rows and a global KB version that only changes when content does.
+
+Writers call sync_kb_entries instead of deleting and re-inserting everything. Each
+row is compared by hash; if nothing changed nothing is written. Otherwise the new
+KB is built in a shadow table (with its index) and swapped in by renaming it over
+kb_enhanced in one short transaction, together with the version bump. The database
+runs in WAL mode, so readers keep using the old table until the swap commits and
+never block on or see a half-built KB. Readers (search indexes, result and answer
+caches) key their state off get_kb_version(), so the version bump is what tells
+them to reload, and an identical refresh invalidates nothing.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Any, Tuple, Iterable, Hashable
+
+logger = logging.getLogger(__name__)
+DB_FILE = "telegram_bot.db"
+
+# Other processes (e.g. populate_capitalx_kb.py run by hand) can bump the version,
+# so the cached value is re-read from the database at most this often
+VERSION_CHECK_INTERVAL_SECONDS = 5.0
+
+HASH_FIELDS = ("category", "subcategory", "keywords", "title", "content", "url")
+
+SHADOW_TABLE = "kb_enhanced_shadow"
+# The shadow table's index can't share a name with the live one, so rebuilds alternate
+SEARCH_INDEX_NAMES = ("idx_kb_search", "idx_kb_search_b")
+
+KBEntry = Tuple[str, Optional[str], Optional[str], str, str, Optional[str]]
+
+
+def compute_content_hash(category: str, subcategory: Optional[str], keywords: Optional[str],
+                         title: str, content: str, url: Optional[str]) -> str:
+    """Stable SHA-256 over every user-visible field of a KB row."""
+    fields = (category, subcategory, keywords, title, content, url)
+    joined = "\x1f".join("" if field is None else str(field) for field in fields)
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
+
+def _create_kb_table(cursor: sqlite3.Cursor, table: str) -> None:
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            category TEXT NOT NULL,
+            subcategory TEXT,
+            keywords TEXT,
+            title TEXT NOT NULL,
+            content TEXT NOT NULL,
+            url TEXT,
+            content_hash TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def _create_search_index(cursor: sqlite3.Cursor, table: str, name: str) -> None:
+    cursor.execute(f"""
+        CREATE INDEX IF NOT EXISTS {name}
+        ON {table}(category, subcategory, keywords, title)
+    """)
+
+
+def _search_index_name(cursor: sqlite3.Cursor, table: str = "kb_enhanced") -> Optional[str]:
+    """Name of the search index currently on a table, if any."""
+    for row in cursor.execute(f"PRAGMA index_list({table})").fetchall():
+        if row[1] in SEARCH_INDEX_NAMES:
+            return row[1]
+    return None
+
+
+def enable_wal(conn: sqlite3.Connection) -> None:
+    """Switch the database to WAL so readers never wait for a KB rebuild (persists in the file)."""
+    if conn.in_transaction:
+        return
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+    except sqlite3.Error as e:
+        logger.warning(f"Could not enable WAL mode: {e}")
+
+
+def ensure_kb_schema(conn: sqlite3.Connection) -> None:
+    """Create the KB tables, or add the versioning columns to an older database."""
+    cursor = conn.cursor()
+    _create_kb_table(cursor, "kb_enhanced")
+    if _search_index_name(cursor) is None:
+        _create_search_index(cursor, "kb_enhanced", SEARCH_INDEX_NAMES[0])
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS kb_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    """)
+
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(kb_enhanced)")}
+    if "content_hash" not in columns:
+        cursor.execute("ALTER TABLE kb_enhanced ADD COLUMN content_hash TEXT")
+
+    # Backfill rows written before hashing existed (or by older writers)
+    missing = cursor.execute(f"""
+        SELECT id, {', '.join(HASH_FIELDS)} FROM kb_enhanced WHERE content_hash IS NULL
+    """).fetchall()
+    for row in missing:
+        cursor.execute("UPDATE kb_enhanced SET content_hash = ? WHERE id = ?",
+                       (compute_content_hash(*row[1:]), row[0]))
+
+
+def _read_meta(cursor: sqlite3.Cursor, key: str) -> Optional[str]:
+    row = cursor.execute("SELECT value FROM kb_meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def _write_meta(cursor: sqlite3.Cursor, key: str, value: str) -> None:
+    cursor.execute("INSERT OR REPLACE INTO kb_meta (key, value) VALUES (?, ?)", (key, value))
+
+
+def _digest_of(content_hashes: Iterable[Optional[str]]) -> str:
+    digest = hashlib.sha256()
+    for content_hash in sorted(h or "" for h in content_hashes):
+        digest.update(content_hash.encode("ascii"))
+    return digest.hexdigest()
+
+
+def compute_kb_digest(cursor: sqlite3.Cursor) -> str:
+    """Digest of the whole KB, independent of row order and ids."""
+    return _digest_of(row[0] for row in cursor.execute("SELECT content_hash FROM kb_enhanced"))
+
+
+def _build_shadow_table(conn: sqlite3.Connection, rows: List[Tuple]) -> None:
+    """Write the new KB into the shadow table and index it, outside the live table."""
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {SHADOW_TABLE}")
+    _create_kb_table(cursor, SHADOW_TABLE)
+    cursor.executemany(f"""
+        INSERT INTO {SHADOW_TABLE}
+        (id, category, subcategory, keywords, title, content, url, content_hash, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), COALESCE(?, CURRENT_TIMESTAMP))
+    """, rows)
+    live_index = _search_index_name(cursor)
+    shadow_index = SEARCH_INDEX_NAMES[1] if live_index == SEARCH_INDEX_NAMES[0] else SEARCH_INDEX_NAMES[0]
+    _create_search_index(cursor, SHADOW_TABLE, shadow_index)
+    conn.commit()
+
+
+def _swap_in_shadow_table(conn: sqlite3.Connection) -> None:
+    """Replace kb_enhanced with the shadow table; the caller commits."""
+    cursor = conn.cursor()
+    cursor.execute("ALTER TABLE kb_enhanced RENAME TO kb_enhanced_old")
+    cursor.execute(f"ALTER TABLE {SHADOW_TABLE} RENAME TO kb_enhanced")
+    cursor.execute("DROP TABLE kb_enhanced_old")
+
+
+def _is_live_db(conn: sqlite3.Connection) -> bool:
+    """Whether conn is open on DB_FILE, whose version get_kb_version() reports."""
+    for _, name, path in conn.execute("PRAGMA database_list").fetchall():
+        if name == "main":
+            return bool(path) and os.path.abspath(path) == os.path.abspath(DB_FILE)
+    return False
+
+
+def read_kb_entries(conn: sqlite3.Connection) -> List[KBEntry]:
+    """Current KB rows as entries, in id order, for writers that only replace some of them."""
+    ensure_kb_schema(conn)
+    return conn.execute("""
+        SELECT category, subcategory, keywords, title, content, url FROM kb_enhanced ORDER BY id
+    """).fetchall()
+
+
+def sync_kb_entries(conn: sqlite3.Connection, entries: Iterable[KBEntry]) -> Dict[str, Any]:
+    """
+    Make kb_enhanced match the given entries, writing nothing if nothing changed.
+
+    Rows are matched on (category, subcategory, title) and keep their id and
+    created_at. Changes are built in a shadow table and swapped in atomically
+    together with the new version and the derived store, then the version is
+    published, so readers never index uncommitted or half-written rows.
+
+    Args:
+        conn: Open database connection
+        entries: (category, subcategory, keywords, title, content, url) tuples
+
+    Returns:
+        Dict with inserted/updated/deleted/unchanged counts, "changed" and the KB "version"
+    """
+    enable_wal(conn)
+    ensure_kb_schema(conn)
+    conn.commit()
+    cursor = conn.cursor()
+
+    existing: Dict[Tuple, Tuple] = {}
+    duplicates = 0
+    for row_id, category, subcategory, title, content_hash, created_at, updated_at in cursor.execute("""
+            SELECT id, category, subcategory, title, content_hash, created_at, updated_at
+            FROM kb_enhanced ORDER BY id"""):
+        key = (category, subcategory, title)
+        if key in existing:
+            duplicates += 1
+        else:
+            existing[key] = (row_id, content_hash, created_at, updated_at)
+    next_id = (cursor.execute("SELECT MAX(id) FROM kb_enhanced").fetchone()[0] or 0) + 1
+
+    stats = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+    rows = []
+    seen = set()
+    for category, subcategory, keywords, title, content, url in entries:
+        key = (category, subcategory, title)
+        if key in seen:
+            continue
+        seen.add(key)
+        content_hash = compute_content_hash(category, subcategory, keywords, title, content, url)
+        if key not in existing:
+            row_id, created_at, updated_at = next_id, None, None
+            next_id += 1
+            stats["inserted"] += 1
+        else:
+            row_id, old_hash, created_at, updated_at = existing[key]
+            if old_hash == content_hash:
+                stats["unchanged"] += 1
+            else:
+                # None becomes CURRENT_TIMESTAMP in the shadow table
+                updated_at = None
+                stats["updated"] += 1
+        rows.append((row_id, category, subcategory, keywords, title, content, url, content_hash, created_at, updated_at))
+    stats["deleted"] = len(existing) - (stats["updated"] + stats["unchanged"]) + duplicates
+
+    digest = _digest_of(row[7] for row in rows)
+    version = int(_read_meta(cursor, "version") or 0)
+    changed = digest != _read_meta(cursor, "digest")
+    rows_changed = stats["inserted"] or stats["updated"] or stats["deleted"]
+
+    if rows_changed:
+        _build_shadow_table(conn, rows)
+        # Explicit transaction: the renames, version and store update become visible together
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            _swap_in_shadow_table(conn)
+            if changed:
+                version += 1
+                _write_meta(cursor, "version", str(version))
+                _write_meta(cursor, "digest", digest)
+            # Keep the compressed read-side store in step with the rows just written
+            from kb_store import sync_kb_store
+            sync_kb_store(conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    else:
+        # Nothing to swap, but databases created before the store existed still need it built
+        from kb_store import sync_kb_store
+        sync_kb_store(conn)
+        if changed:
+            version += 1
+            _write_meta(cursor, "version", str(version))
+            _write_meta(cursor, "digest", digest)
+        conn.commit()
+
+    if changed:
+        logger.info(f"Knowledge base changed ({stats}), now at version {version}")
+    else:
+        logger.info(f"Knowledge base unchanged at version {version}")
+    stats["changed"] = changed
+    stats["version"] = version
+    # Scratch and test databases have their own version numbers; only the live one is published
+    if _is_live_db(conn):
+        _version_cache.set(version)
+    return stats
+
+
+def read_kb_version(db_file: Optional[str] = None) -> int:
+    """Read the KB version straight from the database (0 if it was never synced)."""
+    try:
+        conn = sqlite3.connect(db_file or DB_FILE)
+        try:
+            row = conn.execute("SELECT value FROM kb_meta WHERE key = 'version'").fetchone()
+            return int(row[0]) if row else 0
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return 0
+
+
+class _VersionCache:
+    """Process-local copy of the KB version, refreshed from the database periodically."""
+
+    def __init__(self, check_interval: float = VERSION_CHECK_INTERVAL_SECONDS):
+        self.check_interval = check_interval
+        self.version: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> int:
+        now = time.monotonic()
+        if self.version is None or now - self._checked_at >= self.check_interval:
+            version = read_kb_version()
+            with self._lock:
+                self.version = version
+                self._checked_at = now
+        return self.version
+
+    def set(self, version: int) -> None:
+        with self._lock:
+            self.version = version
+            self._checked_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version = None
+
+
+_version_cache = _VersionCache()
+
+
+def get_kb_version() -> int:
+    """Current KB version; cheap enough to call on every lookup."""
+    return _version_cache.get()
+
+
+def invalidate_kb_version() -> None:
+    """Force the next get_kb_version() call to re-read the database."""
+    _version_cache.invalidate()
+
+
+class VersionedCache:
+    """Bounded dict cache that empties itself whenever the KB version changes."""
+
+    def __init__(self, max_size: int = 512):
+        self.max_size = max_size
+        self.version: Optional[int] = None
+        self._data: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self) -> None:
+        version = get_kb_version()
+        if version != self.version:
+            self._data.clear()
+            self.version = version
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or stale."""
+        with self._lock:
+            self._check_version()
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Cache a value for the current KB version."""
+        with self._lock:
+            self._check_version()
+            if len(self._data) >= self.max_size:
+                # Dicts keep insertion order, so this evicts the oldest entry
+                self._data.pop(next(iter(self._data)))
+            self._data[key] = value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+def get_kb_status(db_file: Optional[str] = None) -> Dict[str, Any]:
+    """Version, digest and row count of the knowledge base."""
+    try:
+        conn = sqlite3.connect(db_file or DB_FILE)
+        try:
+            cursor = conn.cursor()
+            return {
+                "version": int(_read_meta(cursor, "version") or 0),
+                "digest": _read_meta(cursor, "digest"),
+                "entries": cursor.execute("SELECT COUNT(*) FROM kb_enhanced").fetchone()[0]
+            }
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.error(f"Error reading knowledge base status: {e}")
+        return {"version": 0, "digest": None, "entries": 0}
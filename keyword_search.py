@@ -3,6 +3,8 @@ import logging
 from typing import List, Tuple, Dict, Optional
 from collections import defaultdict
 
+from search_metrics import search_metrics
+
 logger = logging.getLogger(__name__)
 DB_FILE = "telegram_bot.db"
 
@@ -203,7 +205,7 @@ class KeywordSearchEngine:
                 cursor.execute("""
                     SELECT content FROM kb_enhanced 
                     WHERE category = ? AND subcategory = ?
-                    ORDER BY updated_at DESC
+                    ORDER BY updated_at DESC, id DESC
                     LIMIT 1
                 """, (category, subcategory))
                 
@@ -263,7 +265,7 @@ class KeywordSearchEngine:
                 cursor.execute("""
                     SELECT title, category, content FROM kb_enhanced 
                     WHERE category = ? AND subcategory = ?
-                    ORDER BY updated_at DESC
+                    ORDER BY updated_at DESC, id DESC
                     LIMIT 1
                 """, (category, subcategory))
                 
@@ -311,11 +313,21 @@ search_engine = KeywordSearchEngine()
 
 def search_kb_enhanced(query: str) -> Optional[str]:
     """Enhanced search function for the knowledge base."""
-    return search_engine.search_kb_enhanced(query)
+    with search_metrics.trace("keyword_v1", query) as trace:
+        with trace.stage("search"):
+            result = search_engine.search_kb_enhanced(query)
+        if result:
+            trace.record_outcome("search")
+        return result
 
 def search_kb_detailed_enhanced(query: str) -> List[Tuple[str, str, str]]:
     """Enhanced detailed search returning multiple results."""
-    return search_engine.search_kb_detailed_enhanced(query)
+    with search_metrics.trace("keyword_v1_detailed", query) as trace:
+        with trace.stage("search"):
+            results = search_engine.search_kb_detailed_enhanced(query)
+        if results:
+            trace.record_outcome("search")
+        return results
 
 if __name__ == "__main__":
     # Test the search engine
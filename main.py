@@ -50,6 +50,7 @@ else:
         Application,
         CommandHandler,
         CallbackQueryHandler,
+        InlineQueryHandler,
         MessageHandler,
         ContextTypes,
         filters
@@ -68,9 +69,15 @@ else:
         client_bot_message_handler
     )
     # Import broadcast handler
-    from handlers import broadcast_command
+    from handlers import broadcast_command, inline_query_handler, refresh_kb_command
     from database import init_database
-    from kb import refresh_knowledge_base
+    from kb_refresh import start_background_refresh, kb_refresher
+    from kb_artifact import warm_start
+    from capitalx_api import close_async_api_client
+    from http_transport import close_async_transport
+    from search_metrics import search_metrics
+    from query_analytics import query_analytics
+    from api_resilience import api_resilience
 
     # Load environment variables
     load_dotenv()
@@ -101,6 +108,11 @@ else:
             except Exception as e:
                 logger.error(f"Failed to send error message: {e}")
 
+    async def post_shutdown(application) -> None:
+        """Close pooled API connections when the bot stops."""
+        await close_async_api_client()
+        await close_async_transport()
+
     def run_bot_with_retry():
         """Run the bot with automatic retry on failure."""
         max_retries = 15  # Increased retries
@@ -124,13 +136,13 @@ else:
                     init_database()
                     logger.info("Database initialized successfully")
                     
-                    # Initialize knowledge base on startup
-                    logger.info("Initializing knowledge base...")
-                    kb_success = refresh_knowledge_base()
-                    if kb_success:
-                        logger.info("Knowledge base initialized successfully from web")
-                    else:
-                        logger.warning("Failed to initialize knowledge base from web, using existing CapitalX data")
+                    # Load the compiled KB artifact (seeding an empty KB from it) instead of rebuilding indexes
+                    if warm_start():
+                        logger.info("Serving searches from the compiled KB artifact")
+                    
+                    # Refresh the knowledge base in the background; searches use the existing KB meanwhile
+                    if start_background_refresh("startup"):
+                        logger.info("Knowledge base refresh running in background, serving existing CapitalX data")
                         
                 except Exception as e:
                     logger.error(f"Failed to initialize database or knowledge base: {e}")
@@ -147,17 +159,20 @@ else:
                     pool_timeout=45,
                 )
                 
-                application = Application.builder().token(bot_token).request(request).build()
+                application = Application.builder().token(bot_token).request(request).post_shutdown(post_shutdown).build()
 
                 # Add beginner-friendly handlers
                 application.add_handler(CommandHandler("start", start_command))
                 application.add_handler(CommandHandler("clientbot", client_bot_command))
                 application.add_handler(CommandHandler("broadcast", broadcast_command))
+                application.add_handler(CommandHandler("refresh_kb", refresh_kb_command))
                 # Handle all callback queries with the button_callback function
                 application.add_handler(CallbackQueryHandler(button_callback))
                 application.add_handler(CallbackQueryHandler(client_bot_button_handler))
                 application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
                 application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, client_bot_message_handler))
+                # Inline mode autocomplete (enable with /setinline in @BotFather)
+                application.add_handler(InlineQueryHandler(inline_query_handler))
 
                 # Add error handler
                 application.add_error_handler(error_handler)
@@ -226,8 +241,16 @@ else:
                     print("Max retries reached. Exiting.")
                     return False
 
+    def enable_metrics_snapshots():
+        """Write the snapshots read by /status, /metrics/* and the CLI tools; only the running bot does this."""
+        search_metrics.persist()
+        query_analytics.persist()
+        kb_refresher.persist()
+        api_resilience.persist()
+
     def main():
         """Main function to run the beginner-friendly bot."""
+        enable_metrics_snapshots()
         try:
             success = run_bot_with_retry()
             if not success:
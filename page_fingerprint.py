@@ -0,0 +1,146 @@
+"""
+Page Fingerprint Module
+SimHash fingerprints of page text for near-duplicate detection while crawling.
+
+A page's visible text (script, style and navigation chrome removed) is split into
+overlapping word shingles. Each shingle's 64-bit hash votes on every bit of the
+fingerprint, so pages that differ in a few words get fingerprints that differ in
+a few bits. URL variants (trailing slashes, tracking query strings) serving the
+same page therefore land within a small Hamming distance of each other.
+
+SimHashIndex finds such neighbours without comparing against every stored
+fingerprint: the 64 bits are cut into max_distance + 1 bands, and any fingerprint
+within max_distance bits must agree exactly on at least one band (pigeonhole), so
+only fingerprints sharing a band value are compared.
+"""
+
+import hashlib
+import html as html_lib
+import logging
+import os
+import re
+from collections import Counter
+from typing import Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_BITS = 64
+# Pages whose fingerprints differ in at most this many bits are near-duplicates
+SIMHASH_MAX_DISTANCE = int(os.getenv("SIMHASH_MAX_DISTANCE", "3"))
+SHINGLE_SIZE = 3
+# Pages with less text than this are not fingerprinted; short pages look alike too easily
+MIN_FINGERPRINT_WORDS = 20
+
+# Chrome repeated on every page; left in, it would make every page look similar
+BOILERPLATE_BLOCKS = re.compile(
+    r"<(script|style|noscript|nav|header|footer|form|svg|template)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+COMMENT = re.compile(r"<!--.*?-->", re.DOTALL)
+TAG = re.compile(r"<[^>]+>")
+WORD = re.compile(r"[a-z0-9]+")
+
+def page_words(html: str) -> List[str]:
+    """Lowercase words of a page's visible text, without boilerplate blocks."""
+    text = COMMENT.sub(" ", html)
+    text = BOILERPLATE_BLOCKS.sub(" ", text)
+    text = TAG.sub(" ", text)
+    return WORD.findall(html_lib.unescape(text).lower())
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(words: List[str], shingle_size: int = SHINGLE_SIZE) -> int:
+    """
+    64-bit SimHash of a word sequence.
+
+    Args:
+        words: Tokens in document order
+        shingle_size: Words per feature
+
+    Returns:
+        Fingerprint as an int
+    """
+    if len(words) < shingle_size:
+        shingles = Counter([" ".join(words)])
+    else:
+        shingles = Counter(" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1))
+
+    # One "0101..." row per shingle occurrence; zip(*rows) then yields each bit column for C-speed sums
+    rows: List[bytes] = []
+    for shingle, weight in shingles.items():
+        rows.extend([format(_feature_hash(shingle), "064b").encode("ascii")] * weight)
+    zero = ord("0") * len(rows)
+
+    fingerprint = 0
+    for position, column in enumerate(zip(*rows)):
+        # A bit is set when more occurrences vote 1 than 0
+        if 2 * (sum(column) - zero) > len(rows):
+            fingerprint |= 1 << (FINGERPRINT_BITS - 1 - position)
+    return fingerprint
+
+
+def page_fingerprint(html: str) -> Optional[int]:
+    """SimHash of a page's visible text, or None if it has too little text to compare."""
+    words = page_words(html)
+    if len(words) < MIN_FINGERPRINT_WORDS:
+        return None
+    return simhash(words)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of bits in which two fingerprints differ."""
+    return bin(a ^ b).count("1")
+
+
+class SimHashIndex:
+    """Fingerprints keyed by page, searchable for near-duplicates within max_distance bits."""
+
+    def __init__(self, max_distance: int = SIMHASH_MAX_DISTANCE):
+        """
+        Args:
+            max_distance: Largest Hamming distance still treated as a duplicate
+        """
+        self.max_distance = max_distance
+        bands = max_distance + 1
+        # Band widths sum to 64; earlier bands take the remainder
+        widths = [FINGERPRINT_BITS // bands + (1 if i < FINGERPRINT_BITS % bands else 0) for i in range(bands)]
+        self._bands: List[Tuple[int, int]] = []
+        shift = 0
+        for width in widths:
+            self._bands.append((shift, (1 << width) - 1))
+            shift += width
+        self._tables: List[Dict[int, List[Tuple[int, Hashable]]]] = [{} for _ in self._bands]
+        self.count = 0
+        self.comparisons = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, fingerprint: int, key: Hashable) -> None:
+        """Store a fingerprint under a key."""
+        for (shift, mask), table in zip(self._bands, self._tables):
+            table.setdefault(fingerprint >> shift & mask, []).append((fingerprint, key))
+        self.count += 1
+
+    def find(self, fingerprint: int) -> Optional[Hashable]:
+        """Key of the closest stored fingerprint within max_distance bits, or None."""
+        best: Optional[Tuple[int, Hashable]] = None
+        checked = set()
+        for (shift, mask), table in zip(self._bands, self._tables):
+            for candidate, key in table.get(fingerprint >> shift & mask, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                self.comparisons += 1
+                distance = hamming_distance(fingerprint, candidate)
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, key)
+        return best[1] if best else None
+
+    def find_or_add(self, fingerprint: int, key: Hashable) -> Optional[Hashable]:
+        """Return the key of a near-duplicate, or store the fingerprint under key and return None."""
+        duplicate_of = self.find(fingerprint)
+        if duplicate_of is None:
+            self.add(fingerprint, key)
+        return duplicate_of
@@ -0,0 +1,405 @@
+"""
+Query Analytics Module
+Streaming, bounded-memory aggregation of search outcomes to find missed and low-confidence queries.
+
+Every user query is grouped into a search session. The traces that search_metrics
+records for that session decide which engine and stage answered it, with what
+confidence, or whether it fell through every engine. Query frequencies are kept in
+a count-min sketch with a small top-K table on top. Memory therefore stays fixed
+no matter how many distinct queries users send.
+"""
+
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import atexit
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Any, Tuple, Generator
+
+from search_config import KEYWORD_MAPPING, SYNONYMS
+from search_metrics import SearchTrace, search_metrics, write_snapshot, read_snapshot
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_FILE = os.getenv("QUERY_ANALYTICS_FILE", "query_analytics.json")
+LOW_CONFIDENCE_THRESHOLD = float(os.getenv("QUERY_LOW_CONFIDENCE", "0.7"))
+TOP_K = 100
+SKETCH_WIDTH = 2048
+SKETCH_DEPTH = 4
+FLUSH_INTERVAL_SECONDS = 30
+
+# Stages that answer from the curated keyword mapping; anything else is a fallback
+EXACT_STAGES = {"match_lookup", "search"}
+
+# Upper bounds of the confidence buckets for match weights
+CONFIDENCE_BUCKETS = (0.5, 0.6, 0.7, 0.8, 0.9)
+
+NORMALIZE_PATTERN = re.compile(r"[^a-z0-9\s]")
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase a query, drop punctuation and collapse whitespace."""
+    return " ".join(NORMALIZE_PATTERN.sub(" ", query.lower()).split())
+
+
+class CountMinSketch:
+    """Fixed-size frequency sketch; estimates never undercount."""
+
+    def __init__(self, width: int = SKETCH_WIDTH, depth: int = SKETCH_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.table = [array('L', [0] * width) for _ in range(depth)]
+
+    def _indexes(self, item: str) -> List[int]:
+        # One 64-bit digest gives enough independent 16-bit slices for every row
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=2 * self.depth).digest()
+        return [int.from_bytes(digest[2 * row:2 * row + 2], 'little') % self.width for row in range(self.depth)]
+
+    def add(self, item: str, count: int = 1) -> int:
+        """Add an item and return its new estimated count."""
+        estimate = None
+        for row, index in zip(self.table, self._indexes(item)):
+            row[index] += count
+            estimate = row[index] if estimate is None else min(estimate, row[index])
+        return estimate or 0
+
+    def estimate(self, item: str) -> int:
+        """Estimated count of an item."""
+        return min(row[index] for row, index in zip(self.table, self._indexes(item)))
+
+    def clear(self) -> None:
+        for row in self.table:
+            for i in range(self.width):
+                row[i] = 0
+
+
+class HeavyHitters:
+    """Top-K most frequent items, using a count-min sketch for the counts."""
+
+    def __init__(self, k: int = TOP_K, width: int = SKETCH_WIDTH, depth: int = SKETCH_DEPTH):
+        self.k = k
+        self.sketch = CountMinSketch(width, depth)
+        self.top: Dict[str, int] = {}
+        self.total = 0
+
+    def add(self, item: str) -> None:
+        """Count one occurrence of an item."""
+        self.total += 1
+        estimate = self.sketch.add(item)
+        if item in self.top or len(self.top) < self.k:
+            self.top[item] = estimate
+            return
+        smallest = min(self.top, key=self.top.get)
+        if estimate > self.top[smallest]:
+            del self.top[smallest]
+            self.top[item] = estimate
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Items with the highest estimated counts."""
+        return sorted(self.top.items(), key=lambda item: (-item[1], item[0]))[:n]
+
+    def clear(self) -> None:
+        self.sketch.clear()
+        self.top.clear()
+        self.total = 0
+
+
+class SearchSession:
+    """Collects the engine traces produced while answering one user query."""
+
+    def __init__(self, query: str, source: str):
+        self.query = query
+        self.source = source
+        self.traces: List[SearchTrace] = []
+        self.corrected_query: Optional[str] = None
+        self.handled_by: Optional[str] = None
+        self.cached_outcome: Optional[Tuple[Optional[str], Optional[str], Optional[float]]] = None
+
+    def add_trace(self, trace: SearchTrace) -> None:
+        self.traces.append(trace)
+
+    def mark_corrected(self, corrected_query: str) -> None:
+        """Record that the query was re-run after spelling correction."""
+        self.corrected_query = corrected_query
+
+    def mark_handled(self, handler: str) -> None:
+        """Record that a handler rule answered the query without a search engine."""
+        self.handled_by = handler
+
+    def mark_cached(self, outcome: Tuple[Optional[str], Optional[str], Optional[float]]) -> None:
+        """Replay the outcome of an earlier session whose answer was served from cache."""
+        self.cached_outcome = outcome
+
+    def outcome(self) -> Tuple[Optional[str], Optional[str], Optional[float]]:
+        """Return (engine, stage, confidence) of whatever produced the reply, if anything."""
+        # Handler rules replace the search result, so they are what the user actually saw
+        if self.handled_by:
+            return "handler_rules", self.handled_by, None
+        if self.cached_outcome is not None:
+            return self.cached_outcome
+        for trace in self.traces:
+            if trace.hit_stage:
+                return trace.engine, trace.hit_stage, trace.confidence
+        return None, None, None
+
+
+_current_session: contextvars.ContextVar[Optional[SearchSession]] = contextvars.ContextVar(
+    "query_analytics_session", default=None
+)
+
+
+class QueryAnalytics:
+    """Aggregates search sessions into outcome counters and heavy-hitter query lists."""
+
+    def __init__(self, top_k: int = TOP_K, analytics_file: Optional[str] = ANALYTICS_FILE,
+                 low_confidence_threshold: float = LOW_CONFIDENCE_THRESHOLD,
+                 flush_interval: float = FLUSH_INTERVAL_SECONDS):
+        self.analytics_file = analytics_file
+        self.low_confidence_threshold = low_confidence_threshold
+        self.flush_interval = flush_interval
+        self.queries = HeavyHitters(top_k)
+        self.missed = HeavyHitters(top_k)
+        self.low_confidence = HeavyHitters(top_k)
+        self.outcomes: Counter = Counter()
+        self.confidence_buckets: Counter = Counter()
+        self.corrected = 0
+        self.started_at = time.time()
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._persisting = False
+
+    @contextmanager
+    def session(self, query: str, source: str = "message") -> Generator[SearchSession, None, None]:
+        """Group every search run for one user query and record the outcome on exit."""
+        session = SearchSession(query, source)
+        token = _current_session.set(session)
+        try:
+            yield session
+        finally:
+            _current_session.reset(token)
+            self.record_session(session)
+
+    def on_trace(self, trace: SearchTrace) -> None:
+        """search_metrics listener that attaches traces to the active session."""
+        session = _current_session.get()
+        if session is not None:
+            session.add_trace(trace)
+
+    def is_low_confidence(self, stage: Optional[str], confidence: Optional[float]) -> bool:
+        """Whether an answer came from a fallback stage or a weak keyword match."""
+        if stage not in EXACT_STAGES:
+            return True
+        return confidence is not None and confidence < self.low_confidence_threshold
+
+    def record_session(self, session: SearchSession) -> None:
+        """Fold a finished session into the aggregates."""
+        normalized = normalize_query(session.query)
+        if not normalized:
+            return
+        engine, stage, confidence = session.outcome()
+        with self._lock:
+            self.queries.add(normalized)
+            if session.corrected_query:
+                self.corrected += 1
+            if engine is None:
+                self.outcomes["miss"] += 1
+                self.missed.add(normalized)
+            else:
+                self.outcomes[f"{engine}.{stage}"] += 1
+                if engine != "handler_rules" and self.is_low_confidence(stage, confidence):
+                    self.low_confidence.add(normalized)
+            if confidence is not None and stage == "match_lookup":
+                self.confidence_buckets[_confidence_bucket(confidence)] += 1
+        self.maybe_flush()
+
+    def snapshot(self, top_n: int = 25) -> Dict[str, Any]:
+        """Return the current aggregates as a JSON-serialisable dictionary."""
+        with self._lock:
+            total = self.queries.total
+            return {
+                "generated_at": time.time(),
+                "started_at": self.started_at,
+                "total_queries": total,
+                "missed_queries": self.missed.total,
+                "low_confidence_queries": self.low_confidence.total,
+                "corrected_queries": self.corrected,
+                "miss_rate": round(self.missed.total / total, 4) if total else None,
+                "outcomes": dict(self.outcomes.most_common()),
+                "confidence_buckets": dict(sorted(self.confidence_buckets.items())),
+                "top_queries": [{"query": q, "count": c} for q, c in self.queries.most_common(top_n)],
+                "top_missed": [{"query": q, "count": c} for q, c in self.missed.most_common(top_n)],
+                "top_low_confidence": [{"query": q, "count": c} for q, c in self.low_confidence.most_common(top_n)]
+            }
+
+    def maybe_flush(self) -> None:
+        """Flush the snapshot to disk if the flush interval has elapsed."""
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> bool:
+        """Write the current snapshot to the analytics file."""
+        self._last_flush = time.monotonic()
+        if not self.analytics_file:
+            return False
+        try:
+            write_snapshot(self.analytics_file, self.snapshot(top_n=TOP_K))
+            return True
+        except OSError as e:
+            logger.error(f"Error writing query analytics to {self.analytics_file}: {e}")
+            return False
+
+    def persist(self, path: str = ANALYTICS_FILE) -> None:
+        """
+        Start writing snapshots to a file, periodically and at interpreter exit.
+
+        Args:
+            path: Snapshot file read by /metrics/queries and the CLI
+        """
+        self.analytics_file = path
+        if not self._persisting:
+            atexit.register(self.flush)
+            self._persisting = True
+
+    def reset(self) -> None:
+        """Clear all recorded analytics."""
+        with self._lock:
+            self.queries.clear()
+            self.missed.clear()
+            self.low_confidence.clear()
+            self.outcomes.clear()
+            self.confidence_buckets.clear()
+            self.corrected = 0
+            self.started_at = time.time()
+
+
+def _confidence_bucket(confidence: float) -> str:
+    for bound in CONFIDENCE_BUCKETS:
+        if confidence < bound:
+            return f"<{bound}"
+    return f">={CONFIDENCE_BUCKETS[-1]}"
+
+
+# Global analytics instance fed by the search_metrics trace stream; the bot enables snapshots with persist()
+query_analytics = QueryAnalytics(analytics_file=None)
+search_metrics.add_listener(query_analytics.on_trace)
+
+
+def search_session(query: str, source: str = "message"):
+    """Convenience wrapper around query_analytics.session."""
+    return query_analytics.session(query, source)
+
+
+def load_query_analytics(path: str = ANALYTICS_FILE) -> Optional[Dict[str, Any]]:
+    """Load the most recent query analytics snapshot written by the bot process."""
+    return read_snapshot(path)
+
+
+def suggest_config_additions(snapshot: Dict[str, Any], limit: int = 25) -> Dict[str, Any]:
+    """
+    Turn the top missed and low-confidence queries into search_config suggestions.
+
+    Args:
+        snapshot: Snapshot produced by QueryAnalytics.snapshot
+        limit: Maximum number of queries to consider from each list
+
+    Returns:
+        Dict with "keyword_mapping" candidates (phrases to assign a category) and
+        "synonyms" candidates (unknown words that are close to a known keyword)
+    """
+    from spell_correction import STOP_WORDS, SymSpellIndex, collect_config_terms, tokenize
+
+    known_phrases = set(KEYWORD_MAPPING) | {w for words in SYNONYMS.values() for w in words} | set(SYNONYMS)
+    config_index = SymSpellIndex().build(collect_config_terms())
+
+    keyword_candidates: Dict[str, int] = {}
+    synonym_candidates: Dict[str, Dict[str, int]] = {}
+    entries = snapshot.get("top_missed", [])[:limit] + snapshot.get("top_low_confidence", [])[:limit]
+    for entry in entries:
+        words = [w for w in tokenize(entry["query"]) if w not in STOP_WORDS]
+        phrase = " ".join(words)
+        if phrase and phrase not in known_phrases:
+            keyword_candidates[phrase] = keyword_candidates.get(phrase, 0) + entry["count"]
+        for word in words:
+            if word in config_index:
+                continue
+            suggestion = config_index.lookup(word)
+            if suggestion:
+                variants = synonym_candidates.setdefault(suggestion.term, {})
+                variants[word] = variants.get(word, 0) + entry["count"]
+
+    return {
+        "keyword_mapping": sorted(keyword_candidates.items(), key=lambda item: -item[1]),
+        "synonyms": {base: sorted(variants, key=lambda w: -variants[w])
+                     for base, variants in sorted(synonym_candidates.items())}
+    }
+
+
+def format_config_suggestions(suggestions: Dict[str, Any]) -> str:
+    """Render config suggestions as a snippet that can be pasted into search_config.py."""
+    lines = ["# Suggested KEYWORD_MAPPING additions (assign a category/subcategory)"]
+    for phrase, count in suggestions["keyword_mapping"]:
+        lines.append(f"# '{phrase}': ('Category', 'subcategory'),  # {count} queries")
+    lines.append("")
+    lines.append("# Suggested SYNONYMS additions")
+    for base, variants in suggestions["synonyms"].items():
+        lines.append(f"'{base}': {variants!r},")
+    return "\n".join(lines)
+
+
+def format_query_analytics(snapshot: Dict[str, Any], top_n: int = 20) -> str:
+    """Format an analytics snapshot as a plain-text report."""
+    miss_rate = snapshot.get("miss_rate")
+    lines = [
+        f"Query analytics ({snapshot.get('total_queries', 0)} queries, "
+        f"{snapshot.get('missed_queries', 0)} missed, "
+        f"miss rate {'-' if miss_rate is None else f'{miss_rate:.1%}'}, "
+        f"{snapshot.get('corrected_queries', 0)} spelling-corrected)",
+        "",
+        "Outcomes:"
+    ]
+    for outcome, count in snapshot.get("outcomes", {}).items():
+        lines.append(f"  {outcome:<40} {count:>7}")
+    for title, key in [("Top missed queries", "top_missed"), ("Top low-confidence queries", "top_low_confidence")]:
+        lines.append("")
+        lines.append(f"{title}:")
+        for entry in snapshot.get(key, [])[:top_n]:
+            lines.append(f"  {entry['count']:>6}  {entry['query']}")
+    return "\n".join(lines)
+
+
+def main():
+    """Report query analytics or export search_config suggestions."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="CapitalX bot query analytics")
+    parser.add_argument("--file", default=ANALYTICS_FILE, help="Analytics snapshot file")
+    parser.add_argument("--top", type=int, default=20, help="Number of queries to show")
+    parser.add_argument("--json", action="store_true", help="Print raw JSON instead of a report")
+    parser.add_argument("--export", action="store_true",
+                        help="Print KEYWORD_MAPPING/SYNONYMS suggestions for the top missed queries")
+    args = parser.parse_args()
+
+    snapshot = load_query_analytics(args.file)
+    if snapshot is None:
+        print(f"No query analytics found at {args.file}. Is the bot running?")
+        sys.exit(1)
+
+    if args.export:
+        suggestions = suggest_config_additions(snapshot, args.top)
+        print(json.dumps(suggestions, indent=2) if args.json else format_config_suggestions(suggestions))
+    elif args.json:
+        print(json.dumps(snapshot, indent=2))
+    else:
+        print(format_query_analytics(snapshot, args.top))
+
+
+if __name__ == "__main__":
+    main()
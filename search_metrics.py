@@ -0,0 +1,314 @@
+"""
+Search Metrics Module
+Per-stage timing histograms and a slow-query log for the knowledge base search pipeline.
+
+The bot process records timings in memory and periodically flushes a JSON snapshot
+so the health_check web service (a separate process) and the CLI can read it.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import atexit
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Any, Tuple, Generator, Callable
+
+logger = logging.getLogger(__name__)
+
+METRICS_FILE = os.getenv("SEARCH_METRICS_FILE", "search_metrics.json")
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SEARCH_SLOW_QUERY_MS", "250"))
+SLOW_QUERY_LOG_SIZE = 100
+FLUSH_INTERVAL_SECONDS = 30
+
+# Upper bounds (in milliseconds) of the histogram buckets; the last bucket is open-ended
+HISTOGRAM_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def write_snapshot(path: str, data: Dict[str, Any]) -> None:
+    """Atomically write a JSON snapshot so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str) -> Optional[Dict[str, Any]]:
+    """Read a JSON snapshot written by write_snapshot, or None if unavailable."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.error(f"Error reading metrics snapshot {path}: {e}")
+        return None
+
+
+class Histogram:
+    """Fixed-bucket latency histogram with approximate percentiles."""
+
+    def __init__(self, buckets: Tuple[float, ...] = HISTOGRAM_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value_ms: float) -> None:
+        """Record a single observation in milliseconds."""
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value_ms <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value_ms
+        self.min = value_ms if self.min is None else min(self.min, value_ms)
+        self.max = value_ms if self.max is None else max(self.max, value_ms)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Estimate a percentile as the upper bound of the bucket that contains it."""
+        if not self.count:
+            return None
+        target = self.count * pct / 100
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a JSON-serialisable view of the histogram."""
+        labels = [f"<={bound}" for bound in self.buckets] + [f">{self.buckets[-1]}"]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3) if self.count else None,
+            "min_ms": round(self.min, 3) if self.min is not None else None,
+            "max_ms": round(self.max, 3) if self.max is not None else None,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "buckets": {label: c for label, c in zip(labels, self.counts) if c}
+        }
+
+
+class SearchTrace:
+    """Timings and outcome for a single query through one search engine."""
+
+    def __init__(self, engine: str, query: str):
+        self.engine = engine
+        self.query = query
+        self.started_at = time.time()
+        self.stages: List[Tuple[str, float]] = []
+        self.hit_stage: Optional[str] = None
+        self.confidence: Optional[float] = None
+        self.total_ms = 0.0
+
+    @contextmanager
+    def stage(self, name: str) -> Generator[None, None, None]:
+        """Time a named pipeline stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, (time.perf_counter() - start) * 1000))
+
+    def record_outcome(self, stage: str, confidence: Optional[float] = None) -> None:
+        """Record which stage produced the result and how confident the match was."""
+        self.hit_stage = stage
+        self.confidence = confidence
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON-serialisable view of the trace."""
+        return {
+            "engine": self.engine,
+            "query": self.query,
+            "timestamp": self.started_at,
+            "total_ms": round(self.total_ms, 3),
+            "hit_stage": self.hit_stage,
+            "confidence": self.confidence,
+            "stages": [{"stage": name, "ms": round(ms, 3)} for name, ms in self.stages]
+        }
+
+
+class SearchMetrics:
+    """Aggregates search traces into per-stage histograms and a slow-query log."""
+
+    def __init__(self, slow_threshold_ms: float = SLOW_QUERY_THRESHOLD_MS,
+                 slow_log_size: int = SLOW_QUERY_LOG_SIZE,
+                 metrics_file: Optional[str] = METRICS_FILE,
+                 flush_interval: float = FLUSH_INTERVAL_SECONDS):
+        self.slow_threshold_ms = slow_threshold_ms
+        self.metrics_file = metrics_file
+        self.flush_interval = flush_interval
+        self.histograms: Dict[str, Histogram] = {}
+        self.slow_queries: deque = deque(maxlen=slow_log_size)
+        self.trace_count = 0
+        self.started_at = time.time()
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[SearchTrace], None]] = []
+        self._persisting = False
+
+    def add_listener(self, listener: Callable[[SearchTrace], None]) -> None:
+        """Register a callback that receives every finished trace."""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[SearchTrace], None]) -> None:
+        """Unregister a trace callback."""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    @contextmanager
+    def trace(self, engine: str, query: str) -> Generator[SearchTrace, None, None]:
+        """Trace one query through a search engine and record it on exit."""
+        trace = SearchTrace(engine, query)
+        start = time.perf_counter()
+        try:
+            yield trace
+        finally:
+            trace.total_ms = (time.perf_counter() - start) * 1000
+            self.record_trace(trace)
+
+    def record_trace(self, trace: SearchTrace) -> None:
+        """Fold a finished trace into the histograms and slow-query log."""
+        with self._lock:
+            self.trace_count += 1
+            for name, ms in trace.stages:
+                self._histogram(f"{trace.engine}.{name}").observe(ms)
+            self._histogram(f"{trace.engine}.total").observe(trace.total_ms)
+            if trace.total_ms >= self.slow_threshold_ms:
+                self.slow_queries.append(trace.to_dict())
+                logger.warning(f"Slow search ({trace.total_ms:.1f}ms) in {trace.engine}: '{trace.query[:50]}'")
+        for listener in list(self._listeners):
+            try:
+                listener(trace)
+            except Exception as e:
+                logger.error(f"Error in search trace listener: {e}")
+        self.maybe_flush()
+
+    def _histogram(self, key: str) -> Histogram:
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        return histogram
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the current metrics as a JSON-serialisable dictionary."""
+        with self._lock:
+            return {
+                "generated_at": time.time(),
+                "started_at": self.started_at,
+                "pid": os.getpid(),
+                "trace_count": self.trace_count,
+                "slow_threshold_ms": self.slow_threshold_ms,
+                "histograms": {key: h.snapshot() for key, h in sorted(self.histograms.items())},
+                "slow_queries": list(self.slow_queries)
+            }
+
+    def maybe_flush(self) -> None:
+        """Flush the snapshot to disk if the flush interval has elapsed."""
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> bool:
+        """Write the current snapshot to the metrics file."""
+        self._last_flush = time.monotonic()
+        if not self.metrics_file:
+            return False
+        try:
+            write_snapshot(self.metrics_file, self.snapshot())
+            return True
+        except OSError as e:
+            logger.error(f"Error writing search metrics to {self.metrics_file}: {e}")
+            return False
+
+    def persist(self, path: str = METRICS_FILE) -> None:
+        """
+        Start writing snapshots to a file, periodically and at interpreter exit.
+
+        Only the long-running bot process calls this, so importing the module
+        (tests, CLI tools, the health check) never writes into the working directory.
+
+        Args:
+            path: Snapshot file read by /metrics/search and the CLI
+        """
+        self.metrics_file = path
+        if not self._persisting:
+            atexit.register(self.flush)
+            self._persisting = True
+
+    def reset(self) -> None:
+        """Clear all recorded metrics."""
+        with self._lock:
+            self.histograms.clear()
+            self.slow_queries.clear()
+            self.trace_count = 0
+            self.started_at = time.time()
+
+
+# Global metrics instance shared by all search engines; the bot enables snapshots with persist()
+search_metrics = SearchMetrics(metrics_file=None)
+
+
+def load_search_metrics(path: str = METRICS_FILE) -> Optional[Dict[str, Any]]:
+    """Load the most recent search metrics snapshot written by the bot process."""
+    return read_snapshot(path)
+
+
+def format_search_metrics(snapshot: Dict[str, Any]) -> str:
+    """Format a metrics snapshot as a plain-text report."""
+    lines = [
+        f"Search metrics ({snapshot.get('trace_count', 0)} traces, "
+        f"slow threshold {snapshot.get('slow_threshold_ms')}ms)",
+        "",
+        f"{'stage':<40} {'count':>7} {'mean':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>9}"
+    ]
+    for key, h in snapshot.get("histograms", {}).items():
+        lines.append(
+            f"{key:<40} {h['count']:>7} {_fmt_ms(h['mean_ms']):>9} {_fmt_ms(h['p50_ms']):>8} "
+            f"{_fmt_ms(h['p95_ms']):>8} {_fmt_ms(h['p99_ms']):>8} {_fmt_ms(h['max_ms']):>9}"
+        )
+    slow_queries = snapshot.get("slow_queries", [])
+    lines.append("")
+    lines.append(f"Slow queries ({len(slow_queries)}):")
+    for entry in slow_queries:
+        stages = ", ".join(f"{s['stage']}={s['ms']}ms" for s in entry.get("stages", []))
+        lines.append(f"  [{entry['engine']}] {entry['total_ms']}ms '{entry['query']}' ({stages})")
+    return "\n".join(lines)
+
+
+def _fmt_ms(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:g}"
+
+
+def main():
+    """Dump the latest search metrics snapshot to stdout."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Dump CapitalX bot search metrics")
+    parser.add_argument("--file", default=METRICS_FILE, help="Metrics snapshot file")
+    parser.add_argument("--json", action="store_true", help="Print raw JSON instead of a table")
+    args = parser.parse_args()
+
+    snapshot = load_search_metrics(args.file)
+    if snapshot is None:
+        print(f"No search metrics found at {args.file}. Is the bot running?")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(snapshot, indent=2))
+    else:
+        print(format_search_metrics(snapshot))
+
+
+if __name__ == "__main__":
+    main()
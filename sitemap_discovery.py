@@ -0,0 +1,254 @@
+"""
+Sitemap Discovery Module
+Finds site pages from robots.txt and sitemaps instead of following links.
+
+robots.txt is read first, for its Sitemap: lines and its Disallow rules; if it
+names no sitemap the conventional /sitemap.xml is tried. Sitemaps and sitemap
+indexes are streamed through an incremental XML parser, so each <url> entry is
+handled (and dropped from the tree) as soon as it closes and a large sitemap is
+never held in memory whole. Entries come back newest <lastmod> first, and a
+child sitemap whose lastmod is not newer than on the previous run is not
+downloaded at all.
+
+One robots.txt plus a handful of sitemap requests replace fetching every page
+just to read its links; URLExtractor only falls back to crawling when the site
+publishes no sitemap.
+"""
+
+import logging
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, NamedTuple, Tuple
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+from xml.etree.ElementTree import XMLPullParser, ParseError
+
+import httpx
+
+from async_crawler import DEFAULT_HEADERS, CRAWL_TIMEOUT_SECONDS
+from http_transport import create_async_client, run_async
+
+logger = logging.getLogger(__name__)
+
+# Sitemaps read per discovery run, counting index files; guards against index loops
+MAX_SITEMAPS = 50
+# The sitemap protocol caps a file at 50,000 URLs
+MAX_SITEMAP_URLS = 50000
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class SitemapEntry(NamedTuple):
+    """A page listed in a sitemap, with its lastmod as a Unix timestamp if given."""
+    url: str
+    lastmod: Optional[float] = None
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[float]:
+    """Parse a W3C datetime ("2024-05-01", "2024-05-01T10:00:00+02:00" or "...T08:00:00Z") to a timestamp."""
+    if not value:
+        return None
+    try:
+        # fromisoformat only accepts a "Z" suffix from Python 3.11
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _local_name(tag: str) -> str:
+    # Sitemaps are namespaced ({http://www.sitemaps.org/schemas/sitemap/0.9}url); match on the local part
+    return tag.rsplit("}", 1)[-1]
+
+
+class SitemapStreamParser:
+    """Incremental parser for sitemaps and sitemap indexes, fed one chunk at a time."""
+
+    def __init__(self):
+        self._parser = XMLPullParser(events=("start", "end"))
+        self._root = None
+        self._gunzip = None
+        self._first_chunk = True
+        # (loc, lastmod) of <url> and of <sitemap> elements seen so far
+        self.urls: List[Tuple[str, Optional[float]]] = []
+        self.sitemaps: List[Tuple[str, Optional[float]]] = []
+
+    def feed(self, chunk: bytes) -> None:
+        """Parse the next piece of the document."""
+        if self._first_chunk and chunk:
+            self._first_chunk = False
+            # sitemap.xml.gz served without Content-Encoding arrives still compressed
+            if chunk.startswith(GZIP_MAGIC):
+                self._gunzip = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._gunzip is not None:
+            chunk = self._gunzip.decompress(chunk)
+        self._parser.feed(chunk)
+        self._drain()
+
+    def close(self) -> None:
+        """Finish parsing; raises ParseError if the document was malformed."""
+        if self._gunzip is not None:
+            self._parser.feed(self._gunzip.flush())
+        self._parser.close()
+        self._drain()
+
+    def _drain(self) -> None:
+        for event, element in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = element
+                continue
+            kind = _local_name(element.tag)
+            if kind not in ("url", "sitemap"):
+                continue
+            fields = {_local_name(child.tag): (child.text or "").strip() for child in element}
+            if fields.get("loc"):
+                target = self.urls if kind == "url" else self.sitemaps
+                if len(target) < MAX_SITEMAP_URLS:
+                    target.append((fields["loc"], parse_lastmod(fields.get("lastmod"))))
+            # Entries are complete once they close; drop them so memory stays flat
+            self._root.clear()
+
+
+class SitemapDiscovery:
+    """Reads robots.txt and every sitemap it leads to for one site."""
+
+    def __init__(self, base_url: str, url_filter: Optional[Callable[[str], bool]] = None,
+                 known_sitemaps: Optional[Dict[str, Optional[float]]] = None, user_agent: str = "*",
+                 headers: Optional[Dict[str, str]] = None, timeout: float = CRAWL_TIMEOUT_SECONDS):
+        """
+        Args:
+            base_url: Site root; robots.txt and sitemap.xml are looked up relative to it
+            url_filter: Pages for which this returns False are dropped
+            known_sitemaps: Sitemap URL -> lastmod from the previous run; unchanged ones are skipped
+            user_agent: Agent whose robots.txt rules apply
+            headers: Request headers
+            timeout: Per-request timeout in seconds
+        """
+        self.base_url = base_url.rstrip("/") + "/"
+        self.host = urlparse(self.base_url).netloc
+        self.url_filter = url_filter or (lambda url: True)
+        self.known_sitemaps = dict(known_sitemaps or {})
+        self.user_agent = user_agent
+        self.headers = headers or dict(DEFAULT_HEADERS)
+        self.timeout = timeout
+        self.robots: Optional[RobotFileParser] = None
+        # Sitemap URL -> lastmod as listed in its index (None for top-level sitemaps)
+        self.sitemap_lastmod: Dict[str, Optional[float]] = {}
+        self.sitemaps_read = 0
+        self.sitemaps_skipped = 0
+        self.disallowed = 0
+        self.requests = 0
+
+    @property
+    def found(self) -> bool:
+        """Whether the site publishes at least one readable sitemap."""
+        return self.sitemaps_read > 0 or self.sitemaps_skipped > 0
+
+    def can_fetch(self, url: str) -> bool:
+        """Whether robots.txt allows fetching a URL (everything is allowed before it is loaded)."""
+        return self.robots is None or self.robots.can_fetch(self.user_agent, url)
+
+    async def load_robots(self, client: httpx.AsyncClient) -> List[str]:
+        """
+        Fetch and parse robots.txt.
+
+        Returns:
+            Sitemap URLs it lists, or the conventional /sitemap.xml if it lists none
+        """
+        robots_url = urljoin(self.base_url, "/robots.txt")
+        self.robots = RobotFileParser(robots_url)
+        lines: List[str] = []
+        try:
+            self.requests += 1
+            response = await client.get(robots_url)
+            # A missing robots.txt (or any other error) means no restrictions
+            if response.status_code == 200:
+                lines = response.text.splitlines()
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not fetch {robots_url}: {e}")
+        self.robots.parse(lines)
+        return list(self.robots.site_maps() or []) or [urljoin(self.base_url, "/sitemap.xml")]
+
+    async def read_sitemap(self, client: httpx.AsyncClient, url: str) -> Optional[SitemapStreamParser]:
+        """Stream one sitemap or sitemap index; returns None if it is missing or malformed."""
+        parser = SitemapStreamParser()
+        try:
+            self.requests += 1
+            async with client.stream("GET", url) as response:
+                if response.status_code != 200:
+                    logger.info(f"No sitemap at {url} (HTTP {response.status_code})")
+                    return None
+                async for chunk in response.aiter_bytes():
+                    parser.feed(chunk)
+            parser.close()
+        except (httpx.HTTPError, ParseError, zlib.error) as e:
+            logger.warning(f"Could not read sitemap {url}: {e}")
+            return None
+        self.sitemaps_read += 1
+        return parser
+
+    async def discover(self, client: Optional[httpx.AsyncClient] = None) -> List[SitemapEntry]:
+        """
+        Collect every allowed page listed in the site's sitemaps.
+
+        Args:
+            client: Optional shared client; one is created (and closed) if omitted
+
+        Returns:
+            Entries sorted newest lastmod first, then by URL; entries without lastmod come last
+        """
+        started = time.monotonic()
+        owns_client = client is None
+        if owns_client:
+            client = create_async_client(headers=self.headers, timeout=self.timeout, follow_redirects=True)
+
+        pages: Dict[str, Optional[float]] = {}
+        try:
+            queue = [(url, None) for url in await self.load_robots(client)]
+            seen = set()
+            while queue and self.sitemaps_read < MAX_SITEMAPS:
+                sitemap_url, lastmod = queue.pop(0)
+                if sitemap_url in seen:
+                    continue
+                seen.add(sitemap_url)
+                previous = self.known_sitemaps.get(sitemap_url)
+                if lastmod is not None and previous is not None and lastmod <= previous:
+                    # Unchanged since the last run: its pages are already registered
+                    self.sitemaps_skipped += 1
+                    self.sitemap_lastmod[sitemap_url] = lastmod
+                    continue
+                parser = await self.read_sitemap(client, sitemap_url)
+                if parser is None:
+                    continue
+                self.sitemap_lastmod[sitemap_url] = lastmod
+                queue.extend(parser.sitemaps)
+                for url, page_lastmod in parser.urls:
+                    url = urljoin(sitemap_url, url)
+                    if urlparse(url).netloc != self.host or not self.url_filter(url):
+                        continue
+                    if not self.can_fetch(url):
+                        self.disallowed += 1
+                        continue
+                    # Listed twice: keep the newest lastmod
+                    known = pages.get(url)
+                    if url not in pages or (page_lastmod is not None and (known is None or page_lastmod > known)):
+                        pages[url] = page_lastmod
+        finally:
+            if owns_client:
+                await client.aclose()
+
+        entries = sorted((SitemapEntry(url, lastmod) for url, lastmod in pages.items()),
+                         key=lambda entry: (entry.lastmod is None, -(entry.lastmod or 0), entry.url))
+        logger.info(f"Sitemap discovery found {len(entries)} pages in {self.sitemaps_read} sitemaps "
+                    f"({self.sitemaps_skipped} unchanged, {self.disallowed} disallowed by robots.txt) "
+                    f"with {self.requests} requests in {time.monotonic() - started:.2f}s")
+        return entries
+
+
+def discover_site(base_url: str, **kwargs) -> Tuple[SitemapDiscovery, List[SitemapEntry]]:
+    """Run sitemap discovery to completion from synchronous code."""
+    discovery = SitemapDiscovery(base_url, **kwargs)
+    return discovery, run_async(discovery.discover())
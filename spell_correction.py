@@ -0,0 +1,308 @@
+"""
+Spelling Correction Module
+SymSpell-style "did you mean" suggestions for knowledge base searches.
+
+Every dictionary word is expanded into its deletion neighbourhood once, at build
+time. A lookup only generates the deletions of the query token and probes the
+index, so the cost per token is bounded by the token length instead of growing
+with the vocabulary like difflib comparisons do.
+"""
+
+import logging
+import re
+import sqlite3
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, NamedTuple
+
+from kb_versioning import get_kb_version
+from search_config import QUERY_PATTERNS, KEYWORD_MAPPING, SYNONYMS
+
+logger = logging.getLogger(__name__)
+DB_FILE = "telegram_bot.db"
+
+# Words from search_config are what the exact-match path understands, so they win ties
+CONFIG_TERM_WEIGHT = 50
+MIN_WORD_LENGTH = 3
+
+STOP_WORDS = {
+    'the', 'and', 'but', 'for', 'with', 'are', 'was', 'were', 'been', 'have', 'has', 'had',
+    'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'can', 'what',
+    'how', 'why', 'when', 'where', 'who', 'which', 'this', 'that', 'these', 'those', 'you',
+    'they', 'your', 'our', 'from', 'into', 'about', 'get', 'not'
+}
+
+WORD_PATTERN = re.compile(r"[a-z]+")
+# Same words, found in the user's original text so everything around them is kept
+QUERY_WORD_PATTERN = re.compile(r"[a-z]+", re.IGNORECASE)
+
+
+class Suggestion(NamedTuple):
+    """A dictionary word proposed as a correction for a query token."""
+    term: str
+    distance: int
+    frequency: int
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphabetic words."""
+    return WORD_PATTERN.findall(text.lower())
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Optimal string alignment distance, or max_distance + 1 once it is exceeded."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous_previous: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = current[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+            row_min = min(row_min, current[j])
+        if row_min > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class SymSpellIndex:
+    """Precomputed deletion-neighbourhood dictionary for fast spelling correction."""
+
+    def __init__(self, max_edit_distance: int = 2, prefix_length: int = 7):
+        """
+        Initialize an empty index.
+
+        Args:
+            max_edit_distance: Largest edit distance a suggestion may have
+            prefix_length: Only this many leading characters are expanded into deletes
+        """
+        self.max_edit_distance = max_edit_distance
+        self.prefix_length = prefix_length
+        self.words: Dict[str, int] = {}
+        self.deletes: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.words
+
+    def add_word(self, word: str, frequency: int = 1) -> None:
+        """Add a word (or increase its frequency) and index its deletions."""
+        if word in self.words:
+            self.words[word] += frequency
+            return
+        self.words[word] = frequency
+        for variant in self._deletes(word[:self.prefix_length]):
+            self.deletes.setdefault(variant, []).append(word)
+
+    def build(self, frequencies: Dict[str, int]) -> "SymSpellIndex":
+        """Add every word from a word -> frequency mapping."""
+        for word, frequency in frequencies.items():
+            self.add_word(word, frequency)
+        return self
+
+    def to_data(self) -> Dict[str, Any]:
+        """The index as plain dicts and lists, for the compiled KB artifact."""
+        return {
+            "max_edit_distance": self.max_edit_distance,
+            "prefix_length": self.prefix_length,
+            "words": self.words,
+            "deletes": self.deletes
+        }
+
+    @classmethod
+    def from_data(cls, data: Dict[str, Any]) -> "SymSpellIndex":
+        """Restore an index saved with to_data without recomputing its deletes."""
+        index = cls(data["max_edit_distance"], data["prefix_length"])
+        index.words = data["words"]
+        index.deletes = data["deletes"]
+        return index
+
+    def _deletes(self, word: str) -> Set[str]:
+        """All strings reachable from word by deleting up to max_edit_distance characters."""
+        results = {word}
+        frontier = {word}
+        for _ in range(self.max_edit_distance):
+            next_frontier = set()
+            for candidate in frontier:
+                if len(candidate) <= 1:
+                    continue
+                for i in range(len(candidate)):
+                    next_frontier.add(candidate[:i] + candidate[i + 1:])
+            next_frontier -= results
+            results |= next_frontier
+            frontier = next_frontier
+        return results
+
+    def lookup(self, term: str, max_edit_distance: Optional[int] = None) -> Optional[Suggestion]:
+        """
+        Find the closest, most frequent dictionary word for a term.
+
+        Args:
+            term: Lowercase query token
+            max_edit_distance: Optional tighter bound than the index default
+
+        Returns:
+            Best Suggestion, or None if nothing is within the edit distance
+        """
+        if max_edit_distance is None:
+            max_edit_distance = self.max_edit_distance
+        max_edit_distance = min(max_edit_distance, self.max_edit_distance)
+
+        if term in self.words:
+            return Suggestion(term, 0, self.words[term])
+
+        best: Optional[Suggestion] = None
+        checked = set()
+        for variant in self._deletes(term[:self.prefix_length]):
+            for candidate in self.deletes.get(variant, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                distance = edit_distance(term, candidate, max_edit_distance)
+                if distance > max_edit_distance:
+                    continue
+                frequency = self.words[candidate]
+                if best is None or (distance, -frequency) < (best.distance, -best.frequency):
+                    best = Suggestion(candidate, distance, frequency)
+        return best
+
+    def correct_query(self, query: str) -> Optional[str]:
+        """
+        Correct each misspelled token of a query, leaving the rest of the text as typed.
+
+        Returns:
+            The corrected query, or None if every token was already known or uncorrectable
+        """
+        changed = False
+
+        def correct_token(match: re.Match) -> str:
+            nonlocal changed
+            token = match.group(0).lower()
+            if len(token) < MIN_WORD_LENGTH or token in STOP_WORDS or token in self.words:
+                return match.group(0)
+            # Short words get a tighter bound so "fee" does not turn into "free"
+            suggestion = self.lookup(token, 1 if len(token) <= 4 else None)
+            if suggestion and suggestion.term != token:
+                changed = True
+                return suggestion.term
+            return match.group(0)
+
+        corrected = QUERY_WORD_PATTERN.sub(correct_token, query)
+        return corrected if changed else None
+
+
+def collect_config_terms() -> Counter:
+    """Collect the vocabulary understood by the keyword mapping, patterns and synonyms."""
+    terms: Counter = Counter()
+    phrases: List[str] = list(KEYWORD_MAPPING.keys())
+    for pattern_name, patterns in QUERY_PATTERNS.items():
+        phrases.append(pattern_name)
+        phrases.extend(patterns)
+    for base_word, synonyms in SYNONYMS.items():
+        phrases.append(base_word)
+        phrases.extend(synonyms)
+    for phrase in phrases:
+        for word in tokenize(phrase.replace('_', ' ')):
+            if len(word) >= MIN_WORD_LENGTH and word not in STOP_WORDS:
+                terms[word] += CONFIG_TERM_WEIGHT
+    return terms
+
+
+def collect_kb_terms(db_file: Optional[str] = None) -> Counter:
+    """Collect word frequencies from knowledge base titles, keywords and content."""
+    terms: Counter = Counter()
+    try:
+        conn = sqlite3.connect(db_file or DB_FILE)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT title, subcategory, keywords, content FROM kb_enhanced")
+            for row in cursor.fetchall():
+                for field in row:
+                    if not field:
+                        continue
+                    for word in tokenize(field.replace(',', ' ').replace('_', ' ')):
+                        if len(word) >= MIN_WORD_LENGTH and word not in STOP_WORDS:
+                            terms[word] += 1
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning(f"Could not read knowledge base vocabulary: {e}")
+    return terms
+
+
+def build_spelling_index(db_file: Optional[str] = None) -> SymSpellIndex:
+    """Build a spelling index from the knowledge base and search configuration.
+
+    For the live KB the index compiled into the KB artifact is used when it matches.
+    """
+    if db_file is None:
+        from kb_artifact import get_compiled_kb
+        compiled = get_compiled_kb()
+        if compiled is not None:
+            return compiled.spelling_index
+    frequencies = collect_config_terms()
+    frequencies.update(collect_kb_terms(db_file))
+    index = SymSpellIndex().build(frequencies)
+    logger.info(f"Built spelling index with {len(index)} words and {len(index.deletes)} deletes")
+    return index
+
+
+# Lazily built global index, tagged with the KB version it was built from
+_spelling_index: Optional[SymSpellIndex] = None
+_spelling_index_version: Optional[int] = None
+_index_lock = threading.Lock()
+
+
+def get_spelling_index() -> SymSpellIndex:
+    """Get the global spelling index, rebuilding it only when the KB version changes."""
+    global _spelling_index, _spelling_index_version
+    version = get_kb_version()
+    if _spelling_index is None or _spelling_index_version != version:
+        # While another thread rebuilds it, keep answering from the previous index
+        if not _index_lock.acquire(blocking=_spelling_index is None):
+            return _spelling_index
+        try:
+            if _spelling_index is None or _spelling_index_version != version:
+                _spelling_index = build_spelling_index()
+                _spelling_index_version = version
+        finally:
+            _index_lock.release()
+    return _spelling_index
+
+
+def rebuild_spelling_index() -> SymSpellIndex:
+    """Rebuild the global spelling index ahead of use, e.g. at startup or after a KB refresh."""
+    global _spelling_index, _spelling_index_version
+    with _index_lock:
+        version = get_kb_version()
+        _spelling_index = build_spelling_index()
+        _spelling_index_version = version
+    return _spelling_index
+
+
+def reset_spelling_index() -> None:
+    """Drop the global spelling index so it is rebuilt from fresh data on next use."""
+    global _spelling_index
+    with _index_lock:
+        _spelling_index = None
+
+
+def suggest_correction(query: str) -> Optional[str]:
+    """Suggest a corrected version of a query, or None if nothing needs correcting."""
+    try:
+        return get_spelling_index().correct_query(query)
+    except Exception as e:
+        logger.error(f"Error suggesting spelling correction: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    for test_query in ["how to regster", "depost money", "withdrawl funds", "refferal bonus", "invesment plans"]:
+        print(f"'{test_query}' -> {suggest_correction(test_query)}")
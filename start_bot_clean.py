@@ -6,9 +6,10 @@ Script to cleanly start the bot after ensuring no other instances are running.
 import os
 import sys
 import time
-import requests
 from dotenv import load_dotenv
 
+from http_transport import get_session
+
 # Load environment variables
 load_dotenv()
 
@@ -22,7 +23,7 @@ def stop_existing_webhooks():
     try:
         # Delete any existing webhook
         url = f"https://api.telegram.org/bot{bot_token}/deleteWebhook"
-        response = requests.post(url, timeout=10)
+        response = get_session().post(url, timeout=10)
         if response.status_code == 200:
             data = response.json()
             if data.get('ok'):
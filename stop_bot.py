@@ -5,9 +5,10 @@ Script to stop any existing bot instances and clean up.
 
 import os
 import sys
-import requests
 from dotenv import load_dotenv
 
+from http_transport import get_session
+
 # Load environment variables
 load_dotenv()
 
@@ -34,7 +35,7 @@ def main():
     # Try to delete webhook to ensure clean state
     try:
         url = f"https://api.telegram.org/bot{bot_token}/deleteWebhook"
-        response = requests.post(url)
+        response = get_session().post(url)
         if response.status_code == 200:
             print("Webhook deleted successfully")
         else:
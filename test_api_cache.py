@@ -0,0 +1,183 @@
+"""
+Test file for the CapitalX API result caches
+"""
+
+import unittest
+import asyncio
+import threading
+import sys
+import os
+
+import httpx
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api_cache import TTLCache
+from capitalx_api import AsyncCapitalXAPI
+
+
+class CountingFetch:
+    """Fetch coroutine returning the next queued result and counting calls."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return self.results.pop(0) if len(self.results) > 1 else self.results[0]
+
+
+def ok(value):
+    return {"success": True, "data": value, "status_code": 200}
+
+
+def age(cache, key, seconds):
+    """Pretend the entry for key was stored seconds ago."""
+    entry = cache._entries[key]
+    cache._entries[key] = entry._replace(stored_at=entry.stored_at - seconds)
+
+
+class TestTTLCache(unittest.TestCase):
+    def test_fresh_results_are_served_from_memory(self):
+        """Test that a fresh result is fetched once and then served from the cache."""
+        cache = TTLCache(ttl=60)
+        fetch = CountingFetch(ok(1))
+
+        async def run():
+            return [await cache.get_or_fetch("plans", fetch) for _ in range(3)]
+
+        self.assertEqual([r["data"] for r in asyncio.run(run())], [1, 1, 1])
+        self.assertEqual(fetch.calls, 1)
+        self.assertEqual(cache.stats()["hits"], 2)
+
+    def test_stale_result_served_while_revalidating(self):
+        """Test that stale data is returned at once and refreshed by one background task."""
+        cache = TTLCache(ttl=60, stale_ttl=600)
+        fetch = CountingFetch(ok("old"), ok("new"))
+
+        async def run():
+            await cache.get_or_fetch("market", fetch)
+            age(cache, "market", 120)
+            stale = [await cache.get_or_fetch("market", fetch) for _ in range(3)]
+            await asyncio.gather(*cache._inflight.values())
+            return stale, await cache.get_or_fetch("market", fetch)
+
+        stale, refreshed = asyncio.run(run())
+        self.assertEqual([r["data"] for r in stale], ["old", "old", "old"])
+        self.assertEqual(refreshed["data"], "new")
+        self.assertEqual(fetch.calls, 2)
+        self.assertEqual(cache.stats()["stale_hits"], 3)
+
+    def test_expired_and_failed_results(self):
+        """Test that errors are not cached and data past the stale window is refetched inline."""
+        cache = TTLCache(ttl=60, stale_ttl=60)
+        fetch = CountingFetch({"success": False, "error": "Request timeout"}, ok("a"), ok("b"))
+
+        async def run():
+            first = await cache.get_or_fetch("plans", fetch)
+            second = await cache.get_or_fetch("plans", fetch)
+            age(cache, "plans", 500)
+            return first, second, await cache.get_or_fetch("plans", fetch)
+
+        first, second, third = asyncio.run(run())
+        self.assertFalse(first["success"])
+        self.assertEqual((second["data"], third["data"]), ("a", "b"))
+        self.assertEqual(fetch.calls, 3)
+
+    def test_failed_refresh_keeps_stale_value(self):
+        """Test that a failed background refresh leaves the stale value in place."""
+        cache = TTLCache(ttl=60, stale_ttl=600)
+        fetch = CountingFetch(ok("old"), {"success": False, "error": "Connection error"})
+
+        async def run():
+            await cache.get_or_fetch("market", fetch)
+            age(cache, "market", 120)
+            await cache.get_or_fetch("market", fetch)
+            await asyncio.gather(*cache._inflight.values())
+            return await cache.get_or_fetch("market", fetch)
+
+        self.assertEqual(asyncio.run(run())["data"], "old")
+        self.assertEqual(cache.stats()["refresh_failures"], 1)
+
+    def test_concurrent_misses_share_one_fetch(self):
+        """Test that concurrent misses coalesce and a fetch overtaken by invalidate() is not stored."""
+        cache = TTLCache(ttl=60)
+        fetch = CountingFetch(ok("before write"), ok("after write"))
+
+        async def run():
+            pending = [asyncio.ensure_future(cache.get_or_fetch("user1", fetch)) for _ in range(3)]
+            await asyncio.sleep(0)
+            cache.invalidate("user1")
+            shared = await asyncio.gather(*pending)
+            return shared, await cache.get_or_fetch("user1", fetch)
+
+        shared, fresh = asyncio.run(run())
+        self.assertEqual([r["data"] for r in shared], ["before write"] * 3)
+        self.assertEqual(fresh["data"], "after write")
+        self.assertEqual(fetch.calls, 2)
+        self.assertEqual(cache.stats()["coalesced"], 2)
+
+    def test_fetch_in_flight_on_another_loop_is_not_shared(self):
+        """Test that a caller on one event loop never awaits a fetch running on another."""
+        cache = TTLCache(ttl=60)
+        started = threading.Event()
+        release = threading.Event()
+
+        async def slow_fetch():
+            started.set()
+            await asyncio.to_thread(release.wait, 5)
+            return ok("other loop")
+
+        other = threading.Thread(target=lambda: asyncio.run(cache.get_or_fetch("plans", slow_fetch)))
+        other.start()
+        try:
+            self.assertTrue(started.wait(5))
+            result = asyncio.run(cache.get_or_fetch("plans", CountingFetch(ok("this loop"))))
+        finally:
+            release.set()
+            other.join()
+        self.assertEqual(result["data"], "this loop")
+        self.assertEqual(cache.stats()["coalesced"], 0)
+
+    def test_size_bound_evicts_least_recently_used(self):
+        """Test that the cache keeps at most max_size keys, dropping the least recently used."""
+        cache = TTLCache(ttl=60, max_size=2)
+
+        async def run():
+            for key in ("a", "b", "a", "c"):
+                await cache.get_or_fetch(key, CountingFetch(ok(key)))
+
+        asyncio.run(run())
+        self.assertEqual(list(cache._entries), ["a", "c"])
+
+
+class TestClientCaching(unittest.TestCase):
+    def test_plans_fetched_once_across_taps(self):
+        """Test that repeated plan lookups through the async client make one HTTP request."""
+        paths = []
+
+        def handler(request):
+            paths.append(request.url.path)
+            return httpx.Response(404)
+
+        client = AsyncCapitalXAPI("key", transport=httpx.MockTransport(handler))
+
+        async def run():
+            try:
+                results = [await client.get_investment_plans() for _ in range(5)]
+                await client.get_market_data()
+                await client.get_market_data()
+                return results
+            finally:
+                await client.aclose()
+
+        results = asyncio.run(run())
+        self.assertTrue(all(result["success"] for result in results))
+        self.assertEqual(paths, ["/api/investment-plans", "/api/market-data"])
+        self.assertEqual(client.cache_stats()["investment_plans"]["hits"], 4)
+
+if __name__ == '__main__':
+    unittest.main()
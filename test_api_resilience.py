@@ -0,0 +1,150 @@
+"""
+Test file for the CapitalX API circuit breakers and retry policy
+"""
+
+import unittest
+from unittest.mock import patch
+import asyncio
+import tempfile
+import sys
+import os
+
+import httpx
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api_resilience import (APIResilience, CircuitBreaker, RetryPolicy, endpoint_key, load_api_metrics, api_resilience,
+                            CLOSED, OPEN, HALF_OPEN, TIMEOUT_ERROR, CONNECTION_ERROR, CIRCUIT_OPEN_ERROR)
+from capitalx_api import AsyncCapitalXAPI
+
+OK = {"success": True, "data": {}, "status_code": 200}
+DOWN = {"success": False, "error": CONNECTION_ERROR, "status_code": None}
+
+
+class Attempts:
+    """Blocking attempt function returning queued results and counting calls."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.results.pop(0) if len(self.results) > 1 else self.results[0]
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_endpoint_key_folds_user_ids(self):
+        """Test that every user's requests to an endpoint share one breaker."""
+        self.assertEqual(endpoint_key("get", "/api/users/42/balance?x=1"), "GET /api/users/{id}/balance")
+        self.assertEqual(endpoint_key("GET", "/api/market-data"), "GET /api/market-data")
+
+    def test_opens_then_half_opens_and_closes(self):
+        """Test the closed -> open -> half-open -> closed cycle with a single trial request."""
+        breaker = CircuitBreaker("GET /api/market-data", failure_threshold=2, reset_timeout=60)
+        breaker.record(DOWN)
+        self.assertEqual(breaker.state, CLOSED)
+        breaker.record({"success": False, "error": "Endpoint not found", "status_code": 404})
+        breaker.record(DOWN)
+        self.assertEqual(breaker.state, CLOSED, "a 404 answer resets the failure run")
+        breaker.record(DOWN)
+        self.assertEqual(breaker.state, OPEN)
+        self.assertFalse(breaker.allow())
+
+        breaker.opened_at -= 61
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertFalse(breaker.allow(), "only one trial request at a time")
+        breaker.record(DOWN)
+        self.assertEqual(breaker.state, OPEN)
+
+        breaker.opened_at -= 61
+        self.assertTrue(breaker.allow())
+        breaker.record(OK)
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual(breaker.snapshot()["times_opened"], 2)
+        self.assertEqual(breaker.snapshot()["rejected"], 2)
+
+
+class TestRetries(unittest.TestCase):
+    def setUp(self):
+        self.resilience = APIResilience(RetryPolicy(max_retries=2, base_delay=0), failure_threshold=3,
+                                        metrics_file=None)
+
+    def test_fast_get_failures_are_retried(self):
+        """Test that a refused GET is retried and the recovered result is returned."""
+        attempt = Attempts(DOWN, {"success": False, "error": "HTTP error", "status_code": 503}, OK)
+        self.assertEqual(self.resilience.call("GET", "/api/market-data", attempt), OK)
+        self.assertEqual(attempt.calls, 3)
+        self.assertEqual(self.resilience.retries, 2)
+
+    def test_writes_and_timeouts_are_not_retried(self):
+        """Test that POSTs and timed-out requests get a single attempt."""
+        post = Attempts(DOWN)
+        self.resilience.call("POST", "/api/users/1/withdrawals", post)
+        timeout = Attempts({"success": False, "error": TIMEOUT_ERROR, "status_code": None})
+        self.resilience.call("GET", "/api/users/1/balance", timeout)
+        missing = Attempts({"success": False, "error": "Endpoint not found", "status_code": 404})
+        self.resilience.call("GET", "/api/users/1/referral-info", missing)
+        self.assertEqual((post.calls, timeout.calls, missing.calls), (1, 1, 1))
+
+    def test_open_circuit_short_circuits(self):
+        """Test that once open, calls return a failure without attempting a request."""
+        attempt = Attempts(DOWN)
+        for user_id in range(3):
+            self.resilience.call("GET", f"/api/users/{user_id}/balance", attempt)
+        calls = attempt.calls
+        result = self.resilience.call("GET", "/api/users/99/balance", attempt)
+        self.assertEqual(attempt.calls, calls)
+        self.assertFalse(result["success"])
+        self.assertTrue(result["error"].startswith(CIRCUIT_OPEN_ERROR))
+        self.assertEqual(self.resilience.snapshot()["open_circuits"], ["GET /api/users/{id}/balance"])
+
+
+class TestClientOutage(unittest.TestCase):
+    def test_outage_fails_fast_and_is_reported(self):
+        """Test that after the breaker opens the async client stops calling the platform."""
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            raise httpx.ConnectError("refused", request=request)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            metrics_file = os.path.join(tmpdir, "api_metrics.json")
+            resilience = APIResilience(RetryPolicy(max_retries=1, base_delay=0), failure_threshold=2,
+                                       metrics_file=metrics_file)
+            client = AsyncCapitalXAPI("key", transport=httpx.MockTransport(handler), resilience=resilience)
+
+            async def run():
+                try:
+                    return [await client.get_user_balance(f"user{i}") for i in range(6)]
+                finally:
+                    await client.aclose()
+
+            results = asyncio.run(run())
+            self.assertFalse(any(result["success"] for result in results))
+            # Two failed calls of two attempts each open the circuit; the other four never leave the process
+            self.assertEqual(len(requests), 4)
+            self.assertEqual(resilience.short_circuited, 4)
+
+            self.assertTrue(resilience.flush())
+            snapshot = load_api_metrics(metrics_file)
+            self.assertEqual(snapshot["breakers"]["GET /api/users/{id}/balance"]["state"], OPEN)
+
+    def test_global_instance_writes_only_once_persisted(self):
+        """Test that importing the module does not write API metrics into the working directory."""
+        self.assertIsNone(api_resilience.metrics_file)
+        resilience = APIResilience(metrics_file=None)
+        self.assertFalse(resilience.flush())
+        with tempfile.TemporaryDirectory() as tmpdir:
+            metrics_file = os.path.join(tmpdir, "api_metrics.json")
+            with patch('api_resilience.atexit.register') as register:
+                resilience.persist(metrics_file)
+            register.assert_called_once_with(resilience.flush)
+            self.assertTrue(resilience.flush())
+            self.assertIsNotNone(load_api_metrics(metrics_file))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+"""
+Test file for the async crawler, run against a local HTTP fixture server
+"""
+
+import unittest
+import asyncio
+import threading
+import tempfile
+import time
+import sys
+import os
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from async_crawler import AsyncCrawler, HostRateLimiter, CrawlFrontier
+from crawl_state import CrawlStateStore
+from extract_urls import URLExtractor
+
+PAGE_DELAY = 0.2
+PAGES = {
+    "/": ['/page1', '/page2', '/page3', '/page4', '/page5', '/admin/users', 'https://example.com/out'],
+    "/page1": ['/page1/child', '/#top', '/page2'],
+    "/page2": ['/page1'],
+    "/page3": [],
+    "/page4": [],
+    "/page5": ['/missing'],
+    "/page1/child": ['/page1/child/deeper'],
+    "/page1/child/deeper": [],
+}
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_GET(self):
+        FixtureHandler.requests_seen.append(self.path)
+        time.sleep(PAGE_DELAY)
+        links = PAGES.get(self.path)
+        if links is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = "<html><body>" + "".join(f'<a href="{link}">x</a>' for link in links) + "</body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+class TestAsyncCrawler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        FixtureHandler.requests_seen = []
+
+    def crawl(self, max_depth, **kwargs):
+        extractor = URLExtractor(self.base_url)
+        kwargs.setdefault("rate_limiter", HostRateLimiter(rate=0, max_per_host=8))
+        crawler = AsyncCrawler(self.base_url, max_depth=max_depth, url_filter=extractor.is_valid_url, **kwargs)
+        return asyncio.run(crawler.crawl())
+
+    def test_filters_and_depth(self):
+        """Test that admin/external links are dropped and depth is respected."""
+        urls = self.crawl(max_depth=2)
+        self.assertIn(f"{self.base_url}/page1/child", urls)
+        self.assertNotIn(f"{self.base_url}/page1/child/deeper", urls)
+        self.assertFalse(any("admin" in url or "example.com" in url for url in urls))
+        self.assertNotIn("/page1/child", FixtureHandler.requests_seen)
+
+    def test_each_page_fetched_once(self):
+        """Test that the frontier deduplicates pages, including fragment variants."""
+        self.crawl(max_depth=3)
+        self.assertEqual(len(FixtureHandler.requests_seen), len(set(FixtureHandler.requests_seen)))
+        self.assertIn("/page1/child", FixtureHandler.requests_seen)
+        self.assertIn("/missing", FixtureHandler.requests_seen)
+
+    def test_concurrent_wall_time(self):
+        """Test that a crawl takes about the slowest few responses, not their sum."""
+        started = time.monotonic()
+        self.crawl(max_depth=2, concurrency=8)
+        elapsed = time.monotonic() - started
+        # 6 pages at 0.2s each would take 1.2s serially; two levels in parallel is ~0.4s
+        self.assertLess(elapsed, 6 * PAGE_DELAY * 0.75)
+
+    def test_extractor_uses_crawler(self):
+        """Test that URLExtractor.extract_all_urls returns the crawled URLs."""
+        extractor = URLExtractor(self.base_url)
+        urls = extractor.extract_all_urls(max_depth=1)
+        self.assertIn(f"{self.base_url}/page5", urls)
+        self.assertIn(self.base_url, extractor.visited_urls)
+
+    def test_resume_skips_fresh_pages(self):
+        """Test that a second run replays fetched pages from the crawl state."""
+        with tempfile.TemporaryDirectory() as tmp:
+            db_file = os.path.join(tmp, "crawl.db")
+            first = self.crawl(max_depth=3, state=CrawlStateStore(self.base_url, db_file))
+            fetched = len(FixtureHandler.requests_seen)
+
+            FixtureHandler.requests_seen = []
+            second = self.crawl(max_depth=3, state=CrawlStateStore(self.base_url, db_file))
+            self.assertEqual(second, first)
+            self.assertEqual(FixtureHandler.requests_seen, [])
+
+            # Outside the freshness window everything is fetched again
+            self.crawl(max_depth=3, state=CrawlStateStore(self.base_url, db_file, freshness_seconds=0))
+            self.assertEqual(len(FixtureHandler.requests_seen), fetched)
+            stats = CrawlStateStore(self.base_url, db_file).stats()
+            self.assertEqual((stats["queued"], stats["failed"], stats["fetched"]), (0, 0, fetched))
+
+    def test_interrupted_crawl_resumes(self):
+        """Test that a cancelled crawl checkpoints its frontier and the next run finishes it."""
+        full = self.crawl(max_depth=3)
+        full_requests = len(FixtureHandler.requests_seen)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            db_file = os.path.join(tmp, "crawl.db")
+            FixtureHandler.requests_seen = []
+            crawler = AsyncCrawler(self.base_url, max_depth=3, concurrency=1,
+                                   url_filter=URLExtractor(self.base_url).is_valid_url,
+                                   rate_limiter=HostRateLimiter(rate=0),
+                                   state=CrawlStateStore(self.base_url, db_file))
+
+            async def interrupted():
+                try:
+                    await asyncio.wait_for(crawler.crawl(), timeout=PAGE_DELAY * 2.5)
+                except asyncio.TimeoutError:
+                    pass
+
+            asyncio.run(interrupted())
+            first_run = len(FixtureHandler.requests_seen)
+            self.assertGreater(CrawlStateStore(self.base_url, db_file).stats()["queued"], 0)
+
+            FixtureHandler.requests_seen = []
+            resumed = self.crawl(max_depth=3, state=CrawlStateStore(self.base_url, db_file))
+            self.assertEqual(resumed, full)
+            # At most the page in flight when the crawl was cancelled is fetched twice
+            self.assertLessEqual(first_run + len(FixtureHandler.requests_seen), full_requests + 1)
+
+class TestHostRateLimiter(unittest.TestCase):
+    def test_requests_are_spaced_per_host(self):
+        """Test that request starts on one host are spaced by the rate, other hosts are not."""
+        limiter = HostRateLimiter(rate=20, max_per_host=10)
+        starts = {}
+
+        async def request(host, i):
+            async with limiter.acquire(host):
+                starts[(host, i)] = time.monotonic()
+
+        async def run():
+            await asyncio.gather(*(request(host, i) for host in ("a", "b") for i in range(5)))
+
+        began = time.monotonic()
+        asyncio.run(run())
+        self.assertGreaterEqual(max(starts[("a", i)] for i in range(5)) - began, 0.19)
+        self.assertLess(min(starts[("b", i)] for i in range(5)) - began, 0.05)
+
+class TestCrawlFrontier(unittest.TestCase):
+    def test_normalize(self):
+        """Test that fragments and empty paths do not create new pages."""
+        async def run():
+            frontier = CrawlFrontier()
+            self.assertTrue(frontier.add("http://host", 0))
+            self.assertFalse(frontier.add("http://host/#top", 1))
+            self.assertTrue(frontier.add("http://host/a", 1))
+            self.assertFalse(frontier.add("http://host/a#b", 1))
+            return frontier.queue.qsize()
+        self.assertEqual(asyncio.run(run()), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,13 +4,17 @@ Test file for CapitalX API integration
 
 import unittest
 from unittest.mock import patch, MagicMock
+import asyncio
+import time
 import sys
 import os
 
+import httpx
+
 # Add the project root to the path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from capitalx_api import CapitalXAPI, initialize_api_client, get_api_client
+from capitalx_api import CapitalXAPI, AsyncCapitalXAPI, initialize_api_client, get_api_client
 from capitalx_api import (
     set_bot_secret, validate_secret, get_financial_info, get_investment_plans,
     get_user_investments, create_investment, get_user_balance, get_user_referral_info,
@@ -292,5 +296,123 @@ class TestCapitalXAPI(unittest.TestCase):
         self.assertTrue(get_market_data()["success"])
         self.assertTrue(get_withdrawal_history(self.user_id)["success"])
 
+class TestAsyncCapitalXAPI(unittest.TestCase):
+    def setUp(self):
+        """Set up an async client whose requests are answered by a mock transport."""
+        self.user_id = "123456789"
+        self.requests = []
+        self.responses = {}
+
+        async def handler(request):
+            self.requests.append(request)
+            delay = self.responses.get(("delay", request.url.path), 0)
+            if delay:
+                await asyncio.sleep(delay)
+            status, body = self.responses.get(request.url.path, (404, {}))
+            return httpx.Response(status, json=body)
+
+        self.client = AsyncCapitalXAPI("test_api_key", timeout=5, write_timeout=12,
+                                       transport=httpx.MockTransport(handler))
+
+    def run_with_client(self, coro_factory):
+        """Run coroutines against the client in a fresh event loop and close it afterwards."""
+        async def run():
+            try:
+                return await coro_factory()
+            finally:
+                await self.client.aclose()
+        return asyncio.run(run())
+
+    def test_request_headers_and_timeouts(self):
+        """Test that requests carry auth headers and reads and writes get their own timeouts."""
+        self.responses[f"/api/users/{self.user_id}/balance"] = (200, {"balance": 120})
+        self.responses[f"/api/users/{self.user_id}/withdrawals"] = (200, {"status": "pending"})
+
+        async def calls():
+            return (await self.client.get_user_balance(self.user_id),
+                    await self.client.request_withdrawal(self.user_id, 75))
+
+        balance, withdrawal = self.run_with_client(calls)
+        self.assertEqual(balance, {"success": True, "data": {"balance": 120}, "status_code": 200})
+        self.assertTrue(withdrawal["success"])
+        read, write = self.requests
+        self.assertEqual(read.headers["Authorization"], "Bearer test_api_key")
+        self.assertEqual(read.extensions["timeout"]["read"], 5)
+        self.assertEqual(write.method, "POST")
+        self.assertEqual(write.extensions["timeout"]["read"], 12)
+        self.assertIn(b'"amount":75', write.content.replace(b" ", b""))
+
+    def test_not_found_fallback_matches_sync_client(self):
+        """Test that a missing endpoint yields the same fallback data as the blocking client."""
+        result = self.run_with_client(self.client.get_investment_plans)
+        with patch.object(CapitalXAPI, '_make_request', return_value={"success": False, "status_code": 404}):
+            expected = CapitalXAPI("test_api_key").get_investment_plans()
+        self.assertEqual(result, expected)
+        self.assertEqual(len(result["data"]["plans"]), 10)
+
+    def test_errors_become_results(self):
+        """Test that timeouts, connection and HTTP errors are returned rather than raised."""
+        def failing(exc):
+            def handler(request):
+                raise exc("boom", request=request)
+            return httpx.MockTransport(handler)
+
+        for exc, error in ((httpx.ReadTimeout, "Request timeout"), (httpx.ConnectError, "Connection error")):
+            self.client = AsyncCapitalXAPI("test_api_key", transport=failing(exc))
+            result = self.run_with_client(self.client.get_market_data)
+            self.assertEqual(result, {"success": False, "error": error, "status_code": None})
+
+        self.client = AsyncCapitalXAPI("test_api_key", transport=httpx.MockTransport(lambda r: httpx.Response(500)))
+        result = self.run_with_client(self.client.get_market_data)
+        self.assertFalse(result["success"])
+        self.assertEqual(result["status_code"], 500)
+
+    def test_slow_calls_do_not_block_each_other(self):
+        """Test that concurrent calls share one pooled client and overlap instead of queueing."""
+        user_ids = [f"user{i}" for i in range(6)]
+        for user_id in user_ids:
+            path = f"/api/users/{user_id}/referral-info"
+            self.responses[path] = (200, {"referral_code": f"REF-{user_id}"})
+            self.responses[("delay", path)] = 0.2
+
+        async def calls():
+            pool = self.client._get_client()
+            results = await asyncio.gather(*(self.client.get_user_referral_info(user_id)
+                                             for user_id in user_ids[:5]))
+            self.assertIs(self.client._get_client(), pool)
+            return results
+
+        started = time.monotonic()
+        results = self.run_with_client(calls)
+        self.assertLess(time.monotonic() - started, 0.6)
+        self.assertEqual([result["data"]["referral_code"] for result in results],
+                         [f"REF-{user_id}" for user_id in user_ids[:5]])
+
+        # A later event loop gets a fresh pool rather than the closed one
+        self.run_with_client(lambda: self.client.get_user_referral_info(user_ids[5]))
+        self.assertEqual(len(self.requests), 6)
+
+    def test_user_data_coalesced_and_invalidated_by_writes(self):
+        """Test that concurrent lookups of one user's balance share a request and a withdrawal drops it."""
+        balance_path = f"/api/users/{self.user_id}/balance"
+        self.responses[balance_path] = (200, {"balance": 500})
+        self.responses[("delay", balance_path)] = 0.05
+        self.responses[f"/api/users/{self.user_id}/withdrawals"] = (200, {"status": "pending"})
+
+        async def calls():
+            first = await asyncio.gather(*(self.client.get_user_balance(self.user_id) for _ in range(4)))
+            await self.client.get_user_balance(self.user_id)
+            await self.client.request_withdrawal(self.user_id, 100)
+            self.responses[balance_path] = (200, {"balance": 400})
+            return first, await self.client.get_user_balance(self.user_id)
+
+        first, after = self.run_with_client(calls)
+        self.assertTrue(all(result["data"]["balance"] == 500 for result in first))
+        self.assertEqual(after["data"]["balance"], 400)
+        self.assertEqual([request.url.path for request in self.requests],
+                         [balance_path, f"/api/users/{self.user_id}/withdrawals", balance_path])
+        stats = self.client.cache_stats()["user_balance"]
+        self.assertEqual((stats["misses"], stats["coalesced"], stats["hits"]), (2, 3, 1))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,139 @@
+"""
+Test file for the missing-endpoint negative cache
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+import asyncio
+import sys
+import os
+
+import httpx
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from endpoint_availability import EndpointAvailability, AVAILABLE, MISSING, PROBE
+from capitalx_api import CapitalXAPI, AsyncCapitalXAPI
+
+NOT_FOUND = {"success": False, "error": "Endpoint not found", "status_code": 404}
+KEY = "GET /api/users/{id}/balance"
+
+
+def expire(availability, key, resource=None):
+    """Pretend the 404 for a resource was recorded longer ago than the TTL."""
+    availability._missing[(key, resource or key)] -= availability.missing_ttl + 1
+
+
+class TestEndpointAvailability(unittest.TestCase):
+    def test_missing_probe_and_recovery(self):
+        """Test that a 404 is remembered, probed once after expiry and forgotten when answered."""
+        availability = EndpointAvailability(missing_ttl=600)
+        self.assertEqual(availability.check(KEY), AVAILABLE)
+        availability.record(KEY, NOT_FOUND)
+        self.assertEqual(availability.check(KEY), MISSING)
+
+        expire(availability, KEY)
+        self.assertEqual(availability.check(KEY), PROBE)
+        self.assertEqual(availability.check(KEY), MISSING, "one probe at a time")
+        availability.record(KEY, {"success": False, "error": "Connection error", "status_code": None})
+        self.assertEqual(availability.check(KEY), MISSING, "an outage does not prove the endpoint exists")
+
+        expire(availability, KEY)
+        self.assertEqual(availability.check(KEY), PROBE)
+        availability.record(KEY, {"success": True, "data": {}, "status_code": 200})
+        self.assertEqual(availability.check(KEY), AVAILABLE)
+        self.assertEqual(availability.snapshot()["recovered"], 1)
+
+    def test_users_are_tracked_separately_and_reported_together(self):
+        """Test that one user's 404 does not hide the resource from other users or leak their id."""
+        availability = EndpointAvailability(missing_ttl=600, max_resources=2)
+        availability.record(KEY, NOT_FOUND, "GET /api/users/1/balance")
+        self.assertEqual(availability.check(KEY, "GET /api/users/1/balance"), MISSING)
+        self.assertEqual(availability.check(KEY, "GET /api/users/2/balance"), AVAILABLE)
+
+        availability.record(KEY, NOT_FOUND, "GET /api/users/2/balance")
+        snapshot = availability.snapshot()
+        self.assertEqual(list(snapshot["missing"]), [KEY])
+        self.assertEqual(snapshot["missing"][KEY]["resources"], 2)
+
+        availability.record(KEY, NOT_FOUND, "GET /api/users/3/balance")
+        self.assertEqual(availability.check(KEY, "GET /api/users/1/balance"), AVAILABLE, "oldest entry evicted")
+        availability.forget(KEY)
+        self.assertEqual(availability.snapshot()["missing"], {})
+
+    def test_endpoint_logged_when_its_first_resource_goes_missing(self):
+        """Test that the fallback notice is logged once per endpoint, again only after it fully recovered."""
+        availability = EndpointAvailability(missing_ttl=600)
+        with self.assertLogs('endpoint_availability', level='INFO') as logs:
+            availability.record(KEY, NOT_FOUND, "GET /api/users/1/balance")
+            availability.record(KEY, NOT_FOUND, "GET /api/users/2/balance")
+            for user in (1, 2):
+                availability.record(KEY, {"success": True, "status_code": 200}, f"GET /api/users/{user}/balance")
+            availability.record(KEY, NOT_FOUND, "GET /api/users/3/balance")
+        notices = [line for line in logs.output if "answered 404" in line]
+        self.assertEqual(len(notices), 2)
+        self.assertEqual(availability._missing_counts, {KEY: 1})
+
+
+class TestClients(unittest.TestCase):
+    def test_async_client_serves_fallback_and_probes_in_background(self):
+        """Test that a missing resource costs one request, and re-checks never delay callers."""
+        requests = []
+        live = {"balance": False}
+
+        def handler(request):
+            requests.append(request.url.path)
+            if live["balance"] or request.url.path == "/api/users/known/balance":
+                return httpx.Response(200, json={"balance": 900})
+            return httpx.Response(404)
+
+        client = AsyncCapitalXAPI("key", transport=httpx.MockTransport(handler))
+        availability = client.resilience.availability
+        resource = "GET /api/users/user0/balance"
+
+        async def run():
+            try:
+                first = [await client.get_user_balance("user0") for _ in range(3)]
+                known = await client.get_user_balance("known")
+                client.invalidate_user("user0")
+                expire(availability, KEY, resource)
+                live["balance"] = True
+                during_probe = await client.get_user_balance("user0")
+                await asyncio.gather(*client.resilience._probes)
+                client.invalidate_user("user0")
+                after_probe = await client.get_user_balance("user0")
+                return first, known, during_probe, after_probe
+            finally:
+                await client.aclose()
+
+        first, known, during_probe, after_probe = asyncio.run(run())
+        self.assertTrue(all(result["data"]["bonus_balance"] == 50 for result in first))
+        self.assertEqual(known["data"], {"balance": 900}, "another user's 404 does not hide the endpoint")
+        self.assertEqual(during_probe["data"]["bonus_balance"], 50, "the caller is not kept waiting for the probe")
+        self.assertEqual(after_probe["data"], {"balance": 900})
+        self.assertEqual(requests, ["/api/users/user0/balance", "/api/users/known/balance",
+                                    "/api/users/user0/balance", "/api/users/user0/balance"])
+
+    @patch('capitalx_api.requests.Session')
+    def test_sync_client_skips_known_missing_reads_only(self, mock_session):
+        """Test that the blocking client stops re-requesting missing reads but still sends writes."""
+        response = MagicMock()
+        response.status_code = 404
+        session = MagicMock()
+        session.request.return_value = response
+        mock_session.return_value = session
+
+        client = CapitalXAPI("key")
+        for _ in range(3):
+            self.assertEqual(client.get_withdrawal_history("1")["data"], {"withdrawals": []})
+        self.assertEqual(session.request.call_count, 1)
+        client.get_withdrawal_history("2")
+        self.assertEqual(session.request.call_count, 2, "each user's resource is checked on its own")
+
+        for _ in range(2):
+            self.assertTrue(client.request_withdrawal("1", 100)["success"])
+        self.assertEqual(session.request.call_count, 4)
+
+if __name__ == '__main__':
+    unittest.main()
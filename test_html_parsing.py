@@ -0,0 +1,68 @@
+"""
+Test file for the pluggable HTML parsing backends
+"""
+
+import unittest
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bs4 import BeautifulSoup
+
+from html_parsing import available_backends, get_backend, extract_links, make_soup
+from benchmark_html_parsing import bs4_baseline, PAGE_URL
+
+PAGE = """
+<html><head><title>CapitalX</title></head><body>
+  <A HREF="/register/">Register</A>
+  <a href="deposit?amount=50&amp;method=card">Deposit</a>
+  <a name="no-href">Anchor</a>
+  <a href="">Self</a>
+  <form action="/login/" method="post"><input name="user"/></form>
+  <form method="get"></form>
+  <a href="https://example.com/out">External</a><br/>
+  <p>Unclosed <a href="#top">Top
+</body></html>
+"""
+
+class TestLinkExtraction(unittest.TestCase):
+    def test_matches_beautifulsoup(self):
+        """Test that every backend finds the same links as the old BeautifulSoup code."""
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "demo.html"), encoding="utf-8") as f:
+            demo = f.read()
+        for html in (PAGE, demo):
+            expected = sorted(bs4_baseline(html))
+            for backend in available_backends():
+                self.assertEqual(sorted(extract_links(html, PAGE_URL, backend)), expected, backend)
+
+    def test_resolves_and_unescapes(self):
+        """Test that relative links are resolved and entities decoded."""
+        links = extract_links(PAGE, PAGE_URL, "html.parser")
+        self.assertEqual(links[0], "https://capitalx-rtn.onrender.com/register/")
+        self.assertIn("https://capitalx-rtn.onrender.com/deposit?amount=50&method=card", links)
+        self.assertIn("https://capitalx-rtn.onrender.com/login/", links)
+        self.assertEqual(len(links), 6)
+
+    def test_empty_page(self):
+        """Test that an empty page has no links."""
+        self.assertEqual(extract_links("", PAGE_URL), [])
+
+class TestBackends(unittest.TestCase):
+    def test_stdlib_always_available(self):
+        """Test that html.parser is always the last-resort backend."""
+        self.assertEqual(available_backends()[-1], "html.parser")
+
+    def test_unknown_backend_falls_back(self):
+        """Test that a missing backend falls back to the fastest installed one."""
+        self.assertEqual(get_backend("no-such-parser"), available_backends()[0])
+
+    def test_make_soup(self):
+        """Test that make_soup returns a usable BeautifulSoup tree."""
+        soup = make_soup(PAGE)
+        self.assertIsInstance(soup, BeautifulSoup)
+        self.assertEqual(soup.title.string, "CapitalX")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+"""
+Test file for the HTTP record/replay cassette
+"""
+
+import unittest
+import asyncio
+import tempfile
+import threading
+import time
+import sys
+import os
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import httpx
+import requests
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from http_cassette import (Cassette, CassetteMiss, FaultProfile, AsyncCassetteTransport, install,
+                           normalize_url, MODE_RECORD)
+from kb_scraper import KBScraper
+
+PAGE = b"<html><body><a href='/about'>About</a></body></html>"
+
+class SiteHandler(BaseHTTPRequestHandler):
+    hits = 0
+
+    def do_GET(self):
+        SiteHandler.hits += 1
+        if self.path.startswith("/api/plans"):
+            body, content_type = b'{"plans": [1, 2]}', "application/json"
+        else:
+            body, content_type = PAGE, "text/html"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("ETag", '"v1"')
+        self.send_header("X-Request-Id", str(SiteHandler.hits))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        body = self.rfile.read(length)
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b'{"echo": ' + body + b'}')
+
+    def log_message(self, *args):
+        pass
+
+class TestCassette(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "site.json.gz")
+        server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+        self.base_url = f"http://127.0.0.1:{server.server_port}"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        # Record, then take the site down so replays must be offline
+        cassette = Cassette(self.path)
+        session = requests.Session()
+        install(session, cassette, MODE_RECORD)
+        session.get(f"{self.base_url}/")
+        session.get(f"{self.base_url}/api/plans?b=2&a=1")
+        session.post(f"{self.base_url}/api/echo", json={"x": 1})
+        session.post(f"{self.base_url}/api/echo", json={"x": 2})
+
+        async def record_async():
+            transport = AsyncCassetteTransport(cassette, MODE_RECORD)
+            async with httpx.AsyncClient(transport=transport) as client:
+                await client.get(f"{self.base_url}/about")
+
+        asyncio.run(record_async())
+        cassette.save()
+        server.shutdown()
+        server.server_close()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def replay_session(self, faults=None):
+        cassette = Cassette.load(self.path)
+        session = requests.Session()
+        install(session, cassette, faults=faults)
+        return session, cassette
+
+    def test_replay_offline(self):
+        """Test that recorded responses replay without the server, matched on query and body."""
+        session, cassette = self.replay_session()
+        self.assertEqual(session.get(f"{self.base_url}/#top").content, PAGE)
+        self.assertEqual(session.get(f"{self.base_url}/api/plans?a=1&b=2").json(), {"plans": [1, 2]})
+        self.assertEqual(session.post(f"{self.base_url}/api/echo", json={"x": 2}).json(), {"echo": {"x": 2}})
+        self.assertEqual(cassette.stats["replayed"], 3)
+
+        with self.assertRaises(CassetteMiss):
+            session.get(f"{self.base_url}/never-recorded")
+        self.assertEqual(cassette.stats["misses"], 1)
+
+    def test_compact_and_byte_identical(self):
+        """Test that noisy headers are dropped and re-saving produces the same bytes."""
+        cassette = Cassette.load(self.path)
+        self.assertNotIn("x-request-id", cassette.interactions[0]["headers"])
+        self.assertEqual(cassette.interactions[0]["body"], cassette.interactions[-1]["body"])
+        self.assertEqual(len(cassette.bodies), 4)
+
+        copy_path = os.path.join(self.tmpdir.name, "copy.json.gz")
+        cassette.save(copy_path)
+        Cassette.load(copy_path).save()
+        with open(self.path, "rb") as original, open(copy_path, "rb") as copy:
+            self.assertEqual(original.read(), copy.read())
+
+    def test_async_replay(self):
+        """Test that the httpx transport replays what either client recorded."""
+        cassette = Cassette.load(self.path)
+
+        async def fetch():
+            async with httpx.AsyncClient(transport=AsyncCassetteTransport(cassette)) as client:
+                return [(await client.get(f"{self.base_url}{path}")).text for path in ("/about", "/")]
+
+        self.assertEqual(asyncio.run(fetch()), [PAGE.decode()] * 2)
+
+    def test_conditional_get_replays_304(self):
+        """Test that the scraper's conditional refresh sees 304 when its ETag matches."""
+        scraper = KBScraper(self.base_url + "/", os.path.join(self.tmpdir.name, "kb.db"))
+        install(scraper.session, Cassette.load(self.path))
+        first = scraper.fetch_page_if_changed(self.base_url)
+        self.assertEqual((first.status, first.etag), ("changed", '"v1"'))
+        self.assertEqual(scraper.fetch_page_if_changed(self.base_url, {"etag": '"v1"'}).status, "not_modified")
+
+    def test_injected_faults_are_deterministic(self):
+        """Test that the same seed injects the same failures and latency."""
+        def run(seed):
+            session, cassette = self.replay_session(FaultProfile(error_rate=0.5, seed=seed))
+            outcomes = []
+            for _ in range(20):
+                try:
+                    session.get(f"{self.base_url}/")
+                    outcomes.append(True)
+                except requests.ConnectionError:
+                    outcomes.append(False)
+            return outcomes, cassette.stats["injected_errors"]
+
+        self.assertEqual(run(3), run(3))
+        self.assertTrue(0 < run(3)[1] < 20)
+
+        session, _ = self.replay_session(FaultProfile(latency=0.05, error_rate=1.0, error_status=503))
+        started = time.monotonic()
+        self.assertEqual(session.get(f"{self.base_url}/").status_code, 503)
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+
+    def test_normalize_url(self):
+        """Test that fragments and query order do not change the match key."""
+        self.assertEqual(normalize_url("http://h?b=1&a=2#x"), "http://h/?a=2&b=1")
+
+if __name__ == '__main__':
+    unittest.main()
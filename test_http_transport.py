@@ -0,0 +1,133 @@
+"""
+Test file for the shared HTTP transport
+"""
+
+import unittest
+from unittest.mock import patch, AsyncMock
+import asyncio
+import threading
+import sys
+import os
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import http_transport
+from http_transport import (create_session, create_async_client, get_async_transport, get_shared_adapter,
+                            http2_available, run_async, transport_stats, HTTP_TIMEOUT_SECONDS)
+
+
+class TestSessions(unittest.TestCase):
+    def setUp(self):
+        transport_stats.reset()
+
+    def test_sessions_share_pool_but_not_headers(self):
+        """Test that sessions keep their own headers while sending through one adapter."""
+        api = create_session({"Authorization": "Bearer secret"})
+        scraper = create_session({"User-Agent": "scraper"})
+        self.assertIs(api.get_adapter("https://capitalx-rtn.onrender.com/"), get_shared_adapter())
+        self.assertIs(scraper.get_adapter("http://example.com/"), get_shared_adapter())
+        self.assertNotIn("Authorization", scraper.headers)
+
+        # Closing one session must not tear down the pool the others use
+        scraper.close()
+        self.assertIsNotNone(get_shared_adapter().poolmanager)
+
+    def test_default_timeout_and_stats(self):
+        """Test that requests without a timeout get the default and are counted per host."""
+        def send_stub(request, **kwargs):
+            response = requests.Response()
+            response.status_code = 200
+            response.url = request.url
+            response.request = request
+            return response
+
+        with patch.object(HTTPAdapter, 'send', side_effect=send_stub) as send:
+            create_session().get("https://capitalx-rtn.onrender.com/api/market-data")
+            create_session().get("https://capitalx-rtn.onrender.com/", timeout=3)
+        self.assertEqual(send.call_args_list[0].kwargs["timeout"][1], HTTP_TIMEOUT_SECONDS)
+        self.assertEqual(send.call_args_list[1].kwargs["timeout"], 3)
+        stats = transport_stats.snapshot()["capitalx-rtn.onrender.com"]
+        self.assertEqual((stats["requests"], stats["status"]), (2, {"2xx": 2}))
+
+
+class TestAsyncClients(unittest.TestCase):
+    def setUp(self):
+        transport_stats.reset()
+
+    def test_clients_share_the_loop_pool(self):
+        """Test that async clients in one loop share a pool that outlives each client."""
+        async def run():
+            pool = get_async_transport()
+            with patch.object(pool, 'aclose', new=AsyncMock()) as aclose:
+                first = create_async_client()
+                second = create_async_client(headers={"User-Agent": "crawler"})
+                await first.aclose()
+                self.assertIs(get_async_transport(), pool)
+                await second.aclose()
+                aclose.assert_not_called()
+            await http_transport.close_async_transport()
+            return pool
+
+        first_pool = asyncio.run(run())
+        self.assertIsNot(asyncio.run(run()), first_pool, "a new event loop gets a new pool")
+
+    def test_other_loops_do_not_replace_or_close_the_pool(self):
+        """Test that a refresh thread's loop gets its own pool and the bot loop's pool is closed on shutdown."""
+        async def refresh_crawl():
+            async with create_async_client():
+                pass
+            return get_async_transport()
+
+        async def bot():
+            pool = get_async_transport()
+            # A KB refresh runs its own loop on another thread while the bot loop is live
+            refresh = {}
+            thread = threading.Thread(target=lambda: refresh.update(pool=run_async(refresh_crawl())))
+            with patch.object(httpx.AsyncHTTPTransport, 'aclose', new=AsyncMock()) as closed:
+                thread.start()
+                await asyncio.to_thread(thread.join)
+            self.assertEqual(closed.await_count, 1, "run_async closes only the refresh loop's pool")
+            self.assertIsNot(refresh["pool"], pool)
+            self.assertIs(get_async_transport(), pool)
+
+            with patch.object(pool, 'aclose', new=AsyncMock()) as aclose:
+                await http_transport.close_async_transport()
+            aclose.assert_awaited_once()
+            self.assertIsNot(get_async_transport(), pool)
+            await http_transport.close_async_transport()
+
+        asyncio.run(bot())
+
+    def test_custom_transport_is_instrumented(self):
+        """Test that a caller-supplied transport is used, timed and counted as an error when it fails."""
+        def handler(request):
+            if request.url.path == "/down":
+                raise httpx.ConnectError("refused", request=request)
+            return httpx.Response(503)
+
+        async def run():
+            async with create_async_client(transport=httpx.MockTransport(handler)) as client:
+                await client.get("https://api.example/up")
+                with self.assertRaises(httpx.ConnectError):
+                    await client.get("https://api.example/down")
+
+        asyncio.run(run())
+        stats = transport_stats.snapshot()["api.example"]
+        self.assertEqual(stats["errors"], 2)
+        self.assertEqual(stats["status"], {"5xx": 1, "error": 1})
+
+    def test_http2_needs_h2(self):
+        """Test that HTTP/2 is only used when asked for and the h2 package is installed."""
+        with patch.object(http_transport, 'HTTP2_ENABLED', True), \
+                patch.object(http_transport.importlib.util, 'find_spec', return_value=None):
+            self.assertFalse(http2_available())
+        with patch.object(http_transport, 'HTTP2_ENABLED', False):
+            self.assertFalse(http2_available())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Test file for inline mode prefix-trie autocomplete
+"""
+
+import unittest
+import sqlite3
+import tempfile
+import asyncio
+import sys
+import os
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from inline_search import PrefixTrie, InlineEntry, InlineSearchIndex, load_kb_entries, normalize_key
+
+class TestPrefixTrie(unittest.TestCase):
+    def test_complete_ranks_by_score(self):
+        """Test that completions come back best first and respect the limit."""
+        trie = PrefixTrie(top_k=2)
+        trie.insert("deposit", 1, 1.0)
+        trie.insert("deposit methods", 2, 3.0)
+        trie.insert("depth", 3, 2.0)
+        trie.finalize()
+
+        self.assertEqual(trie.complete("dep"), [2, 3])
+        self.assertEqual(trie.complete("deposit"), [2, 1])
+        self.assertEqual(trie.complete("dep", limit=1), [2])
+        self.assertEqual(trie.complete("xyz"), [])
+
+    def test_repeated_key_keeps_best_score(self):
+        """Test that an entry is listed once with its highest score."""
+        trie = PrefixTrie()
+        trie.insert("bonus", 1, 1.0)
+        trie.insert("Bonus!", 1, 5.0)
+        trie.insert("bonuses", 2, 2.0)
+        trie.finalize()
+        self.assertEqual(trie.complete("bon"), [1, 2])
+
+    def test_normalize_key(self):
+        """Test keys are case and punctuation insensitive."""
+        self.assertEqual(normalize_key("  How-To  Deposit? "), "how to deposit")
+
+class TestInlineSearchIndex(unittest.TestCase):
+    def setUp(self):
+        """Create a small knowledge base in a temporary database."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_file = os.path.join(self.tmpdir.name, "kb.db")
+        conn = sqlite3.connect(self.db_file)
+        conn.execute("""
+            CREATE TABLE kb_enhanced (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                category TEXT NOT NULL,
+                subcategory TEXT,
+                keywords TEXT,
+                title TEXT NOT NULL,
+                content TEXT NOT NULL
+            )
+        """)
+        conn.executemany(
+            "INSERT INTO kb_enhanced (category, subcategory, keywords, title, content) VALUES (?, ?, ?, ?, ?)",
+            [
+                ("Financial Operations", "deposit", "deposit,eft,card", "Deposit Information", "Minimum deposit is R50"),
+                ("Financial Operations", "withdrawal", "withdraw,cash out", "Withdrawal Rules", "Minimum withdrawal is R50"),
+            ]
+        )
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_complete_from_titles_keywords_and_mapping(self):
+        """Test that titles, later title words, keywords and mapped phrases all complete."""
+        index = InlineSearchIndex(load_kb_entries(self.db_file))
+        self.assertEqual(index.complete("depo")[0].title, "Deposit Information")
+        self.assertEqual(index.complete("infor")[0].title, "Deposit Information")
+        self.assertEqual(index.complete("cash")[0].title, "Withdrawal Rules")
+        # 'payout' comes from KEYWORD_MAPPING, not the KB row itself
+        self.assertEqual(index.complete("payou")[0].title, "Withdrawal Rules")
+        self.assertEqual(index.complete("zzz"), [])
+
+    def test_missing_table(self):
+        """Test that a database without a KB yields an empty index."""
+        entries = load_kb_entries(os.path.join(self.tmpdir.name, "empty.db"))
+        self.assertEqual(InlineSearchIndex(entries).complete("dep"), [])
+
+class TestInlineQueryHandler(unittest.TestCase):
+    def test_answer_is_cached_and_shared(self):
+        """Test the handler answers with Telegram caching enabled for all users."""
+        import handlers
+
+        inline_query = MagicMock()
+        inline_query.query = "dep"
+        inline_query.answer = AsyncMock()
+        update = MagicMock()
+        update.inline_query = inline_query
+        entry = InlineEntry(7, "Financial Operations", "deposit", "Deposit Information", "Minimum deposit is R50")
+
+        with patch.object(handlers, 'complete_query', return_value=[entry]):
+            asyncio.run(handlers.inline_query_handler(update, MagicMock()))
+
+        args, kwargs = inline_query.answer.call_args
+        self.assertEqual(args[0][0].id, "7")
+        self.assertEqual(args[0][0].title, "Deposit Information")
+        self.assertFalse(kwargs["is_personal"])
+        self.assertGreater(kwargs["cache_time"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
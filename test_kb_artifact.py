@@ -0,0 +1,185 @@
+"""
+Test file for the compiled knowledge base artifact
+"""
+
+import unittest
+from unittest.mock import patch
+import sqlite3
+import tempfile
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import kb_artifact
+import kb_versioning
+import spell_correction
+from kb_artifact import (compile_artifact, save_artifact, load_artifact, collect_source_rows, parse_markdown_sections,
+                         get_compiled_kb, seed_from_artifact, reset_compiled_kb, DOC_SUBCATEGORY_PREFIX)
+from kb_versioning import sync_kb_entries, invalidate_kb_version
+
+DOC = """# CapitalX Guide
+
+## Wallet
+
+### Withdrawal Process
+- **Minimum** withdrawal is R50
+- Withdrawals are processed within 24 hours of the request being approved
+
+## Referral Program
+Invite friends with your referral link and earn R10 for every friend who deposits.
+"""
+
+class TestMarkdown(unittest.TestCase):
+    def test_sections_nest_under_parent(self):
+        """Test that subsections keep their parent heading and markdown markup is stripped."""
+        title, sections = parse_markdown_sections(DOC)
+        self.assertEqual(title, "CapitalX Guide")
+        self.assertEqual([heading for heading, _ in sections], ["Wallet - Withdrawal Process", "Referral Program"])
+        self.assertEqual(sections[0][1][0], "Minimum withdrawal is R50")
+
+class TestArtifact(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_file = os.path.join(self.tmpdir.name, "kb.db")
+        self.path = os.path.join(self.tmpdir.name, "kb_artifact.bin")
+        doc_path = os.path.join(self.tmpdir.name, "guide.md")
+        with open(doc_path, "w", encoding="utf-8") as f:
+            f.write(DOC)
+        self.rows = collect_source_rows(doc_path)
+        self.artifact = compile_artifact(self.rows)
+        save_artifact(self.artifact, self.path)
+        # Every default database path points into the temp dir, so nothing lands in the working directory
+        self.patchers = [
+            patch.object(kb_artifact, 'KB_ARTIFACT_FILE', self.path),
+            patch.object(kb_artifact, 'DB_FILE', self.db_file),
+            patch.object(kb_versioning, 'DB_FILE', self.db_file),
+            patch.object(spell_correction, 'DB_FILE', self.db_file),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        reset_compiled_kb()
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+        reset_compiled_kb()
+        invalidate_kb_version()
+        self.tmpdir.cleanup()
+
+    def test_round_trip(self):
+        """Test that the artifact holds curated and document rows and loads back intact."""
+        self.assertTrue(any(row[1].startswith(DOC_SUBCATEGORY_PREFIX) for row in self.rows))
+        loaded = load_artifact(self.path)
+        self.assertEqual(loaded.entries, self.artifact.entries)
+        self.assertEqual(loaded.kb_digest, self.artifact.kb_digest)
+        self.assertEqual(loaded.answers[("Platform Overview", "about")][0], "About CapitalX")
+        self.assertEqual(loaded.spelling_index.correct_query("referal"), "referral")
+        self.assertTrue(loaded.inline_index.complete("refer"))
+
+    def test_rejects_foreign_file(self):
+        """Test that files with another magic or format version are ignored."""
+        with open(self.path, "wb") as f:
+            f.write(b"NOPE" + bytes(20))
+        self.assertIsNone(load_artifact(self.path))
+        self.assertIsNone(load_artifact(os.path.join(self.tmpdir.name, "missing.bin")))
+
+    def test_rejects_pickle_payload(self):
+        """Test that only plain marshalled data is accepted after a valid header."""
+        import pickle
+
+        with open(self.path, "wb") as f:
+            f.write(kb_artifact.HEADER.pack(kb_artifact.MAGIC, kb_artifact.FORMAT_VERSION) +
+                    pickle.dumps(self.artifact.entries))
+        self.assertIsNone(load_artifact(self.path))
+
+    def test_seed_and_validate_against_kb(self):
+        """Test that an empty KB is seeded and the artifact is only used while the KB matches."""
+        self.assertTrue(seed_from_artifact(self.db_file))
+        self.assertFalse(seed_from_artifact(self.db_file))
+        self.assertIsNotNone(get_compiled_kb(self.db_file))
+
+        with patch.object(spell_correction, 'collect_kb_terms') as collect_kb_terms:
+            self.assertIs(spell_correction.build_spelling_index(), get_compiled_kb().spelling_index)
+        collect_kb_terms.assert_not_called()
+
+        conn = sqlite3.connect(self.db_file)
+        try:
+            sync_kb_entries(conn, self.rows[:-1])
+        finally:
+            conn.close()
+        invalidate_kb_version()
+        reset_compiled_kb()
+        self.assertIsNone(get_compiled_kb(self.db_file))
+
+    def test_answers_match_database_lookup(self):
+        """Test that compiled answers pick the row the database would: newest updated_at, then highest id."""
+        from enhanced_keyword_search import EnhancedKeywordSearchEngine
+
+        key = ("Platform Overview", "about")
+        rows = [("Platform Overview", "about", "", "Old Overview", "old", None),
+                ("Platform Overview", "about", "", "New Overview", "new", None)]
+        conn = sqlite3.connect(self.db_file)
+        try:
+            sync_kb_entries(conn, rows)
+            engine = EnhancedKeywordSearchEngine()
+            for newest_title in ("New Overview", "Old Overview"):
+                if newest_title == "Old Overview":
+                    conn.execute("UPDATE kb_enhanced SET updated_at = '2999-01-01' WHERE title = 'Old Overview'")
+                    conn.commit()
+                self.assertTrue(kb_artifact.compile_from_db(self.db_file, self.path))
+                compiled = load_artifact(self.path).answers[key]
+                with patch('enhanced_keyword_search.get_compiled_kb', return_value=None):
+                    from_db = engine._lookup_entry(conn, False, *key)
+                self.assertEqual(compiled[0], newest_title)
+                self.assertEqual(tuple(from_db), compiled)
+        finally:
+            conn.close()
+
+    def test_scraper_refresh_keeps_seeded_rows(self):
+        """Test that a scraper refresh only replaces its own rows in a KB seeded from the artifact."""
+        from kb_scraper import KBScraper
+        from kb_versioning import read_kb_entries
+
+        self.assertTrue(seed_from_artifact(self.db_file))
+        scraper = KBScraper(db_file=self.db_file)
+        result = scraper.save_to_kb({"about": "CapitalX scraped overview", "stats": "10,000 investors"})
+        self.assertEqual((result["updated"], result["inserted"], result["deleted"]), (1, 1, 0))
+
+        conn = sqlite3.connect(self.db_file)
+        try:
+            rows = read_kb_entries(conn)
+        finally:
+            conn.close()
+        by_key = {(row[0], row[1], row[3]): row for row in rows}
+        self.assertEqual(len(rows), len(self.artifact.entries) + 1)
+        for entry in self.artifact.entries:
+            self.assertIn((entry[0], entry[1], entry[3]), by_key)
+        self.assertEqual(by_key[("Platform Overview", "about", "About CapitalX")][4], "CapitalX scraped overview")
+        self.assertTrue(any(row[1].startswith(DOC_SUBCATEGORY_PREFIX) for row in rows))
+
+    def test_refresh_recompiles_only_changed_kb(self):
+        """Test that the artifact is rewritten after a refresh only when the KB changed."""
+        import kb
+        import kb_scraper
+
+        seed_from_artifact(self.db_file)
+
+        def changed_refresh(progress=None):
+            return bool(kb_scraper.KBScraper(db_file=self.db_file).save_to_kb({"stats": "10,000 investors"}))
+
+        with patch.object(kb, 'DB_FILE', self.db_file), \
+                patch.object(kb_artifact, 'compile_from_db') as compile_from_db, \
+                patch.object(spell_correction, 'rebuild_spelling_index') as rebuild_spelling_index:
+            with patch.object(kb_scraper, 'update_knowledge_base', return_value=True):
+                self.assertTrue(kb.refresh_knowledge_base())
+            compile_from_db.assert_not_called()
+            rebuild_spelling_index.assert_not_called()
+            with patch.object(kb_scraper, 'update_knowledge_base', side_effect=changed_refresh):
+                self.assertTrue(kb.refresh_knowledge_base())
+            compile_from_db.assert_called_once_with()
+            rebuild_spelling_index.assert_called_once_with()
+
+if __name__ == '__main__':
+    unittest.main()
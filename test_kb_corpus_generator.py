@@ -0,0 +1,77 @@
+"""
+Test file for the synthetic KB corpus generator and search scaling benchmark
+"""
+
+import unittest
+import sqlite3
+import tempfile
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import kb
+from search_config import KEYWORD_MAPPING
+from kb_corpus_generator import generate_corpus, build_corpus_db
+from benchmark_search_scaling import run_benchmark, scaling_slope, use_database, format_report
+
+class TestCorpusGenerator(unittest.TestCase):
+    def test_same_seed_same_corpus(self):
+        """Test that generation is deterministic per seed."""
+        self.assertEqual(generate_corpus(50, seed=7), generate_corpus(50, seed=7))
+        self.assertNotEqual(generate_corpus(50, seed=7), generate_corpus(50, seed=8))
+
+    def test_entries_use_configured_categories(self):
+        """Test that entries use real category/subcategory pairs and unique titles."""
+        corpus = generate_corpus(300)
+        targets = set(KEYWORD_MAPPING.values())
+        for category, subcategory, keywords, title, content, url in corpus:
+            self.assertIn((category, subcategory), targets)
+            self.assertTrue(keywords)
+            self.assertIn(title, content)
+        self.assertEqual(len({entry[3] for entry in corpus}), len(corpus))
+
+    def test_popularity_is_skewed(self):
+        """Test that a few subcategories dominate, like real query traffic."""
+        corpus = generate_corpus(1000)
+        counts = sorted((sum(1 for entry in corpus if entry[1] == sub) for sub in {e[1] for e in corpus}),
+                        reverse=True)
+        self.assertGreater(counts[0], 5 * counts[-1])
+
+    def test_build_corpus_db(self):
+        """Test that a corpus database is written through the KB sync path."""
+        with tempfile.TemporaryDirectory() as tmp:
+            db_file = os.path.join(tmp, "kb.db")
+            result = build_corpus_db(db_file, 100)
+            self.assertEqual(result["inserted"], 100)
+            conn = sqlite3.connect(db_file)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM kb_enhanced").fetchone()[0], 100)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM kb_docs").fetchone()[0], 100)
+            conn.close()
+
+class TestScalingBenchmark(unittest.TestCase):
+    def test_scaling_slope(self):
+        """Test the log-log slope fit."""
+        self.assertAlmostEqual(scaling_slope([10, 100, 1000], [1, 10, 100]), 1.0)
+        self.assertAlmostEqual(scaling_slope([10, 100, 1000], [5, 5, 5]), 0.0)
+        self.assertIsNone(scaling_slope([10], [1]))
+
+    def test_use_database_restores_db_file(self):
+        """Test that the benchmark leaves the modules pointing at the original database."""
+        original = kb.DB_FILE
+        with use_database("other.db"):
+            self.assertEqual(kb.DB_FILE, "other.db")
+        self.assertEqual(kb.DB_FILE, original)
+
+    def test_small_benchmark_run(self):
+        """Test an end-to-end run over two tiny corpora."""
+        with tempfile.TemporaryDirectory() as tmp:
+            report = run_benchmark([20, 60], corpus_dir=tmp, repeat=1)
+        self.assertEqual(report["sizes"], [20, 60])
+        self.assertIn("enhanced.search_kb_enhanced_v2", report["scaling"])
+        self.assertIn("inline_search.complete", report["results"][60])
+        self.assertIn("kb.search_kb", format_report(report))
+
+if __name__ == '__main__':
+    unittest.main()
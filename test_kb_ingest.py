@@ -0,0 +1,127 @@
+"""
+Test file for multi-page knowledge base ingestion
+"""
+
+import unittest
+import sqlite3
+import tempfile
+import sys
+import os
+
+import httpx
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from kb_ingest import parse_page, chunk_paragraphs, infer_category, ingest_site, is_page_entry
+from kb_scraper import KBScraper
+from kb_versioning import sync_kb_entries, read_kb_entries
+from async_crawler import HostRateLimiter
+
+BASE = "https://capitalx-rtn.onrender.com"
+LONG_SENTENCE = "Withdrawals are processed to your wallet once the deposit rule is met. "
+
+PAGES = {
+    "/withdraw/": f"""<html><head><title>Withdraw</title><script>var x = "deposit";</script></head><body>
+        <nav><a href="/">Home</a></nav>
+        <h1>How to withdraw</h1>
+        <p>{LONG_SENTENCE * 20}</p>
+        <ul><li><p>Open your wallet and choose the amount to withdraw.</p></li></ul>
+        <h2>Referral earnings</h2>
+        <p>Invite friends with your referral link and earn R10 for every friend who deposits.</p>
+    </body></html>""",
+    "/faq/": """<html><body><h2>Questions</h2>
+        <p>Contact support by email if your question about CapitalX is not answered here.</p></body></html>""",
+}
+
+def handler(request):
+    body = PAGES.get(request.url.path)
+    if body is None:
+        return httpx.Response(404)
+    return httpx.Response(200, text=body, headers={"Content-Type": "text/html"})
+
+class TestParsePage(unittest.TestCase):
+    def test_sections_chunks_and_categories(self):
+        """Test that a page is split by heading, long sections are chunked and categories inferred."""
+        entries = parse_page(f"{BASE}/withdraw/", PAGES["/withdraw/"])
+        categories = [entry[0] for entry in entries]
+        self.assertGreater(len(entries), 2)
+        self.assertEqual(categories[-1], "Referral Program")
+        self.assertTrue(all(category == "Financial Operations" for category in categories[:-1]))
+        self.assertTrue(all(is_page_entry(entry) for entry in entries))
+        self.assertEqual(len({entry[1] for entry in entries}), len(entries))
+        self.assertIn("How to withdraw (1/", entries[0][3])
+        self.assertIn("withdraw", entries[0][2].split(","))
+
+        text = "\n".join(entry[4] for entry in entries)
+        self.assertEqual(text.count("Open your wallet"), 1)
+        self.assertNotIn("var x", text)
+
+    def test_chunk_limits(self):
+        """Test that chunks respect the size limit and tiny fragments are dropped."""
+        chunks = chunk_paragraphs([LONG_SENTENCE * 30, "ok"], max_chars=300)
+        self.assertTrue(all(len(chunk) <= 300 for chunk in chunks))
+        self.assertEqual(sum(chunk.count("Withdrawals") for chunk in chunks), 30)
+
+    def test_default_category(self):
+        """Test that text without category terms stays in the overview category."""
+        self.assertEqual(infer_category(f"{BASE}/", "Welcome", "Hello there")[0], "Platform Overview")
+
+class TestIngestSite(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_file = os.path.join(self.tmpdir.name, "kb.db")
+        conn = sqlite3.connect(self.db_file)
+        sync_kb_entries(conn, [("Bonuses", "bonus", "bonus", "Bonus Information", "R50 bonus", BASE)])
+        conn.close()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def ingest(self):
+        urls = [f"{BASE}/withdraw/", f"{BASE}/faq/", f"{BASE}/missing/"]
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return ingest_site(urls, workers=2, db_file=self.db_file, client=client,
+                           rate_limiter=HostRateLimiter(rate=0))
+
+    def entries(self):
+        conn = sqlite3.connect(self.db_file)
+        try:
+            return read_kb_entries(conn)
+        finally:
+            conn.close()
+
+    def test_ingest_reports_and_keeps_other_entries(self):
+        """Test that pages are ingested in one sync next to the existing entries."""
+        report = self.ingest()
+        self.assertEqual((report["pages"], report["failed"]), (2, 1))
+        self.assertEqual(report["sync"]["inserted"], report["entries"])
+        self.assertGreater(report["entries_per_second"], 0)
+
+        entries = self.entries()
+        self.assertEqual(entries[0][3], "Bonus Information")
+        self.assertEqual(len(entries), report["entries"] + 1)
+        self.assertIn("Contact & Support", {entry[0] for entry in entries})
+
+        # An identical run writes nothing
+        self.assertEqual(self.ingest()["sync"]["unchanged"], len(entries))
+
+    def test_near_duplicate_variant_skipped(self):
+        """Test that a URL variant serving the same page is not parsed or ingested again."""
+        urls = [f"{BASE}/withdraw/", f"{BASE}/faq/", f"{BASE}/withdraw/?ref=telegram"]
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        report = ingest_site(urls, workers=2, db_file=self.db_file, client=client,
+                             rate_limiter=HostRateLimiter(rate=0))
+        self.assertEqual((report["pages"], report["duplicates"]), (2, 1))
+        self.assertFalse(any("ref=telegram" in entry[5] for entry in self.entries()))
+
+    def test_main_page_refresh_keeps_ingested_entries(self):
+        """Test that the main page scraper doesn't delete ingested page entries."""
+        report = self.ingest()
+        KBScraper(BASE, self.db_file).save_to_kb({"bonus": "New bonus text"})
+        entries = self.entries()
+        self.assertEqual(sum(1 for entry in entries if is_page_entry(entry)), report["entries"])
+        self.assertIn("New bonus text", [entry[4] for entry in entries])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Test file for background knowledge base refreshes
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock, AsyncMock
+import asyncio
+import tempfile
+import threading
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import kb_refresh
+import handlers
+from kb_refresh import KBRefresher, load_refresh_status
+
+class TestKBRefresher(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.status_file = os.path.join(self.tmpdir.name, "kb_refresh_status.json")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_start_returns_immediately_and_reports_progress(self):
+        """Test that the refresh runs in the background with stage reporting."""
+        release = threading.Event()
+
+        def slow_refresh(progress):
+            progress("fetching")
+            release.wait(5)
+            progress("saving")
+            return True
+
+        refresher = KBRefresher(slow_refresh, self.status_file)
+        self.assertTrue(refresher.start("startup"))
+        self.assertTrue(refresher.is_running())
+        self.assertFalse(refresher.start("command"))
+        self.assertEqual(load_refresh_status(self.status_file)["state"], "running")
+
+        release.set()
+        self.assertTrue(refresher.wait(5))
+        status = refresher.get_status()
+        self.assertEqual((status["state"], status["stage"], status["reason"], status["runs"]),
+                         ("succeeded", "saving", "startup", 1))
+        self.assertEqual(load_refresh_status(self.status_file)["state"], "succeeded")
+
+    def test_failure_is_recorded(self):
+        """Test that an exception marks the refresh failed and allows a retry."""
+        def broken_refresh(progress):
+            raise RuntimeError("site down")
+
+        refresher = KBRefresher(broken_refresh, None)
+        refresher.start()
+        self.assertFalse(refresher.wait(5))
+        self.assertEqual(refresher.get_status()["error"], "site down")
+        self.assertTrue(refresher.start())
+        refresher.wait(5)
+        self.assertEqual(refresher.get_status()["runs"], 2)
+
+    def test_global_refresher_writes_only_once_persisted(self):
+        """Test that the shared refresher keeps its status in memory until the bot opts in."""
+        self.assertIsNone(kb_refresh.kb_refresher.status_file)
+        refresher = KBRefresher(lambda progress: True, None)
+        refresher.persist(self.status_file)
+        self.assertEqual(load_refresh_status(self.status_file)["state"], "idle")
+
+class TestRefreshCommand(unittest.TestCase):
+    def test_command_reports_result_without_blocking(self):
+        """Test that /refresh_kb returns at once and a separate task reports the result."""
+        release = threading.Event()
+        refresher = KBRefresher(lambda progress: release.wait(5), None)
+        working_msg = MagicMock(edit_text=AsyncMock())
+        update = MagicMock()
+        update.message.reply_text = AsyncMock(return_value=working_msg)
+        context = MagicMock()
+        tasks = []
+        context.application.create_task.side_effect = lambda coro, update=None: tasks.append(coro)
+
+        async def run():
+            await handlers.refresh_kb_command(update, context)
+            # The handler is done while the refresh is still running
+            self.assertTrue(refresher.is_running())
+            working_msg.edit_text.assert_not_called()
+            release.set()
+            await tasks[0]
+
+        with patch.object(kb_refresh, 'kb_refresher', refresher), \
+             patch.object(handlers, 'log_command'), \
+             patch.object(handlers, 'REFRESH_PROGRESS_INTERVAL', 0.01):
+            asyncio.run(run())
+
+        self.assertIn("updated successfully", working_msg.edit_text.call_args.args[0])
+        self.assertEqual(refresher.get_status()["reason"], "command")
+
+if __name__ == '__main__':
+    unittest.main()
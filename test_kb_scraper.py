@@ -0,0 +1,105 @@
+"""
+Test file for conditional-GET knowledge base refreshes
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+import sqlite3
+import tempfile
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import kb_versioning
+import kb_scraper
+from kb_versioning import invalidate_kb_version
+from kb_scraper import KBScraper
+
+PAGE = b"<html><body><h1>CapitalX</h1></body></html>"
+
+def make_response(status_code=200, body=PAGE, headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.content = body
+    response.text = body.decode()
+    response.headers = headers or {}
+    return response
+
+class TestConditionalRefresh(unittest.TestCase):
+    def setUp(self):
+        """Use a temporary database for the scraper and KB version."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_file = os.path.join(self.tmpdir.name, "kb.db")
+        self.db_patch = patch.object(kb_versioning, 'DB_FILE', self.db_file)
+        self.db_patch.start()
+        invalidate_kb_version()
+        self.scraper = KBScraper(db_file=self.db_file)
+
+    def tearDown(self):
+        self.db_patch.stop()
+        invalidate_kb_version()
+        self.tmpdir.cleanup()
+
+    def refresh(self, response, **kwargs):
+        with patch.object(self.scraper.session, 'get', return_value=response) as get, \
+             patch.object(self.scraper, 'parse_main_page', wraps=self.scraper.parse_main_page) as parse:
+            self.assertTrue(self.scraper.scrape_and_populate(**kwargs))
+        return get.call_args.kwargs["headers"], parse.call_count
+
+    def test_first_refresh_parses_and_stores_validators(self):
+        """Test that the first run fetches unconditionally and records the validators."""
+        headers, parsed = self.refresh(make_response(headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}))
+        self.assertEqual(headers, {})
+        self.assertEqual(parsed, 1)
+        state = self.scraper.load_fetch_state(self.scraper.base_url)
+        self.assertEqual(state["etag"], '"v1"')
+
+    def test_not_modified_skips_parse_and_writes(self):
+        """Test that a 304 sends the validators and leaves the KB untouched."""
+        self.refresh(make_response(headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}))
+        version = kb_versioning.read_kb_version(self.db_file)
+
+        with patch.object(kb_scraper, 'sync_kb_entries') as sync:
+            headers, parsed = self.refresh(make_response(status_code=304, body=b""))
+        self.assertEqual(headers["If-None-Match"], '"v1"')
+        self.assertEqual(headers["If-Modified-Since"], "Mon, 01 Jan 2024 00:00:00 GMT")
+        self.assertEqual(parsed, 0)
+        sync.assert_not_called()
+        self.assertEqual(kb_versioning.read_kb_version(self.db_file), version)
+
+    def test_identical_body_skips_parse(self):
+        """Test that a server without validators still costs one request when nothing changed."""
+        self.refresh(make_response())
+        with patch.object(kb_scraper, 'sync_kb_entries') as sync:
+            _, parsed = self.refresh(make_response())
+        self.assertEqual(parsed, 0)
+        sync.assert_not_called()
+
+    def test_changed_body_is_parsed(self):
+        """Test that a different body is parsed and synced."""
+        self.refresh(make_response())
+        _, parsed = self.refresh(make_response(body=PAGE + b"<p>new</p>"))
+        self.assertEqual(parsed, 1)
+
+    def test_state_ignored_after_kb_cleared(self):
+        """Test that clearing the KB forces the next refresh to repopulate it."""
+        self.refresh(make_response(headers={"ETag": '"v1"'}))
+        self.scraper.clear_existing_kb()
+        headers, parsed = self.refresh(make_response(headers={"ETag": '"v1"'}))
+        self.assertEqual(headers, {})
+        self.assertEqual(parsed, 1)
+        conn = sqlite3.connect(self.db_file)
+        self.assertGreater(conn.execute("SELECT COUNT(*) FROM kb_enhanced").fetchone()[0], 0)
+        conn.close()
+
+    def test_force_refetches(self):
+        """Test that force ignores the stored validators."""
+        self.refresh(make_response(headers={"ETag": '"v1"'}))
+        headers, parsed = self.refresh(make_response(headers={"ETag": '"v1"'}), force=True)
+        self.assertEqual(headers, {})
+        self.assertEqual(parsed, 1)
+
+if __name__ == '__main__':
+    unittest.main()
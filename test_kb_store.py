@@ -0,0 +1,134 @@
+"""
+Test file for the compressed knowledge base store
+"""
+
+import unittest
+from unittest.mock import patch
+import sqlite3
+import tempfile
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import kb_versioning
+import enhanced_keyword_search
+from kb_versioning import sync_kb_entries, invalidate_kb_version
+from kb_store import (
+    KBStore, train_dictionary, compress_body, decompress_body, get_store_stats,
+    FIELD_KEYWORDS, FIELD_TITLE, FIELD_CONTENT
+)
+from search_metrics import SearchMetrics
+
+SHARED = "💡 **Quick Tips:**\n• Minimum amount: R50\n• Processing time: 24-48 hours\nStill having issues? Click 'Contact Support' below.\n"
+ENTRIES = [
+    ("Financial Operations", "deposit", "deposit,money", "Deposit Information", "📥 Deposits by card or EFT.\n" + SHARED, None),
+    ("Financial Operations", "withdrawal", "withdraw,cash out", "Withdrawal Rules", "📤 Withdrawals go to your bank.\n" + SHARED, None),
+    ("Investment", "companies", "shares,companies", "Investment Companies", "Invest in Shoprite and Naspers shares.", None),
+]
+WEIGHTS = {FIELD_KEYWORDS: 3, FIELD_TITLE: 2, FIELD_CONTENT: 1}
+
+class TestCompression(unittest.TestCase):
+    def test_roundtrip_with_trained_dictionary(self):
+        """Test that a dictionary trained on shared text shrinks bodies and round-trips."""
+        bodies = [entry[4] for entry in ENTRIES]
+        dictionary = train_dictionary(bodies)
+        self.assertIn(b"Processing time", dictionary)
+        for body in bodies:
+            blob = compress_body(body, dictionary)
+            self.assertEqual(decompress_body(blob, dictionary), body)
+        self.assertLess(len(compress_body(bodies[0], dictionary)), len(compress_body(bodies[0], b"")))
+
+class TestKBStore(unittest.TestCase):
+    def setUp(self):
+        """Sync sample entries (and so the store) into a temporary database."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_file = os.path.join(self.tmpdir.name, "kb.db")
+        self.db_patch = patch.object(kb_versioning, 'DB_FILE', self.db_file)
+        self.db_patch.start()
+        self.sync(ENTRIES)
+        self.store = KBStore(cache_size=2)
+        self.conn = sqlite3.connect(self.db_file)
+
+    def tearDown(self):
+        self.conn.close()
+        self.db_patch.stop()
+        invalidate_kb_version()
+        self.tmpdir.cleanup()
+
+    def sync(self, entries):
+        conn = sqlite3.connect(self.db_file)
+        try:
+            return sync_kb_entries(conn, entries)
+        finally:
+            conn.close()
+
+    def test_store_is_built_and_smaller(self):
+        """Test that syncing the KB builds the compressed store."""
+        stats = get_store_stats(self.db_file)
+        self.assertEqual(stats["stored_entries"], 3)
+        self.assertLess(stats["compressed_bytes"], stats["raw_bytes"])
+        self.assertTrue(self.store.available(self.conn))
+
+    def test_prefix_term_search(self):
+        """Test that terms match by prefix and rank by field weight."""
+        ranked = self.store.search_terms(self.conn, ["withdr"], WEIGHTS)
+        self.assertEqual(len(ranked), 1)
+        self.assertEqual(self.store.get_entry(self.conn, ranked[0][0])[0], "Withdrawal Rules")
+        # Keyword + title + content beats content-only
+        ranked = self.store.search_terms(self.conn, ["deposit"], WEIGHTS)
+        self.assertEqual(self.store.get_entry(self.conn, ranked[0][0])[0], "Deposit Information")
+        self.assertEqual(self.store.search_terms(self.conn, ["zzz"], WEIGHTS), [])
+
+    def test_punctuated_terms_match_like_path(self):
+        """Test that punctuated query terms find the same entries the LIKE fallback finds."""
+        self.sync(ENTRIES + [
+            ("Financial Operations", "e-wallets", "e-wallet,ewallet", "E-Wallet Deposits",
+             "What's supported? Deposit from any e-wallet.", None),
+        ])
+        self.conn.close()
+        self.conn = sqlite3.connect(self.db_file)
+        fields = ("keywords", "title", "subcategory", "content")
+        for term in ("what's", "e-wallet", "24-48"):
+            expected = {row[0] for row in self.conn.execute(
+                f"SELECT id FROM kb_enhanced WHERE {' OR '.join(f'LOWER({f}) LIKE ?' for f in fields)}",
+                [f"%{term}%"] * len(fields))}
+            ranked = self.store.search_terms(self.conn, [term], {0: 3, 1: 2, 2: 1.5, 3: 1})
+            self.assertTrue(expected, term)
+            self.assertEqual({entry_id for entry_id, _ in ranked}, expected, term)
+
+    def test_body_lru(self):
+        """Test that bodies are decompressed once and served from the LRU afterwards."""
+        entry_id = self.store.find_entry(self.conn, "Investment", "companies")
+        first = self.store.get_entry(self.conn, entry_id)
+        second = self.store.get_entry(self.conn, entry_id)
+        self.assertEqual(first, second)
+        self.assertEqual((self.store.misses, self.store.hits), (1, 1))
+
+    def test_only_changed_rows_are_reencoded(self):
+        """Test that re-syncing rewrites only entries whose hash changed."""
+        from kb_store import sync_kb_store
+        self.assertEqual(sync_kb_store(self.conn)["written"], 0)
+
+        edited = list(ENTRIES)
+        edited[2] = ENTRIES[2][:4] + ("Invest in Sasol shares.", None)
+        self.sync(edited[1:])
+        self.conn.close()
+        self.conn = sqlite3.connect(self.db_file)
+        self.assertEqual(get_store_stats(self.db_file)["stored_entries"], 2)
+        self.assertEqual(self.store.search_terms(self.conn, ["naspers"], WEIGHTS), [])
+        self.assertEqual(len(self.store.search_terms(self.conn, ["sasol"], WEIGHTS)), 1)
+
+    def test_engine_uses_store(self):
+        """Test that the enhanced engine's keyword fallback reads from the store."""
+        engine = enhanced_keyword_search.EnhancedKeywordSearchEngine()
+        metrics = SearchMetrics(slow_threshold_ms=0, metrics_file=None)
+        with patch.object(enhanced_keyword_search, 'DB_FILE', self.db_file), \
+             patch.object(enhanced_keyword_search, 'search_metrics', metrics):
+            result = engine.search_kb_enhanced("naspers")
+        self.assertEqual(result, "Invest in Shoprite and Naspers shares.")
+        self.assertEqual(metrics.slow_queries[0]["hit_stage"], "like_fallback")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+"""
+Test file for knowledge base content hashing and versioning
+"""
+
+import unittest
+from unittest.mock import patch
+import sqlite3
+import tempfile
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import kb_versioning
+from kb_versioning import (
+    sync_kb_entries, ensure_kb_schema, read_kb_version, get_kb_version,
+    invalidate_kb_version, get_kb_status, VersionedCache
+)
+from kb_scraper import KBScraper
+
+ENTRIES = [
+    ("Financial Operations", "deposit", "deposit,money", "Deposit Information", "Minimum deposit is R50", "https://example.com/"),
+    ("Bonuses", "bonus", "bonus,free", "Bonus Information", "R50 registration bonus", "https://example.com/"),
+]
+
+class TestKBVersioning(unittest.TestCase):
+    def setUp(self):
+        """Point the versioning module at a temporary database."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_file = os.path.join(self.tmpdir.name, "kb.db")
+        self.db_patch = patch.object(kb_versioning, 'DB_FILE', self.db_file)
+        self.db_patch.start()
+        invalidate_kb_version()
+
+    def tearDown(self):
+        self.db_patch.stop()
+        invalidate_kb_version()
+        self.tmpdir.cleanup()
+
+    def _sync(self, entries):
+        conn = sqlite3.connect(self.db_file)
+        try:
+            return sync_kb_entries(conn, entries)
+        finally:
+            conn.close()
+
+    def _row_ids(self):
+        conn = sqlite3.connect(self.db_file)
+        try:
+            return dict(conn.execute("SELECT title, id FROM kb_enhanced").fetchall())
+        finally:
+            conn.close()
+
+    def test_identical_sync_does_not_bump_version(self):
+        """Test that re-syncing the same content changes nothing."""
+        first = self._sync(ENTRIES)
+        self.assertEqual((first["inserted"], first["version"], first["changed"]), (2, 1, True))
+        ids = self._row_ids()
+
+        second = self._sync(list(reversed(ENTRIES)))
+        self.assertEqual((second["unchanged"], second["version"], second["changed"]), (2, 1, False))
+        self.assertEqual(self._row_ids(), ids)
+        self.assertEqual(read_kb_version(self.db_file), 1)
+
+    def test_only_live_database_publishes_version(self):
+        """Test that syncing a scratch database leaves the live KB version alone."""
+        self._sync(ENTRIES)
+        self._sync(ENTRIES[:1])
+        self.assertEqual(get_kb_version(), 2)
+
+        conn = sqlite3.connect(os.path.join(self.tmpdir.name, "scratch.db"))
+        try:
+            self.assertEqual(sync_kb_entries(conn, ENTRIES)["version"], 1)
+        finally:
+            conn.close()
+        self.assertEqual(kb_versioning._version_cache.version, 2)
+        self.assertEqual(get_kb_version(), 2)
+
+    def test_changed_and_removed_rows(self):
+        """Test that edits update rows in place and missing rows are deleted."""
+        self._sync(ENTRIES)
+        ids = self._row_ids()
+        edited = [ENTRIES[0][:4] + ("Minimum deposit is R100", ENTRIES[0][5])]
+
+        result = self._sync(edited)
+        self.assertEqual((result["updated"], result["deleted"], result["version"]), (1, 1, 2))
+        self.assertEqual(self._row_ids(), {"Deposit Information": ids["Deposit Information"]})
+        self.assertEqual(get_kb_status(self.db_file)["entries"], 1)
+
+    def test_legacy_table_is_migrated(self):
+        """Test that a pre-versioning kb_enhanced table gets hashes backfilled."""
+        conn = sqlite3.connect(self.db_file)
+        conn.execute("""
+            CREATE TABLE kb_enhanced (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, category TEXT NOT NULL, subcategory TEXT,
+                keywords TEXT, title TEXT NOT NULL, content TEXT NOT NULL, url TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.execute("INSERT INTO kb_enhanced (category, subcategory, keywords, title, content, url) VALUES (?, ?, ?, ?, ?, ?)",
+                     ENTRIES[0])
+        ensure_kb_schema(conn)
+        conn.commit()
+        self.assertIsNotNone(conn.execute("SELECT content_hash FROM kb_enhanced").fetchone()[0])
+        conn.close()
+
+        result = self._sync(ENTRIES[:1])
+        self.assertEqual((result["unchanged"], result["inserted"]), (1, 0))
+
+    def test_rebuild_swaps_shadow_table(self):
+        """Test that a rebuild leaves one indexed kb_enhanced table, in WAL mode."""
+        self._sync(ENTRIES)
+        self._sync(ENTRIES[:1])
+        conn = sqlite3.connect(self.db_file)
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        indexes = [row[1] for row in conn.execute("PRAGMA index_list(kb_enhanced)")]
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        conn.close()
+        self.assertNotIn("kb_enhanced_shadow", tables)
+        self.assertNotIn("kb_enhanced_old", tables)
+        self.assertEqual(len([name for name in indexes if name.startswith("idx_kb_search")]), 1)
+        self.assertEqual(journal_mode, "wal")
+
+    def test_readers_see_old_kb_until_swap(self):
+        """Test that a concurrent reader never observes a half-built or empty KB."""
+        self._sync(ENTRIES)
+        seen = []
+        build = kb_versioning._build_shadow_table
+
+        def build_then_read(conn, rows):
+            build(conn, rows)
+            reader = sqlite3.connect(self.db_file)
+            seen.append(reader.execute("SELECT COUNT(*) FROM kb_enhanced").fetchone()[0])
+            reader.close()
+
+        with patch.object(kb_versioning, '_build_shadow_table', side_effect=build_then_read):
+            self._sync(ENTRIES + [("Investment", "plans", "plans", "Investment Plans", "Tiers from R70", None)])
+        self.assertEqual(seen, [2])
+        self.assertEqual(get_kb_status(self.db_file)["entries"], 3)
+
+    def test_failed_swap_keeps_old_kb(self):
+        """Test that a crash during the swap rolls back to the previous KB and version."""
+        self._sync(ENTRIES)
+
+        def crash_mid_swap(conn):
+            conn.execute("ALTER TABLE kb_enhanced RENAME TO kb_enhanced_old")
+            raise sqlite3.OperationalError("boom")
+
+        with patch.object(kb_versioning, '_swap_in_shadow_table', side_effect=crash_mid_swap):
+            with self.assertRaises(sqlite3.OperationalError):
+                self._sync([])
+        self.assertEqual(get_kb_status(self.db_file)["entries"], 2)
+        self.assertEqual(read_kb_version(self.db_file), 1)
+
+    def test_versioned_cache_invalidation(self):
+        """Test that caches survive identical refreshes and empty on real changes."""
+        cache = VersionedCache(max_size=2)
+        self._sync(ENTRIES)
+        cache.set("deposit", "answer")
+        self._sync(ENTRIES)
+        self.assertEqual(cache.get("deposit"), "answer")
+
+        self._sync(ENTRIES[:1])
+        self.assertEqual(get_kb_version(), 2)
+        self.assertIsNone(cache.get("deposit"))
+
+    def test_versioned_cache_is_bounded(self):
+        """Test that the oldest entry is evicted when the cache is full."""
+        cache = VersionedCache(max_size=2)
+        for key in ["a", "b", "c"]:
+            cache.set(key, key)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("c"), "c")
+
+    def test_scraper_save_is_incremental(self):
+        """Test that the scraper syncs instead of clearing and re-inserting."""
+        scraper = KBScraper(db_file=self.db_file)
+        scraper.setup_kb_tables()
+        data = {"about": "CapitalX is an investment platform", "deposit": "Minimum deposit is R50"}
+        self.assertEqual(scraper.save_to_kb(data)["inserted"], 2)
+        result = scraper.save_to_kb(data)
+        self.assertFalse(result["changed"])
+        self.assertEqual(result["unchanged"], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Test file for SimHash page fingerprints and near-duplicate crawling
+"""
+
+import unittest
+import asyncio
+import random
+import sys
+import os
+
+import httpx
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from page_fingerprint import SimHashIndex, simhash, page_words, page_fingerprint, hamming_distance
+from async_crawler import AsyncCrawler, HostRateLimiter
+
+BASE = "https://capitalx-rtn.onrender.com"
+ARTICLE = ("Withdrawals are processed to your wallet once the deposit rule is met. Minimum withdrawal is R50 "
+           "and requests are approved within one business day. Bonus funds must be invested before they can "
+           "be withdrawn, and referral earnings are paid out together with your real balance. ")
+
+def page(body, links=()):
+    anchors = "".join(f'<a href="{link}">more</a>' for link in links)
+    return (f"<html><head><script>var tracking = 1;</script></head><body><nav>Home Plans Wallet</nav>"
+            f"<main><p>{body}</p>{anchors}</main><footer>CapitalX 2024</footer></body></html>")
+
+SITE = {
+    "/": page("Invest in shares with CapitalX. " * 10, ["/withdraw/", "/withdraw/?utm_source=tg", "/plans/"]),
+    "/withdraw/": page(ARTICLE * 4, ["/withdraw/history/"]),
+    "/plans/": page("Tier 1 plans start at R70 and return R112 after the plan duration. " * 6),
+    "/withdraw/history/": page("Your past withdrawals and their status are listed here for each month. " * 4),
+}
+
+def handler(request):
+    body = SITE.get(request.url.path)
+    if body is None:
+        return httpx.Response(404)
+    if request.url.query:
+        # Tracking variants render a timestamp, so they are near, not exact, duplicates
+        body = body.replace("</main>", "<p>Rendered at 12:00</p></main>")
+    return httpx.Response(200, text=body, headers={"Content-Type": "text/html"})
+
+class TestSimHash(unittest.TestCase):
+    def test_boilerplate_removed(self):
+        """Test that scripts and navigation chrome don't count as page text."""
+        words = page_words(page("Hello &amp; welcome"))
+        self.assertEqual(words, ["hello", "welcome"])
+
+    def test_near_and_far(self):
+        """Test that a small edit moves the fingerprint a few bits and other text moves it far."""
+        words = page_words(page(ARTICLE * 2))
+        edited = list(words)
+        edited[5] = "changed"
+        self.assertLessEqual(hamming_distance(simhash(words), simhash(edited)), 3)
+        self.assertGreater(hamming_distance(simhash(words), page_fingerprint(SITE["/plans/"])), 10)
+        self.assertIsNone(page_fingerprint(page("Too short")))
+
+    def test_index_finds_within_distance(self):
+        """Test that banded lookup finds every fingerprint within the distance and nothing beyond."""
+        rng = random.Random(7)
+        index = SimHashIndex(max_distance=3)
+        stored = [rng.getrandbits(64) for _ in range(500)]
+        for position, fingerprint in enumerate(stored):
+            index.add(fingerprint, position)
+        near = stored[42] ^ (1 << 3) ^ (1 << 40) ^ (1 << 63)
+        self.assertEqual(index.find(near), 42)
+        self.assertIsNone(index.find(near ^ (1 << 20) ^ (1 << 30)))
+        self.assertLess(index.comparisons, 20)
+
+class TestCrawlerDedupe(unittest.TestCase):
+    def crawl(self, **kwargs):
+        crawler = AsyncCrawler(f"{BASE}/", max_depth=3, rate_limiter=HostRateLimiter(rate=0), **kwargs)
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return crawler, asyncio.run(crawler.crawl(client))
+
+    def test_variant_skipped(self):
+        """Test that a tracking-parameter variant is dropped and its links aren't parsed again."""
+        crawler, urls = self.crawl()
+        self.assertNotIn(f"{BASE}/withdraw/?utm_source=tg", urls)
+        self.assertIn(f"{BASE}/withdraw/history/", urls)
+        self.assertEqual(len(crawler.duplicates), 1)
+
+        crawler, urls = self.crawl(dedupe=False)
+        self.assertIn(f"{BASE}/withdraw/?utm_source=tg", urls)
+        self.assertEqual(crawler.duplicates, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+"""
+Test file for query outcome analytics
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock, AsyncMock
+import asyncio
+import tempfile
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from search_metrics import SearchMetrics
+from query_analytics import (
+    CountMinSketch, HeavyHitters, QueryAnalytics, normalize_query,
+    load_query_analytics, suggest_config_additions, format_config_suggestions, format_query_analytics,
+    query_analytics
+)
+
+class TestSketches(unittest.TestCase):
+    def test_count_min_never_undercounts(self):
+        """Test that estimates are at least the true count even with collisions."""
+        sketch = CountMinSketch(width=8, depth=2)
+        for i in range(50):
+            sketch.add(f"query {i}")
+        for _ in range(5):
+            sketch.add("deposit")
+        self.assertGreaterEqual(sketch.estimate("deposit"), 6)
+        self.assertGreaterEqual(sketch.estimate("query 3"), 1)
+
+    def test_heavy_hitters_keeps_frequent_items(self):
+        """Test that frequent items survive a stream of one-off items."""
+        hitters = HeavyHitters(k=3)
+        for i in range(200):
+            hitters.add(f"rare {i}")
+            if i % 4 == 0:
+                hitters.add("withdraw")
+            if i % 10 == 0:
+                hitters.add("bonus")
+        top = [item for item, _ in hitters.most_common(2)]
+        self.assertEqual(top, ["withdraw", "bonus"])
+        self.assertEqual(len(hitters.top), 3)
+
+    def test_normalize_query(self):
+        """Test punctuation and whitespace normalization."""
+        self.assertEqual(normalize_query("  How do I   Deposit?! "), "how do i deposit")
+
+class TestQueryAnalytics(unittest.TestCase):
+    def setUp(self):
+        """Wire an analytics instance to a private metrics stream."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.analytics_file = os.path.join(self.tmpdir.name, "analytics.json")
+        self.metrics = SearchMetrics(metrics_file=None)
+        self.analytics = QueryAnalytics(top_k=10, analytics_file=self.analytics_file, flush_interval=3600)
+        self.metrics.add_listener(self.analytics.on_trace)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _search(self, engine, query, hit_stage=None, confidence=None):
+        with self.metrics.trace(engine, query) as trace:
+            if hit_stage:
+                trace.record_outcome(hit_stage, confidence)
+
+    def test_miss_and_hit_outcomes(self):
+        """Test that sessions record the first engine that answered, or a miss."""
+        with self.analytics.session("Depost money?") as session:
+            self._search("enhanced_v2", "depost money")
+            self._search("kb_fallback", "depost money")
+            session.mark_corrected("deposit money")
+            self._search("enhanced_v2", "deposit money", "match_lookup", 0.9)
+        for _ in range(2):
+            with self.analytics.session("crypto staking"):
+                self._search("enhanced_v2", "crypto staking")
+                self._search("kb_fallback", "crypto staking")
+
+        snapshot = self.analytics.snapshot()
+        self.assertEqual(snapshot["total_queries"], 3)
+        self.assertEqual(snapshot["missed_queries"], 2)
+        self.assertEqual(snapshot["corrected_queries"], 1)
+        self.assertEqual(snapshot["outcomes"], {"miss": 2, "enhanced_v2.match_lookup": 1})
+        self.assertEqual(snapshot["top_missed"], [{"query": "crypto staking", "count": 2}])
+
+    def test_low_confidence_and_handler_rules(self):
+        """Test fallback answers are low confidence and rule answers are not misses."""
+        with self.analytics.session("tell me about shoprite"):
+            self._search("enhanced_v2", "tell me about shoprite", "like_fallback", 3)
+        with self.analytics.session("cant deposit") as session:
+            self._search("enhanced_v2", "cant deposit")
+            session.mark_handled("deposit_rule")
+
+        snapshot = self.analytics.snapshot()
+        self.assertEqual(snapshot["missed_queries"], 0)
+        self.assertEqual(snapshot["top_low_confidence"][0]["query"], "tell me about shoprite")
+        self.assertEqual(snapshot["outcomes"]["handler_rules.deposit_rule"], 1)
+
+    def test_registered_message_handler_records_no_sessions(self):
+        """Test that chat answered by topic rules, without a KB search, is not counted as a miss."""
+        import beginner_handlers
+
+        async def send(text):
+            update = MagicMock()
+            update.effective_user = None
+            update.effective_chat.type = "private"
+            update.message.text = text
+            update.message.reply_text = AsyncMock()
+            await beginner_handlers.handle_message(update, MagicMock())
+
+        with patch.object(query_analytics, 'record_session') as record_session, \
+                patch.object(beginner_handlers, 'suggest_correction', return_value=None):
+            asyncio.run(send("hello there"))
+            asyncio.run(send("ok thanks"))
+
+        record_session.assert_not_called()
+
+    def test_global_instance_writes_only_once_persisted(self):
+        """Test that importing the module does not write analytics into the working directory."""
+        self.assertIsNone(query_analytics.analytics_file)
+        analytics = QueryAnalytics(analytics_file=None)
+        self.assertFalse(analytics.flush())
+        with patch('query_analytics.atexit.register') as register:
+            analytics.persist(self.analytics_file)
+        register.assert_called_once_with(analytics.flush)
+        self.assertTrue(analytics.flush())
+
+    def test_traces_outside_session_are_ignored(self):
+        """Test that searches not triggered by a user query are not counted."""
+        self._search("kb_fallback", "about")
+        self.assertEqual(self.analytics.snapshot()["total_queries"], 0)
+
+    def test_flush_and_export(self):
+        """Test that missed queries can be exported as search_config suggestions."""
+        with self.analytics.session("withdrawl crypto wallet"):
+            self._search("enhanced_v2", "withdrawl crypto wallet")
+        self.assertTrue(self.analytics.flush())
+
+        snapshot = load_query_analytics(self.analytics_file)
+        self.assertIn("withdrawl crypto wallet", format_query_analytics(snapshot))
+        suggestions = suggest_config_additions(snapshot)
+        self.assertEqual(suggestions["keyword_mapping"], [("withdrawl crypto wallet", 1)])
+        self.assertEqual(suggestions["synonyms"], {"withdraw": ["withdrawl"]})
+        self.assertIn("'withdraw': ['withdrawl'],", format_config_suggestions(suggestions))
+
+    def test_endpoint_shows_query_text_only_with_token(self):
+        """Test that /metrics/queries hides user messages from requests without METRICS_TOKEN."""
+        import health_check
+
+        with self.analytics.session("my account number is 12345"):
+            pass
+        self.assertTrue(self.analytics.flush())
+        client = health_check.app.test_client()
+
+        with patch.object(health_check, 'load_query_analytics', lambda: load_query_analytics(self.analytics_file)):
+            with patch.object(health_check, 'METRICS_TOKEN', None):
+                open_snapshot = client.get('/metrics/queries').get_json()["query_analytics"]
+            with patch.object(health_check, 'METRICS_TOKEN', "s3cret"):
+                wrong = client.get('/metrics/queries', headers={"Authorization": "Bearer guess"}).get_json()
+                right = client.get('/metrics/queries', headers={"Authorization": "Bearer s3cret"}).get_json()
+
+        self.assertEqual(open_snapshot["missed_queries"], 1)
+        for snapshot in (open_snapshot, wrong["query_analytics"]):
+            self.assertNotIn("12345", str(snapshot))
+        self.assertEqual(right["query_analytics"]["top_missed"][0]["query"], "my account number is 12345")
+
+if __name__ == '__main__':
+    unittest.main()
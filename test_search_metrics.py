@@ -0,0 +1,174 @@
+"""
+Test file for search pipeline instrumentation
+"""
+
+import unittest
+from unittest.mock import patch
+import sqlite3
+import tempfile
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from search_metrics import Histogram, SearchMetrics, load_search_metrics, format_search_metrics, search_metrics
+import enhanced_keyword_search
+from enhanced_keyword_search import EnhancedKeywordSearchEngine
+import inline_search
+from inline_search import InlineSearchIndex, load_kb_entries
+
+class TestHistogram(unittest.TestCase):
+    def test_observe_and_percentiles(self):
+        """Test bucket counts and percentile estimates."""
+        histogram = Histogram(buckets=(1, 10, 100))
+        for value in [0.5, 0.7, 5, 50, 500]:
+            histogram.observe(value)
+
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot["count"], 5)
+        self.assertEqual(snapshot["min_ms"], 0.5)
+        self.assertEqual(snapshot["max_ms"], 500)
+        self.assertEqual(snapshot["buckets"], {"<=1": 2, "<=10": 1, "<=100": 1, ">100": 1})
+        self.assertEqual(histogram.percentile(50), 10)
+        self.assertEqual(histogram.percentile(99), 500)
+
+    def test_empty_histogram(self):
+        """Test an empty histogram has no percentiles."""
+        self.assertIsNone(Histogram().percentile(50))
+
+class TestSearchMetrics(unittest.TestCase):
+    def setUp(self):
+        """Set up a metrics instance that writes to a temporary file."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.metrics_file = os.path.join(self.tmpdir.name, "metrics.json")
+        self.metrics = SearchMetrics(slow_threshold_ms=0, metrics_file=self.metrics_file, flush_interval=3600)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_trace_records_stages_and_slow_queries(self):
+        """Test that traced stages land in histograms and the slow-query log."""
+        with self.metrics.trace("engine", "deposit money") as trace:
+            with trace.stage("preprocess"):
+                pass
+            with trace.stage("lookup"):
+                pass
+            trace.record_outcome("lookup", 0.9)
+
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot["trace_count"], 1)
+        self.assertIn("engine.preprocess", snapshot["histograms"])
+        self.assertIn("engine.lookup", snapshot["histograms"])
+        self.assertIn("engine.total", snapshot["histograms"])
+        self.assertEqual(len(snapshot["slow_queries"]), 1)
+        slow = snapshot["slow_queries"][0]
+        self.assertEqual(slow["query"], "deposit money")
+        self.assertEqual(slow["hit_stage"], "lookup")
+        self.assertEqual([s["stage"] for s in slow["stages"]], ["preprocess", "lookup"])
+
+    def test_fast_queries_not_logged_as_slow(self):
+        """Test that queries under the threshold are not kept in the slow log."""
+        metrics = SearchMetrics(slow_threshold_ms=10_000, metrics_file=None)
+        with metrics.trace("engine", "fast"):
+            pass
+        self.assertEqual(metrics.snapshot()["slow_queries"], [])
+
+    def test_flush_and_load_roundtrip(self):
+        """Test that a flushed snapshot can be loaded and formatted."""
+        with self.metrics.trace("engine", "bonus"):
+            pass
+        self.assertTrue(self.metrics.flush())
+
+        snapshot = load_search_metrics(self.metrics_file)
+        self.assertIsNotNone(snapshot)
+        self.assertEqual(snapshot["trace_count"], 1)
+        self.assertIn("engine.total", format_search_metrics(snapshot))
+
+    def test_load_missing_snapshot(self):
+        """Test loading a snapshot that does not exist."""
+        self.assertIsNone(load_search_metrics(os.path.join(self.tmpdir.name, "missing.json")))
+
+    def test_global_instance_writes_only_once_persisted(self):
+        """Test that the shared instance flushes nowhere until the bot opts in."""
+        metrics = SearchMetrics(metrics_file=None)
+        self.assertFalse(metrics.flush())
+        path = os.path.join(self.tmpdir.name, "bot_metrics.json")
+        with patch('search_metrics.atexit.register') as register:
+            metrics.persist(path)
+            metrics.persist(path)
+        register.assert_called_once_with(metrics.flush)
+        self.assertTrue(metrics.flush())
+        self.assertIsNotNone(load_search_metrics(path))
+        self.assertIsNone(search_metrics.metrics_file)
+
+class TestEngineInstrumentation(unittest.TestCase):
+    def setUp(self):
+        """Create a small knowledge base in a temporary database."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_file = os.path.join(self.tmpdir.name, "kb.db")
+        conn = sqlite3.connect(self.db_file)
+        conn.execute("""
+            CREATE TABLE kb_enhanced (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                category TEXT NOT NULL,
+                subcategory TEXT,
+                keywords TEXT,
+                title TEXT NOT NULL,
+                content TEXT NOT NULL,
+                url TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.execute(
+            "INSERT INTO kb_enhanced (category, subcategory, keywords, title, content) VALUES (?, ?, ?, ?, ?)",
+            ("Financial Operations", "deposit", "deposit,money", "Deposit Information", "Minimum deposit is R50")
+        )
+        conn.commit()
+        conn.close()
+        self.metrics = SearchMetrics(slow_threshold_ms=0, metrics_file=None)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_enhanced_search_records_pipeline_stages(self):
+        """Test that the enhanced engine times each pipeline stage."""
+        engine = EnhancedKeywordSearchEngine()
+        with patch.object(enhanced_keyword_search, 'DB_FILE', self.db_file), \
+             patch.object(enhanced_keyword_search, 'search_metrics', self.metrics):
+            result = engine.search_kb_enhanced("deposit")
+
+        self.assertEqual(result, "Minimum deposit is R50")
+        histograms = self.metrics.snapshot()["histograms"]
+        for stage in ["preprocess", "find_best_matches", "match_lookup", "total"]:
+            self.assertIn(f"enhanced_v2.{stage}", histograms)
+        self.assertEqual(self.metrics.slow_queries[0]["hit_stage"], "match_lookup")
+
+    def test_enhanced_search_miss_times_like_fallback(self):
+        """Test that a miss goes through and records the LIKE fallback stage."""
+        engine = EnhancedKeywordSearchEngine()
+        with patch.object(enhanced_keyword_search, 'DB_FILE', self.db_file), \
+             patch.object(enhanced_keyword_search, 'search_metrics', self.metrics):
+            result = engine.search_kb_enhanced("zzzz qqqq")
+
+        self.assertIsNone(result)
+        self.assertIn("enhanced_v2.like_fallback", self.metrics.snapshot()["histograms"])
+        self.assertIsNone(self.metrics.slow_queries[0]["hit_stage"])
+
+    def test_inline_completion_is_traced(self):
+        """Test that inline autocomplete records its index and prefix-walk stages."""
+        index = InlineSearchIndex(load_kb_entries(self.db_file))
+        with patch.object(inline_search, 'get_inline_index', return_value=index), \
+             patch.object(inline_search, 'search_metrics', self.metrics):
+            entries = inline_search.complete_query("dep")
+            inline_search.complete_query("zzz")
+
+        self.assertEqual(entries[0].title, "Deposit Information")
+        histograms = self.metrics.snapshot()["histograms"]
+        for stage in ["index", "prefix_walk", "total"]:
+            self.assertIn(f"inline.{stage}", histograms)
+        self.assertEqual([q["hit_stage"] for q in self.metrics.slow_queries], ["prefix_walk", None])
+
+if __name__ == '__main__':
+    unittest.main()
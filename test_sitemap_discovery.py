@@ -0,0 +1,116 @@
+"""
+Test file for robots.txt and sitemap based page discovery
+"""
+
+import unittest
+import asyncio
+import gzip
+import sys
+import os
+
+import httpx
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sitemap_discovery import SitemapDiscovery, SitemapStreamParser, parse_lastmod
+from extract_urls import URLExtractor
+
+BASE = "https://capitalx-rtn.onrender.com"
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+ROBOTS = f"""User-agent: *
+Disallow: /private/
+Sitemap: {BASE}/sitemap_index.xml
+"""
+INDEX = f"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex {NS}>
+  <sitemap><loc>{BASE}/sitemap-pages.xml.gz</loc><lastmod>2024-06-01</lastmod></sitemap>
+  <sitemap><loc>{BASE}/sitemap-old.xml</loc><lastmod>2023-01-01</lastmod></sitemap>
+</sitemapindex>"""
+PAGES = f"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset {NS}>
+  <url><loc>{BASE}/faq/</loc><lastmod>2024-05-01T10:00:00+00:00</lastmod></url>
+  <url><loc>{BASE}/plans/</loc><lastmod>2024-05-20</lastmod></url>
+  <url><loc>{BASE}/contact/</loc></url>
+  <url><loc>{BASE}/private/report/</loc></url>
+  <url><loc>{BASE}/admin/users/</loc></url>
+  <url><loc>https://example.com/elsewhere/</loc></url>
+</urlset>"""
+OLD = f"""<urlset {NS}><url><loc>{BASE}/legacy/</loc></url></urlset>"""
+
+class Site:
+    def __init__(self, files):
+        self.files = files
+        self.requests = []
+
+    def handler(self, request):
+        self.requests.append(request.url.path)
+        body = self.files.get(request.url.path)
+        if body is None:
+            return httpx.Response(404)
+        return httpx.Response(200, content=body)
+
+    def discover(self, **kwargs):
+        discovery = SitemapDiscovery(BASE, url_filter=URLExtractor(BASE).is_valid_url, **kwargs)
+        client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        return discovery, asyncio.run(discovery.discover(client))
+
+FILES = {
+    "/robots.txt": ROBOTS.encode(),
+    "/sitemap_index.xml": INDEX.encode(),
+    "/sitemap-pages.xml.gz": gzip.compress(PAGES.encode()),
+    "/sitemap-old.xml": OLD.encode(),
+}
+
+class TestStreamParser(unittest.TestCase):
+    def test_byte_at_a_time(self):
+        """Test that entries are parsed incrementally no matter how the body is chunked."""
+        parser = SitemapStreamParser()
+        data = PAGES.encode()
+        for i in range(len(data)):
+            parser.feed(data[i:i + 1])
+        parser.close()
+        self.assertEqual(len(parser.urls), 6)
+        self.assertEqual(parser.urls[1], (f"{BASE}/plans/", parse_lastmod("2024-05-20")))
+        self.assertIsNone(parser.urls[2][1])
+
+    def test_lastmod_formats(self):
+        """Test that W3C dates with and without time zone parse to the same instant."""
+        self.assertEqual(parse_lastmod("2024-05-01"), parse_lastmod("2024-05-01T02:00:00+02:00"))
+        self.assertEqual(parse_lastmod("2024-05-01T00:00:00Z"), parse_lastmod("2024-05-01"))
+        self.assertIsNone(parse_lastmod("yesterday"))
+
+class TestDiscovery(unittest.TestCase):
+    def test_robots_index_and_filters(self):
+        """Test that sitemaps from robots.txt are followed and disallowed or foreign pages dropped."""
+        site = Site(FILES)
+        discovery, entries = site.discover()
+        urls = [entry.url for entry in entries]
+        self.assertEqual(urls, [f"{BASE}/plans/", f"{BASE}/faq/", f"{BASE}/contact/", f"{BASE}/legacy/"])
+        self.assertEqual(discovery.disallowed, 1)
+        self.assertFalse(discovery.can_fetch(f"{BASE}/private/report/"))
+        self.assertEqual(discovery.requests, 4)
+        self.assertTrue(discovery.found)
+
+    def test_unchanged_sitemap_skipped(self):
+        """Test that a child sitemap whose lastmod did not move is not downloaded again."""
+        site = Site(FILES)
+        first, _ = site.discover()
+        site.requests = []
+        second, entries = site.discover(known_sitemaps=first.sitemap_lastmod)
+        self.assertNotIn("/sitemap-old.xml", site.requests)
+        self.assertNotIn("/sitemap-pages.xml.gz", site.requests)
+        self.assertEqual((second.sitemaps_skipped, entries), (2, []))
+        self.assertTrue(second.found)
+
+    def test_no_sitemap(self):
+        """Test that a site without robots.txt or sitemap reports nothing found."""
+        site = Site({})
+        discovery, entries = site.discover()
+        self.assertEqual(site.requests, ["/robots.txt", "/sitemap.xml"])
+        self.assertFalse(discovery.found)
+        self.assertTrue(discovery.can_fetch(f"{BASE}/anything/"))
+
+if __name__ == '__main__':
+    unittest.main()
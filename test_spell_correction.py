@@ -0,0 +1,133 @@
+"""
+Test file for SymSpell-style spelling correction
+"""
+
+import unittest
+from unittest.mock import patch
+import sqlite3
+import tempfile
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from spell_correction import (
+    SymSpellIndex, edit_distance, collect_config_terms, collect_kb_terms, build_spelling_index
+)
+from utils import format_search_results
+
+class TestEditDistance(unittest.TestCase):
+    def test_edit_distance(self):
+        """Test insertions, deletions, substitutions and transpositions."""
+        self.assertEqual(edit_distance("deposit", "deposit", 2), 0)
+        self.assertEqual(edit_distance("depost", "deposit", 2), 1)
+        self.assertEqual(edit_distance("depsoit", "deposit", 2), 1)
+        self.assertEqual(edit_distance("bonus", "bones", 2), 1)
+        self.assertEqual(edit_distance("abc", "xyz", 2), 3)
+
+class TestSymSpellIndex(unittest.TestCase):
+    def setUp(self):
+        """Build a small index."""
+        self.index = SymSpellIndex().build({
+            "deposit": 10, "withdrawal": 8, "withdraw": 12, "referral": 5, "register": 7, "bonus": 9
+        })
+
+    def test_exact_word(self):
+        """Test that known words are returned unchanged."""
+        suggestion = self.index.lookup("bonus")
+        self.assertEqual(suggestion.term, "bonus")
+        self.assertEqual(suggestion.distance, 0)
+
+    def test_lookup_corrections(self):
+        """Test common typos are corrected."""
+        self.assertEqual(self.index.lookup("depost").term, "deposit")
+        self.assertEqual(self.index.lookup("refferal").term, "referral")
+        self.assertEqual(self.index.lookup("regster").term, "register")
+
+    def test_lookup_prefers_frequent_word_on_tie(self):
+        """Test that frequency breaks ties between equally distant words."""
+        self.assertEqual(self.index.lookup("withdrawl").term, "withdraw")
+
+    def test_lookup_no_match(self):
+        """Test that unrelated words return no suggestion."""
+        self.assertIsNone(self.index.lookup("xylophone"))
+
+    def test_correct_query(self):
+        """Test whole-query correction."""
+        self.assertEqual(self.index.correct_query("how to regster"), "how to register")
+        self.assertEqual(self.index.correct_query("Depost BONUS"), "deposit BONUS")
+        self.assertIsNone(self.index.correct_query("deposit bonus"))
+
+    def test_correct_query_keeps_other_text(self):
+        """Test that amounts, digits and punctuation survive correction."""
+        self.assertEqual(self.index.correct_query("withdrawl r50?"), "withdraw r50?")
+        self.assertEqual(self.index.correct_query("depost R1,000 (bonus)"), "deposit R1,000 (bonus)")
+
+    def test_stale_index_served_during_rebuild(self):
+        """Test that lookups use the previous index instead of waiting for a rebuild."""
+        import spell_correction
+
+        with patch.object(spell_correction, '_spelling_index', self.index), \
+                patch.object(spell_correction, '_spelling_index_version', 1), \
+                patch.object(spell_correction, 'get_kb_version', return_value=2), \
+                patch.object(spell_correction, 'build_spelling_index') as build:
+            with spell_correction._index_lock:
+                self.assertIs(spell_correction.get_spelling_index(), self.index)
+            build.assert_not_called()
+            self.assertIs(spell_correction.get_spelling_index(), build.return_value)
+
+class TestVocabulary(unittest.TestCase):
+    def test_config_terms(self):
+        """Test vocabulary from search_config is collected."""
+        terms = collect_config_terms()
+        self.assertIn("deposit", terms)
+        self.assertIn("withdrawal", terms)
+        self.assertNotIn("the", terms)
+
+    def test_kb_terms_and_index(self):
+        """Test vocabulary from the knowledge base is collected."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_file = os.path.join(tmpdir, "kb.db")
+            conn = sqlite3.connect(db_file)
+            conn.execute("CREATE TABLE kb_enhanced (title TEXT, subcategory TEXT, keywords TEXT, content TEXT)")
+            conn.execute("INSERT INTO kb_enhanced VALUES ('Shoprite Plan', 'plans', 'shoprite,naspers', 'Invest in Naspers')")
+            conn.commit()
+            conn.close()
+
+            terms = collect_kb_terms(db_file)
+            self.assertEqual(terms["naspers"], 2)
+            index = build_spelling_index(db_file)
+            self.assertEqual(index.correct_query("shopryte"), "shoprite")
+
+    def test_missing_kb_table(self):
+        """Test that a database without a KB yields no terms instead of failing."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self.assertEqual(len(collect_kb_terms(os.path.join(tmpdir, "empty.db"))), 0)
+
+class TestFormatCorrectedResults(unittest.TestCase):
+    def test_format_with_correction(self):
+        """Test that corrected searches say what was actually searched."""
+        response = format_search_results([("Deposit Information", "Financial Operations", "R50 minimum")],
+                                         "depost", "deposit")
+        self.assertIn("Search Results for 'deposit'", response)
+        self.assertIn("No matches for 'depost'", response)
+
+class TestMessageCorrection(unittest.TestCase):
+    def test_registered_message_handler_corrects_topic_words(self):
+        """Test that the live message handler re-reads misspelled messages before giving up."""
+        import beginner_handlers
+
+        with patch.object(beginner_handlers, 'suggest_correction', return_value="withdraw funds") as suggest:
+            self.assertEqual(beginner_handlers.classify_message("withdrw funds"), ("withdrawal", "withdraw funds"))
+        suggest.assert_called_once_with("withdrw funds")
+
+        with patch.object(beginner_handlers, 'suggest_correction') as suggest:
+            self.assertEqual(beginner_handlers.classify_message("bonus please"), ("bonus", None))
+        suggest.assert_not_called()
+
+        with patch.object(beginner_handlers, 'suggest_correction', return_value=None):
+            self.assertEqual(beginner_handlers.classify_message("zzz"), (None, None))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Test file for the canonical URL registry
+"""
+
+import unittest
+from unittest.mock import patch
+import tempfile
+import shutil
+import time
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import client_bot
+from url_registry import (URLRegistry, CLIENT_PAGES, canonicalize, export_url_tables, update_registry,
+                          render_js_url_table)
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+class TestCanonicalize(unittest.TestCase):
+    def test_same_page_same_url(self):
+        """Test that spelling variants of one page canonicalize identically."""
+        variants = [
+            "https://capitalx-rtn.onrender.com",
+            "HTTPS://CapitalX-RTN.onrender.com:443/#top",
+            "https://capitalx-rtn.onrender.com/\\n📧",
+            "https://capitalx-rtn.onrender.com/.",
+            "/",
+        ]
+        self.assertEqual({canonicalize(url) for url in variants}, {"https://capitalx-rtn.onrender.com/"})
+
+    def test_query_sorted_and_invalid_rejected(self):
+        """Test that query order is normalized and non-http URLs are rejected."""
+        self.assertEqual(canonicalize("https://h.com/p?b=2&a=1"), "https://h.com/p?a=1&b=2")
+        self.assertEqual(canonicalize("register/"), "https://capitalx-rtn.onrender.com/register/")
+        self.assertIsNone(canonicalize("mailto:support@capitalx.com"))
+        self.assertIsNone(canonicalize(""))
+
+class TestURLRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_file = os.path.join(self.tmpdir.name, "registry.db")
+        self.registry = URLRegistry(self.db_file)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_dedupe_filter_and_persist(self):
+        """Test that only new client URLs are stored and they survive a restart."""
+        added = self.registry.scan_text(
+            "Visit https://capitalx-rtn.onrender.com/register/\\n2. or https://capitalx-rtn.onrender.com/register/#x, "
+            "https://capitalx-rtn.onrender.com/admin/users and https://t.me/BotFather", "text")
+        self.assertEqual(added, 1)
+        self.assertEqual(self.registry.add_urls(["/register/", "/wallet/"], "crawl"), 1)
+
+        reopened = URLRegistry(self.db_file)
+        self.assertEqual(reopened.urls(), ["https://capitalx-rtn.onrender.com/register/",
+                                           "https://capitalx-rtn.onrender.com/wallet/"])
+        self.assertEqual(reopened.get_entry("/register/")["source"], "text")
+        reopened.mark_checked(["https://capitalx-rtn.onrender.com/wallet/"], 200)
+        self.assertEqual(reopened.get_entry("/wallet/")["http_status"], 200)
+
+    def test_unchanged_file_not_rescanned(self):
+        """Test that a file is only scanned again after it changes."""
+        path = os.path.join(self.tmpdir.name, "notes.md")
+        with open(path, "w") as f:
+            f.write("See https://capitalx-rtn.onrender.com/faq/\n")
+        self.assertEqual(self.registry.scan_file(path), 1)
+
+        with patch.object(self.registry, 'scan_text') as scan_text:
+            self.registry.scan_file(path)
+        scan_text.assert_not_called()
+
+        with open(path, "a") as f:
+            f.write("And https://capitalx-rtn.onrender.com/contact/\n")
+        os.utime(path, (time.time() + 5, time.time() + 5))
+        self.assertEqual(self.registry.scan_file(path), 1)
+
+    def test_named_pages_keep_order(self):
+        """Test that named pages come back in CLIENT_PAGES order even if seen earlier."""
+        self.registry.add_urls(["/wallet/"], "crawl")
+        update_registry(self.registry, files=[])
+        self.assertEqual(list(self.registry.named_urls()), list(CLIENT_PAGES))
+
+class TestExport(unittest.TestCase):
+    def test_tables_match_bots(self):
+        """Test that exporting the registry reproduces the tables in both bots."""
+        with tempfile.TemporaryDirectory() as tmp:
+            registry = URLRegistry(os.path.join(tmp, "registry.db"))
+            update_registry(registry, files=[])
+            named = registry.named_urls()
+            self.assertEqual(named, client_bot.CAPITALX_URLS)
+
+            client_copy = shutil.copy(os.path.join(ROOT, "client_bot.py"), tmp)
+            js_copy = shutil.copy(os.path.join(ROOT, "capitalx-bot.js"), tmp)
+            self.assertEqual(export_url_tables(named, client_copy, js_copy), [])
+
+            named["faq"] = "https://capitalx-rtn.onrender.com/faq/"
+            self.assertEqual(export_url_tables(named, client_copy, js_copy), [client_copy, js_copy])
+            with open(js_copy) as f:
+                self.assertIn("\n".join(render_js_url_table(named)), f.read())
+
+if __name__ == '__main__':
+    unittest.main()
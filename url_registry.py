@@ -0,0 +1,526 @@
+"""
+URL Registry Module
+One canonical, deduplicated list of client-facing CapitalX URLs.
+
+Every discovery source (named client pages, URLs mentioned in project files, KB entry
+URLs and the site crawler) feeds the same pipeline: canonicalize, filter out admin and
+external pages, dedupe against an in-memory set and write only what is new to SQLite.
+Project files are only re-scanned when their size or mtime changed.
+
+The registry is also the source of the hardcoded URL tables: export_url_tables()
+regenerates the CAPITALX_URLS map in client_bot.py and this.urls in capitalx-bot.js,
+and export_url_lists() writes capitalx_urls.txt and CAPITALX_URLS.md.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Set, Any
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+
+logger = logging.getLogger(__name__)
+DB_FILE = "telegram_bot.db"
+
+BASE_URL = "https://capitalx-rtn.onrender.com/"
+
+# Named pages linked from the bots, in display order
+CLIENT_PAGES = {
+    "home": "/",
+    "register": "/register/",
+    "login": "/login/",
+    "dashboard": "/dashboard/",
+    "wallet": "/wallet/",
+    "deposit": "/deposit/",
+    "withdraw": "/withdraw/",
+    "investment_plans": "/investment-plans/",
+    "tiers": "/tiers/",
+    "referral": "/referral/",
+    "profile": "/profile/",
+    "support": "/support/"
+}
+
+ADMIN_INDICATORS = ['/admin', '/dashboard/admin', '/control', '/manage', '/backend', '/panel', '/settings']
+
+# Project files that mention site URLs
+SOURCE_FILES = ["populate_capitalx_kb.py", "kb_scraper.py", "init_kb.py", "README.md", "capitalx_knowledge_base.md"]
+
+# Generated blocks in the bots are delimited by these markers
+CLIENT_BOT_FILE = "client_bot.py"
+JS_BOT_FILE = "capitalx-bot.js"
+GENERATED_BEGIN = "BEGIN GENERATED URL TABLE (url_registry.py)"
+GENERATED_END = "END GENERATED URL TABLE"
+
+TEXT_EXPORT_FILE = "capitalx_urls.txt"
+MARKDOWN_EXPORT_FILE = "CAPITALX_URLS.md"
+
+# Stops at whitespace, quotes, brackets and escape sequences such as a literal \n
+URL_PATTERN = re.compile(r"https?://[^\s\"'<>()\[\]{}\\`]+")
+TRAILING_PUNCTUATION = ".,;:!?*"
+
+
+def canonicalize(url: str, base_url: str = BASE_URL) -> Optional[str]:
+    """
+    Canonical form of a URL, so the same page is only stored once.
+
+    Relative URLs are resolved against base_url; the scheme and host are lowercased,
+    default ports, fragments and trailing punctuation dropped, an empty path becomes
+    "/" and query parameters are sorted.
+
+    Returns:
+        The canonical URL, or None if it is not an http(s) URL
+    """
+    url = (url or "").strip()
+    match = URL_PATTERN.match(url) if url.lower().startswith(("http://", "https://")) else None
+    if match:
+        url = match.group(0)
+    elif url:
+        url = urljoin(base_url, url.split()[0])
+    url = url.rstrip(TRAILING_PUNCTUATION)
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https") or not parts.hostname:
+        return None
+    host = parts.hostname
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def is_admin_url(url: str) -> bool:
+    """Check if a URL is an admin page."""
+    path = urlsplit(url).path.lower()
+    return any(indicator in path for indicator in ADMIN_INDICATORS)
+
+
+def is_client_url(url: str, base_url: str = BASE_URL) -> bool:
+    """Whether a canonical URL is a non-admin page on the CapitalX site."""
+    return urlsplit(url).netloc == urlsplit(base_url).netloc and not is_admin_url(url)
+
+
+def find_urls(text: str) -> List[str]:
+    """All absolute URLs mentioned in a piece of text."""
+    return URL_PATTERN.findall(text)
+
+
+def ensure_registry_schema(conn: sqlite3.Connection) -> None:
+    """Create the registry tables if they don't exist."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS url_registry (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT NOT NULL UNIQUE,
+            name TEXT UNIQUE,
+            name_position INTEGER,
+            source TEXT NOT NULL,
+            first_seen REAL NOT NULL,
+            last_seen REAL NOT NULL,
+            last_checked REAL,
+            http_status INTEGER,
+            lastmod REAL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS url_registry_sources (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime REAL NOT NULL,
+            scanned_at REAL NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS url_registry_sitemaps (
+            url TEXT PRIMARY KEY,
+            lastmod REAL,
+            read_at REAL NOT NULL
+        )
+    """)
+    # Registries created before sitemap discovery
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(url_registry)")}
+    if "lastmod" not in columns:
+        conn.execute("ALTER TABLE url_registry ADD COLUMN lastmod REAL")
+
+
+class URLRegistry:
+    """Canonical client URLs persisted in SQLite, with a set index for deduplication."""
+
+    def __init__(self, db_file: Optional[str] = None, base_url: str = BASE_URL):
+        """
+        Args:
+            db_file: Database file; defaults to the bot database
+            base_url: Site whose pages are kept; relative URLs resolve against it
+        """
+        self.db_file = db_file or DB_FILE
+        self.base_url = base_url
+        self._known: Optional[Set[str]] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_file)
+        ensure_registry_schema(conn)
+        return conn
+
+    def _index(self, conn: sqlite3.Connection) -> Set[str]:
+        if self._known is None:
+            self._known = {row[0] for row in conn.execute("SELECT url FROM url_registry")}
+        return self._known
+
+    def add_urls(self, urls: Iterable[str], source: str) -> int:
+        """
+        Canonicalize, filter and store URLs; already known ones only get last_seen bumped.
+
+        Args:
+            urls: Raw URLs, absolute or relative to the base URL
+            source: Where they came from, e.g. "crawl" or "file:README.md"
+
+        Returns:
+            Number of URLs that were new
+        """
+        canonical = set()
+        for url in urls:
+            url = canonicalize(url, self.base_url)
+            if url and is_client_url(url, self.base_url):
+                canonical.add(url)
+        if not canonical:
+            return 0
+
+        now = time.time()
+        conn = self._connect()
+        try:
+            known = self._index(conn)
+            new = sorted(canonical - known)
+            conn.executemany("""
+                INSERT OR IGNORE INTO url_registry (url, source, first_seen, last_seen) VALUES (?, ?, ?, ?)
+            """, [(url, source, now, now) for url in new])
+            conn.executemany("UPDATE url_registry SET last_seen = ? WHERE url = ?",
+                             [(now, url) for url in canonical & known])
+            conn.commit()
+            known.update(new)
+        finally:
+            conn.close()
+        if new:
+            logger.info(f"Registered {len(new)} new URLs from {source}")
+        return len(new)
+
+    def add_named(self, pages: Dict[str, str], source: str = "client_pages") -> None:
+        """Register named pages (name -> URL or path), keeping their order."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            known = self._index(conn)
+            for position, (name, page) in enumerate(pages.items()):
+                url = canonicalize(page, self.base_url)
+                if not url:
+                    logger.warning(f"Ignoring invalid URL for {name}: {page}")
+                    continue
+                # A name moves to the new URL if the page was renamed
+                conn.execute("UPDATE url_registry SET name = NULL, name_position = NULL WHERE name = ? AND url != ?",
+                             (name, url))
+                conn.execute("""
+                    INSERT INTO url_registry (url, name, name_position, source, first_seen, last_seen)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (url) DO UPDATE SET name = excluded.name, name_position = excluded.name_position,
+                        last_seen = excluded.last_seen
+                """, (url, name, position, source, now, now))
+                known.add(url)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def scan_text(self, text: str, source: str) -> int:
+        """Register every site URL mentioned in text; returns how many were new."""
+        return self.add_urls(find_urls(text), source)
+
+    def scan_file(self, path: str) -> int:
+        """
+        Register the URLs mentioned in a file, unless it is unchanged since the last scan.
+
+        Returns:
+            Number of new URLs
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            logger.warning(f"URL source file not found: {path}")
+            return 0
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT size, mtime FROM url_registry_sources WHERE path = ?", (path,)).fetchone()
+        finally:
+            conn.close()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime:
+            return 0
+
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            added = self.scan_text(f.read(), f"file:{os.path.basename(path)}")
+        conn = self._connect()
+        try:
+            conn.execute("""
+                INSERT OR REPLACE INTO url_registry_sources (path, size, mtime, scanned_at) VALUES (?, ?, ?, ?)
+            """, (path, stat.st_size, stat.st_mtime, time.time()))
+            conn.commit()
+        finally:
+            conn.close()
+        return added
+
+    def scan_knowledge_base(self, db_file: Optional[str] = None) -> int:
+        """Register the URLs of knowledge base entries."""
+        try:
+            conn = sqlite3.connect(db_file or self.db_file)
+            try:
+                urls = [row[0] for row in conn.execute(
+                    "SELECT DISTINCT url FROM kb_enhanced WHERE url IS NOT NULL AND url != ''")]
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read knowledge base URLs: {e}")
+            return 0
+        return self.add_urls(urls, "kb")
+
+    def crawl(self, max_depth: int = 3, state=None) -> int:
+        """
+        Discover the site's pages (sitemaps first, link crawl as fallback) and register them.
+
+        Args:
+            max_depth: Crawl depth when the site has no sitemap
+            state: Optional CrawlStateStore so an interrupted crawl resumes
+
+        Returns:
+            Number of new URLs
+        """
+        # Imported lazily: extract_urls imports this module
+        from extract_urls import URLExtractor
+        extractor = URLExtractor(self.base_url, state=state)
+        urls = extractor.extract_all_urls(max_depth, known_sitemaps=self.sitemap_lastmods())
+        added = self.add_urls(urls, extractor.source)
+        self.record_lastmod(extractor.lastmod)
+        self.record_sitemaps(extractor.sitemap_lastmod)
+        self.mark_checked(extractor.visited_urls)
+        return added
+
+    def record_lastmod(self, lastmods: Dict[str, Optional[float]]) -> None:
+        """Store sitemap lastmod timestamps of registered pages."""
+        rows = [(lastmod, url) for url, lastmod in
+                ((canonicalize(u, self.base_url), lastmod) for u, lastmod in lastmods.items())
+                if url and lastmod is not None]
+        conn = self._connect()
+        try:
+            conn.executemany("UPDATE url_registry SET lastmod = ? WHERE url = ?", rows)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def sitemap_lastmods(self) -> Dict[str, Optional[float]]:
+        """Sitemap URL -> lastmod as of the last discovery run."""
+        conn = self._connect()
+        try:
+            return dict(conn.execute("SELECT url, lastmod FROM url_registry_sitemaps"))
+        finally:
+            conn.close()
+
+    def record_sitemaps(self, lastmods: Dict[str, Optional[float]]) -> None:
+        """Remember which sitemaps were seen, so unchanged ones are skipped next time."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.executemany("INSERT OR REPLACE INTO url_registry_sitemaps (url, lastmod, read_at) VALUES (?, ?, ?)",
+                             [(url, lastmod, now) for url, lastmod in lastmods.items()])
+            conn.commit()
+        finally:
+            conn.close()
+
+    def mark_checked(self, urls: Iterable[str], http_status: Optional[int] = None) -> None:
+        """Record that pages were just fetched."""
+        now = time.time()
+        rows = [(now, http_status, url) for url in filter(None, (canonicalize(u, self.base_url) for u in urls))]
+        conn = self._connect()
+        try:
+            conn.executemany("UPDATE url_registry SET last_checked = ?, http_status = ? WHERE url = ?", rows)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def urls(self) -> List[str]:
+        """Every registered URL, sorted."""
+        conn = self._connect()
+        try:
+            return [row[0] for row in conn.execute("SELECT url FROM url_registry ORDER BY url")]
+        finally:
+            conn.close()
+
+    def named_urls(self) -> Dict[str, str]:
+        """Named pages in the order they were registered."""
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT name, url FROM url_registry WHERE name IS NOT NULL ORDER BY name_position, id").fetchall()
+        finally:
+            conn.close()
+        return dict(rows)
+
+    def get_entry(self, url: str) -> Optional[Dict[str, Any]]:
+        """Stored row for a URL, or None if it is not registered."""
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        try:
+            row = conn.execute("SELECT * FROM url_registry WHERE url = ?",
+                               (canonicalize(url, self.base_url),)).fetchone()
+        finally:
+            conn.close()
+        return dict(row) if row else None
+
+
+def _camel_case(name: str) -> str:
+    first, *rest = name.split("_")
+    return first + "".join(part.capitalize() for part in rest)
+
+
+def render_python_url_map(named: Dict[str, str]) -> List[str]:
+    """Lines of the CAPITALX_URLS dict in client_bot.py."""
+    items = [f'    "{name}": "{url}"' for name, url in named.items()]
+    return ["CAPITALX_URLS = {"] + [item + "," for item in items[:-1]] + items[-1:] + ["}"]
+
+
+def render_js_url_table(named: Dict[str, str]) -> List[str]:
+    """Lines of the this.urls object in capitalx-bot.js."""
+    items = [f"            {_camel_case(name)}: '{url}'" for name, url in named.items()]
+    return ["        this.urls = {"] + [item + "," for item in items[:-1]] + items[-1:] + ["        };"]
+
+
+def replace_generated_block(text: str, block: List[str]) -> str:
+    """
+    Swap the lines between the generated-table markers for a new block.
+
+    Raises:
+        ValueError: If the markers are missing
+    """
+    lines = text.split("\n")
+    begin = next((i for i, line in enumerate(lines) if GENERATED_BEGIN in line), None)
+    end = next((i for i, line in enumerate(lines) if GENERATED_END in line), None)
+    if begin is None or end is None or end < begin:
+        raise ValueError("Generated URL table markers not found")
+    return "\n".join(lines[:begin + 1] + block + lines[end:])
+
+
+def _rewrite(path: str, block: List[str]) -> bool:
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    updated = replace_generated_block(text, block)
+    if updated == text:
+        return False
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(updated)
+    logger.info(f"Regenerated URL table in {path}")
+    return True
+
+
+def export_url_tables(named: Dict[str, str], client_bot_file: str = CLIENT_BOT_FILE,
+                      js_bot_file: str = JS_BOT_FILE) -> List[str]:
+    """
+    Regenerate the URL tables in the Python and JavaScript bots.
+
+    Returns:
+        Files that changed
+    """
+    changed = []
+    if _rewrite(client_bot_file, render_python_url_map(named)):
+        changed.append(client_bot_file)
+    if _rewrite(js_bot_file, render_js_url_table(named)):
+        changed.append(js_bot_file)
+    return changed
+
+
+def export_url_lists(urls: List[str], text_file: str = TEXT_EXPORT_FILE,
+                     markdown_file: str = MARKDOWN_EXPORT_FILE) -> None:
+    """Write the plain text list and the markdown report of client URLs."""
+    generated = time.strftime('%Y-%m-%d %H:%M:%S')
+    with open(text_file, 'w', encoding='utf-8') as f:
+        f.write("# CapitalX Website URLs (Non-Admin Pages)\n")
+        f.write(f"# Generated by url_registry.py on {generated}\n")
+        f.write(f"# Total URLs: {len(urls)}\n\n")
+        for url in urls:
+            f.write(f"{url}\n")
+
+    # Group URLs by path depth
+    grouped: Dict[int, List[str]] = {}
+    for url in urls:
+        path_parts = urlsplit(url).path.strip('/').split('/')
+        depth = len(path_parts) if path_parts != [''] else 0
+        grouped.setdefault(depth, []).append(url)
+
+    with open(markdown_file, 'w', encoding='utf-8') as f:
+        f.write("# CapitalX Website URLs\n\n")
+        f.write("This document contains all non-admin page URLs from the CapitalX website.\n\n")
+        f.write(f"**Generated:** {generated}\n")
+        f.write(f"**Total URLs Found:** {len(urls)}\n\n")
+        f.write("## URL List\n\n")
+        for depth in sorted(grouped):
+            f.write(f"### Level {depth} Pages\n\n")
+            for url in sorted(grouped[depth]):
+                f.write(f"- [{url}]({url})\n")
+            f.write("\n")
+    logger.info(f"Exported {len(urls)} URLs to {text_file} and {markdown_file}")
+
+
+def update_registry(registry: "URLRegistry", crawl: bool = False, max_depth: int = 3,
+                    files: Iterable[str] = SOURCE_FILES, state=None) -> Dict[str, int]:
+    """
+    Run every discovery source through the registry.
+
+    Args:
+        registry: Registry to update
+        crawl: Also crawl the live site
+        max_depth: Crawl depth
+        files: Project files to scan for URLs
+        state: Optional CrawlStateStore for the crawl
+
+    Returns:
+        Number of new URLs per source
+    """
+    registry.add_named(CLIENT_PAGES)
+    added = {"files": sum(registry.scan_file(path) for path in files),
+             "kb": registry.scan_knowledge_base()}
+    if crawl:
+        added["crawl"] = registry.crawl(max_depth, state)
+    return added
+
+
+# Global registry backed by the bot database
+url_registry = URLRegistry()
+
+
+def get_client_urls() -> List[str]:
+    """Every registered client URL."""
+    return url_registry.urls()
+
+
+def main():
+    """Update the registry and regenerate every URL list and table from it."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Discover CapitalX client URLs and export the URL tables")
+    parser.add_argument("--crawl", action="store_true", help="Also crawl the live site")
+    parser.add_argument("--depth", type=int, default=3, help="Crawl depth")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    state = None
+    if args.crawl:
+        from crawl_state import CrawlStateStore
+        state = CrawlStateStore(BASE_URL)
+    added = update_registry(url_registry, crawl=args.crawl, max_depth=args.depth, state=state)
+
+    urls = url_registry.urls()
+    export_url_lists(urls)
+    changed = export_url_tables(url_registry.named_urls())
+
+    print("\n✅ URL Registry Updated!")
+    print(f"📊 Total URLs: {len(urls)} ({', '.join(f'{n} new from {s}' for s, n in added.items())})")
+    print("📁 Files Generated:")
+    print(f"   - {TEXT_EXPORT_FILE} (Plain text list)")
+    print(f"   - {MARKDOWN_EXPORT_FILE} (Formatted markdown report)")
+    for path in changed:
+        print(f"   - {path} (URL table regenerated)")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,7 @@ from datetime import datetime
 from typing import Dict, List, Optional, Any
 
 # Import the CapitalX API client
-from capitalx_api import get_user_referral_info as api_get_user_referral_info, get_user_balance as api_get_user_balance
+from capitalx_api import get_async_api_client
 from database import get_db_connection, add_user, log_command
 
 logger = logging.getLogger(__name__)
@@ -33,7 +33,7 @@ def generate_referral_code(chat_id: int) -> str:
         # Fallback to a simple code
         return f"REF{chat_id}"
 
-def get_user_referral_info(chat_id: int) -> Dict[str, Any]:
+async def get_user_referral_info(chat_id: int) -> Dict[str, Any]:
     """
     Get referral information for a user.
     
@@ -45,7 +45,7 @@ def get_user_referral_info(chat_id: int) -> Dict[str, Any]:
     """
     try:
         # Try to get referral info from the CapitalX API first
-        api_response = api_get_user_referral_info(str(chat_id))
+        api_response = await get_async_api_client().get_user_referral_info(str(chat_id))
         
         if api_response["success"]:
             referral_data = api_response["data"]
@@ -409,7 +409,7 @@ def update_user_account(chat_id: int, account_id: int, account_name: Optional[st
             "message": "Failed to update account"
         }
 
-def get_user_balance_info(chat_id: int) -> Dict[str, Any]:
+async def get_user_balance_info(chat_id: int) -> Dict[str, Any]:
     """
     Get user's account balance information.
     
@@ -421,7 +421,7 @@ def get_user_balance_info(chat_id: int) -> Dict[str, Any]:
     """
     try:
         # Try to get balance info from the CapitalX API first
-        api_response = api_get_user_balance(str(chat_id))
+        api_response = await get_async_api_client().get_user_balance(str(chat_id))
         
         if api_response["success"]:
             balance_data = api_response["data"]
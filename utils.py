@@ -35,12 +35,18 @@ def truncate_text(text: str, max_length: int = 300) -> str:
         return text
     return text[:max_length] + "..."
 
-def format_search_results(results: List[tuple], query: str) -> str:
-    """Format search results for display."""
+def format_search_results(results: List[tuple], query: str, corrected_query: Optional[str] = None) -> str:
+    """Format search results for display, noting when a spelling correction was applied."""
     if not results:
         return f"🔍 No results found for '{query}'. Try different keywords or use the main menu for navigation."
     
-    response_parts = [f"🔍 **Search Results for '{query}':**\n"]
+    if corrected_query:
+        response_parts = [
+            f"🔍 **Search Results for '{corrected_query}':**",
+            f"_No matches for '{query}', showing results for '{corrected_query}' instead._\n"
+        ]
+    else:
+        response_parts = [f"🔍 **Search Results for '{query}':**\n"]
     
     for i, (title, category, content) in enumerate(results[:3], 1):
         truncated_content = truncate_text(content)
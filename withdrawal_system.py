@@ -8,7 +8,7 @@ from datetime import datetime
 from typing import Dict, List, Optional, Any
 
 # Import the CapitalX API client
-from capitalx_api import get_user_balance as api_get_user_balance, request_withdrawal as api_request_withdrawal, get_withdrawal_history as api_get_withdrawal_history
+from capitalx_api import get_async_api_client
 from database import get_db_connection, get_user_active_investments
 from user_management import get_user_balance_info
 
@@ -155,7 +155,7 @@ def update_withdrawal_settings(chat_id: int, auto_withdraw_enabled: Optional[boo
             "message": "Failed to update withdrawal settings"
         }
 
-def check_auto_withdrawal_eligibility(chat_id: int) -> Dict[str, Any]:
+async def check_auto_withdrawal_eligibility(chat_id: int) -> Dict[str, Any]:
     """
     Check if a user is eligible for auto-withdrawal based on their settings and investment performance.
     
@@ -181,7 +181,7 @@ def check_auto_withdrawal_eligibility(chat_id: int) -> Dict[str, Any]:
         threshold = settings.get("auto_withdraw_threshold", 100)
         
         # Get user's balance information
-        balance_info = get_user_balance_info(chat_id)
+        balance_info = await get_user_balance_info(chat_id)
         
         if balance_info["status"] == "error":
             return balance_info
@@ -211,7 +211,7 @@ def check_auto_withdrawal_eligibility(chat_id: int) -> Dict[str, Any]:
             "message": "Failed to check auto-withdrawal eligibility"
         }
 
-def request_withdrawal(chat_id: int, amount: Optional[float] = None) -> Dict[str, Any]:
+async def request_withdrawal(chat_id: int, amount: Optional[float] = None) -> Dict[str, Any]:
     """
     Request a withdrawal for a user.
     
@@ -224,7 +224,7 @@ def request_withdrawal(chat_id: int, amount: Optional[float] = None) -> Dict[str
     """
     try:
         # Get user's balance information
-        balance_info = get_user_balance_info(chat_id)
+        balance_info = await get_user_balance_info(chat_id)
         
         if balance_info["status"] == "error":
             return balance_info
@@ -255,7 +255,7 @@ def request_withdrawal(chat_id: int, amount: Optional[float] = None) -> Dict[str
         withdrawal_method = settings.get("withdrawal_method", "bank_transfer") if settings["status"] == "success" else "bank_transfer"
         
         # Try to request withdrawal through the CapitalX API
-        api_response = api_request_withdrawal(str(chat_id), withdrawal_amount)
+        api_response = await get_async_api_client().request_withdrawal(str(chat_id), withdrawal_amount)
         
         if api_response["success"]:
             withdrawal_data = api_response["data"]
@@ -324,7 +324,7 @@ def request_withdrawal(chat_id: int, amount: Optional[float] = None) -> Dict[str
             "message": "Failed to process withdrawal request"
         }
 
-def get_withdrawal_history(chat_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+async def get_withdrawal_history(chat_id: int, limit: int = 10) -> List[Dict[str, Any]]:
     """
     Get withdrawal history for a user.
     
@@ -337,7 +337,7 @@ def get_withdrawal_history(chat_id: int, limit: int = 10) -> List[Dict[str, Any]
     """
     try:
         # Try to get withdrawal history from the CapitalX API first
-        api_response = api_get_withdrawal_history(str(chat_id))
+        api_response = await get_async_api_client().get_withdrawal_history(str(chat_id))
         
         if api_response["success"]:
             # Return API data
@@ -383,92 +383,3 @@ def get_withdrawal_history(chat_id: int, limit: int = 10) -> List[Dict[str, Any]
         except Exception as db_error:
             logger.error(f"Error getting withdrawal history from database for user {chat_id}: {db_error}")
             return []
-
-# Import the CapitalX API client
-from capitalx_api import get_user_balance as api_get_user_balance, request_withdrawal as api_request_withdrawal, get_withdrawal_history as api_get_withdrawal_history
-from database import get_db_connection, get_user_active_investments
-from user_management import get_user_balance_info
-
-logger = logging.getLogger(__name__)
-
-class CapitalXAPI:
-    def __init__(self, base_url: str, api_key: str):
-        self.base_url = base_url
-        self.api_key = api_key
-
-    def _make_request(self, method: str, endpoint: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """
-        Make a request to the CapitalX API.
-        
-        Args:
-            method: HTTP method (GET, POST, etc.)
-            endpoint: API endpoint
-            data: Data to send with the request (for POST requests)
-            
-        Returns:
-            Dictionary with API response
-        """
-        import requests
-        
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        url = f"{self.base_url}{endpoint}"
-        
-        try:
-            if method == "GET":
-                response = requests.get(url, headers=headers)
-            elif method == "POST":
-                response = requests.post(url, headers=headers, json=data)
-            else:
-                return {
-                    "success": False,
-                    "error": "Unsupported HTTP method"
-                }
-            
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {
-                "success": False,
-                "error": str(e)
-            }
-
-    def get_user_balance(self, user_id: str) -> Dict[str, Any]:
-        """
-        Get user's balance.
-        
-        Args:
-            user_id: User identifier
-            
-        Returns:
-            Dictionary with user's balance
-        """
-        return self._make_request("GET", f"/api/users/{user_id}/balance")
-
-    def request_withdrawal(self, user_id: str, amount: float) -> Dict[str, Any]:
-        """
-        Request a withdrawal for a user.
-        
-        Args:
-            user_id: User identifier
-            amount: Amount to withdraw
-            
-        Returns:
-            Dictionary with withdrawal request status
-        """
-        return self._make_request("POST", f"/api/users/{user_id}/withdrawals", {"amount": amount})
-
-    def get_withdrawal_history(self, user_id: str) -> Dict[str, Any]:
-        """
-        Get user's withdrawal history.
-        
-        Args:
-            user_id: User identifier
-            
-        Returns:
-            Dictionary with withdrawal history
-        """
-        return self._make_request("GET", f"/api/users/{user_id}/withdrawals")